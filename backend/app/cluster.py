@@ -0,0 +1,57 @@
+"""
+在本機啟動 cluster：N 個 backend 節點 + 1 個 gateway。
+
+    python -m app.cluster --nodes 3 --port 8000
+
+節點使用 port+1 ... port+N，gateway 使用 port。節點沿用目前的環境變數 (USE_MOCK_DB 等)；
+檔案 / shared memory 類的設定會加上 .node{i} 後綴，避免節點之間共用同一份資料。
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+import uvicorn
+
+from app.gateway import create_gateway
+
+# 每個節點必須各自一份的設定
+PER_NODE_SETTINGS = ("SQLITE_DB_PATH", "MEMORY_JOURNAL_PATH", "MEMORY_SNAPSHOT_PATH", "SHARED_MEMORY_NAME")
+
+
+def node_environment(index: int) -> dict:
+    env = dict(os.environ)
+    env.pop("CLUSTER_NODES", None)
+    for key in PER_NODE_SETTINGS:
+        if env.get(key):
+            env[key] = f"{env[key]}.node{index}"
+    return env
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run several backend nodes behind a restaurant-sharded gateway")
+    parser.add_argument("--nodes", type=int, default=3)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    nodes, processes = [], []
+    for i in range(1, args.nodes + 1):
+        port = args.port + i
+        nodes.append(f"http://{args.host}:{port}")
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", args.host, "--port", str(port)],
+            env=node_environment(i)
+        ))
+    try:
+        uvicorn.run(create_gateway(nodes), host=args.host, port=args.port)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -29,3 +29,15 @@ class NotInQueueError(DomainError):
     def __init__(self, message: str = "User is not in queue."):
         super().__init__("NOT_IN_QUEUE", message)
 
+
+class ReadOnlyReplicaError(DomainError):
+    def __init__(self):
+        super().__init__("READ_ONLY_REPLICA", "This node is a read-only follower. Send writes to the leader.")
+
+class NotAFollowerError(DomainError):
+    def __init__(self):
+        super().__init__("NOT_A_FOLLOWER", "Only a follower can be promoted.")
+
+class NodeUnavailableError(DomainError):
+    def __init__(self):
+        super().__init__("NODE_UNAVAILABLE", "The node that owns this restaurant is unavailable.")
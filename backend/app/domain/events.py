@@ -0,0 +1,40 @@
+# app/domain/events.py
+from dataclasses import dataclass
+from typing import Callable, List
+
+# 會改變餐廳狀態的操作種類
+QUEUE_JOINED = "queue_joined"    # 使用者加入排隊
+QUEUE_LEFT = "queue_left"        # 使用者離開排隊
+TABLE_SEATED = "table_seated"    # 叫號入座 (同時影響排隊與座位)
+TABLE_CLEARED = "table_cleared"  # 離座 / 清桌
+
+
+@dataclass(frozen=True)
+class RestaurantChangedEvent:
+    """某間餐廳的排隊或座位發生變化"""
+    restaurant_id: int
+    kind: str
+
+    @property
+    def affects_queue(self) -> bool:
+        return self.kind in (QUEUE_JOINED, QUEUE_LEFT, TABLE_SEATED)
+
+    @property
+    def affects_tables(self) -> bool:
+        return self.kind in (TABLE_SEATED, TABLE_CLEARED)
+
+
+class RestaurantEventBus:
+    """
+    簡單的同步 Observer：Service 在寫入成功後 publish，
+    需要跟著更新的元件 (狀態投影、快取、推播...) 透過 subscribe 註冊。
+    """
+    def __init__(self):
+        self._handlers: List[Callable[[RestaurantChangedEvent], None]] = []
+
+    def subscribe(self, handler: Callable[[RestaurantChangedEvent], None]) -> None:
+        self._handlers.append(handler)
+
+    def publish(self, event: RestaurantChangedEvent) -> None:
+        for handler in list(self._handlers):
+            handler(event)
@@ -0,0 +1,307 @@
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import FastAPI, Query, Request, Response, WebSocket, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.domain.errors import NodeUnavailableError, NotInQueueError, QueueAlreadyJoinedError
+from app.services.hash_ring import ConsistentHashRing
+from app.services.locking import AsyncStripedLock
+from app.services.user_directory import UserDirectory
+
+# --- Cluster gateway ---
+# 每個節點是一個獨立的 backend (uvicorn app.main:app)，以一致性雜湊依 restaurant_id 分配餐廳：
+#   /api/restaurants/{id}/... 與 /api/restaurant/{id}/...   轉送給負責該餐廳的節點
+#   GET /api/restaurants、GET /api/restaurants/status       分送到所有節點，只取各自負責的餐廳合併
+#   /api/user/{user_id}/queue(/stream)                       依 user 目錄找到使用者排隊的餐廳再轉送
+# 「同一位使用者只能排一間餐廳」由 gateway 的 user 目錄檢查 (節點只看得到自己的餐廳)。
+# 只能啟動一個 gateway process：user 目錄放在 gateway 的記憶體中。
+
+# 不轉送的 hop-by-hop header
+_HOP_BY_HOP = {"connection", "keep-alive", "transfer-encoding", "upgrade", "te", "trailer",
+               "proxy-authenticate", "proxy-authorization", "host", "content-length"}
+
+
+def error_response(status_code: int, code: str, message: str):
+    """輔助函式：產生符合格式的錯誤回應"""
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": {
+                "code": code,
+                "message": message
+            }
+        }
+    )
+
+
+def _node_unavailable() -> JSONResponse:
+    error = NodeUnavailableError()
+    return error_response(status.HTTP_502_BAD_GATEWAY, error.code, error.message)
+
+
+class ClusterGateway:
+    def __init__(self, nodes: List[str], client: Optional[httpx.AsyncClient] = None, replicas: int = 64):
+        if not nodes:
+            raise ValueError("cluster gateway needs at least one node")
+        self.nodes = [node.rstrip("/") for node in nodes]
+        self.ring = ConsistentHashRing(self.nodes, replicas=replicas)
+        self.client = client or httpx.AsyncClient(timeout=10.0)
+        self.directory = UserDirectory()
+        # 同一位使用者的「查目錄 + 轉送加入 / 離開」要序列化
+        self.user_locks = AsyncStripedLock()
+        # GET /api/restaurants：每個節點上次的 (ETag, 餐廳列表)，以條件式 GET 重新整理
+        self._restaurant_lists: Dict[str, Tuple[Optional[str], list]] = {}
+        # GET /api/restaurants/status：合併後的燈號與 gateway 自己的版本
+        self._node_status_versions: Dict[str, int] = {}
+        self._statuses: Dict[int, str] = {}
+        self._status_changed_at: Dict[int, int] = {}
+        self._status_version = 0
+
+    def owner(self, restaurant_id: int) -> str:
+        return self.ring.node_for(restaurant_id)
+
+    async def forward(self, node: str, request: Request, body: Optional[bytes] = None) -> Response:
+        """把 Request 原樣轉送給節點，回應以串流方式傳回 (SSE 也適用)"""
+        headers = {key: value for key, value in request.headers.items() if key.lower() not in _HOP_BY_HOP}
+        upstream_request = self.client.build_request(
+            request.method, node + request.url.path,
+            params=request.query_params, headers=headers,
+            content=body if body is not None else await request.body(),
+            # SSE 連線會一直開著，讀取不設逾時
+            timeout=httpx.Timeout(10.0, read=None) if request.url.path.endswith("/stream") else self.client.timeout
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TransportError:
+            return _node_unavailable()
+        response_headers = {key: value for key, value in upstream.headers.items() if key.lower() not in _HOP_BY_HOP}
+        return StreamingResponse(
+            upstream.aiter_raw(), status_code=upstream.status_code, headers=response_headers,
+            background=BackgroundTask(upstream.aclose)
+        )
+
+    # --- 排隊：經過 user 目錄 ---
+    async def _still_queued(self, user_id: int, restaurant_id: int) -> bool:
+        """目錄中的紀錄是否仍然有效 (使用者可能已經入座)"""
+        response = await self.client.request("GET", f"{self.owner(restaurant_id)}/api/user/{user_id}/queue")
+        if response.status_code == status.HTTP_200_OK:
+            return response.json()["restaurant_id"] == restaurant_id
+        if response.status_code == status.HTTP_400_BAD_REQUEST:
+            return False
+        raise httpx.HTTPStatusError("unexpected status", request=response.request, response=response)
+
+    async def join_queue(self, restaurant_id: int, request: Request) -> Response:
+        body = await request.body()
+        try:
+            user_id = int(json.loads(body)["user_id"])
+        except (ValueError, KeyError, TypeError):
+            # 交給節點回傳與單機相同的 422
+            return await self.forward(self.owner(restaurant_id), request, body)
+        async with self.user_locks.for_key(user_id):
+            queued_at = self.directory.get(user_id)
+            if queued_at is not None:
+                try:
+                    still_queued = await self._still_queued(user_id, queued_at)
+                except (httpx.TransportError, httpx.HTTPStatusError):
+                    return _node_unavailable()
+                if still_queued:
+                    error = QueueAlreadyJoinedError()
+                    return error_response(status.HTTP_409_CONFLICT, error.code, error.message)
+                self.directory.discard(user_id, queued_at)
+            response = await self.forward(self.owner(restaurant_id), request, body)
+            if response.status_code == status.HTTP_201_CREATED:
+                self.directory.set(user_id, restaurant_id)
+            return response
+
+    async def leave_queue(self, restaurant_id: int, request: Request) -> Response:
+        body = await request.body()
+        try:
+            user_id = int(json.loads(body)["user_id"])
+        except (ValueError, KeyError, TypeError):
+            return await self.forward(self.owner(restaurant_id), request, body)
+        async with self.user_locks.for_key(user_id):
+            response = await self.forward(self.owner(restaurant_id), request, body)
+            if response.status_code in (status.HTTP_204_NO_CONTENT, status.HTTP_400_BAD_REQUEST):
+                self.directory.discard(user_id, restaurant_id)
+            return response
+
+    async def user_queue(self, user_id: int, request: Request) -> Response:
+        restaurant_id = self.directory.get(user_id)
+        if restaurant_id is None:
+            error = NotInQueueError()
+            return error_response(status.HTTP_400_BAD_REQUEST, error.code, error.message)
+        response = await self.forward(self.owner(restaurant_id), request)
+        if response.status_code == status.HTTP_400_BAD_REQUEST:
+            # 節點說不在排隊中：已經入座，清掉過期的紀錄
+            self.directory.discard(user_id, restaurant_id)
+        return response
+
+    # --- 分送到所有節點的查詢 ---
+    async def _fetch_restaurant_list(self, node: str) -> None:
+        etag, items = self._restaurant_lists.get(node, (None, []))
+        headers = {"If-None-Match": etag} if etag else {}
+        response = await self.client.request("GET", f"{node}/api/restaurants", headers=headers)
+        if response.status_code == status.HTTP_304_NOT_MODIFIED:
+            return
+        response.raise_for_status()
+        self._restaurant_lists[node] = (response.headers.get("etag"), response.json())
+
+    async def restaurants(self, request: Request) -> Response:
+        try:
+            await asyncio.gather(*(self._fetch_restaurant_list(node) for node in self.nodes))
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            return _node_unavailable()
+        # 每個節點都有全部餐廳的基本資料，燈號只有負責的節點是正確的
+        lists = {node: self._restaurant_lists[node] for node in self.nodes}
+        by_node = {node: {item["restaurant_id"]: item for item in items} for node, (_, items) in lists.items()}
+        merged = [by_node[self.owner(item["restaurant_id"])].get(item["restaurant_id"], item) for item in lists[self.nodes[0]][1]]
+        # 合併後的 ETag 由各節點的 ETag 組成：任何節點的燈號改變，ETag 就不同
+        fingerprint = "|".join(etag or hashlib.sha1(json.dumps(items).encode()).hexdigest() for etag, items in lists.values())
+        etag = f'"cluster-{hashlib.sha1(fingerprint.encode()).hexdigest()[:16]}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return JSONResponse(merged, headers={"ETag": etag})
+
+    async def _fetch_status_changes(self, node: str) -> Tuple[str, dict, bool]:
+        since_version = self._node_status_versions.get(node, 0)
+        response = await self.client.request("GET", f"{node}/api/restaurants/status", params={"since_version": since_version})
+        response.raise_for_status()
+        changes = response.json()
+        if changes["version"] < since_version:
+            # 節點重啟過，版本重新開始：重新取得全部燈號
+            response = await self.client.request("GET", f"{node}/api/restaurants/status", params={"since_version": 0})
+            response.raise_for_status()
+            return node, response.json(), True
+        return node, changes, False
+
+    async def status_changes(self, since_version: int) -> Response:
+        """
+        gateway 自己維護一個燈號版本：向各節點查詢「上次看到的版本之後」的變化，
+        只採用負責該餐廳的節點回報的燈號，有改變才推進 gateway 的版本。
+        """
+        try:
+            results = await asyncio.gather(*(self._fetch_status_changes(node) for node in self.nodes))
+        except (httpx.TransportError, httpx.HTTPStatusError):
+            return _node_unavailable()
+        for node, changes, restarted in results:
+            if restarted:
+                self._node_status_versions[node] = changes["version"]
+            else:
+                self._node_status_versions[node] = max(self._node_status_versions.get(node, 0), changes["version"])
+            for change in changes["changes"]:
+                restaurant_id = change["restaurant_id"]
+                if self.owner(restaurant_id) != node or self._statuses.get(restaurant_id) == change["status"]:
+                    continue
+                self._status_version += 1
+                self._statuses[restaurant_id] = change["status"]
+                self._status_changed_at[restaurant_id] = self._status_version
+        # gateway 重啟後前端帶來的版本可能比目前還大，視為重新取得全部
+        if since_version > self._status_version:
+            since_version = 0
+        return JSONResponse({
+            "version": self._status_version,
+            "changes": [
+                {"restaurant_id": restaurant_id, "status": self._statuses[restaurant_id]}
+                for restaurant_id, changed_at in self._status_changed_at.items() if changed_at > since_version
+            ]
+        })
+
+    # --- 店家看板 WebSocket ---
+    async def dashboard(self, websocket: WebSocket, restaurant_id: int) -> None:
+        from websockets.asyncio.client import connect
+        from websockets.exceptions import ConnectionClosed, WebSocketException
+
+        url = "ws" + self.owner(restaurant_id)[len("http"):] + websocket.url.path
+        try:
+            upstream = await connect(url)
+        except (OSError, WebSocketException):
+            await websocket.close(code=1011)
+            return
+        await websocket.accept()
+
+        async def client_to_node() -> None:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                await upstream.send(message.get("text") or message.get("bytes"))
+
+        async def node_to_client() -> None:
+            try:
+                async for message in upstream:
+                    if isinstance(message, str):
+                        await websocket.send_text(message)
+                    else:
+                        await websocket.send_bytes(message)
+            except ConnectionClosed:
+                pass
+            await websocket.close(code=upstream.close_code or 1000)
+
+        tasks = [asyncio.create_task(client_to_node()), asyncio.create_task(node_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await upstream.close()
+
+
+def create_gateway(nodes: List[str], client: Optional[httpx.AsyncClient] = None, replicas: int = 64) -> FastAPI:
+    gateway = ClusterGateway(nodes, client=client, replicas=replicas)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        yield
+        await gateway.client.aclose()
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.gateway = gateway
+    methods = ["GET", "POST", "PUT", "PATCH", "DELETE"]
+
+    @app.get("/")
+    async def root():
+        return {"message": "Gateway is running!", "nodes": gateway.nodes}
+
+    @app.get("/api/restaurants")
+    async def get_restaurants(request: Request):
+        return await gateway.restaurants(request)
+
+    @app.get("/api/restaurants/status")
+    async def get_restaurant_status_changes(since_version: int = Query(0, ge=0)):
+        return await gateway.status_changes(since_version)
+
+    @app.post("/api/restaurants/{restaurant_id}/queue")
+    async def join_queue(restaurant_id: int, request: Request):
+        return await gateway.join_queue(restaurant_id, request)
+
+    @app.delete("/api/restaurants/{restaurant_id}/queue")
+    async def leave_queue(restaurant_id: int, request: Request):
+        return await gateway.leave_queue(restaurant_id, request)
+
+    @app.websocket("/api/restaurants/{restaurant_id}/dashboard")
+    async def restaurant_dashboard(websocket: WebSocket, restaurant_id: int):
+        await gateway.dashboard(websocket, restaurant_id)
+
+    @app.api_route("/api/restaurants/{restaurant_id}/{rest:path}", methods=methods)
+    @app.api_route("/api/restaurant/{restaurant_id}/{rest:path}", methods=methods)
+    async def restaurant_scoped(restaurant_id: int, rest: str, request: Request):
+        return await gateway.forward(gateway.owner(restaurant_id), request)
+
+    @app.get("/api/user/{user_id}/queue")
+    @app.get("/api/user/{user_id}/queue/stream")
+    async def user_queue(user_id: int, request: Request):
+        return await gateway.user_queue(user_id, request)
+
+    return app
+
+
+# uvicorn app.gateway:app 使用：CLUSTER_NODES 為逗號分隔的節點網址，例如 http://127.0.0.1:8001,http://127.0.0.1:8002
+CLUSTER_NODES = [node for node in os.getenv("CLUSTER_NODES", "").split(",") if node]
+app = create_gateway(CLUSTER_NODES) if CLUSTER_NODES else None
@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional
 from app.domain.entities import MapEntity
-from app.schemas.map_schema import RestaurantItem
+from app.schemas.map_schema import RestaurantItem, RestaurantStatusChangesResponse
 
 class IMapService(ABC):
     @abstractmethod
@@ -12,6 +12,13 @@ class IMapService(ABC):
         """
         pass
 
+    @abstractmethod
+    def get_status_changes(self, since_version: int) -> RestaurantStatusChangesResponse:
+        """
+        取得燈號在 since_version 之後有改變的餐廳，以及目前的燈號版本
+        """
+        pass
+
 
 class IMapRepository(ABC):
     @abstractmethod
@@ -30,6 +37,31 @@ class IMapRepository(ABC):
         """
         pass
 
+# --- 非同步版本 (方法與同步介面一一對應) ---
+
+class IAsyncMapService(ABC):
+    @abstractmethod
+    async def get_restaurants(self) -> List[RestaurantItem]:
+        """同 IMapService.get_restaurants"""
+        pass
+
+    @abstractmethod
+    async def get_status_changes(self, since_version: int) -> RestaurantStatusChangesResponse:
+        """同 IMapService.get_status_changes"""
+        pass
+
+
+class IAsyncMapRepository(ABC):
+    @abstractmethod
+    async def get_restaurant_basic_info(self, restaurant_id: int) -> Optional[MapEntity]:
+        """同 IMapRepository.get_restaurant_basic_info"""
+        pass
+
+    @abstractmethod
+    async def get_all_restaurants(self) -> List[MapEntity]:
+        """同 IMapRepository.get_all_restaurants"""
+        pass
+
 """
 以下是Restaurant表格，可參考
 restaurant_id | restaurant_name | lat  | lng   | image_url                         | average_price | specialties
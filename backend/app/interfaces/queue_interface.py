@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Optional,Tuple
-from app.schemas.queue_schema import QueueStatusResponse,JoinQueueResponse, QueueNextResponse, UserQueueStatusResponse
+from typing import Dict, List, Optional,Tuple
+from app.schemas.queue_schema import QueueStatusResponse,JoinQueueResponse, QueueNextResponse, UserQueueStatusResponse, UserQueuePositionEvent
 from app.domain.entities import QueueEntity
 from app.domain.value_objects import RestaurantMetrics
 
@@ -46,6 +46,15 @@ class IQueueService(ABC):
             Raises:
                 NotInQueueError: 使用者不在排隊中
         """
+    @abstractmethod
+    def get_user_queue_position(self, user_id: int) -> UserQueuePositionEvent:
+        """
+            讓已經排隊的人取得排隊狀況與目前叫號 (SSE 推播使用)
+            Raises:
+                NotInQueueError: 使用者不在排隊中
+                RestaurantNotFoundError: 餐廳不存在
+        """
+        pass
 
 class IQueueRepository(ABC):
     @abstractmethod
@@ -58,7 +67,7 @@ class IQueueRepository(ABC):
                 VALUES (?, ?, ?);
 
             Returns:
-                bool: 成功加入排隊與否
+                bool: 成功加入排隊與否 (使用者已在排隊時違反 idx_queue_user_unique，回傳 False)
         """
         pass
 
@@ -124,6 +133,21 @@ class IQueueRepository(ABC):
         """
         pass
     @abstractmethod
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        """
+            一次取得多間餐廳的等待組數，避免逐間查詢 (N+1)。
+
+            SQL 指令:
+                SELECT restaurant_id, COUNT(*) AS total
+                FROM queue
+                WHERE restaurant_id IN (?, ?, ...)
+                GROUP BY restaurant_id;
+
+            Returns:
+                Dict[int, int]: restaurant_id -> 排隊中的總組數 (沒有人排隊的餐廳為 0)
+        """
+        pass
+    @abstractmethod
     def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
         """
             取得該餐廳排隊隊伍中下一個叫號。
@@ -147,37 +171,30 @@ class IQueueRepository(ABC):
         """
             取得特定使用者在該餐廳排隊隊伍中前面還有多少人。
             
-            前面的人數 = 該使用者在隊伍中的順位 (Row Number) 減去 1。
-            順位計算規則：根據 `restaurant_id` 分區，並按照 `ticket_number` 遞增排序。
+            前面的人數 = 同一間餐廳中 ticket_number 比該使用者小的組數。
+            (不使用 ROW_NUMBER() 視窗函數：那需要排序整張 queue 表，
+             改為兩次索引查詢，只掃描 queue(restaurant_id, ticket_number) 索引中的一段範圍)
 
             SQL 指令:
-                WITH UserRank AS (
-                    -- 1. 計算所有人在各自餐廳隊伍中的順序 (row_num)
-                    SELECT
-                        user_id,
-                        restaurant_id,
-                        ticket_number,
-                        ROW_NUMBER() OVER (
-                            PARTITION BY restaurant_id
-                            ORDER BY ticket_number ASC
-                        ) as row_num
-                    FROM
-                        queue
-                )
-                -- 2. 查詢特定使用者 (user_id = ?) 和餐廳 (restaurant_id = ?) 的順序，並計算前面人數
-                SELECT
-                    (row_num - 1) AS people_ahead
-                FROM
-                    UserRank
-                WHERE
-                    user_id = ? AND restaurant_id = ?;
-
-            若結果為空 (No rows returned)，表示該使用者不在該餐廳的排隊隊伍中。
-            
+                SELECT COUNT(*) AS people_ahead
+                FROM queue
+                WHERE restaurant_id = ?
+                  AND ticket_number < (
+                      -- 由 queue(user_id, restaurant_id, ticket_number) 覆蓋索引直接取得
+                      SELECT ticket_number
+                      FROM queue
+                      WHERE user_id = ? AND restaurant_id = ?
+                  );
+
+            索引:
+                CREATE UNIQUE INDEX idx_queue_restaurant_ticket ON queue(restaurant_id, ticket_number);
+                CREATE INDEX idx_queue_user ON queue(user_id, restaurant_id, ticket_number);
+                CREATE UNIQUE INDEX idx_queue_user_unique ON queue(user_id);  -- 查詢以 INDEXED BY 指定覆蓋索引
+
+            若使用者不在該餐廳的排隊隊伍中，子查詢為 NULL，結果為 0。
+
             Returns:
-                Optional[int]: 
-                    - 若使用者在隊伍中 → 回傳前面排隊的人數 (int >= 0)
-                    - 若使用者不在隊伍中 → 回傳 None (或空集/No rows returned)
+                int: 前面排隊的人數 (int >= 0)
         """
         pass
 """
@@ -232,6 +249,41 @@ class IQueueRuntimeRepository(ABC):
         """
         pass
     @abstractmethod
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        """
+        原子地取得下一張號碼牌並讓 next_ticket_number + 1
+        (取代 get_next_ticket_number + increment_next_ticket_number 兩步，避免同時加入時拿到相同號碼)
+        SQL指令:
+            UPDATE queue_runtime
+            SET next_ticket_number = next_ticket_number + 1
+            WHERE restaurant_id = ?
+            RETURNING next_ticket_number - 1 AS ticket_number;
+        """
+        pass
+    @abstractmethod
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        """
+        原子地預借一段連續的號碼 [start, end) 並讓 next_ticket_number + size，
+        之後由 worker 在本地發號，不必每次加入排隊都寫共用的計數器。
+        SQL指令:
+            UPDATE queue_runtime
+            SET next_ticket_number = next_ticket_number + :size
+            WHERE restaurant_id = ?
+            RETURNING next_ticket_number - :size AS start, next_ticket_number AS end;
+        """
+        pass
+    @abstractmethod
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        """
+        歸還預借後沒用完的號碼 [start, end)。只有這段號碼之後沒有再發出其他號碼
+        (next_ticket_number 仍等於 end) 時才能收回；否則這段號碼成為空號，回傳 False。
+        SQL指令:
+            UPDATE queue_runtime
+            SET next_ticket_number = :start
+            WHERE restaurant_id = ? AND next_ticket_number = :end;
+        """
+        pass
+    @abstractmethod
     def get_metrics(self, restaurant_id: int) -> RestaurantMetrics: #[average_wait_time, table_number]
         """
         取得平均等待時間及餐廳座位數
@@ -243,6 +295,19 @@ class IQueueRuntimeRepository(ABC):
             WHERE restaurant_id = ?;
         """
         pass
+    @abstractmethod
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        """
+        一次取得多間餐廳的平均等待時間及餐廳座位數
+        SQL指令:
+            SELECT
+                restaurant_id,
+                JSON_EXTRACT(metrics, '$[0]') AS average_wait_time,
+                JSON_EXTRACT(metrics, '$[1]') AS table_number
+            FROM queue_runtime
+            WHERE restaurant_id IN (?, ?, ...);
+        """
+        pass
 
 """
 以下是QueueRuntion表格，可參考
@@ -252,4 +317,100 @@ metrics 是 [average_wait_time, table_number]
 restaurant_id | current_ticket_number | next_ticket_number | metrics
 2             | 14             | 17                 | [8, 6]
 3             | 5              | 7                  | [10, 5]
-"""
\ No newline at end of file
+"""
+
+# --- 非同步版本 ---
+# 方法與上面的同步介面一一對應 (語意、例外、SQL 指令皆相同)，
+# 給 asyncpg / aiosqlite 等 I/O 型 Repository 使用，讓同一個 event loop 可同時等待多個查詢。
+
+class IAsyncQueueService(ABC):
+    @abstractmethod
+    async def join_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> JoinQueueResponse:
+        """同 IQueueService.join_restaurant_waiting_queue"""
+        pass
+    @abstractmethod
+    async def leave_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> None:
+        """同 IQueueService.leave_restaurant_waiting_queue"""
+        pass
+    @abstractmethod
+    async def get_queue_status(self, restaurant_id: int) -> QueueStatusResponse:
+        """同 IQueueService.get_queue_status"""
+        pass
+    @abstractmethod
+    async def get_queue_next(self, restaurant_id: int) -> QueueNextResponse:
+        """同 IQueueService.get_queue_next"""
+        pass
+    @abstractmethod
+    async def get_user_queue_status(self, user_id: int) -> UserQueueStatusResponse:
+        """同 IQueueService.get_user_queue_status"""
+        pass
+    @abstractmethod
+    async def get_user_queue_position(self, user_id: int) -> UserQueuePositionEvent:
+        """同 IQueueService.get_user_queue_position"""
+        pass
+
+
+class IAsyncQueueRepository(ABC):
+    @abstractmethod
+    async def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        """同 IQueueRepository.add_to_queue"""
+        pass
+    @abstractmethod
+    async def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        """同 IQueueRepository.remove_from_queue"""
+        pass
+    @abstractmethod
+    async def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        """同 IQueueRepository.get_user_current_queue"""
+        pass
+    @abstractmethod
+    async def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id:int, ticket_number: int) -> Optional[QueueEntity]:
+        """同 IQueueRepository.get_user_current_queue_by_restaurantId_and_ticketNumber"""
+        pass
+    @abstractmethod
+    async def get_total_waiting(self, restaurant_id: int) -> int:
+        """同 IQueueRepository.get_total_waiting"""
+        pass
+    @abstractmethod
+    async def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        """同 IQueueRepository.get_total_waiting_bulk"""
+        pass
+    @abstractmethod
+    async def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        """同 IQueueRepository.get_next_queue_to_call"""
+        pass
+    @abstractmethod
+    async def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        """同 IQueueRepository.get_people_ahead"""
+        pass
+
+
+class IAsyncQueueRuntimeRepository(ABC):
+    @abstractmethod
+    async def get_current_ticket_number(self, restaurant_id: int) -> int:
+        """同 IQueueRuntimeRepository.get_current_ticket_number"""
+        pass
+    @abstractmethod
+    async def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        """同 IQueueRuntimeRepository.set_current_ticket_number"""
+        pass
+    @abstractmethod
+    async def get_next_ticket_number(self, restaurant_id: int) -> int:
+        """同 IQueueRuntimeRepository.get_next_ticket_number"""
+        pass
+    @abstractmethod
+    async def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        """同 IQueueRuntimeRepository.increment_next_ticket_number"""
+        pass
+    @abstractmethod
+    async def allocate_ticket(self, restaurant_id: int) -> int:
+        """同 IQueueRuntimeRepository.allocate_ticket"""
+        pass
+    @abstractmethod
+    async def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        """同 IQueueRuntimeRepository.get_metrics"""
+        pass
+    @abstractmethod
+    async def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        """同 IQueueRuntimeRepository.get_metrics_bulk"""
+        pass
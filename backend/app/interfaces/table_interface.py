@@ -76,6 +76,63 @@ class ITableRepository(ABC):
     @abstractmethod
     def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
         pass
+    @abstractmethod
+    def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        """
+        一次取得多間餐廳的空桌數，避免逐間查詢 (N+1)。
+
+        SQL 指令:
+            SELECT restaurant_id, COUNT(*) AS remaining
+            FROM seat
+            WHERE restaurant_id IN (?, ?, ...)
+              AND status = 'empty'
+            GROUP BY restaurant_id;
+
+        Returns:
+            Dict[int, int]: restaurant_id -> 空桌數 (沒有空桌的餐廳為 0)
+        """
+        pass
+
+
+# --- 非同步版本 (方法與同步介面一一對應) ---
+
+class IAsyncTableService(ABC):
+    @abstractmethod
+    async def get_restaurant_seats(self, restaurant_id: int) -> RestaurantSeatsResponse:
+        """同 ITableService.get_restaurant_seats"""
+        pass
+
+    @abstractmethod
+    async def update_table_status(self, restaurant_id: int, table_id: int, new_table_status: str, queue_ticket_number: int) -> UpdateTableStatusResponse:
+        """同 ITableService.update_table_status"""
+        pass
+
+
+class IAsyncTableRepository(ABC):
+    @abstractmethod
+    async def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
+        """同 ITableRepository.get_tables_by_restaurant"""
+        pass
+
+    @abstractmethod
+    async def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
+        """同 ITableRepository.get_table_by_id"""
+        pass
+
+    @abstractmethod
+    async def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
+        """同 ITableRepository.update_status"""
+        pass
+
+    @abstractmethod
+    async def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
+        """同 ITableRepository.get_restaurant_remaining_table"""
+        pass
+
+    @abstractmethod
+    async def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        """同 ITableRepository.get_restaurant_remaining_table_bulk"""
+        pass
 """
 以下是Seat表格，可參考
 
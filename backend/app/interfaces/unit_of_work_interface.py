@@ -0,0 +1,54 @@
+from abc import ABC, abstractmethod
+from typing import AsyncContextManager, ContextManager
+
+
+class IUnitOfWork(ABC):
+    @abstractmethod
+    def begin(self) -> ContextManager[None]:
+        """
+        開始一個交易，with 區塊內所有 Repository 的寫入一起 commit 或一起 rollback：
+
+            with unit_of_work.begin():
+                queue_repo.remove_from_queue(...)
+                queue_runtime_repo.set_current_ticket_number(...)
+                table_repo.update_status(...)
+
+        區塊正常結束時 commit；拋出例外時 rollback，並把例外往外拋。
+        已經在交易中時加入外層的交易，由最外層決定 commit / rollback。
+        號碼牌 (allocate_ticket / lease_ticket_block) 與 SQL 的 sequence 相同，rollback 後不會收回。
+
+        SQL 指令:
+            BEGIN IMMEDIATE;
+            ...
+            COMMIT;    -- 例外時 ROLLBACK
+        """
+        pass
+
+    @abstractmethod
+    def savepoint(self) -> ContextManager[None]:
+        """
+        在目前的交易中建立 savepoint：區塊拋出例外時只復原區塊內的寫入，外層交易繼續；
+        區塊成功時寫入併入外層，由外層 commit。不在交易中時等同 begin()。
+
+        SQL 指令:
+            SAVEPOINT unit_of_work;
+            ...
+            RELEASE unit_of_work;    -- 例外時 ROLLBACK TO unit_of_work; RELEASE unit_of_work;
+        """
+        pass
+
+
+class IAsyncUnitOfWork(ABC):
+    @abstractmethod
+    def begin(self) -> AsyncContextManager[None]:
+        """
+        同 IUnitOfWork.begin，以 async with 使用
+        """
+        pass
+
+    @abstractmethod
+    def savepoint(self) -> AsyncContextManager[None]:
+        """
+        同 IUnitOfWork.savepoint，以 async with 使用
+        """
+        pass
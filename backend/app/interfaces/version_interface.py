@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+
+class IRestaurantVersionRepository(ABC):
+    """
+    多個 worker 共用的每間餐廳版本號，與資料在同一個交易 (或同一個鎖) 中遞增。
+    ETag 與排隊狀態回應快取在處理 Request 時讀取這裡的版本，其他 worker 的異動立即生效。
+    """
+    @abstractmethod
+    def get_epoch(self) -> str:
+        """
+        共用資料建立時產生的識別碼，所有 worker 相同；資料重建 (版本從 0 開始) 時改變。
+
+        SQL 指令:
+            SELECT value FROM db_info WHERE key = 'epoch';
+        """
+        pass
+
+    @abstractmethod
+    def get_versions(self, restaurant_id: int) -> Tuple[int, int]:
+        """
+        回傳 (排隊版本, 座位版本)：
+            排隊版本  加入 / 離開排隊、叫號改變時 + 1
+            座位版本  座位狀態改變時 + 1
+        尚未有任何異動的餐廳回傳 (0, 0)。
+
+        SQL 指令:
+            SELECT queue_version, table_version FROM restaurant_version WHERE restaurant_id = ?;
+        """
+        pass
+
+    @abstractmethod
+    def get_all_versions(self) -> Dict[int, Tuple[int, int]]:
+        """
+        所有有過異動的餐廳：restaurant_id -> (排隊版本, 座位版本)
+
+        SQL 指令:
+            SELECT restaurant_id, queue_version, table_version FROM restaurant_version;
+        """
+        pass
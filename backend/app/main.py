@@ -8,13 +8,17 @@ import os
 
 # Import Router 和原本的依賴定義
 # 注意：這裡使用 "from app..." 表示執行時的根目錄必須是 app 的上一層 (backend)
-from app.routers.queues import queue_router, get_queue_service
+from app.routers.queues import queue_router, get_queue_service, get_queue_notifier
 from app.routers.map import map_router, get_map_service
 from app.routers.table import table_router, get_table_service
+from app.routers.etag import get_resource_versions
+from app.routers.dashboard import dashboard_router, get_dashboard_notifier
+from app.routers.replication import replication_router, get_replication_node, ReadOnlyReplicaMiddleware
+from app.routers.metrics import metrics_router, get_group_committer, get_map_cache
 
 # Import 我們剛剛寫好的記憶體版 Service
 # 提醒：請確保您已建立 app/infrastructure 資料夾，並將 memory_adapters.py 放在其中
-from app.repositories.fake_all_repo import get_memory_queue_service, get_memory_map_service, get_memory_table_service
+from app.repositories.fake_all_repo import get_memory_async_queue_service, get_memory_async_map_service, get_memory_async_table_service, get_memory_resource_versions, get_memory_queue_notifier, get_memory_dashboard_notifier, get_memory_replication_node, get_memory_group_committer, get_memory_map_cache
 
 app = FastAPI(
     title="排隊系統 API (Dev Mode)",
@@ -27,41 +31,72 @@ _imgs_dir = os.path.join(os.path.dirname(__file__), "imgs")
 if os.path.isdir(_imgs_dir):
     app.mount("/imgs", StaticFiles(directory=_imgs_dir), name="imgs")
 
-origins = [
-    "http://localhost:5173",
-    "http://127.0.0.1:5173"
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins = origins,
-    allow_credentials = True,
-    allow_methods = ["*"],
-    allow_headers = ["*"],
-)
 # 註冊 Router
 app.include_router(queue_router, tags=["Queues"])
 app.include_router(map_router, tags=["Restaurants"])
 app.include_router(table_router, tags=["Tables"])
+app.include_router(dashboard_router, tags=["Dashboard"])
+app.include_router(replication_router, tags=["Replication"])
+app.include_router(metrics_router, tags=["Metrics"])
 
 # 您可以透過環境變數控制，或者在開發階段直接寫死
 USE_MOCK_DB = os.getenv("USE_MOCK_DB", "True").lower() == "true"
 
 if USE_MOCK_DB:
     print("⚠️  正在使用 In-Memory 模擬資料庫模式")
-    print("⚠️  所有排隊資料將儲存在 RAM 中，重啟後消失")
+    if os.getenv("SHARED_MEMORY_NAME"):
+        print(f"⚠️  資料放在 shared memory ({os.getenv('SHARED_MEMORY_NAME')})，所有 worker 共用，全部停止且刪除 segment 後消失")
+    elif os.getenv("MEMORY_JOURNAL_PATH"):
+        print(f"⚠️  異動寫入 journal ({os.getenv('MEMORY_JOURNAL_PATH')})，重啟後會重播恢復")
+    else:
+        print("⚠️  所有排隊資料將儲存在 RAM 中，重啟後消失")
     # 這行程式碼的作用跟 TestClient 的 override 一模一樣
     # 它告訴 FastAPI: 只要有人要 get_queue_service，就給他 get_memory_queue_service
-    app.dependency_overrides[get_queue_service] = get_memory_queue_service
-    app.dependency_overrides[get_map_service] = get_memory_map_service
-    app.dependency_overrides[get_table_service] = get_memory_table_service
+    # Router 皆為 async def，直接注入 async Service，不需要經過 thread pool
+    app.dependency_overrides[get_queue_service] = get_memory_async_queue_service
+    app.dependency_overrides[get_map_service] = get_memory_async_map_service
+    app.dependency_overrides[get_table_service] = get_memory_async_table_service
+    app.dependency_overrides[get_resource_versions] = get_memory_resource_versions
+    app.dependency_overrides[get_queue_notifier] = get_memory_queue_notifier
+    app.dependency_overrides[get_dashboard_notifier] = get_memory_dashboard_notifier
+    app.dependency_overrides[get_replication_node] = get_memory_replication_node
+    app.dependency_overrides[get_group_committer] = get_memory_group_committer
+    app.dependency_overrides[get_map_cache] = get_memory_map_cache
+    get_node = get_memory_replication_node
 else:
     print("[Mode] 使用 真實資料庫 (Production)")
-    # app.dependency_overrides[get_queue_service] = get_real_queue_service
-    # app.dependency_overrides[get_map_service] = get_real_map_service
-    pass 
-    # 注意：如果你在 Router 定義的 get_queue_service 預設就是拋出 Error，
-    # 那這裡的 else 必須要 override，否則程式會報錯 NotImplementedError。
+    # SQLite 資料庫 (路徑由 SQLITE_DB_PATH 指定)，第一次啟動時建立資料表與初始資料
+    from app.repositories.sqlite_all_repo import (
+        get_sqlite_queue_service, get_sqlite_map_service, get_sqlite_table_service,
+        get_sqlite_resource_versions, get_sqlite_queue_notifier, get_sqlite_dashboard_notifier,
+        get_sqlite_replication_node, get_sqlite_group_committer, get_sqlite_map_cache
+    )
+    app.dependency_overrides[get_queue_service] = get_sqlite_queue_service
+    app.dependency_overrides[get_map_service] = get_sqlite_map_service
+    app.dependency_overrides[get_table_service] = get_sqlite_table_service
+    app.dependency_overrides[get_resource_versions] = get_sqlite_resource_versions
+    app.dependency_overrides[get_queue_notifier] = get_sqlite_queue_notifier
+    app.dependency_overrides[get_dashboard_notifier] = get_sqlite_dashboard_notifier
+    app.dependency_overrides[get_replication_node] = get_sqlite_replication_node
+    app.dependency_overrides[get_group_committer] = get_sqlite_group_committer
+    app.dependency_overrides[get_map_cache] = get_sqlite_map_cache
+    get_node = get_sqlite_replication_node
+
+# follower 拒絕寫入；先加入的 middleware 在內層，CORS 最後加入，503 回應也會帶 CORS header
+app.add_middleware(ReadOnlyReplicaMiddleware, get_node=get_node)
+
+origins = [
+    "http://localhost:5173",
+    "http://127.0.0.1:5173"
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins = origins,
+    allow_credentials = True,
+    allow_methods = ["*"],
+    allow_headers = ["*"],
+)
 
 
 @app.get("/")
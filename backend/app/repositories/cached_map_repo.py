@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.interfaces.map_interface import IMapRepository
+from app.domain.entities import MapEntity
+
+
+class CachedMapRepository(IMapRepository):
+    """
+    餐廳基本資料的 read-through 快取：get_restaurant_basic_info 先查記憶體，沒有才問 inner 並放進快取。
+
+      - 最多保留 max_size 間餐廳，滿了淘汰最久沒讀取的 (LRU)
+      - 每筆快取 ttl 秒後過期，下一次讀取重新向 inner 查詢
+      - 不存在的餐廳 (inner 回傳 None) 也快取 negative_ttl 秒，亂填的 restaurant_id 不會每次都查資料庫
+      - 餐廳資料有修改時呼叫 invalidate / invalidate_all 清掉快取
+
+    get_all_restaurants 不快取，直接交給 inner。
+    """
+    def __init__(
+        self,
+        inner: IMapRepository,
+        max_size: int = 1024,
+        ttl: float = 60.0,
+        negative_ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.inner = inner
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.clock = clock
+        # restaurant_id -> (餐廳資料或 None, 過期時間)，順序為最近讀取的在最後
+        self._entries: "OrderedDict[int, Tuple[Optional[MapEntity], float]]" = OrderedDict()
+        # 每次清除快取就加一：查詢 inner 期間被清除過，查到的可能是舊資料，不放進快取
+        self._generation = 0
+        self._lock = threading.Lock()
+        # 統計
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_restaurant_basic_info(self, restaurant_id: int) -> Optional[MapEntity]:
+        with self._lock:
+            entry = self._entries.get(restaurant_id)
+            if entry is not None and entry[1] > self.clock():
+                self._entries.move_to_end(restaurant_id)
+                self._hits += 1
+                if entry[0] is None:
+                    self._negative_hits += 1
+                return entry[0]
+            self._misses += 1
+            generation = self._generation
+        # 查詢 inner 時不持有 _lock，其他餐廳的讀取不必等待
+        restaurant = self.inner.get_restaurant_basic_info(restaurant_id)
+        ttl = self.ttl if restaurant is not None else self.negative_ttl
+        with self._lock:
+            if generation == self._generation and ttl > 0:
+                self._entries[restaurant_id] = (restaurant, self.clock() + ttl)
+                self._entries.move_to_end(restaurant_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return restaurant
+
+    def get_all_restaurants(self) -> List[MapEntity]:
+        return self.inner.get_all_restaurants()
+
+    def invalidate(self, restaurant_id: int) -> None:
+        """餐廳資料有修改 (或新增了這個 restaurant_id) 時清掉它的快取"""
+        with self._lock:
+            self._entries.pop(restaurant_id, None)
+            self._generation += 1
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """命中 / 未命中次數 (未命中才會查詢 inner)"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
@@ -1,10 +1,24 @@
+import atexit
+import os
+import threading
+from array import array
+from functools import partial
 from typing import Optional, List, Dict, Tuple
-from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
-from app.interfaces.map_interface import IMapRepository
-from app.interfaces.table_interface import ITableRepository
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository, IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.interfaces.map_interface import IMapRepository, IAsyncMapRepository
+from app.interfaces.table_interface import ITableRepository, IAsyncTableRepository
 from app.domain.entities import MapEntity, QueueEntity, TableEntity
 from app.domain.value_objects import RestaurantMetrics
 from app.schemas.table_schema import RestaurantSeatsResponse, TableDetail
+from app.domain.events import RestaurantEventBus
+from app.services.status_projection import RestaurantStatusProjection
+from app.services.resource_versions import ResourceVersions
+from app.services.queue_notifier import QueueChangeNotifier
+from app.services.queue_response_cache import QueueResponseCache
+from app.services.unit_of_work import AsyncUnitOfWork, UnitOfWork, record_undo
+from app.services.locking import AsyncStripedLockAdapter
+from app.repositories.journal import TABLE_STATUS_CODES, TABLE_STATUS_NAMES
+from app.repositories.replication import ReplicationNode
 # --- 1. 模擬 Map Repository (餐廳資訊) ---
 class MemoryMapRepository(IMapRepository):
     def get_restaurant_basic_info(self, restaurant_id: int) -> Optional[MapEntity]:
@@ -73,79 +87,347 @@ class MemoryMapRepository(IMapRepository):
             )
         ]
 # --- 2. 模擬 Queue Repository (排隊資料) ---
+# _slots 中代表「此號碼已離開 / 入座」的 tombstone
+_EMPTY_ROW = -1
+
+
+class _RestaurantTicketQueue:
+    """
+    單一餐廳的排隊序列。
+
+    號碼牌是遞增發放的，所以以 ticket_number - base 當作位置，
+    用 append-only 的 _slots 保存該號碼在 MemoryQueueRepository 欄位中的 row：
+        - 離開 / 入座只把該位置設為 _EMPTY_ROW (tombstone)，不搬移其他資料
+        - _head 指向最小的有效號碼，叫號時才往後推進 (lazy)
+        - 前面的 tombstone 夠多時才一次壓縮 (compaction)，攤銷後為 O(1)
+    另外以 Fenwick Tree (Binary Indexed Tree) 記錄每個位置是否有人，
+    在 O(log n) 內回答「比我小的號碼還有幾張在排隊」，
+    等同於介面文件中 ROW_NUMBER() OVER (ORDER BY ticket_number) - 1。
+    _slots 與 _tree 都是 array('q')，每個位置固定 8 bytes。
+    """
+    # head 前面至少累積這麼多 tombstone，且佔一半以上才壓縮
+    _COMPACT_THRESHOLD = 64
+
+    def __init__(self, base: int):
+        # base: _slots[0] 對應的 ticket_number
+        self._base = base
+        self._slots = array('q')
+        # _tree[0] 不使用 (Fenwick Tree 為 1-based)，長度永遠是 len(_slots) + 1
+        self._tree = array('q', [0])
+        self._head = 0
+        self.count = 0
+
+    @classmethod
+    def restore(cls, base: int, head: int, count: int, slots: array, tree: array) -> "_RestaurantTicketQueue":
+        """由 snapshot 的內容直接還原，不重建 Fenwick Tree"""
+        restaurant_queue = cls(base)
+        restaurant_queue._head = head
+        restaurant_queue.count = count
+        restaurant_queue._slots = slots
+        restaurant_queue._tree = tree
+        return restaurant_queue
+
+    def _prefix(self, position: int) -> int:
+        """位置 1..position 的有效筆數"""
+        total = 0
+        while position > 0:
+            total += self._tree[position]
+            position -= position & -position
+        return total
+
+    def _update(self, position: int, delta: int) -> None:
+        while position < len(self._tree):
+            self._tree[position] += delta
+            position += position & -position
+
+    def _append_slot(self, row: int) -> None:
+        """在尾端新增一個位置，並以 O(log n) 補上對應的 Fenwick 節點"""
+        self._slots.append(row)
+        position = len(self._slots)
+        low = position - (position & -position)
+        # 新節點涵蓋 (low, position]
+        self._tree.append(self._prefix(position - 1) - self._prefix(low) + (row != _EMPTY_ROW))
+
+    def _rebuild(self) -> None:
+        """以 O(n) 從 _slots 重建 Fenwick Tree"""
+        tree = array('q', [0])
+        tree.extend(0 if row == _EMPTY_ROW else 1 for row in self._slots)
+        size = len(self._slots)
+        for position in range(1, size + 1):
+            parent = position + (position & -position)
+            if parent <= size:
+                tree[parent] += tree[position]
+        self._tree = tree
+
+    def _compact(self) -> None:
+        """丟掉 head 之前的 tombstone"""
+        if self.count == 0:
+            self._base += len(self._slots)
+            del self._slots[:]
+            self._tree = array('q', [0])
+        else:
+            self._base += self._head
+            del self._slots[:self._head]
+            self._rebuild()
+        self._head = 0
+
+    def insert(self, ticket_number: int, row: int) -> None:
+        offset = ticket_number - self._base
+        if offset < 0:
+            # 比 base 更小的號碼 (罕見情況)，在前面補空位後重建
+            self._slots[0:0] = array('q', [_EMPTY_ROW]) * -offset
+            self._base = ticket_number
+            self._head += -offset
+            offset = 0
+            self._rebuild()
+        if offset < len(self._slots):
+            self._slots[offset] = row
+            self._update(offset + 1, 1)
+        else:
+            while len(self._slots) < offset:
+                self._append_slot(_EMPTY_ROW)
+            self._append_slot(row)
+        if offset < self._head:
+            self._head = offset
+        self.count += 1
+
+    def get(self, ticket_number: int) -> int:
+        """回傳該號碼的 row，不存在時回傳 _EMPTY_ROW"""
+        offset = ticket_number - self._base
+        if 0 <= offset < len(self._slots):
+            return self._slots[offset]
+        return _EMPTY_ROW
+
+    def remove(self, ticket_number: int) -> None:
+        offset = ticket_number - self._base
+        self._slots[offset] = _EMPTY_ROW
+        self._update(offset + 1, -1)
+        self.count -= 1
+        if self.count == 0:
+            self._compact()
+
+    def first_ticket(self) -> Optional[int]:
+        """最小的有效號碼；head 只往後推進，不建立任何暫存 List"""
+        slots = self._slots
+        head = self._head
+        while head < len(slots) and slots[head] == _EMPTY_ROW:
+            head += 1
+        self._head = head
+        if head >= self._COMPACT_THRESHOLD and head * 2 >= len(slots):
+            self._compact()
+        if self.count == 0:
+            return None
+        return self._base + self._head
+
+    def count_before(self, ticket_number: int) -> int:
+        """ticket_number 小於指定號碼的排隊組數"""
+        position = min(ticket_number - self._base, len(self._slots))
+        if position <= 0:
+            return 0
+        return self._prefix(position)
+
+
 class MemoryQueueRepository(IQueueRepository):
+    """
+    以欄式 (columnar) 方式保存排隊資料：
+    queue_id / restaurant_id / user_id / ticket_number 各是一條 array('q')，
+    同一個 row 代表同一筆排隊資料，離開後的 row 會放進 _free_rows 重複使用。
+    只有在回傳給 Service 時才建立 QueueEntity。
+
+    實測 (tracemalloc, 100 萬筆、1000 間餐廳、user_id 皆 > 256)：
+    約 152 bytes / 筆，其中 user_id 索引 (dict + int 物件) 約佔 100 bytes，
+    欄位與排隊序列約 50 bytes；每筆一個 QueueEntity 加上兩個 dict 索引的做法約 435 bytes / 筆。
+    100 萬組排隊約需 150 MB RAM。
+    """
     def __init__(self):
-        # 使用 List 來模擬資料庫的 Table
-        self._queue_data: List[QueueEntity] = []
+        # 欄位資料，index 即為 row
+        self._queue_ids = array('q')
+        self._restaurant_ids = array('q')
+        self._user_ids = array('q')
+        self._ticket_numbers = array('q')
+        # 可重複使用的 row
+        self._free_rows = array('q')
+        # Key: user_id -> row (相當於 queue(user_id) 索引)
+        self._rows_by_user: Dict[int, int] = {}
+        # Key: restaurant_id -> 該餐廳的排隊序列 (相當於 queue(restaurant_id, ticket_number) 索引)
+        self._restaurant_queues: Dict[int, _RestaurantTicketQueue] = {}
         # 模擬 Auto Increment 的 Primary Key
         self._id_counter = 1
+        # 欄位、空閒 row 與排隊序列是多個 Request 共用的結構 (first_ticket 也會壓縮序列)，
+        # 以一把短暫持有的鎖保護，相當於 DB 的 row lock / latch
+        self._lock = threading.Lock()
+
+    def _to_entity(self, row: int) -> QueueEntity:
+        return QueueEntity(
+            queue_id=self._queue_ids[row],
+            restaurant_id=self._restaurant_ids[row],
+            user_id=self._user_ids[row],
+            ticket_number=self._ticket_numbers[row]
+        )
 
     def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
         """
         模擬 INSERT INTO queue ...
         """
-        new_entry = QueueEntity(
-            queue_id=self._id_counter,
-            restaurant_id=restaurant_id,
-            user_id=user_id,
-            ticket_number=ticket_number
-        )
-        self._queue_data.append(new_entry)
-        self._id_counter += 1
+        with self._lock:
+            added = self._insert_row(restaurant_id, user_id, ticket_number)
+        if added:
+            record_undo(partial(self.remove_from_queue, restaurant_id, user_id))
+        return added
+
+    def _restore_row(self, restaurant_id: int, user_id: int, ticket_number: int, queue_id: int) -> None:
+        """rollback 用：以原本的 queue_id 放回離開的排隊資料"""
+        with self._lock:
+            self._insert_row(restaurant_id, user_id, ticket_number, queue_id=queue_id)
+
+    def _insert_row(self, restaurant_id: int, user_id: int, ticket_number: int, queue_id: Optional[int] = None) -> bool:
+        """呼叫前須持有 _lock；queue_id 為 None 時配發新的 queue_id；使用者已在排隊時不寫入，回傳 False"""
+        # 同一位使用者只能有一筆，否則舊的那筆會留在排隊中卻再也移除不掉
+        if user_id in self._rows_by_user:
+            return False
+        new_id = queue_id is None
+        if new_id:
+            queue_id = self._id_counter
+        if self._free_rows:
+            row = self._free_rows.pop()
+            self._queue_ids[row] = queue_id
+            self._restaurant_ids[row] = restaurant_id
+            self._user_ids[row] = user_id
+            self._ticket_numbers[row] = ticket_number
+        else:
+            row = len(self._queue_ids)
+            self._queue_ids.append(queue_id)
+            self._restaurant_ids.append(restaurant_id)
+            self._user_ids.append(user_id)
+            self._ticket_numbers.append(ticket_number)
+        restaurant_queue = self._restaurant_queues.get(restaurant_id)
+        if restaurant_queue is None:
+            restaurant_queue = self._restaurant_queues[restaurant_id] = _RestaurantTicketQueue(base=ticket_number)
+        restaurant_queue.insert(ticket_number, row)
+        self._rows_by_user[user_id] = row
+        if new_id:
+            self._id_counter += 1
         return True
 
     def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
         """
         模擬 DELETE FROM queue WHERE ...
         """
-        original_count = len(self._queue_data)
-        # 過濾掉符合條件的項目 (相當於刪除)
-        self._queue_data = [
-            q for q in self._queue_data 
-            if not (q.restaurant_id == restaurant_id and q.user_id == user_id)
-        ]
-        # 如果長度有變少，代表刪除成功
-        return len(self._queue_data) < original_count
+        with self._lock:
+            row = self._rows_by_user.get(user_id)
+            if row is None or self._restaurant_ids[row] != restaurant_id:
+                return False
+            del self._rows_by_user[user_id]
+            ticket_number, queue_id = self._ticket_numbers[row], self._queue_ids[row]
+            self._restaurant_queues[restaurant_id].remove(ticket_number)
+            # 空閒 row 不保留 user_id，由 snapshot 還原時可以直接從欄位重建 user 索引
+            self._user_ids[row] = _EMPTY_ROW
+            self._free_rows.append(row)
+        record_undo(partial(self._restore_row, restaurant_id, user_id, ticket_number, queue_id))
+        return True
+
+    # 每間餐廳在 restaurant_meta 中的欄位數：restaurant_id, base, head, count, len(slots)
+    _META_WIDTH = 5
+
+    def export_state(self) -> Dict[str, array]:
+        """
+        snapshot 用：在鎖內整塊複製欄位與排隊序列 (array 切片即 memcpy)，鎖只持有很短的時間。
+        各餐廳的 _slots / _tree 依序接在一起，restaurant_meta 記錄每段的長度。
+        """
+        with self._lock:
+            meta, slots, tree = array('q'), array('q'), array('q')
+            for restaurant_id, restaurant_queue in self._restaurant_queues.items():
+                meta.extend((restaurant_id, restaurant_queue._base, restaurant_queue._head,
+                             restaurant_queue.count, len(restaurant_queue._slots)))
+                slots.extend(restaurant_queue._slots)
+                tree.extend(restaurant_queue._tree)
+            return {
+                "queue_ids": self._queue_ids[:],
+                "restaurant_ids": self._restaurant_ids[:],
+                "user_ids": self._user_ids[:],
+                "ticket_numbers": self._ticket_numbers[:],
+                "free_rows": self._free_rows[:],
+                "id_counter": array('q', [self._id_counter]),
+                "restaurant_meta": meta,
+                "slots": slots,
+                "tree": tree,
+            }
+
+    def import_state(self, state: Dict[str, array]) -> None:
+        """以 export_state() 的內容取代目前的資料"""
+        user_ids = state["user_ids"]
+        # user 索引是唯一需要逐筆建立的結構 (dict(zip(...)) 在 C 層完成)
+        rows_by_user = dict(zip(user_ids, range(len(user_ids))))
+        rows_by_user.pop(_EMPTY_ROW, None)
+        meta, slots, tree = state["restaurant_meta"], state["slots"], state["tree"]
+        restaurant_queues: Dict[int, _RestaurantTicketQueue] = {}
+        slot_offset = tree_offset = 0
+        for i in range(0, len(meta), self._META_WIDTH):
+            restaurant_id, base, head, count, size = meta[i:i + self._META_WIDTH]
+            restaurant_queues[restaurant_id] = _RestaurantTicketQueue.restore(
+                base, head, count,
+                slots[slot_offset:slot_offset + size],
+                tree[tree_offset:tree_offset + size + 1]
+            )
+            slot_offset += size
+            tree_offset += size + 1
+        with self._lock:
+            self._queue_ids = state["queue_ids"]
+            self._restaurant_ids = state["restaurant_ids"]
+            self._user_ids = user_ids
+            self._ticket_numbers = state["ticket_numbers"]
+            self._free_rows = state["free_rows"]
+            self._id_counter = state["id_counter"][0]
+            self._rows_by_user = rows_by_user
+            self._restaurant_queues = restaurant_queues
 
     def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
         """
         模擬 SELECT * FROM queue WHERE user_id = ?
         """
-        for q in self._queue_data:
-            if q.user_id == user_id:
-                return q
-        return None
+        with self._lock:
+            row = self._rows_by_user.get(user_id)
+            if row is None:
+                return None
+            return self._to_entity(row)
+
     def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
         """
         模擬 SELECT * FROM queue WHERE restaurant_id = ? AND ticket_number = ?
         """
-        for q in self._queue_data:
-            if q.restaurant_id == restaurant_id and q.ticket_number == ticket_number:
-                return q
-        return None
+        with self._lock:
+            restaurant_queue = self._restaurant_queues.get(restaurant_id)
+            if restaurant_queue is None:
+                return None
+            row = restaurant_queue.get(ticket_number)
+            if row == _EMPTY_ROW:
+                return None
+            return self._to_entity(row)
     
     def get_total_waiting(self, restaurant_id: int) -> int:
         """
         模擬 SELECT COUNT(*) ...
         """
-        count = 0
-        for q in self._queue_data:
-            if q.restaurant_id == restaurant_id:
-                count += 1
-        return count
+        restaurant_queue = self._restaurant_queues.get(restaurant_id)
+        if restaurant_queue is None:
+            return 0
+        return restaurant_queue.count
+
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        """
+        模擬 SELECT restaurant_id, COUNT(*) ... GROUP BY restaurant_id
+        """
+        return {restaurant_id: self.get_total_waiting(restaurant_id) for restaurant_id in restaurant_ids}
 
     def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
         """
         模擬 SELECT MIN(ticket_number) ...
         """
-        tickets = [
-            q.ticket_number 
-            for q in self._queue_data 
-            if q.restaurant_id == restaurant_id
-        ]
-        if not tickets:
-            return None
-        return min(tickets)
+        with self._lock:
+            restaurant_queue = self._restaurant_queues.get(restaurant_id)
+            if restaurant_queue is None:
+                return None
+            return restaurant_queue.first_ticket()
     def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
         """
         取得排在特定使用者前面的人數。
@@ -160,24 +442,16 @@ class MemoryQueueRepository(IQueueRepository):
                   WHERE restaurant_id = ? AND user_id = ?
               )
         """
-        # 1. 先找到該使用者的 ticket_number
-        target_ticket = None
-        for q in self._queue_data:
-            if q.restaurant_id == restaurant_id and q.user_id == user_id:
-                target_ticket = q.ticket_number
-                break
-        
-        # 如果使用者不在該餐廳的隊伍中，回傳 0 (或是您可以選擇拋出 NotInQueueError)
-        if target_ticket is None:
-            return 0
+        with self._lock:
+            # 1. 先找到該使用者的 ticket_number
+            row = self._rows_by_user.get(user_id)
 
-        # 2. 計算同一間餐廳中，ticket_number 小於 target_ticket 的人數
-        count = 0
-        for q in self._queue_data:
-            if q.restaurant_id == restaurant_id and q.ticket_number < target_ticket:
-                count += 1
-        
-        return count
+            # 如果使用者不在該餐廳的隊伍中，回傳 0 (或是您可以選擇拋出 NotInQueueError)
+            if row is None or self._restaurant_ids[row] != restaurant_id:
+                return 0
+
+            # 2. 計算同一間餐廳中，ticket_number 小於 target_ticket 的人數 (O(log n))
+            return self._restaurant_queues[restaurant_id].count_before(self._ticket_numbers[row])
 # --- 3. 模擬 Queue Runtime Repository (叫號狀態) ---
 class MemoryQueueRuntimeRepository(IQueueRuntimeRepository):
     def __init__(self):
@@ -201,15 +475,17 @@ class MemoryQueueRuntimeRepository(IQueueRuntimeRepository):
                 "metrics": RestaurantMetrics(average_wait_time=100, table_number=12)
             }
         }
+        # 保護 read-modify-write (號碼牌遞增、初始化預設值)
+        self._lock = threading.Lock()
 
     def _ensure_restaurant_exists(self, restaurant_id: int):
         """輔助函數：如果請求的餐廳不在記憶體中，初始化一組預設值"""
         if restaurant_id not in self._runtime_data:
-            self._runtime_data[restaurant_id] = {
+            self._runtime_data.setdefault(restaurant_id, {
                 "current_ticket_number": 0,
                 "next_ticket_number": 1,
                 "metrics": RestaurantMetrics(average_wait_time=15, table_number=4)
-            }
+            })
 
     def get_current_ticket_number(self, restaurant_id: int) -> int:
         self._ensure_restaurant_exists(restaurant_id)
@@ -217,7 +493,9 @@ class MemoryQueueRuntimeRepository(IQueueRuntimeRepository):
 
     def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
         self._ensure_restaurant_exists(restaurant_id)
-        self._runtime_data[restaurant_id]["current_ticket_number"] = ticket_number
+        runtime = self._runtime_data[restaurant_id]
+        record_undo(partial(self.set_current_ticket_number, restaurant_id, runtime["current_ticket_number"]))
+        runtime["current_ticket_number"] = ticket_number
 
     def get_next_ticket_number(self, restaurant_id: int) -> int:
         self._ensure_restaurant_exists(restaurant_id)
@@ -225,12 +503,71 @@ class MemoryQueueRuntimeRepository(IQueueRuntimeRepository):
 
     def increment_next_ticket_number(self, restaurant_id: int) -> None:
         self._ensure_restaurant_exists(restaurant_id)
-        self._runtime_data[restaurant_id]["next_ticket_number"] += 1
+        with self._lock:
+            self._runtime_data[restaurant_id]["next_ticket_number"] += 1
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        self._ensure_restaurant_exists(restaurant_id)
+        with self._lock:
+            runtime = self._runtime_data[restaurant_id]
+            ticket_number = runtime["next_ticket_number"]
+            runtime["next_ticket_number"] = ticket_number + 1
+        return ticket_number
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        self._ensure_restaurant_exists(restaurant_id)
+        with self._lock:
+            runtime = self._runtime_data[restaurant_id]
+            start = runtime["next_ticket_number"]
+            runtime["next_ticket_number"] = start + size
+        return start, start + size
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        self._ensure_restaurant_exists(restaurant_id)
+        with self._lock:
+            runtime = self._runtime_data[restaurant_id]
+            if runtime["next_ticket_number"] != end:
+                return False
+            runtime["next_ticket_number"] = start
+            return True
+
+    def advance_next_ticket_number(self, restaurant_id: int, next_ticket_number: int) -> None:
+        """重播 journal / 同步資料用：next_ticket_number 只會往前，不會發出重複的號碼"""
+        self._ensure_restaurant_exists(restaurant_id)
+        with self._lock:
+            runtime = self._runtime_data[restaurant_id]
+            runtime["next_ticket_number"] = max(runtime["next_ticket_number"], next_ticket_number)
 
     def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
         self._ensure_restaurant_exists(restaurant_id)
         return self._runtime_data[restaurant_id]["metrics"]
-    
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return {restaurant_id: self.get_metrics(restaurant_id) for restaurant_id in restaurant_ids}
+
+    def export_state(self) -> Dict[str, array]:
+        """snapshot 用：每間餐廳 5 個值 (restaurant_id, current, next, average_wait_time, table_number)"""
+        runtime = array('q')
+        with self._lock:
+            for restaurant_id, data in self._runtime_data.items():
+                metrics = data["metrics"]
+                runtime.extend((restaurant_id, data["current_ticket_number"], data["next_ticket_number"],
+                                metrics.average_wait_time, metrics.table_number))
+        return {"runtime": runtime}
+
+    def import_state(self, state: Dict[str, array]) -> None:
+        runtime = state["runtime"]
+        runtime_data = {}
+        for i in range(0, len(runtime), 5):
+            restaurant_id, current_ticket_number, next_ticket_number, average_wait_time, table_number = runtime[i:i + 5]
+            runtime_data[restaurant_id] = {
+                "current_ticket_number": current_ticket_number,
+                "next_ticket_number": next_ticket_number,
+                "metrics": RestaurantMetrics(average_wait_time=average_wait_time, table_number=table_number)
+            }
+        with self._lock:
+            self._runtime_data = runtime_data
+
 class MemoryTableRepository(ITableRepository):
     def __init__(self):
         # 模擬資料庫
@@ -265,19 +602,38 @@ class MemoryTableRepository(ITableRepository):
             311: TableEntity(table_id=311, restaurant_id=3, label="11桌", x=5, y=6, status="empty"),
             312: TableEntity(table_id=312, restaurant_id=3, label="12桌", x=7, y=6, status="empty"),
         }
+        self._tables_by_restaurant, self._empty_count = self._build_indexes(self._tables)
+        # 讀寫都持有：import_state 換上新資料時，不會讀到新的分區配上舊的空桌數
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_indexes(tables: Dict[int, TableEntity]) -> Tuple[Dict[int, Dict[int, TableEntity]], Dict[int, int]]:
+        # 依餐廳分區的索引 (相當於 seat(restaurant_id) 索引)
+        # Key: restaurant_id, Value: {table_id: TableEntity}，與 _tables 共用同一批物件
+        tables_by_restaurant: Dict[int, Dict[int, TableEntity]] = {}
+        # Key: restaurant_id, Value: 目前空桌數，由 update_status 維護
+        empty_count: Dict[int, int] = {}
+        for table in tables.values():
+            tables_by_restaurant.setdefault(table.restaurant_id, {})[table.table_id] = table
+            empty_count.setdefault(table.restaurant_id, 0)
+            if table.status == "empty":
+                empty_count[table.restaurant_id] += 1
+        return tables_by_restaurant, empty_count
 
     def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
         """
         取得特定餐廳的所有座位資訊。
         """
-        # 回傳 TableEntity 的列表
-        return [t for t in self._tables.values() if t.restaurant_id == restaurant_id]
+        # 回傳 TableEntity 的列表，只走訪該餐廳的桌子
+        with self._lock:
+            return list(self._tables_by_restaurant.get(restaurant_id, {}).values())
 
     def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
         """
         透過 ID 取得單一座位資訊。
         """
-        table = self._tables.get(table_id)
+        with self._lock:
+            table = self._tables.get(table_id)
         if table:
             # 回傳副本避免直接修改
             return TableEntity(
@@ -292,24 +648,321 @@ class MemoryTableRepository(ITableRepository):
 
     def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
         """
-        更新座位狀態。
+        更新座位狀態，同時維護該餐廳的空桌數。
         """
-        if table_id in self._tables:
-            self._tables[table_id].status = new_table_status
+        with self._lock:
+            table = self._tables.get(table_id)
+            if table is None:
+                return False
+            if table.status != new_table_status:
+                record_undo(partial(self.update_status, table_id, table.status, 0))
+                if table.status == "empty":
+                    self._empty_count[table.restaurant_id] -= 1
+                elif new_table_status == "empty":
+                    self._empty_count[table.restaurant_id] += 1
+                table.status = new_table_status
             return True
-        return False
     def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
-        count = 0
-        for table in self._tables.values():
-            if table.restaurant_id == restaurant_id and table.status == "empty":
-                count += 1
-        return count
+        with self._lock:
+            return self._empty_count.get(restaurant_id, 0)
+
+    def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        with self._lock:
+            return {restaurant_id: self._empty_count.get(restaurant_id, 0) for restaurant_id in restaurant_ids}
+
+    def export_state(self) -> Dict[str, object]:
+        """snapshot 用：每張桌子 5 個值 (table_id, restaurant_id, x, y, 狀態代碼)，label 另外放在字串表"""
+        tables, labels = array('q'), []
+        with self._lock:
+            current = list(self._tables.values())
+        for table in current:
+            tables.extend((table.table_id, table.restaurant_id, table.x, table.y, TABLE_STATUS_CODES[table.status]))
+            labels.append(table.label)
+        return {"tables": tables, "labels": labels}
+
+    def import_state(self, state: Dict[str, object]) -> None:
+        tables, labels = state["tables"], state["labels"]
+        # 先在本地建好全部結構，再持有 _lock 一次換上
+        new_tables: Dict[int, TableEntity] = {}
+        for i, label in enumerate(labels):
+            table_id, restaurant_id, x, y, status = tables[i * 5:i * 5 + 5]
+            new_tables[table_id] = TableEntity(
+                table_id=table_id, restaurant_id=restaurant_id, label=label, x=x, y=y, status=TABLE_STATUS_NAMES[status]
+            )
+        tables_by_restaurant, empty_count = self._build_indexes(new_tables)
+        with self._lock:
+            self._tables, self._tables_by_restaurant, self._empty_count = new_tables, tables_by_restaurant, empty_count
+# --- 3.5 非同步介面的記憶體實作 ---
+# 包住上面的同步 Repository，讓 async Service 使用同一份資料。
+# 所有操作都在記憶體內以 O(1) / O(log n) 完成，直接呼叫即可，不需要丟到 thread pool。
+class AsyncMemoryMapRepository(IAsyncMapRepository):
+    def __init__(self, repo: IMapRepository):
+        self._repo = repo
+
+    async def get_restaurant_basic_info(self, restaurant_id: int) -> Optional[MapEntity]:
+        return self._repo.get_restaurant_basic_info(restaurant_id)
+
+    async def get_all_restaurants(self) -> List[MapEntity]:
+        return self._repo.get_all_restaurants()
+
+
+class AsyncMemoryQueueRepository(IAsyncQueueRepository):
+    def __init__(self, repo: IQueueRepository):
+        self._repo = repo
+
+    async def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        return self._repo.add_to_queue(restaurant_id, user_id, ticket_number)
+
+    async def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        return self._repo.remove_from_queue(restaurant_id, user_id)
+
+    async def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        return self._repo.get_user_current_queue(user_id)
+
+    async def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
+        return self._repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id, ticket_number)
+
+    async def get_total_waiting(self, restaurant_id: int) -> int:
+        return self._repo.get_total_waiting(restaurant_id)
+
+    async def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return self._repo.get_total_waiting_bulk(restaurant_ids)
+
+    async def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        return self._repo.get_next_queue_to_call(restaurant_id)
+
+    async def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        return self._repo.get_people_ahead(restaurant_id, user_id)
+
+
+class AsyncMemoryQueueRuntimeRepository(IAsyncQueueRuntimeRepository):
+    def __init__(self, repo: IQueueRuntimeRepository):
+        self._repo = repo
+
+    async def get_current_ticket_number(self, restaurant_id: int) -> int:
+        return self._repo.get_current_ticket_number(restaurant_id)
+
+    async def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        self._repo.set_current_ticket_number(restaurant_id, ticket_number)
+
+    async def get_next_ticket_number(self, restaurant_id: int) -> int:
+        return self._repo.get_next_ticket_number(restaurant_id)
+
+    async def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        self._repo.increment_next_ticket_number(restaurant_id)
+
+    async def allocate_ticket(self, restaurant_id: int) -> int:
+        return self._repo.allocate_ticket(restaurant_id)
+
+    async def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        return self._repo.get_metrics(restaurant_id)
+
+    async def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return self._repo.get_metrics_bulk(restaurant_ids)
+
+
+class AsyncMemoryTableRepository(IAsyncTableRepository):
+    def __init__(self, repo: ITableRepository):
+        self._repo = repo
+
+    async def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
+        return self._repo.get_tables_by_restaurant(restaurant_id)
+
+    async def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
+        return self._repo.get_table_by_id(table_id)
+
+    async def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
+        return self._repo.update_status(table_id, new_table_status, queue_ticket_number)
+
+    async def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
+        return self._repo.get_restaurant_remaining_table(restaurant_id)
+
+    async def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return self._repo.get_restaurant_remaining_table_bulk(restaurant_ids)
 # --- 4. 組合包：產生 Fake Service 的工廠函數 ---
 # 這些變數放在全域，確保所有 Request 共用同一份記憶體資料
 _mock_map_repo = MemoryMapRepository()
 _mock_queue_repo = MemoryQueueRepository()
 _mock_runtime_repo = MemoryQueueRuntimeRepository()
 _mock_table_repo = MemoryTableRepository()
+# 設定 SHARED_MEMORY_NAME 時，排隊、叫號與座位資料改放在具名的 shared memory segment，
+# uvicorn --workers N 的每個 worker 都讀寫同一份資料 (第一個啟動的 worker 以上面的預設資料建立)
+SHARED_MEMORY_NAME = os.getenv("SHARED_MEMORY_NAME")
+SHARED_MEMORY_POLL_MS = int(os.getenv("SHARED_MEMORY_POLL_MS", "50"))
+_shared_state = None
+# 所有 worker 共用的每間餐廳版本號 (ETag 與排隊狀態回應快取在處理 Request 時讀取)
+_shared_version_repo = None
+if SHARED_MEMORY_NAME:
+    # journal / snapshot / 複寫都假設只有一個 process 寫入資料
+    if any(os.getenv(key) for key in ("MEMORY_JOURNAL_PATH", "MEMORY_SNAPSHOT_PATH", "REPLICATION_LISTEN", "REPLICATION_LEADER")):
+        raise ValueError("SHARED_MEMORY_NAME cannot be combined with the journal, snapshot or replication settings")
+    from app.repositories.shared_memory_repo import (
+        SharedQueueState, SharedMemoryQueueRepository, SharedMemoryQueueRuntimeRepository, SharedMemoryTableRepository,
+        SharedMemoryRestaurantVersionRepository
+    )
+    _shared_state = SharedQueueState.open(
+        SHARED_MEMORY_NAME,
+        queue_capacity=int(os.getenv("SHARED_MEMORY_QUEUE_CAPACITY", "100000")),
+        restaurant_capacity=int(os.getenv("SHARED_MEMORY_RESTAURANT_CAPACITY", "256")),
+        ticket_window=int(os.getenv("SHARED_MEMORY_TICKET_WINDOW", "4096")),
+        table_capacity=int(os.getenv("SHARED_MEMORY_TABLE_CAPACITY", "4096")),
+        seed={**_mock_runtime_repo.export_state(), **_mock_table_repo.export_state()}
+    )
+    atexit.register(_shared_state.close)
+    _mock_queue_repo = SharedMemoryQueueRepository(_shared_state)
+    _mock_runtime_repo = SharedMemoryQueueRuntimeRepository(_shared_state)
+    _mock_table_repo = SharedMemoryTableRepository(_shared_state)
+    _shared_version_repo = SharedMemoryRestaurantVersionRepository(_shared_state)
+# Service 的「檢查 + 寫入」鎖；shared memory 模式下要跨 worker 互斥 (None 時使用 process 內的 StripedLock)
+_mock_restaurant_locks = _shared_state.restaurant_locks if _shared_state else None
+_mock_user_locks = _shared_state.user_locks if _shared_state else None
+# async Service (main.py 實際使用的) 也要使用跨 process 的鎖
+_mock_async_restaurant_locks = AsyncStripedLockAdapter(_mock_restaurant_locks) if _shared_state else None
+_mock_async_user_locks = AsyncStripedLockAdapter(_mock_user_locks) if _shared_state else None
+# 內層的記憶體 Repository (snapshot、複寫直接讀寫這三個，不經過 Journaled* 裝飾器)
+_memory_queue_repo, _memory_runtime_repo, _memory_table_repo = _mock_queue_repo, _mock_runtime_repo, _mock_table_repo
+# 設定 MEMORY_JOURNAL_PATH 時，記憶體資料的異動會寫入 append-only journal，重新啟動時重播恢復
+# (只能有一個 process 寫同一個 journal，例如 uvicorn 不可開多個 worker)
+MEMORY_JOURNAL_PATH = os.getenv("MEMORY_JOURNAL_PATH")
+MEMORY_JOURNAL_FSYNC_MS = int(os.getenv("MEMORY_JOURNAL_FSYNC_MS", "10"))
+# 設定 MEMORY_SNAPSHOT_PATH 時，定期把記憶體資料寫成二進位 snapshot；
+# 啟動時先載入 snapshot，journal 只需要重播 snapshot 之後的紀錄
+MEMORY_SNAPSHOT_PATH = os.getenv("MEMORY_SNAPSHOT_PATH")
+MEMORY_SNAPSHOT_INTERVAL_S = float(os.getenv("MEMORY_SNAPSHOT_INTERVAL_S", "60"))
+_mock_journal = None
+_mock_snapshotter = None
+_journal_start = 0
+if MEMORY_SNAPSHOT_PATH and os.path.exists(MEMORY_SNAPSHOT_PATH):
+    from app.repositories.snapshot import load_memory_snapshot
+    _journal_start = load_memory_snapshot(MEMORY_SNAPSHOT_PATH, _memory_queue_repo, _memory_runtime_repo, _memory_table_repo)
+if MEMORY_JOURNAL_PATH:
+    from app.repositories.journal import Journal, read_journal
+    # 先把既有紀錄重播到記憶體資料，再開啟 journal 接續寫入
+    from app.repositories.journaled_repo import replay_journal
+    replay_journal(read_journal(MEMORY_JOURNAL_PATH, start=_journal_start)[0], _memory_queue_repo, _memory_runtime_repo, _memory_table_repo)
+    _mock_journal = Journal(MEMORY_JOURNAL_PATH, fsync_interval=MEMORY_JOURNAL_FSYNC_MS / 1000, start_sequence=_journal_start)
+    atexit.register(_mock_journal.close)
+if MEMORY_SNAPSHOT_PATH:
+    from app.repositories.snapshot import PeriodicSnapshotter
+    # atexit 為後進先出，會在關閉 journal 之前寫最後一次
+    _mock_snapshotter = PeriodicSnapshotter(
+        MEMORY_SNAPSHOT_PATH, _memory_queue_repo, _memory_runtime_repo, _memory_table_repo,
+        interval=MEMORY_SNAPSHOT_INTERVAL_S, journal=_mock_journal
+    )
+    _mock_snapshotter.start()
+    atexit.register(_mock_snapshotter.stop)
+# 複寫：REPLICATION_LISTEN (host:port) 接受 follower 連線並把異動串流過去；
+# REPLICATION_LEADER (host:port) 以 follower 身分啟動，只提供讀取，promote 後才使用 REPLICATION_LISTEN
+REPLICATION_LISTEN = os.getenv("REPLICATION_LISTEN")
+REPLICATION_LEADER = os.getenv("REPLICATION_LEADER")
+_replication_leader = None
+if REPLICATION_LISTEN:
+    from app.repositories.replication import ReplicationLeader, parse_address
+    _listen_host, _listen_port = parse_address(REPLICATION_LISTEN)
+    _replication_leader = ReplicationLeader(
+        _memory_queue_repo, _memory_runtime_repo, _memory_table_repo, host=_listen_host, port=_listen_port
+    )
+# 異動紀錄的寫入端：磁碟 journal 與 / 或複寫
+_journal_targets = [target for target in (_mock_journal, _replication_leader) if target is not None]
+if _journal_targets:
+    from app.repositories.journal import JournalFanout
+    from app.repositories.journaled_repo import (
+        JournaledQueueRepository, JournaledQueueRuntimeRepository, JournaledTableRepository
+    )
+    _journal_sink = _journal_targets[0] if len(_journal_targets) == 1 else JournalFanout(*_journal_targets)
+    _mock_queue_repo = JournaledQueueRepository(_mock_queue_repo, _journal_sink)
+    _mock_runtime_repo = JournaledQueueRuntimeRepository(_mock_runtime_repo, _journal_sink)
+    _mock_table_repo = JournaledTableRepository(_mock_table_repo, _journal_sink)
+# 叫號計數器 write-behind (與 SQLite 模式相同)：號碼牌的 journal 紀錄一次預借一段，
+# 交易外延後寫回的叫號立即寫入 journal，重播時恢復
+RUNTIME_WRITE_BEHIND_MS = float(os.getenv("RUNTIME_WRITE_BEHIND_MS", "0"))
+RUNTIME_WRITE_BEHIND_RESERVE = int(os.getenv("RUNTIME_WRITE_BEHIND_RESERVE", "64"))
+if RUNTIME_WRITE_BEHIND_MS > 0:
+    # 快取在 process 內；snapshot 直接讀內層資料，會漏掉尚未寫回、但已在 journal 中被涵蓋的叫號
+    # follower 的複寫直接寫入內層資料，快取會看不到
+    if _shared_state is not None or MEMORY_SNAPSHOT_PATH or REPLICATION_LEADER:
+        raise ValueError("RUNTIME_WRITE_BEHIND_MS cannot be combined with SHARED_MEMORY_NAME, MEMORY_SNAPSHOT_PATH or REPLICATION_LEADER")
+    from app.repositories.write_behind_repo import WriteBehindQueueRuntimeRepository
+    _mock_runtime_repo = WriteBehindQueueRuntimeRepository(
+        _mock_runtime_repo,
+        flush_interval=RUNTIME_WRITE_BEHIND_MS / 1000,
+        ticket_reserve=RUNTIME_WRITE_BEHIND_RESERVE,
+        journal=_journal_sink if _journal_targets else None
+    )
+    _mock_runtime_repo.start()
+    # atexit 為後進先出，會在關閉 journal 之前寫回
+    atexit.register(_mock_runtime_repo.close)
+# 號碼牌預借：每個 worker 一次預借一段號碼在本地發號 (多 worker 共用 shared memory 時減少搶同一個計數器)
+TICKET_LEASE_BLOCK = int(os.getenv("TICKET_LEASE_BLOCK", "0"))
+TICKET_LEASE_TTL_MS = int(os.getenv("TICKET_LEASE_TTL_MS", "1000"))
+if TICKET_LEASE_BLOCK > 0:
+    from app.repositories.leased_ticket_repo import LeasedTicketRuntimeRepository
+    _mock_runtime_repo = LeasedTicketRuntimeRepository(
+        _mock_runtime_repo, block_size=TICKET_LEASE_BLOCK, lease_ttl=TICKET_LEASE_TTL_MS / 1000
+    )
+    atexit.register(_mock_runtime_repo.release_all)
+# 排隊 / 座位變動時，透過 event bus 增量更新地圖燈號
+_mock_event_bus = RestaurantEventBus()
+_mock_status_projection = RestaurantStatusProjection(
+    queue_repo=_mock_queue_repo,
+    table_repo=_mock_table_repo,
+    queue_runtime_repo=_mock_runtime_repo
+)
+_mock_event_bus.subscribe(_mock_status_projection.handle)
+# 條件式 GET (ETag) 使用的資源版本；shared memory 模式下排隊 / 座位直接讀取共用的版本，不必等 change watcher
+_mock_resource_versions = ResourceVersions(status_projection=_mock_status_projection, version_repo=_shared_version_repo)
+_mock_event_bus.subscribe(_mock_resource_versions.handle)
+
+def get_memory_resource_versions():
+    return _mock_resource_versions
+
+# 排隊狀態 / 下一號的回應快取，餐廳有異動時版本前進 (shared memory 模式下以共用的排隊版本為準)
+_mock_queue_response_cache = QueueResponseCache(version_repo=_shared_version_repo)
+_mock_event_bus.subscribe(_mock_queue_response_cache.handle)
+
+# SSE 推播排隊位置使用的通知器
+_mock_queue_notifier = QueueChangeNotifier()
+_mock_event_bus.subscribe(_mock_queue_notifier.handle)
+
+def get_memory_queue_notifier():
+    return _mock_queue_notifier
+
+# 店家看板 WebSocket 使用的通知器 (排隊與座位變化都要推播)
+_mock_dashboard_notifier = QueueChangeNotifier(watch_tables=True)
+_mock_event_bus.subscribe(_mock_dashboard_notifier.handle)
+
+def get_memory_dashboard_notifier():
+    return _mock_dashboard_notifier
+
+# 複寫角色；follower 套用 leader 的異動後透過 event bus 更新燈號、ETag 與推播，所以在訂閱完成後才啟動
+_replication_follower = None
+if REPLICATION_LEADER:
+    from app.repositories.replication import ReplicationFollower, parse_address
+    _replication_follower = ReplicationFollower(
+        parse_address(REPLICATION_LEADER), _memory_queue_repo, _memory_runtime_repo, _memory_table_repo,
+        event_bus=_mock_event_bus
+    )
+_mock_replication_node = ReplicationNode(leader=_replication_leader, follower=_replication_follower)
+_mock_replication_node.start()
+atexit.register(_mock_replication_node.stop)
+
+def get_memory_replication_node():
+    return _mock_replication_node
+
+# 記憶體模式沒有 commit 成本，不使用 group commit
+def get_memory_group_committer():
+    return None
+
+# 記憶體模式的餐廳資料本來就在記憶體，不需要快取
+def get_memory_map_cache():
+    return None
+
+# shared memory 模式：其他 worker 的異動也要更新本 worker 的燈號、ETag 與推播
+if _shared_state is not None:
+    from app.repositories.shared_memory_repo import SharedMemoryChangeWatcher
+    _shared_watcher = SharedMemoryChangeWatcher(_shared_state, _mock_event_bus, interval=SHARED_MEMORY_POLL_MS / 1000)
+    _shared_watcher.start()
+    atexit.register(_shared_watcher.stop)
 
 def get_memory_queue_service():
     """
@@ -319,7 +972,11 @@ def get_memory_queue_service():
     return QueueService(
         queue_repo=_mock_queue_repo,
         queue_runtime_repo=_mock_runtime_repo,
-        map_repo=_mock_map_repo
+        map_repo=_mock_map_repo,
+        event_bus=_mock_event_bus,
+        restaurant_locks=_mock_restaurant_locks,
+        user_locks=_mock_user_locks,
+        response_cache=_mock_queue_response_cache
     )
 def get_memory_map_service():
     from app.services.map_service import MapService
@@ -330,7 +987,8 @@ def get_memory_map_service():
         map_repo=_mock_map_repo,
         table_repo=_mock_table_repo,
         queue_repo=_mock_queue_repo,
-        queue_runtime_repo=_mock_runtime_repo
+        queue_runtime_repo=_mock_runtime_repo,
+        status_projection=_mock_status_projection
     )
 
 def get_memory_table_service():
@@ -339,5 +997,46 @@ def get_memory_table_service():
         table_repo=_mock_table_repo, 
         map_repo=_mock_map_repo, 
         queue_repo=_mock_queue_repo, 
-        queue_runtime_repo=_mock_runtime_repo
-    )
\ No newline at end of file
+        queue_runtime_repo=_mock_runtime_repo,
+        event_bus=_mock_event_bus,
+        restaurant_locks=_mock_restaurant_locks
+    )
+
+# async 版本的 Repository 包住同一份記憶體資料
+_mock_async_map_repo = AsyncMemoryMapRepository(_mock_map_repo)
+_mock_async_queue_repo = AsyncMemoryQueueRepository(_mock_queue_repo)
+_mock_async_runtime_repo = AsyncMemoryQueueRuntimeRepository(_mock_runtime_repo)
+_mock_async_table_repo = AsyncMemoryTableRepository(_mock_table_repo)
+
+def get_memory_async_queue_service():
+    from app.services.async_queue_service import AsyncQueueService
+    return AsyncQueueService(
+        queue_repo=_mock_async_queue_repo,
+        queue_runtime_repo=_mock_async_runtime_repo,
+        map_repo=_mock_async_map_repo,
+        event_bus=_mock_event_bus,
+        restaurant_locks=_mock_async_restaurant_locks,
+        user_locks=_mock_async_user_locks,
+        response_cache=_mock_queue_response_cache
+    )
+
+def get_memory_async_map_service():
+    from app.services.async_map_service import AsyncMapService
+    return AsyncMapService(
+        map_repo=_mock_async_map_repo,
+        table_repo=_mock_async_table_repo,
+        queue_repo=_mock_async_queue_repo,
+        queue_runtime_repo=_mock_async_runtime_repo,
+        status_projection=_mock_status_projection
+    )
+
+def get_memory_async_table_service():
+    from app.services.async_table_service import AsyncTableService
+    return AsyncTableService(
+        table_repo=_mock_async_table_repo,
+        map_repo=_mock_async_map_repo,
+        queue_repo=_mock_async_queue_repo,
+        queue_runtime_repo=_mock_async_runtime_repo,
+        event_bus=_mock_event_bus,
+        restaurant_locks=_mock_async_restaurant_locks
+    )
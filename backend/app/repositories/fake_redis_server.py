@@ -0,0 +1,371 @@
+import bisect
+import socket
+import socketserver
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# --- 測試 / 開發用的本機 RESP server ---
+# 只實作排隊 Repository 用到的 Redis 指令子集，讓 RedisQueueRepository 不需要真的 Redis 也能測試。
+# 與 Redis 相同，所有指令依序 (一次一個) 執行；MULTI / EXEC 之間的指令一次原子地執行。
+
+
+class _CommandError(Exception):
+    pass
+
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+
+class _SortedSet:
+    """member -> score 以及依 (score, member) 排序的列表，ZRANK 以二分搜尋取得"""
+    def __init__(self):
+        self.scores: Dict[bytes, float] = {}
+        self.entries: List[Tuple[float, bytes]] = []
+
+    def add(self, score: float, member: bytes) -> int:
+        old = self.scores.get(member)
+        if old is not None:
+            self.entries.pop(bisect.bisect_left(self.entries, (old, member)))
+        self.scores[member] = score
+        bisect.insort(self.entries, (score, member))
+        return 0 if old is not None else 1
+
+    def remove(self, member: bytes) -> int:
+        score = self.scores.pop(member, None)
+        if score is None:
+            return 0
+        self.entries.pop(bisect.bisect_left(self.entries, (score, member)))
+        return 1
+
+    def rank(self, member: bytes) -> Optional[int]:
+        score = self.scores.get(member)
+        if score is None:
+            return None
+        return bisect.bisect_left(self.entries, (score, member))
+
+
+def _format_score(score: float) -> bytes:
+    return str(int(score) if score == int(score) else score).encode()
+
+
+def _to_int(value: bytes) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise _CommandError("ERR value is not an integer or out of range")
+
+
+class FakeRedisStore:
+    """資料與指令實作 (strings / hashes / sorted sets)"""
+    def __init__(self):
+        self.data: Dict[bytes, Any] = {}
+        # 每個 key 被修改的次數，WATCH 用來判斷交易是否需要取消
+        self.versions: Dict[bytes, int] = {}
+        self.lock = threading.Lock()
+
+    def _touch(self, key: bytes) -> None:
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def _get(self, key: bytes, kind: type) -> Any:
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            raise _CommandError(WRONGTYPE)
+        return value
+
+    def execute(self, args: List[bytes]) -> Any:
+        name = args[0].upper().decode()
+        handler = getattr(self, "cmd_" + name.lower(), None)
+        if handler is None:
+            raise _CommandError(f"ERR unknown command '{name}'")
+        return handler(*args[1:])
+
+    # --- generic ---
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_select(self, index):
+        return "OK"
+
+    def cmd_flushall(self):
+        for key in list(self.data):
+            self._touch(key)
+        self.data.clear()
+        return "OK"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self.data.pop(key, None) is not None:
+                self._touch(key)
+                removed += 1
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if key in self.data)
+
+    # --- strings ---
+    def cmd_get(self, key):
+        return self._get(key, bytes)
+
+    def cmd_set(self, key, value, *options):
+        if b"NX" in (option.upper() for option in options) and key in self.data:
+            return None
+        self.data[key] = value
+        self._touch(key)
+        return "OK"
+
+    def cmd_incrby(self, key, amount):
+        value = _to_int(self._get(key, bytes) or b"0") + _to_int(amount)
+        self.data[key] = str(value).encode()
+        self._touch(key)
+        return value
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    # --- hashes ---
+    def _hash(self, key: bytes, create: bool = False) -> Optional[Dict[bytes, bytes]]:
+        value = self._get(key, dict)
+        if value is None and create:
+            value = self.data[key] = {}
+        return value
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise _CommandError("ERR wrong number of arguments for 'hset' command")
+        value = self._hash(key, create=True)
+        added = 0
+        for field, field_value in zip(pairs[::2], pairs[1::2]):
+            added += field not in value
+            value[field] = field_value
+        self._touch(key)
+        return added
+
+    def cmd_hsetnx(self, key, field, field_value):
+        value = self._hash(key, create=True)
+        if field in value:
+            return 0
+        value[field] = field_value
+        self._touch(key)
+        return 1
+
+    def cmd_hget(self, key, field):
+        value = self._hash(key)
+        return None if value is None else value.get(field)
+
+    def cmd_hmget(self, key, *fields):
+        value = self._hash(key) or {}
+        return [value.get(field) for field in fields]
+
+    def cmd_hgetall(self, key):
+        value = self._hash(key) or {}
+        return [item for pair in value.items() for item in pair]
+
+    def cmd_hdel(self, key, *fields):
+        value = self._hash(key)
+        if value is None:
+            return 0
+        removed = sum(1 for field in fields if value.pop(field, None) is not None)
+        if not value:
+            del self.data[key]
+        if removed:
+            self._touch(key)
+        return removed
+
+    def cmd_hincrby(self, key, field, amount):
+        value = self._hash(key, create=True)
+        result = _to_int(value.get(field, b"0")) + _to_int(amount)
+        value[field] = str(result).encode()
+        self._touch(key)
+        return result
+
+    # --- sorted sets ---
+    def _zset(self, key: bytes, create: bool = False) -> Optional[_SortedSet]:
+        value = self._get(key, _SortedSet)
+        if value is None and create:
+            value = self.data[key] = _SortedSet()
+        return value
+
+    def cmd_zadd(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise _CommandError("ERR syntax error")
+        value = self._zset(key, create=True)
+        added = sum(value.add(float(score), member) for score, member in zip(pairs[::2], pairs[1::2]))
+        self._touch(key)
+        return added
+
+    def cmd_zrem(self, key, *members):
+        value = self._zset(key)
+        if value is None:
+            return 0
+        removed = sum(value.remove(member) for member in members)
+        if not value.scores:
+            del self.data[key]
+        if removed:
+            self._touch(key)
+        return removed
+
+    def cmd_zcard(self, key):
+        value = self._zset(key)
+        return 0 if value is None else len(value.scores)
+
+    def cmd_zscore(self, key, member):
+        value = self._zset(key)
+        score = None if value is None else value.scores.get(member)
+        return None if score is None else _format_score(score)
+
+    def cmd_zrank(self, key, member):
+        value = self._zset(key)
+        return None if value is None else value.rank(member)
+
+    def cmd_zrange(self, key, start, stop, *options):
+        """ZRANGE key start stop [BYSCORE] [WITHSCORES] (不支援 LIMIT / REV)"""
+        flags = {option.upper() for option in options}
+        value = self._zset(key)
+        if value is None:
+            return []
+        entries = value.entries
+        if b"BYSCORE" in flags:
+            low, high = float(start), float(stop)
+            first = last = bisect.bisect_left(entries, (low, b""))
+            while last < len(entries) and entries[last][0] <= high:
+                last += 1
+            selected = entries[first:last]
+        else:
+            length = len(entries)
+            first, last = _to_int(start), _to_int(stop)
+            first = max(first + length if first < 0 else first, 0)
+            last = last + length if last < 0 else min(last, length - 1)
+            selected = entries[first:last + 1]
+        if b"WITHSCORES" in flags:
+            return [item for score, member in selected for item in (member, _format_score(score))]
+        return [member for _, member in selected]
+
+
+class _RespHandler(socketserver.StreamRequestHandler):
+    def setup(self) -> None:
+        super().setup()
+        # 每個回覆立即送出，避免 pipeline 的多個小回覆被 Nagle + delayed ACK 延遲
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # inline command (例如 telnet / redis-cli 的純文字)
+            return line.strip().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _encode(self, reply: Any) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, _CommandError):
+            return b"-" + str(reply).encode() + b"\r\n"
+        if isinstance(reply, str):
+            return b"+" + reply.encode() + b"\r\n"
+        if isinstance(reply, int):
+            return b":%d\r\n" % reply
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        if isinstance(reply, list):
+            return b"*%d\r\n" % len(reply) + b"".join(self._encode(item) for item in reply)
+        raise TypeError(f"Cannot encode {reply!r}")
+
+    def handle(self) -> None:
+        store: FakeRedisStore = self.server.store  # type: ignore[attr-defined]
+        queued: Optional[List[List[bytes]]] = None
+        watched: Dict[bytes, int] = {}
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            name = args[0].upper()
+            if name == b"MULTI":
+                queued = []
+                reply: Any = "OK"
+            elif name == b"EXEC":
+                if queued is None:
+                    reply = _CommandError("ERR EXEC without MULTI")
+                else:
+                    with store.lock:
+                        if any(store.versions.get(key, 0) != version for key, version in watched.items()):
+                            reply = None
+                        else:
+                            reply = [self._run(store, command) for command in queued]
+                    queued = None
+                    watched = {}
+                    if reply is None:
+                        # 交易取消：nil array
+                        self.wfile.write(b"*-1\r\n")
+                        continue
+            elif name == b"DISCARD":
+                queued = None
+                watched = {}
+                reply = "OK"
+            elif name == b"WATCH":
+                with store.lock:
+                    for key in args[1:]:
+                        watched[key] = store.versions.get(key, 0)
+                reply = "OK"
+            elif name == b"UNWATCH":
+                watched = {}
+                reply = "OK"
+            elif queued is not None:
+                queued.append(args)
+                reply = "QUEUED"
+            else:
+                with store.lock:
+                    reply = self._run(store, args)
+            self.wfile.write(self._encode(reply))
+
+    @staticmethod
+    def _run(store: FakeRedisStore, args: List[bytes]) -> Any:
+        try:
+            return store.execute(args)
+        except _CommandError as e:
+            return e
+
+
+class _ThreadingServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRedisServer:
+    """
+    在背景 thread 執行的本機 RESP server。
+        server = FakeRedisServer()
+        host, port = server.start()
+        ...
+        server.stop()
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.store = FakeRedisStore()
+        self._server = _ThreadingServer((host, port), _RespHandler)
+        self._server.store = self.store  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"redis://{host}:{port}/0"
+
+    def start(self) -> Tuple[str, int]:
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="fake-redis", daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,228 @@
+import os
+import struct
+import threading
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+# --- 記憶體模式的 append-only journal ---
+# 每筆異動是固定 29 bytes 的紀錄：
+#   op (uint8) | a (int64) | b (int64) | c (int64) | crc32(前 25 bytes) (uint32)
+# 檔案開頭是 8 bytes 的 header (magic + 版本)。
+# 重新啟動時依序重播；最後一筆若因當機只寫了一半 (長度不足或 CRC 不符)，會被截掉。
+
+JOURNAL_MAGIC = b"QJNL"
+JOURNAL_VERSION = 1
+_HEADER = struct.Struct("<4sI")
+_RECORD = struct.Struct("<Bqqq")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _RECORD.size + _CRC.size
+
+# 異動種類與參數 (a, b, c)
+OP_QUEUE_ADD = 1        # restaurant_id, user_id, ticket_number
+OP_QUEUE_REMOVE = 2     # restaurant_id, user_id, -
+OP_CURRENT_TICKET = 3   # restaurant_id, current_ticket_number, -
+OP_NEXT_TICKET = 4      # restaurant_id, next_ticket_number (重播時只會往前), -
+OP_TABLE_STATUS = 5     # table_id, status code, queue_ticket_number
+
+TABLE_STATUS_CODES = {"empty": 0, "eating": 1}
+TABLE_STATUS_NAMES = {code: name for name, code in TABLE_STATUS_CODES.items()}
+
+JournalRecord = Tuple[int, int, int, int]
+
+
+def encode_record(op: int, a: int, b: int = 0, c: int = 0) -> bytes:
+    body = _RECORD.pack(op, a, b, c)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def record_offset(sequence: int) -> int:
+    """第 sequence 筆 (0-based) 紀錄在檔案中的位置"""
+    return _HEADER.size + sequence * RECORD_SIZE
+
+
+def read_journal(path: str, start: int = 0) -> Tuple[List[JournalRecord], int]:
+    """
+    讀取 journal 中第 start 筆 (0-based) 之後所有完整的紀錄；
+    start 之前的紀錄已由 snapshot 涵蓋，直接跳過、不檢查。
+    回傳 (紀錄列表, 最後一筆完整紀錄結束的位置)；檔案不存在時回傳 ([], 0)。
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return [], 0
+        magic, version = _HEADER.unpack(header)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION:
+            raise ValueError(f"{path} is not a queue journal (version {JOURNAL_VERSION})")
+        size = os.fstat(f.fileno()).st_size
+        if record_offset(start) > size:
+            # 檔案比 snapshot 記錄的位置還短 (journal 被換掉)，只保留完整的紀錄
+            complete = (size - _HEADER.size) // RECORD_SIZE
+            return [], record_offset(complete)
+        f.seek(record_offset(start))
+        data = f.read()
+    records: List[JournalRecord] = []
+    base = record_offset(start)
+    offset = 0
+    while offset + RECORD_SIZE <= len(data):
+        body = data[offset:offset + _RECORD.size]
+        (crc,) = _CRC.unpack_from(data, offset + _RECORD.size)
+        if zlib.crc32(body) != crc:
+            break
+        records.append(_RECORD.unpack(body))
+        offset += RECORD_SIZE
+    return records, base + offset
+
+
+def decode_records(buffer) -> List[JournalRecord]:
+    """解析連續的紀錄 (複寫串流用)；長度不是整數筆或 CRC 不符時拋出 ValueError"""
+    if len(buffer) % RECORD_SIZE:
+        raise ValueError("Truncated journal record")
+    records: List[JournalRecord] = []
+    for offset in range(0, len(buffer), RECORD_SIZE):
+        (crc,) = _CRC.unpack_from(buffer, offset + _RECORD.size)
+        if zlib.crc32(buffer[offset:offset + _RECORD.size]) != crc:
+            raise ValueError("Journal record checksum mismatch")
+        records.append(_RECORD.unpack_from(buffer, offset))
+    return records
+
+
+class Journal:
+    """
+    Journal 寫入端。
+
+    append() 只把紀錄放進記憶體中的 buffer 就返回 (記憶體速度)；
+    背景 thread 每隔 fsync_interval 秒 (或 buffer 超過 flush_bytes) 把累積的紀錄一次 write + fsync，
+    多筆異動共用一次 fsync (group commit)。
+    需要確定寫入磁碟才回應的呼叫端，可以用 wait_durable(append 回傳的序號)。
+    序號即為檔案中的紀錄數 (重新開啟後接續計算)，snapshot 以此記錄自己涵蓋到哪一筆。
+    start_sequence: 已由 snapshot 涵蓋的紀錄數，開啟時只檢查其後的紀錄是否完整。
+    """
+    def __init__(self, path: str, fsync_interval: float = 0.01, flush_bytes: int = 1 << 20, start_sequence: int = 0):
+        self.path = path
+        self.start_sequence = start_sequence
+        self.fsync_interval = fsync_interval
+        self.flush_bytes = flush_bytes
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        # 已 append 的紀錄數 / 已 fsync 的紀錄數
+        self._appended = 0
+        self._durable = 0
+        self._closed = False
+        # wait_durable() 要求立即寫入，不等 fsync_interval
+        self._flush_requested = False
+        self._error: Optional[BaseException] = None
+        self._file = self._open_for_append()
+        self._appended = self._durable = (self._file.tell() - _HEADER.size) // RECORD_SIZE
+        self._writer = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self._writer.start()
+
+    def _open_for_append(self):
+        _, valid_length = read_journal(self.path, start=self.start_sequence)
+        f = open(self.path, "a+b")
+        if valid_length == 0:
+            # 新檔案 (或只有不完整的 header)
+            f.truncate(0)
+            f.write(_HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION))
+        elif os.path.getsize(self.path) != valid_length:
+            # 截掉當機時寫了一半的紀錄
+            f.truncate(valid_length)
+        f.flush()
+        os.fsync(f.fileno())
+        f.seek(0, os.SEEK_END)
+        return f
+
+    def records(self) -> Iterator[JournalRecord]:
+        """目前檔案中的紀錄 (只包含已寫入檔案的部分)"""
+        return iter(read_journal(self.path)[0])
+
+    def append(self, op: int, a: int, b: int = 0, c: int = 0) -> int:
+        """加入一筆紀錄，回傳序號"""
+        record = encode_record(op, a, b, c)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Journal is closed")
+            # 背景寫入已經失敗 (例如磁碟已滿)：不再接受紀錄，避免靜默遺失與 buffer 無限增長
+            if self._error is not None:
+                raise RuntimeError("Journal writer failed") from self._error
+            self._buffer += record
+            self._appended += 1
+            if len(self._buffer) >= self.flush_bytes:
+                self._cond.notify_all()
+            return self._appended
+
+    def wait_durable(self, sequence: int, timeout: Optional[float] = None) -> bool:
+        """等待序號 (含) 之前的紀錄都已 fsync"""
+        with self._cond:
+            if self._durable < sequence:
+                self._flush_requested = True
+                self._cond.notify_all()
+            self._cond.wait_for(lambda: self._durable >= sequence or self._error is not None, timeout)
+            if self._error is not None:
+                raise RuntimeError("Journal writer failed") from self._error
+            return self._durable >= sequence
+
+    def flush(self) -> None:
+        """立即寫入並 fsync 目前所有紀錄"""
+        with self._cond:
+            sequence = self._appended
+        self.wait_durable(sequence)
+
+    @property
+    def sequence(self) -> int:
+        """目前已 append 的紀錄數 (含尚未 fsync 的)"""
+        return self._appended
+
+    @property
+    def durable_sequence(self) -> int:
+        return self._durable
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._flush_requested or len(self._buffer) >= self.flush_bytes,
+                    self.fsync_interval
+                )
+                if not self._buffer and self._closed:
+                    return
+                self._flush_requested = False
+                data, self._buffer = bytes(self._buffer), bytearray()
+                sequence = self._appended
+            if data:
+                try:
+                    self._file.write(data)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except BaseException as e:
+                    with self._cond:
+                        self._error = e
+                        self._cond.notify_all()
+                    return
+            with self._cond:
+                self._durable = sequence
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        """寫入剩下的紀錄後關閉檔案"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        self._file.close()
+
+
+class JournalFanout:
+    """
+    把同一筆紀錄交給多個寫入端 (磁碟 journal、複寫給 follower...)，
+    提供與 Journal 相同的 append()，Journaled* 裝飾器不需要知道有幾個寫入端；回傳第一個寫入端的序號。
+    """
+    def __init__(self, *targets):
+        self.targets = list(targets)
+
+    def append(self, op: int, a: int, b: int = 0, c: int = 0) -> int:
+        sequences = [target.append(op, a, b, c) for target in self.targets]
+        return sequences[0]
@@ -0,0 +1,162 @@
+from functools import partial
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.interfaces.table_interface import ITableRepository
+from app.domain.entities import QueueEntity, TableEntity
+from app.domain.value_objects import RestaurantMetrics
+from app.services.unit_of_work import before_commit, unit_of_work_scope
+from app.repositories.journal import (
+    Journal, JournalRecord,
+    OP_QUEUE_ADD, OP_QUEUE_REMOVE, OP_CURRENT_TICKET, OP_NEXT_TICKET, OP_TABLE_STATUS,
+    TABLE_STATUS_CODES, TABLE_STATUS_NAMES
+)
+
+if TYPE_CHECKING:
+    # fake_all_repo 在啟用 journal 時會 import 這個模組，執行期不反向 import
+    from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+
+# --- 寫入 journal 的 Repository 裝飾器 ---
+# 先修改記憶體資料，在 commit 前 append 到 journal；讀取直接交給內層 Repository。
+# 每次寫入都在 Unit of Work 範圍內 (沒有外層交易時自成一個)：rollback 的異動不會寫進 journal / 複寫，
+# append 失敗 (journal 已關閉、背景寫入失敗) 時記憶體的異動依 undo log 復原，Request 收到錯誤且狀態不變；
+# 號碼牌 (OP_NEXT_TICKET) rollback 後不收回，立即 append，恢復後不會重複發出號碼。
+# 同一間餐廳 / 同一位使用者的寫入已經由 Service 的鎖序列化，因此 journal 中的順序與實際套用的順序一致。
+
+
+class JournaledQueueRepository(IQueueRepository):
+    def __init__(self, inner: IQueueRepository, journal: Journal):
+        self.inner = inner
+        self.journal = journal
+
+    def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        with unit_of_work_scope():
+            added = self.inner.add_to_queue(restaurant_id, user_id, ticket_number)
+            if added:
+                before_commit(partial(self.journal.append, OP_QUEUE_ADD, restaurant_id, user_id, ticket_number))
+        return added
+
+    def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        with unit_of_work_scope():
+            removed = self.inner.remove_from_queue(restaurant_id, user_id)
+            if removed:
+                before_commit(partial(self.journal.append, OP_QUEUE_REMOVE, restaurant_id, user_id))
+        return removed
+
+    def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        return self.inner.get_user_current_queue(user_id)
+
+    def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
+        return self.inner.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id, ticket_number)
+
+    def get_total_waiting(self, restaurant_id: int) -> int:
+        return self.inner.get_total_waiting(restaurant_id)
+
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return self.inner.get_total_waiting_bulk(restaurant_ids)
+
+    def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        return self.inner.get_next_queue_to_call(restaurant_id)
+
+    def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        return self.inner.get_people_ahead(restaurant_id, user_id)
+
+
+class JournaledQueueRuntimeRepository(IQueueRuntimeRepository):
+    """號碼牌以「發出後的 next_ticket_number」記錄，重播時只往前推，不會重複發出號碼"""
+    def __init__(self, inner: IQueueRuntimeRepository, journal: Journal):
+        self.inner = inner
+        self.journal = journal
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        return self.inner.get_current_ticket_number(restaurant_id)
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        with unit_of_work_scope():
+            self.inner.set_current_ticket_number(restaurant_id, ticket_number)
+            before_commit(partial(self.journal.append, OP_CURRENT_TICKET, restaurant_id, ticket_number))
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        return self.inner.get_next_ticket_number(restaurant_id)
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        self.inner.increment_next_ticket_number(restaurant_id)
+        self.journal.append(OP_NEXT_TICKET, restaurant_id, self.inner.get_next_ticket_number(restaurant_id))
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        ticket_number = self.inner.allocate_ticket(restaurant_id)
+        self.journal.append(OP_NEXT_TICKET, restaurant_id, ticket_number + 1)
+        return ticket_number
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        start, end = self.inner.lease_ticket_block(restaurant_id, size)
+        self.journal.append(OP_NEXT_TICKET, restaurant_id, end)
+        return start, end
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        # 不寫 journal：重播只會讓 next_ticket_number 往前，歸還的號碼在恢復後成為空號，不會重複發出
+        return self.inner.release_ticket_block(restaurant_id, start, end)
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        return self.inner.get_metrics(restaurant_id)
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return self.inner.get_metrics_bulk(restaurant_ids)
+
+
+class JournaledTableRepository(ITableRepository):
+    def __init__(self, inner: ITableRepository, journal: Journal):
+        self.inner = inner
+        self.journal = journal
+
+    def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
+        return self.inner.get_tables_by_restaurant(restaurant_id)
+
+    def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
+        return self.inner.get_table_by_id(table_id)
+
+    def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
+        with unit_of_work_scope():
+            updated = self.inner.update_status(table_id, new_table_status, queue_ticket_number)
+            if updated:
+                before_commit(partial(self.journal.append, OP_TABLE_STATUS, table_id, TABLE_STATUS_CODES[new_table_status], queue_ticket_number))
+        return updated
+
+    def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
+        return self.inner.get_restaurant_remaining_table(restaurant_id)
+
+    def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return self.inner.get_restaurant_remaining_table_bulk(restaurant_ids)
+
+
+def replay_journal(
+    records: Iterable[JournalRecord],
+    queue_repo: "MemoryQueueRepository",
+    runtime_repo: "MemoryQueueRuntimeRepository",
+    table_repo: "MemoryTableRepository"
+) -> int:
+    """
+    把 journal 紀錄依序套用到 (尚未包上 Journaled*) 的記憶體 Repository，回傳套用的筆數。
+    每種紀錄都是「設定成某個狀態」，重複套用結果相同；
+    從 snapshot 恢復時，snapshot 可能已包含其後幾筆紀錄的異動，重播一次仍會得到相同的最終狀態。
+    """
+    count = 0
+    for op, a, b, c in records:
+        if op == OP_QUEUE_ADD:
+            current = queue_repo.get_user_current_queue(user_id=b)
+            if current is not None and (current.restaurant_id, current.ticket_number) != (a, c):
+                queue_repo.remove_from_queue(restaurant_id=current.restaurant_id, user_id=b)
+                current = None
+            if current is None:
+                queue_repo.add_to_queue(restaurant_id=a, user_id=b, ticket_number=c)
+        elif op == OP_QUEUE_REMOVE:
+            queue_repo.remove_from_queue(restaurant_id=a, user_id=b)
+        elif op == OP_CURRENT_TICKET:
+            runtime_repo.set_current_ticket_number(restaurant_id=a, ticket_number=b)
+        elif op == OP_NEXT_TICKET:
+            runtime_repo.advance_next_ticket_number(restaurant_id=a, next_ticket_number=b)
+        elif op == OP_TABLE_STATUS:
+            table_repo.update_status(table_id=a, new_table_status=TABLE_STATUS_NAMES[b], queue_ticket_number=c)
+        else:
+            raise ValueError(f"Unknown journal op {op}")
+        count += 1
+    return count
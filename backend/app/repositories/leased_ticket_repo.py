@@ -0,0 +1,102 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+from app.interfaces.queue_interface import IQueueRuntimeRepository
+from app.domain.value_objects import RestaurantMetrics
+
+
+@dataclass
+class TicketLease:
+    """向共用計數器預借的一段號碼 [next, end)，next 為下一張要發出的號碼"""
+    next: int
+    end: int
+    expires_at: float
+
+
+class LeasedTicketRuntimeRepository(IQueueRuntimeRepository):
+    """
+    號碼牌預借：每個 worker 一次向共用的 next_ticket_number 預借 block_size 張號碼，
+    之後 allocate_ticket 在本地發號，熱門餐廳不必每次加入排隊都寫同一個共用計數器。
+
+    多個 worker 各自持有一段號碼，發號順序不再等於加入順序，以下規則讓叫號維持合理：
+      1. 不發出 <= current_ticket_number (已經叫過) 的號碼，跳過即可
+      2. 預借超過 lease_ttl 秒就停用，避免某個 worker 很久之後才發出比其他人小很多的號碼 (插隊)
+      3. 停用 / 關閉時歸還沒用完的號碼 (只有仍在計數器尾端時收得回來，否則成為空號)；
+         get_next_queue_to_call 取排隊中最小的號碼，空號不影響叫號
+    get_next_ticket_number 回傳共用計數器的值，包含已預借但還沒發出的號碼。
+    """
+    def __init__(
+        self,
+        inner: IQueueRuntimeRepository,
+        block_size: int = 16,
+        lease_ttl: float = 1.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.inner = inner
+        self.block_size = block_size
+        self.lease_ttl = lease_ttl
+        self.clock = clock
+        self._leases: Dict[int, TicketLease] = {}
+        self._lock = threading.Lock()
+
+    def _retire(self, restaurant_id: int) -> None:
+        """停用餐廳目前的預借並歸還剩下的號碼 (呼叫前須持有 _lock)"""
+        lease = self._leases.pop(restaurant_id, None)
+        if lease is not None and lease.next < lease.end:
+            self.inner.release_ticket_block(restaurant_id, lease.next, lease.end)
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        current_ticket_number = self.inner.get_current_ticket_number(restaurant_id)
+        with self._lock:
+            lease = self._leases.get(restaurant_id)
+            if lease is not None and lease.expires_at <= self.clock():
+                self._retire(restaurant_id)
+                lease = None
+            while True:
+                if lease is None:
+                    start, end = self.inner.lease_ticket_block(restaurant_id, self.block_size)
+                    lease = self._leases[restaurant_id] = TicketLease(next=start, end=end, expires_at=self.clock() + self.lease_ttl)
+                # 已經叫過的號碼不再發出
+                lease.next = max(lease.next, current_ticket_number + 1)
+                if lease.next < lease.end:
+                    ticket_number = lease.next
+                    lease.next += 1
+                    return ticket_number
+                self._retire(restaurant_id)
+                lease = None
+
+    def release_all(self) -> None:
+        """關閉時歸還所有預借的號碼"""
+        with self._lock:
+            for restaurant_id in list(self._leases):
+                self._retire(restaurant_id)
+
+    def outstanding(self) -> Dict[int, Tuple[int, int]]:
+        """目前各餐廳預借中、還沒發出的號碼區間"""
+        with self._lock:
+            return {restaurant_id: (lease.next, lease.end) for restaurant_id, lease in self._leases.items()}
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        return self.inner.lease_ticket_block(restaurant_id, size)
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        return self.inner.release_ticket_block(restaurant_id, start, end)
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        return self.inner.get_current_ticket_number(restaurant_id)
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        self.inner.set_current_ticket_number(restaurant_id, ticket_number)
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        return self.inner.get_next_ticket_number(restaurant_id)
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        self.inner.increment_next_ticket_number(restaurant_id)
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        return self.inner.get_metrics(restaurant_id)
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return self.inner.get_metrics_bulk(restaurant_ids)
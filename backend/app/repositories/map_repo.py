@@ -0,0 +1,39 @@
+import json
+from typing import List, Optional
+from app.interfaces.map_interface import IMapRepository
+from app.domain.entities import MapEntity
+from app.repositories.sqlite_db import SQLiteDatabase
+
+_RESTAURANT_COLUMNS = "restaurant_id, restaurant_name, lat, lng, image_url, average_price, specialties"
+
+
+def _to_entity(row) -> MapEntity:
+    restaurant_id, restaurant_name, lat, lng, image_url, average_price, specialties = row
+    low, high = json.loads(average_price)
+    return MapEntity(
+        restaurant_id=restaurant_id,
+        restaurant_name=restaurant_name,
+        lat=lat,
+        lng=lng,
+        image_url=image_url,
+        average_price=(low, high),
+        specialties=specialties
+    )
+
+
+class SQLiteMapRepository(IMapRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def get_restaurant_basic_info(self, restaurant_id: int) -> Optional[MapEntity]:
+        row = self.db.connection.execute(
+            f"SELECT {_RESTAURANT_COLUMNS} FROM restaurant WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()
+        return _to_entity(row) if row is not None else None
+
+    def get_all_restaurants(self) -> List[MapEntity]:
+        rows = self.db.connection.execute(
+            f"SELECT {_RESTAURANT_COLUMNS} FROM restaurant ORDER BY restaurant_id"
+        ).fetchall()
+        return [_to_entity(row) for row in rows]
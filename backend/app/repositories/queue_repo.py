@@ -0,0 +1,192 @@
+import json
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.domain.entities import QueueEntity
+from app.domain.value_objects import RestaurantMetrics
+from app.repositories.sqlite_db import SQLiteDatabase, id_list_param
+
+# 尚未建立 queue_runtime 資料列的餐廳，與記憶體版相同的預設值
+DEFAULT_METRICS = RestaurantMetrics(average_wait_time=15, table_number=4)
+
+# 違反 idx_queue_user_unique 時的錯誤訊息 (SQLite 以欄位而不是索引名稱表示)
+USER_ALREADY_QUEUED_ERROR = "UNIQUE constraint failed: queue.user_id"
+
+
+class SQLiteQueueRepository(IQueueRepository):
+    """
+    queue 表的 SQLite 實作，所有查詢都走 idx_queue_restaurant_ticket / idx_queue_user 覆蓋索引
+    (SQL 與索引說明見 IQueueRepository)
+    """
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        try:
+            self.db.connection.execute(
+                "INSERT INTO queue (restaurant_id, user_id, ticket_number) VALUES (?, ?, ?)",
+                (restaurant_id, user_id, ticket_number)
+            )
+        except sqlite3.IntegrityError as e:
+            # idx_queue_user_unique：其他 process 已先替這位使用者寫入
+            if str(e) == USER_ALREADY_QUEUED_ERROR:
+                return False
+            # 其他衝突 (例如同一間餐廳重複的號碼) 是發號的錯誤，不能當成使用者已在排隊
+            raise
+        return True
+
+    def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        cursor = self.db.connection.execute(
+            "DELETE FROM queue WHERE restaurant_id = ? AND user_id = ?",
+            (restaurant_id, user_id)
+        )
+        return cursor.rowcount > 0
+
+    def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        row = self.db.connection.execute(
+            # 指定覆蓋索引：idx_queue_user_unique 也符合條件，但需要回表
+            "SELECT queue_id, restaurant_id, user_id, ticket_number FROM queue INDEXED BY idx_queue_user WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        return QueueEntity(*row) if row is not None else None
+
+    def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
+        row = self.db.connection.execute(
+            "SELECT queue_id, restaurant_id, user_id, ticket_number FROM queue WHERE restaurant_id = ? AND ticket_number = ?",
+            (restaurant_id, ticket_number)
+        ).fetchone()
+        return QueueEntity(*row) if row is not None else None
+
+    def get_total_waiting(self, restaurant_id: int) -> int:
+        return self.db.connection.execute(
+            "SELECT COUNT(*) FROM queue WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()[0]
+
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        rows = self.db.connection.execute(
+            """
+            SELECT restaurant_id, COUNT(*)
+            FROM queue
+            WHERE restaurant_id IN (SELECT value FROM json_each(?))
+            GROUP BY restaurant_id
+            """,
+            (id_list_param(restaurant_ids),)
+        ).fetchall()
+        total_waiting = dict.fromkeys(restaurant_ids, 0)
+        total_waiting.update(rows)
+        return total_waiting
+
+    def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        return self.db.connection.execute(
+            "SELECT MIN(ticket_number) FROM queue WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()[0]
+
+    def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        return self.db.connection.execute(
+            """
+            SELECT COUNT(*)
+            FROM queue
+            WHERE restaurant_id = ?
+              AND ticket_number < (
+                  SELECT ticket_number FROM queue INDEXED BY idx_queue_user WHERE user_id = ? AND restaurant_id = ?
+              )
+            """,
+            (restaurant_id, user_id, restaurant_id)
+        ).fetchone()[0]
+
+
+class SQLiteQueueRuntimeRepository(IQueueRuntimeRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def _ensure_row(self, conn, restaurant_id: int) -> None:
+        """與記憶體版相同：還沒有資料列的餐廳以預設值建立"""
+        conn.execute("INSERT OR IGNORE INTO queue_runtime (restaurant_id) VALUES (?)", (restaurant_id,))
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        row = self.db.connection.execute(
+            "SELECT current_ticket_number FROM queue_runtime WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()
+        return row[0] if row is not None else 0
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        with self.db.transaction() as conn:
+            self._ensure_row(conn, restaurant_id)
+            conn.execute(
+                "UPDATE queue_runtime SET current_ticket_number = ? WHERE restaurant_id = ?",
+                (ticket_number, restaurant_id)
+            )
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        row = self.db.connection.execute(
+            "SELECT next_ticket_number FROM queue_runtime WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()
+        return row[0] if row is not None else 1
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        with self.db.transaction() as conn:
+            self._ensure_row(conn, restaurant_id)
+            conn.execute(
+                "UPDATE queue_runtime SET next_ticket_number = next_ticket_number + 1 WHERE restaurant_id = ?",
+                (restaurant_id,)
+            )
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        # 單一 UPDATE ... RETURNING，在寫入鎖內完成讀取與遞增 (多個 process 共用同一個 DB 檔也不會重複)
+        with self.db.transaction() as conn:
+            self._ensure_row(conn, restaurant_id)
+            return conn.execute(
+                """
+                UPDATE queue_runtime
+                SET next_ticket_number = next_ticket_number + 1
+                WHERE restaurant_id = ?
+                RETURNING next_ticket_number - 1
+                """,
+                (restaurant_id,)
+            ).fetchall()[0][0]
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        with self.db.transaction() as conn:
+            self._ensure_row(conn, restaurant_id)
+            return tuple(conn.execute(
+                """
+                UPDATE queue_runtime
+                SET next_ticket_number = next_ticket_number + ?
+                WHERE restaurant_id = ?
+                RETURNING next_ticket_number - ?, next_ticket_number
+                """,
+                (size, restaurant_id, size)
+            ).fetchall()[0])
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE queue_runtime SET next_ticket_number = ? WHERE restaurant_id = ? AND next_ticket_number = ?",
+                (start, restaurant_id, end)
+            )
+            return cursor.rowcount > 0
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        row = self.db.connection.execute(
+            "SELECT metrics FROM queue_runtime WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()
+        if row is None:
+            return DEFAULT_METRICS
+        average_wait_time, table_number = json.loads(row[0])
+        return RestaurantMetrics(average_wait_time=average_wait_time, table_number=table_number)
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        rows = self.db.connection.execute(
+            "SELECT restaurant_id, metrics FROM queue_runtime WHERE restaurant_id IN (SELECT value FROM json_each(?))",
+            (id_list_param(restaurant_ids),)
+        ).fetchall()
+        metrics = dict.fromkeys(restaurant_ids, DEFAULT_METRICS)
+        for restaurant_id, raw in rows:
+            average_wait_time, table_number = json.loads(raw)
+            metrics[restaurant_id] = RestaurantMetrics(average_wait_time=average_wait_time, table_number=table_number)
+        return metrics
@@ -0,0 +1,181 @@
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.domain.entities import QueueEntity
+from app.domain.value_objects import RestaurantMetrics
+from app.repositories.resp_client import RespClient
+from app.services.unit_of_work import in_unit_of_work, record_undo
+
+# --- Redis 資料模型 ---
+#   queue:{restaurant_id}            ZSET   member = user_id, score = ticket_number
+#   queue:user:{user_id}             HASH   queue_id / restaurant_id / ticket_number (相當於 queue(user_id) 索引)
+#   queue:id                         STRING queue_id 流水號
+#   queue_runtime:{restaurant_id}    HASH   current_ticket_number / average_wait_time / table_number
+#   queue_runtime:{restaurant_id}:issued  STRING 已發出的最後一張號碼 (INCR 即為下一張號碼)
+QUEUE_KEY = "queue:{}"
+USER_KEY = "queue:user:{}"
+QUEUE_ID_KEY = "queue:id"
+RUNTIME_KEY = "queue_runtime:{}"
+ISSUED_KEY = "queue_runtime:{}:issued"
+
+# 尚未建立 queue_runtime 資料的餐廳，與記憶體版相同的預設值
+DEFAULT_METRICS = RestaurantMetrics(average_wait_time=15, table_number=4)
+
+
+class RedisQueueRepository(IQueueRepository):
+    """
+    每間餐廳的排隊是一個 sorted set (score = 號碼)：
+        get_total_waiting     -> ZCARD              O(1)
+        get_people_ahead      -> ZRANK              O(log n)
+        get_next_queue_to_call-> ZRANGE 0 0         O(log n)
+    需要多個指令的操作以 pipeline (MULTI / EXEC) 一次送出。
+    """
+    # WATCH 的 key 在交易前被其他 client 修改時，重試的次數
+    MAX_RETRIES = 5
+
+    def __init__(self, client: RespClient):
+        self.client = client
+
+    def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        user_key = USER_KEY.format(user_id)
+        for _ in range(self.MAX_RETRIES):
+            # 使用者已在排隊 (可能是其他節點寫入的) 時不寫入；WATCH 確保檢查與寫入之間沒有其他 client 先寫入
+            self.client.execute("WATCH", user_key)
+            if self.client.execute("EXISTS", user_key):
+                self.client.execute("UNWATCH")
+                return False
+            queue_id = self.client.execute("INCR", QUEUE_ID_KEY)
+            result = self.client.pipeline([
+                ("ZADD", QUEUE_KEY.format(restaurant_id), ticket_number, user_id),
+                ("HSET", user_key, "queue_id", queue_id, "restaurant_id", restaurant_id, "ticket_number", ticket_number),
+            ], transaction=True)
+            if result is not None:
+                # Redis 不參與 SQLite 的交易，rollback 時以反向操作補償
+                record_undo(partial(self.remove_from_queue, restaurant_id, user_id))
+                return True
+        raise RuntimeError(f"add_to_queue: too much contention on user {user_id}")
+
+    def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        user_key = USER_KEY.format(user_id)
+        for _ in range(self.MAX_RETRIES):
+            # WATCH 後再檢查所在餐廳，確保檢查與刪除之間沒有其他 client 改過這位使用者的資料
+            self.client.execute("WATCH", user_key)
+            current_restaurant, ticket_number = self.client.execute("HMGET", user_key, "restaurant_id", "ticket_number")
+            if current_restaurant is None or int(current_restaurant) != restaurant_id:
+                self.client.execute("UNWATCH")
+                return False
+            result = self.client.pipeline([
+                ("ZREM", QUEUE_KEY.format(restaurant_id), user_id),
+                ("DEL", user_key),
+            ], transaction=True)
+            if result is not None:
+                record_undo(partial(self.add_to_queue, restaurant_id, user_id, int(ticket_number)))
+                return True
+        raise RuntimeError(f"remove_from_queue: too much contention on user {user_id}")
+
+    def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        queue_id, restaurant_id, ticket_number = self.client.execute(
+            "HMGET", USER_KEY.format(user_id), "queue_id", "restaurant_id", "ticket_number"
+        )
+        if queue_id is None:
+            return None
+        return QueueEntity(queue_id=int(queue_id), restaurant_id=int(restaurant_id), user_id=user_id, ticket_number=int(ticket_number))
+
+    def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
+        members = self.client.execute("ZRANGE", QUEUE_KEY.format(restaurant_id), ticket_number, ticket_number, "BYSCORE")
+        if not members:
+            return None
+        entry = self.get_user_current_queue(int(members[0]))
+        # 兩次查詢之間使用者可能已經離開 / 改排其他餐廳
+        if entry is None or entry.restaurant_id != restaurant_id or entry.ticket_number != ticket_number:
+            return None
+        return entry
+
+    def get_total_waiting(self, restaurant_id: int) -> int:
+        return self.client.execute("ZCARD", QUEUE_KEY.format(restaurant_id))
+
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        counts = self.client.pipeline([("ZCARD", QUEUE_KEY.format(restaurant_id)) for restaurant_id in restaurant_ids])
+        return dict(zip(restaurant_ids, counts))
+
+    def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        head = self.client.execute("ZRANGE", QUEUE_KEY.format(restaurant_id), 0, 0, "WITHSCORES")
+        if not head:
+            return None
+        return int(float(head[1]))
+
+    def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        rank = self.client.execute("ZRANK", QUEUE_KEY.format(restaurant_id), user_id)
+        return 0 if rank is None else rank
+
+
+class RedisQueueRuntimeRepository(IQueueRuntimeRepository):
+    """叫號狀態；號碼牌以 INCR 原子地發出，多個 API 節點共用同一個計數器"""
+    def __init__(self, client: RespClient):
+        self.client = client
+
+    def seed(self, rows: Sequence[Tuple[int, int, int, Sequence[int]]]) -> None:
+        """
+        寫入初始資料 (restaurant_id, current_ticket_number, next_ticket_number, [average_wait_time, table_number])；
+        已經存在的值不覆蓋，多個節點同時啟動也安全。
+        """
+        commands = []
+        for restaurant_id, current_ticket_number, next_ticket_number, (average_wait_time, table_number) in rows:
+            runtime_key = RUNTIME_KEY.format(restaurant_id)
+            commands += [
+                ("HSETNX", runtime_key, "current_ticket_number", current_ticket_number),
+                ("HSETNX", runtime_key, "average_wait_time", average_wait_time),
+                ("HSETNX", runtime_key, "table_number", table_number),
+                ("SET", ISSUED_KEY.format(restaurant_id), next_ticket_number - 1, "NX"),
+            ]
+        self.client.pipeline(commands)
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        value = self.client.execute("HGET", RUNTIME_KEY.format(restaurant_id), "current_ticket_number")
+        return 0 if value is None else int(value)
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        if in_unit_of_work():
+            record_undo(partial(self.set_current_ticket_number, restaurant_id, self.get_current_ticket_number(restaurant_id)))
+        self.client.execute("HSET", RUNTIME_KEY.format(restaurant_id), "current_ticket_number", ticket_number)
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        issued = self.client.execute("GET", ISSUED_KEY.format(restaurant_id))
+        return (0 if issued is None else int(issued)) + 1
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        self.client.execute("INCR", ISSUED_KEY.format(restaurant_id))
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        return self.client.execute("INCR", ISSUED_KEY.format(restaurant_id))
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        last = self.client.execute("INCRBY", ISSUED_KEY.format(restaurant_id), size)
+        return last - size + 1, last + 1
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        issued_key = ISSUED_KEY.format(restaurant_id)
+        # WATCH 後確認這段號碼之後沒有再發出號碼，才把 issued 退回
+        self.client.execute("WATCH", issued_key)
+        issued = self.client.execute("GET", issued_key)
+        if issued is None or int(issued) != end - 1:
+            self.client.execute("UNWATCH")
+            return False
+        return self.client.pipeline([("SET", issued_key, start - 1)], transaction=True) is not None
+
+    @staticmethod
+    def _to_metrics(values: List[Optional[bytes]]) -> RestaurantMetrics:
+        average_wait_time, table_number = values
+        if average_wait_time is None or table_number is None:
+            return DEFAULT_METRICS
+        return RestaurantMetrics(average_wait_time=int(average_wait_time), table_number=int(table_number))
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        return self._to_metrics(self.client.execute("HMGET", RUNTIME_KEY.format(restaurant_id), "average_wait_time", "table_number"))
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        replies = self.client.pipeline([
+            ("HMGET", RUNTIME_KEY.format(restaurant_id), "average_wait_time", "table_number")
+            for restaurant_id in restaurant_ids
+        ])
+        return {restaurant_id: self._to_metrics(values) for restaurant_id, values in zip(restaurant_ids, replies)}
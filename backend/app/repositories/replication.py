@@ -0,0 +1,394 @@
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+from app.domain.errors import NotAFollowerError
+from app.domain.events import (
+    RestaurantChangedEvent, RestaurantEventBus, QUEUE_JOINED, QUEUE_LEFT, TABLE_SEATED, TABLE_CLEARED
+)
+from app.repositories.journal import (
+    JournalRecord, encode_record, decode_records,
+    OP_QUEUE_ADD, OP_QUEUE_REMOVE, OP_TABLE_STATUS, TABLE_STATUS_CODES
+)
+from app.repositories.journaled_repo import replay_journal
+from app.repositories.snapshot import SectionValue, encode_snapshot, decode_snapshot, export_memory_sections, import_memory_sections
+
+if TYPE_CHECKING:
+    from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+
+# --- 記憶體模式的 leader / follower 複寫 ---
+# 一個 frame = type (1 byte) | payload 長度 (uint64) | payload
+#   leader -> follower
+#     S  snapshot (snapshot.py 格式，journal_sequence 欄位為複寫序號)
+#     R  第一筆的序號 (uint64) + 連續 N 筆 journal 紀錄 (與 journal 檔案相同的 29 bytes 格式)
+#     H  heartbeat：leader 目前的序號 (uint64)
+#   follower -> leader
+#     A  follower 已套用到的序號 (uint64)
+_FRAME = struct.Struct("<cQ")
+_U64 = struct.Struct("<Q")
+
+Address = Tuple[str, int]
+
+
+def parse_address(value: str) -> Address:
+    """'host:port' -> (host, port)"""
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _send_frame(sock: socket.socket, kind: bytes, parts: List[bytes]) -> None:
+    sock.sendall(_FRAME.pack(kind, sum(len(part) for part in parts)))
+    for part in parts:
+        sock.sendall(part)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Replication peer closed the connection")
+        received += count
+    return buffer
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[bytes, bytearray]:
+    kind, length = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    return kind, _recv_exact(sock, length)
+
+
+class _FollowerSession:
+    """leader 端每條 follower 連線的狀態；pending 由 ReplicationLeader._cond 保護"""
+    def __init__(self, sock: socket.socket, address: Address):
+        self.sock = sock
+        self.address = address
+        self.pending: Deque[Tuple[int, bytes]] = deque()
+        self.acked_sequence = 0
+        self.closed = False
+
+
+class ReplicationLeader:
+    """
+    把 Journaled* 裝飾器產生的異動紀錄串流給 follower，提供與 Journal 相同的 append()。
+
+    follower 連上時：
+        1. 在 _cond 內記下目前序號 S，之後的紀錄都放進這條連線的 pending
+        2. 複製記憶體資料 (export_state) 當作 snapshot 送出，標記為序號 S
+        3. 依序送出 pending 中的紀錄；沒有紀錄時每 heartbeat_interval 秒送一次 heartbeat
+    S 之前的紀錄一定已反映在 snapshot 中；之後的紀錄可能也已反映，
+    follower 以 replay_journal 重複套用結果相同 (與 snapshot + journal 的恢復方式一樣)。
+    """
+    # follower 跟不上、暫存的紀錄超過這個數量時中斷連線，讓它重新以 snapshot 開始
+    MAX_PENDING = 1_000_000
+
+    def __init__(
+        self,
+        queue_repo: "MemoryQueueRepository",
+        runtime_repo: "MemoryQueueRuntimeRepository",
+        table_repo: "MemoryTableRepository",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        heartbeat_interval: float = 0.5
+    ):
+        self.queue_repo = queue_repo
+        self.runtime_repo = runtime_repo
+        self.table_repo = table_repo
+        self.host = host
+        self.port = port
+        self.heartbeat_interval = heartbeat_interval
+        self._cond = threading.Condition()
+        self._sequence = 0
+        self._sessions: List[_FollowerSession] = []
+        self._server: Optional[socket.socket] = None
+        self._stopped = False
+
+    @property
+    def sequence(self) -> int:
+        return self._sequence
+
+    @property
+    def address(self) -> Optional[Address]:
+        return None if self._server is None else self._server.getsockname()[:2]
+
+    def resume_from(self, sequence: int) -> None:
+        """follower 被 promote 時，序號接續原本 leader 的序號"""
+        with self._cond:
+            self._sequence = max(self._sequence, sequence)
+
+    def append(self, op: int, a: int, b: int = 0, c: int = 0) -> int:
+        record = encode_record(op, a, b, c)
+        with self._cond:
+            self._sequence += 1
+            for session in self._sessions:
+                session.pending.append((self._sequence, record))
+                if len(session.pending) > self.MAX_PENDING:
+                    session.closed = True
+            if self._sessions:
+                self._cond.notify_all()
+            return self._sequence
+
+    def start(self) -> Address:
+        """開始接受 follower 連線，回傳實際監聽的位址 (port=0 時由系統指定)"""
+        self._server = socket.create_server((self.host, self.port))
+        threading.Thread(target=self._accept_loop, name="replication-leader", daemon=True).start()
+        return self.address
+
+    def _accept_loop(self) -> None:
+        while True:
+            try:
+                sock, address = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._serve, args=(sock, address[:2]), name="replication-sender", daemon=True).start()
+
+    def _serve(self, sock: socket.socket, address: Address) -> None:
+        session = _FollowerSession(sock, address)
+        with self._cond:
+            start = self._sequence
+            self._sessions.append(session)
+        try:
+            sections = export_memory_sections(self.queue_repo, self.runtime_repo, self.table_repo)
+            _send_frame(sock, b"S", list(encode_snapshot(sections, start)))
+            threading.Thread(target=self._read_acks, args=(session,), name="replication-acks", daemon=True).start()
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: session.pending or session.closed or self._stopped, self.heartbeat_interval)
+                    if session.closed or self._stopped:
+                        return
+                    batch = list(session.pending)
+                    session.pending.clear()
+                    sequence = self._sequence
+                if batch:
+                    _send_frame(sock, b"R", [_U64.pack(batch[0][0]) + b"".join(record for _, record in batch)])
+                else:
+                    _send_frame(sock, b"H", [_U64.pack(sequence)])
+        except OSError:
+            pass
+        finally:
+            with self._cond:
+                if session in self._sessions:
+                    self._sessions.remove(session)
+            sock.close()
+
+    def _read_acks(self, session: _FollowerSession) -> None:
+        try:
+            while True:
+                kind, payload = _recv_frame(session.sock)
+                if kind == b"A":
+                    (session.acked_sequence,) = _U64.unpack(payload)
+        except (OSError, ConnectionError, struct.error):
+            with self._cond:
+                session.closed = True
+                self._cond.notify_all()
+
+    def status(self) -> Dict:
+        with self._cond:
+            followers = [
+                {
+                    "address": "{}:{}".format(*session.address),
+                    "acked_sequence": session.acked_sequence,
+                    "lag_records": max(self._sequence - session.acked_sequence, 0)
+                }
+                for session in self._sessions
+            ]
+            return {"sequence": self._sequence, "followers": followers}
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            sessions = list(self._sessions)
+        if self._server is not None:
+            self._server.close()
+        for session in sessions:
+            try:
+                session.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class ReplicationFollower:
+    """
+    連到 leader，先以 snapshot 取代自己的記憶體資料，之後依序套用異動紀錄，
+    並透過 event_bus 發布 RestaurantChangedEvent，讓燈號投影、ETag、SSE / 看板推播跟著更新。
+    與 leader 斷線 (或超過 timeout 秒沒有收到任何資料) 時，每隔 reconnect_interval 秒重新連線並重新以 snapshot 開始。
+    """
+    def __init__(
+        self,
+        leader_address: Address,
+        queue_repo: "MemoryQueueRepository",
+        runtime_repo: "MemoryQueueRuntimeRepository",
+        table_repo: "MemoryTableRepository",
+        event_bus: Optional[RestaurantEventBus] = None,
+        reconnect_interval: float = 0.5,
+        timeout: float = 5.0
+    ):
+        self.leader_address = leader_address
+        self.queue_repo = queue_repo
+        self.runtime_repo = runtime_repo
+        self.table_repo = table_repo
+        self.event_bus = event_bus
+        self.reconnect_interval = reconnect_interval
+        self.timeout = timeout
+        self.applied_sequence = 0
+        self.leader_sequence = 0
+        self.connected = False
+        # 最後一次收到 leader 資料的時間 (time.monotonic)
+        self.last_contact: Optional[float] = None
+        # 至少套用過一次 snapshot
+        self.bootstrapped = threading.Event()
+        self._stopped = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="replication-follower", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                sock = socket.create_connection(self.leader_address, timeout=self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._sock = sock
+                self.connected = True
+                self._follow(sock)
+            except (OSError, ConnectionError, ValueError, struct.error):
+                pass
+            finally:
+                self.connected = False
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+            self._stopped.wait(self.reconnect_interval)
+
+    def _follow(self, sock: socket.socket) -> None:
+        while not self._stopped.is_set():
+            kind, payload = _recv_frame(sock)
+            self.last_contact = time.monotonic()
+            if kind == b"S":
+                sequence, sections = decode_snapshot(payload)
+                import_memory_sections(sections, self.queue_repo, self.runtime_repo, self.table_repo)
+                self.applied_sequence = sequence
+                self.leader_sequence = max(self.leader_sequence, sequence)
+                self._publish_all(sections)
+                self.bootstrapped.set()
+            elif kind == b"R":
+                (first,) = _U64.unpack_from(payload)
+                if first != self.applied_sequence + 1:
+                    raise ConnectionError(f"Replication gap: expected {self.applied_sequence + 1}, got {first}")
+                for record in decode_records(memoryview(payload)[_U64.size:]):
+                    self._apply(record)
+                    self.applied_sequence += 1
+                self.leader_sequence = max(self.leader_sequence, self.applied_sequence)
+            elif kind == b"H":
+                (self.leader_sequence,) = _U64.unpack(payload)
+            _send_frame(sock, b"A", [_U64.pack(self.applied_sequence)])
+
+    def _apply(self, record: JournalRecord) -> None:
+        replay_journal([record], self.queue_repo, self.runtime_repo, self.table_repo)
+        if self.event_bus is None:
+            return
+        op, a, b, _ = record
+        if op == OP_QUEUE_ADD:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=a, kind=QUEUE_JOINED))
+        elif op == OP_QUEUE_REMOVE:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=a, kind=QUEUE_LEFT))
+        elif op == OP_TABLE_STATUS:
+            table = self.table_repo.get_table_by_id(a)
+            if table is not None:
+                kind = TABLE_SEATED if b == TABLE_STATUS_CODES["eating"] else TABLE_CLEARED
+                self.event_bus.publish(RestaurantChangedEvent(restaurant_id=table.restaurant_id, kind=kind))
+        # 叫號 / 號碼牌紀錄總是伴隨上面的紀錄，不另外發布
+
+    def _publish_all(self, sections: Dict[str, SectionValue]) -> None:
+        """整份資料被 snapshot 取代：所有餐廳的排隊與座位都視為有變化 (TABLE_SEATED 兩者都會更新)"""
+        if self.event_bus is None:
+            return
+        restaurant_ids = set(sections["runtime.runtime"][0::5])
+        restaurant_ids.update(sections["table.tables"][1::5])
+        restaurant_ids.update(sections["queue.restaurant_meta"][0::5])
+        for restaurant_id in sorted(restaurant_ids):
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=TABLE_SEATED))
+
+    def status(self) -> Dict:
+        host, port = self.leader_address
+        return {
+            "leader": f"{host}:{port}",
+            "connected": self.connected,
+            "applied_sequence": self.applied_sequence,
+            "leader_sequence": self.leader_sequence,
+            "lag_records": max(self.leader_sequence - self.applied_sequence, 0),
+            "seconds_since_leader_contact": None if self.last_contact is None else round(time.monotonic() - self.last_contact, 3)
+        }
+
+    def stop(self) -> None:
+        self._stopped.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join()
+
+
+class ReplicationNode:
+    """
+    這個 process 在複寫中的角色：
+        standalone  沒有設定複寫
+        leader      接受寫入，並把異動串流給 follower
+        follower    只提供讀取 (寫入由 ReadOnlyReplicaMiddleware 拒絕)；
+                    leader 故障時可以 promote() 成為 leader，有設定 leader 時開始接受其他 follower 連線
+    """
+    def __init__(self, leader: Optional[ReplicationLeader] = None, follower: Optional[ReplicationFollower] = None):
+        self.leader = leader
+        self.follower = follower
+        self._lock = threading.Lock()
+
+    @property
+    def role(self) -> str:
+        if self.follower is not None:
+            return "follower"
+        return "leader" if self.leader is not None else "standalone"
+
+    @property
+    def read_only(self) -> bool:
+        return self.follower is not None
+
+    def start(self) -> None:
+        if self.follower is not None:
+            self.follower.start()
+        elif self.leader is not None:
+            self.leader.start()
+
+    def promote(self) -> None:
+        with self._lock:
+            follower = self.follower
+            if follower is None:
+                raise NotAFollowerError()
+            follower.stop()
+            self.follower = None
+            if self.leader is not None:
+                self.leader.resume_from(follower.applied_sequence)
+                self.leader.start()
+
+    def status(self) -> Dict:
+        status = {"role": self.role}
+        if self.follower is not None:
+            status.update(self.follower.status())
+        elif self.leader is not None:
+            status.update(self.leader.status())
+        return status
+
+    def stop(self) -> None:
+        if self.follower is not None:
+            self.follower.stop()
+        if self.leader is not None:
+            self.leader.stop()
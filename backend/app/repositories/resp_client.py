@@ -0,0 +1,140 @@
+import socket
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+# 一個指令 = 指令名稱與參數，例如 ("ZADD", "queue:2", 15, 25)
+Command = Sequence[Any]
+
+
+class RespError(Exception):
+    """Server 回傳的錯誤 (RESP '-' 回覆)，例如 WRONGTYPE"""
+    pass
+
+
+def encode_command(command: Command) -> bytes:
+    """把指令編碼成 RESP array of bulk strings"""
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def read_reply(reader) -> Any:
+    """
+    讀取一個 RESP 回覆：
+        +OK -> "OK"、:1 -> 1、$n -> bytes (不存在為 None)、*n -> list (nil array 為 None)
+        -ERR ... -> RespError (以回傳值表示，讓 pipeline 可以先讀完所有回覆)
+    """
+    line = reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    prefix, body = line[:1], line[1:-2]
+    if prefix == b"+":
+        return body.decode("utf-8")
+    if prefix == b"-":
+        return RespError(body.decode("utf-8"))
+    if prefix == b":":
+        return int(body)
+    if prefix == b"$":
+        length = int(body)
+        if length == -1:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if prefix == b"*":
+        length = int(body)
+        if length == -1:
+            return None
+        return [read_reply(reader) for _ in range(length)]
+    raise ConnectionError(f"Unknown RESP reply: {line!r}")
+
+
+class RespClient:
+    """
+    最小的 RESP (Redis 協定) client，不需要額外套件：
+    - 每個 thread 一條連線 (與 SQLiteDatabase 相同，thread pool 中的 thread 會重複使用連線)
+    - pipeline() 把多個指令一次送出、一次讀回，只需要一次網路往返 (round trip)
+    - transaction=True 時以 MULTI / EXEC 包起來，指令在 server 端一次原子地執行
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, timeout: float = 5.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._local = threading.local()
+        # 網路往返次數 (觀察 pipeline 效果用)
+        self.round_trips = 0
+
+    @classmethod
+    def from_url(cls, url: str) -> "RespClient":
+        """redis://host:port/db"""
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(host=parsed.hostname or "127.0.0.1", port=parsed.port or 6379, db=db)
+
+    def _connection(self) -> Tuple[socket.socket, Any]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+            if self.db:
+                self._send([("SELECT", self.db)])
+        return conn
+
+    def _send(self, commands: List[Command]) -> List[Any]:
+        sock, reader = self._connection()
+        try:
+            sock.sendall(b"".join(encode_command(command) for command in commands))
+            replies = [read_reply(reader) for _ in commands]
+        except (OSError, ConnectionError):
+            # 連線狀態不明，丟掉這條連線，下次重新建立
+            self.close_thread_connection()
+            raise
+        self.round_trips += 1
+        return replies
+
+    def execute(self, *command: Any) -> Any:
+        """送出單一指令"""
+        reply = self._send([command])[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def pipeline(self, commands: List[Command], transaction: bool = False) -> Optional[List[Any]]:
+        """
+        一次送出多個指令並回傳每個指令的結果 (任何一個指令失敗時拋出 RespError)。
+        transaction=True 時回傳 EXEC 的結果；若 WATCH 的 key 被修改導致交易取消，回傳 None。
+        """
+        if not commands:
+            return []
+        if not transaction:
+            replies = self._send(list(commands))
+        else:
+            replies = self._send([("MULTI",), *commands, ("EXEC",)])
+            # MULTI 與排入佇列時的錯誤 (例如指令不存在)
+            for reply in replies[:-1]:
+                if isinstance(reply, RespError):
+                    raise reply
+            replies = replies[-1]
+            if replies is None:
+                return None
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    def close_thread_connection(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            sock, reader = conn
+            reader.close()
+            sock.close()
+            self._local.conn = None
@@ -0,0 +1,787 @@
+import fcntl
+import os
+import sys
+import tempfile
+import threading
+from array import array
+from functools import partial
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.interfaces.table_interface import ITableRepository
+from app.interfaces.version_interface import IRestaurantVersionRepository
+from app.domain.entities import QueueEntity, TableEntity
+from app.domain.events import RestaurantEventBus
+from app.domain.value_objects import RestaurantMetrics
+from app.repositories.journal import TABLE_STATUS_CODES, TABLE_STATUS_NAMES
+from app.services.change_watcher import RestaurantChangeWatcher
+from app.services.unit_of_work import record_undo
+
+# --- 多個 worker process 共用的記憶體資料 (multiprocessing.shared_memory) ---
+# 整份資料是一個具名的 shared memory segment，以 int64 陣列 (memoryview.cast('q')) 存取：
+#   header        各區段容量、queue_id 流水號、row 使用量等
+#   queue 欄位    queue_id / restaurant_id / user_id / ticket_number 四個欄位 + 空閒 row 堆疊
+#   user 索引     open addressing hash：user_id -> row
+#   餐廳索引      open addressing hash：restaurant_id -> 餐廳槽位
+#   餐廳槽位      每間餐廳一筆：排隊人數、號碼區間、叫號狀態、空桌數、版本號...
+#   號碼環        每間餐廳 ticket_window 格：ticket_number % ticket_window -> row，
+#                 搭配 Fenwick tree 計算「前面有幾人」(O(log n))
+#   座位          每張桌子一筆 (label 以 UTF-8 存在固定 32 bytes)，同餐廳的桌子串成 linked list
+#   座位索引      open addressing hash：table_id -> 座位槽位
+# 跨 process 的互斥使用 lock 檔的 fcntl 位元組範圍鎖 (POSIX record lock)；
+# record lock 屬於 process，同一 process 內的 thread 另外以 threading.Lock 排隊。
+
+SHM_MAGIC = 0x4D485351  # "QSHM"
+SHM_VERSION = 1
+_EMPTY = -1
+_WORD = 8
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+# header 欄位
+_H_MAGIC, _H_VERSION, _H_QUEUE_CAP, _H_RESTAURANT_CAP, _H_WINDOW, _H_TABLE_CAP = range(6)
+_H_ID_COUNTER, _H_HIGH_WATER, _H_FREE_COUNT, _H_RESTAURANT_COUNT, _H_TABLE_COUNT, _H_READY, _H_EPOCH = range(6, 13)
+_HEADER_WORDS = 16
+
+# 餐廳槽位欄位
+(_R_ID, _R_COUNT, _R_HEAD, _R_TAIL, _R_CURRENT, _R_NEXT, _R_AVG_WAIT, _R_TABLE_NUMBER,
+ _R_EMPTY_TABLES, _R_FIRST_TABLE, _R_QUEUE_VERSION, _R_TABLE_VERSION) = range(12)
+_RESTAURANT_WORDS = 12
+
+# 座位槽位欄位 (label 佔最後 4 個 word)
+_T_ID, _T_RESTAURANT, _T_X, _T_Y, _T_STATUS, _T_NEXT, _T_LABEL = range(7)
+_LABEL_BYTES = 32
+_TABLE_WORDS = _T_LABEL + _LABEL_BYTES // _WORD
+
+# 尚未建立資料的餐廳，與記憶體版相同的預設值
+DEFAULT_METRICS = RestaurantMetrics(average_wait_time=15, table_number=4)
+
+# lock 檔中各用途的位元組位置：[0, 2^20) 給 striped lock，之後是資料鎖與建立 segment 用的鎖
+_DATA_LOCK_OFFSET = 1 << 20
+_INIT_LOCK_OFFSET = _DATA_LOCK_OFFSET + 1
+USER_LOCK_BASE = 0
+RESTAURANT_LOCK_BASE = 1 << 16
+
+
+class SharedMemoryFullError(RuntimeError):
+    """shared memory 的固定容量 (排隊筆數、餐廳數、號碼區間) 已用完"""
+
+
+def _power_of_two(minimum: int) -> int:
+    size = 8
+    while size < minimum:
+        size *= 2
+    return size
+
+
+class _LockFile:
+    """
+    一個 process 只開一次的 lock 檔。
+    注意：POSIX record lock 在同一 process 關閉「任何」指向該檔的 fd 時全部釋放，
+    所以不能為每把鎖各自 open / close。
+    """
+    _instances: Dict[str, "_LockFile"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    @classmethod
+    def for_path(cls, path: str) -> "_LockFile":
+        path = os.path.abspath(path)
+        with cls._instances_lock:
+            lock_file = cls._instances.get(path)
+            if lock_file is None:
+                lock_file = cls._instances[path] = cls(path)
+            return lock_file
+
+    def range_lock(self, offset: int) -> "InterProcessLock":
+        return InterProcessLock(self, offset)
+
+
+class InterProcessLock:
+    """鎖住 lock 檔的第 offset 個位元組；同一 process 的 thread 之間以 threading.Lock 互斥"""
+    def __init__(self, lock_file: _LockFile, offset: int):
+        self._lock_file = lock_file
+        self._offset = offset
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self) -> "InterProcessLock":
+        self._thread_lock.acquire()
+        try:
+            fcntl.lockf(self._lock_file.fd, fcntl.LOCK_EX, 1, self._offset)
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def try_acquire(self) -> bool:
+        """不等待：鎖已被持有 (本 process 其他 thread 或其他 process) 時回傳 False；取得後以 __exit__ 釋放"""
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            fcntl.lockf(self._lock_file.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, self._offset)
+        except (BlockingIOError, PermissionError):
+            # 被其他 process 持有 (依平台為 EAGAIN 或 EACCES)
+            self._thread_lock.release()
+            return False
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            fcntl.lockf(self._lock_file.fd, fcntl.LOCK_UN, 1, self._offset)
+        finally:
+            self._thread_lock.release()
+
+
+class InterProcessStripedLock:
+    """
+    StripedLock 的跨 process 版本，給 Service 的「檢查 + 寫入」使用，
+    讓不同 worker 對同一位使用者 / 同一間餐廳的操作也會序列化。
+    key 必須是 int (str 的 hash 在每個 process 不同)。
+    """
+    def __init__(self, lock_file: _LockFile, base: int, stripes: int = 64):
+        self._locks: List[InterProcessLock] = [lock_file.range_lock(base + i) for i in range(stripes)]
+
+    def for_key(self, key: Hashable) -> InterProcessLock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+def _open_segment(name: str, create: bool, size: int = 0) -> SharedMemory:
+    """
+    開啟 / 建立 segment，並且不交給 resource_tracker 管理：
+    segment 由多個彼此無關的 worker 共用，不能在建立它的 worker 結束時被自動刪除。
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, create=create, size=size, track=False)
+    segment = SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class _Layout:
+    """依容量計算各區段在 int64 陣列中的起點"""
+    def __init__(self, queue_capacity: int, restaurant_capacity: int, ticket_window: int, table_capacity: int):
+        self.queue_capacity = queue_capacity
+        self.restaurant_capacity = restaurant_capacity
+        self.ticket_window = ticket_window
+        self.table_capacity = table_capacity
+        self.user_hash_size = _power_of_two(queue_capacity * 2)
+        self.restaurant_hash_size = _power_of_two(restaurant_capacity * 2)
+        self.table_hash_size = _power_of_two(table_capacity * 2)
+
+        offset = _HEADER_WORDS
+
+        def region(words: int) -> int:
+            nonlocal offset
+            start, offset = offset, offset + words
+            return start
+
+        self.queue_ids = region(queue_capacity)
+        self.restaurant_ids = region(queue_capacity)
+        self.user_ids = region(queue_capacity)
+        self.ticket_numbers = region(queue_capacity)
+        self.free_rows = region(queue_capacity)
+        self.user_keys = region(self.user_hash_size)
+        self.user_rows = region(self.user_hash_size)
+        self.restaurant_keys = region(self.restaurant_hash_size)
+        self.restaurant_slots = region(self.restaurant_hash_size)
+        self.restaurants = region(restaurant_capacity * _RESTAURANT_WORDS)
+        self.rings = region(restaurant_capacity * ticket_window)
+        self.trees = region(restaurant_capacity * (ticket_window + 1))
+        self.tables = region(table_capacity * _TABLE_WORDS)
+        self.table_keys = region(self.table_hash_size)
+        self.table_slots = region(self.table_hash_size)
+        self.words = offset
+
+    @property
+    def size(self) -> int:
+        return self.words * _WORD
+
+    # 建立時要填成 _EMPTY 的區段 (其餘為 0)
+    def empty_regions(self):
+        return (
+            (self.user_keys, self.user_hash_size),
+            (self.restaurant_keys, self.restaurant_hash_size),
+            (self.rings, self.restaurant_capacity * self.ticket_window),
+            (self.table_keys, self.table_hash_size),
+        )
+
+
+class SharedQueueState:
+    """
+    一個 worker 對 shared memory segment 的連線，三個 SharedMemory*Repository 共用。
+    資料的讀寫都要持有 lock (跨 process 的資料鎖)；只讀取單一 word 的查詢不需要。
+    """
+    def __init__(self, segment: SharedMemory, lock_file: _LockFile, layout: _Layout):
+        self.segment = segment
+        self.name = segment.name
+        self.layout = layout
+        self.words = segment.buf.cast('q')
+        self.lock_file = lock_file
+        self.lock = lock_file.range_lock(_DATA_LOCK_OFFSET)
+        self.restaurant_locks = InterProcessStripedLock(lock_file, RESTAURANT_LOCK_BASE)
+        self.user_locks = InterProcessStripedLock(lock_file, USER_LOCK_BASE)
+
+    @classmethod
+    def open(
+        cls,
+        name: str,
+        queue_capacity: int = 100_000,
+        restaurant_capacity: int = 256,
+        ticket_window: int = 4096,
+        table_capacity: int = 4096,
+        lock_path: Optional[str] = None,
+        seed: Optional[Dict[str, object]] = None
+    ) -> "SharedQueueState":
+        """
+        連上名為 name 的 segment；不存在時 (第一個啟動的 worker) 依容量建立並寫入 seed。
+        已存在的 segment 以其 header 中的容量為準，容量參數只在建立時使用。
+        seed 為 {"runtime": ..., "tables": ..., "labels": ...}，格式同記憶體 Repository 的 export_state()。
+        """
+        lock_file = _LockFile.for_path(lock_path or os.path.join(tempfile.gettempdir(), f"{name}.lock"))
+        # 建立與初始化期間持有 init 鎖，其他 worker 會等到資料完整才連上
+        with lock_file.range_lock(_INIT_LOCK_OFFSET):
+            try:
+                segment = _open_segment(name, create=False)
+            except FileNotFoundError:
+                layout = _Layout(queue_capacity, restaurant_capacity, ticket_window, table_capacity)
+                segment = _open_segment(name, create=True, size=layout.size)
+            state = cls._attach(segment, lock_file)
+            if state is None:
+                # 新建立的 segment，或建立者在初始化途中結束
+                layout = _Layout(queue_capacity, restaurant_capacity, ticket_window, table_capacity)
+                if segment.size < layout.size:
+                    segment.close()
+                    raise ValueError(f"shared memory segment {name} is smaller than the requested capacity")
+                state = cls(segment, lock_file, layout)
+                state._initialize(seed or {})
+            return state
+
+    @classmethod
+    def _attach(cls, segment: SharedMemory, lock_file: _LockFile) -> Optional["SharedQueueState"]:
+        header = segment.buf.cast('q')
+        try:
+            if header[_H_MAGIC] != SHM_MAGIC or header[_H_VERSION] != SHM_VERSION or not header[_H_READY]:
+                return None
+            layout = _Layout(header[_H_QUEUE_CAP], header[_H_RESTAURANT_CAP], header[_H_WINDOW], header[_H_TABLE_CAP])
+        finally:
+            header.release()
+        return cls(segment, lock_file, layout)
+
+    def _initialize(self, seed: Dict[str, object]) -> None:
+        layout, words = self.layout, self.words
+        words[0:layout.words] = array('q', [0]) * layout.words
+        for start, count in layout.empty_regions():
+            words[start:start + count] = array('q', [_EMPTY]) * count
+        words[_H_QUEUE_CAP] = layout.queue_capacity
+        words[_H_RESTAURANT_CAP] = layout.restaurant_capacity
+        words[_H_WINDOW] = layout.ticket_window
+        words[_H_TABLE_CAP] = layout.table_capacity
+        words[_H_ID_COUNTER] = 1
+        # 重新建立 segment 時版本號從 0 開始，以 epoch 區分 (ETag)
+        words[_H_EPOCH] = int.from_bytes(os.urandom(4), "little")
+
+        runtime = seed.get("runtime", array('q'))
+        for i in range(0, len(runtime), 5):
+            restaurant_id, current_ticket_number, next_ticket_number, average_wait_time, table_number = runtime[i:i + 5]
+            slot = self.restaurant_slot(restaurant_id, create=True)
+            words[slot + _R_CURRENT] = current_ticket_number
+            words[slot + _R_NEXT] = next_ticket_number
+            words[slot + _R_AVG_WAIT] = average_wait_time
+            words[slot + _R_TABLE_NUMBER] = table_number
+        tables, labels = seed.get("tables", array('q')), seed.get("labels", [])
+        for i, label in enumerate(labels):
+            self._insert_table(*tables[i * 5:i * 5 + 5], label)
+
+        words[_H_VERSION] = SHM_VERSION
+        words[_H_MAGIC] = SHM_MAGIC
+        words[_H_READY] = 1
+
+    def close(self) -> None:
+        self.words.release()
+        self.segment.close()
+
+    def destroy(self) -> None:
+        """刪除 segment (所有 worker 都停止後才呼叫，例如測試結束或重設資料)"""
+        name = self.segment._name
+        self.close()
+        if sys.version_info < (3, 13):
+            # unlink() 會向 resource_tracker 取消登記，先登記回去以免它回報錯誤
+            resource_tracker.register(name, "shared_memory")
+        self.segment.unlink()
+
+    # --- open addressing hash (linear probing)，key 為 _EMPTY 表示空位 ---
+    @staticmethod
+    def _home(key: int, size: int) -> int:
+        return ((key * _GOLDEN) & _MASK64) >> (64 - size.bit_length() + 1)
+
+    def _hash_find(self, keys: int, size: int, key: int) -> int:
+        """回傳 key 所在的位置，不存在時回傳 -1"""
+        words, mask = self.words, size - 1
+        i = self._home(key, size)
+        while True:
+            current = words[keys + i]
+            if current == key:
+                return i
+            if current == _EMPTY:
+                return -1
+            i = (i + 1) & mask
+
+    def _hash_insert(self, keys: int, values: int, size: int, key: int, value: int) -> None:
+        words, mask = self.words, size - 1
+        i = self._home(key, size)
+        while words[keys + i] != _EMPTY and words[keys + i] != key:
+            i = (i + 1) & mask
+        # 先寫 value 再寫 key：不持有鎖的讀取只要看到 key，value 就已經是完整的
+        words[values + i] = value
+        words[keys + i] = key
+
+    def _hash_delete(self, keys: int, values: int, size: int, i: int) -> None:
+        """backward shift 刪除：把後面因碰撞而往後放的 key 往前移，不留墓碑"""
+        words, mask = self.words, size - 1
+        j = i
+        while True:
+            j = (j + 1) & mask
+            key = words[keys + j]
+            if key == _EMPTY:
+                break
+            home = self._home(key, size)
+            # home 在 (i, j] 之間 (考慮繞回) 時這個 key 不能移到 i
+            if (i <= j and i < home <= j) or (i > j and (home > i or home <= j)):
+                continue
+            words[values + i] = words[values + j]
+            words[keys + i] = key
+            i = j
+        words[keys + i] = _EMPTY
+
+    # --- 餐廳槽位 ---
+    def restaurant_slot(self, restaurant_id: int, create: bool = False) -> int:
+        """回傳餐廳槽位在 words 中的起點；不存在且 create=False 時回傳 -1 (create 需持有 lock)"""
+        layout = self.layout
+        i = self._hash_find(layout.restaurant_keys, layout.restaurant_hash_size, restaurant_id)
+        if i >= 0:
+            return self.words[layout.restaurant_slots + i]
+        if not create:
+            return -1
+        count = self.words[_H_RESTAURANT_COUNT]
+        if count >= layout.restaurant_capacity:
+            raise SharedMemoryFullError(f"shared memory holds at most {layout.restaurant_capacity} restaurants")
+        slot = layout.restaurants + count * _RESTAURANT_WORDS
+        words = self.words
+        words[slot + _R_ID] = restaurant_id
+        words[slot + _R_NEXT] = 1
+        words[slot + _R_AVG_WAIT] = DEFAULT_METRICS.average_wait_time
+        words[slot + _R_TABLE_NUMBER] = DEFAULT_METRICS.table_number
+        words[slot + _R_FIRST_TABLE] = _EMPTY
+        words[_H_RESTAURANT_COUNT] = count + 1
+        self._hash_insert(layout.restaurant_keys, layout.restaurant_slots, layout.restaurant_hash_size, restaurant_id, slot)
+        return slot
+
+    def restaurant_slots(self) -> List[int]:
+        layout = self.layout
+        return [layout.restaurants + i * _RESTAURANT_WORDS for i in range(self.words[_H_RESTAURANT_COUNT])]
+
+    # --- 號碼環與 Fenwick tree ---
+    def _ring(self, slot: int) -> int:
+        index = (slot - self.layout.restaurants) // _RESTAURANT_WORDS
+        return self.layout.rings + index * self.layout.ticket_window
+
+    def _tree(self, slot: int) -> int:
+        index = (slot - self.layout.restaurants) // _RESTAURANT_WORDS
+        return self.layout.trees + index * (self.layout.ticket_window + 1)
+
+    def _tree_add(self, tree: int, position: int, delta: int) -> None:
+        words, window = self.words, self.layout.ticket_window
+        i = position + 1
+        while i <= window:
+            words[tree + i] += delta
+            i += i & -i
+
+    def _tree_prefix(self, tree: int, position: int) -> int:
+        """環上位置 [0, position) 的人數"""
+        words, total = self.words, 0
+        while position > 0:
+            total += words[tree + position]
+            position -= position & -position
+        return total
+
+    def advance_head(self, slot: int) -> int:
+        """把 head 推進到第一個還在排隊的號碼並回傳 (需持有 lock)"""
+        words, window = self.words, self.layout.ticket_window
+        ring, head, tail = self._ring(slot), words[slot + _R_HEAD], words[slot + _R_TAIL]
+        while head < tail and words[ring + head % window] == _EMPTY:
+            head += 1
+        words[slot + _R_HEAD] = head
+        return head
+
+    def count_before(self, slot: int, ticket_number: int) -> int:
+        """號碼小於 ticket_number 的人數 (需持有 lock)"""
+        words, window = self.words, self.layout.ticket_window
+        head = words[slot + _R_HEAD]
+        end = min(ticket_number, words[slot + _R_TAIL])
+        if end <= head:
+            return 0
+        if end - head >= window:
+            return words[slot + _R_COUNT]
+        tree, start, stop = self._tree(slot), head % window, end % window
+        if start < stop:
+            return self._tree_prefix(tree, stop) - self._tree_prefix(tree, start)
+        return words[slot + _R_COUNT] - self._tree_prefix(tree, start) + self._tree_prefix(tree, stop)
+
+    # --- 排隊資料 (需持有 lock) ---
+    def find_user_row(self, user_id: int) -> int:
+        layout = self.layout
+        i = self._hash_find(layout.user_keys, layout.user_hash_size, user_id)
+        return _EMPTY if i < 0 else self.words[layout.user_rows + i]
+
+    def insert_entry(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        layout, words = self.layout, self.words
+        # 同一位使用者只能有一筆 (跨 process 的最後防線，Service 層已先檢查)
+        if self.find_user_row(user_id) != _EMPTY:
+            return False
+        if words[_H_FREE_COUNT] == 0 and words[_H_HIGH_WATER] >= layout.queue_capacity:
+            raise SharedMemoryFullError(f"shared memory holds at most {layout.queue_capacity} queue entries")
+        slot = self.restaurant_slot(restaurant_id, create=True)
+        window = layout.ticket_window
+        if words[slot + _R_COUNT] == 0:
+            head, tail = ticket_number, ticket_number + 1
+        else:
+            head = min(self.advance_head(slot), ticket_number)
+            tail = max(words[slot + _R_TAIL], ticket_number + 1)
+            if tail - head > window:
+                raise SharedMemoryFullError(f"restaurant {restaurant_id} has more than {window} tickets outstanding")
+        ring = self._ring(slot)
+        position = ticket_number % window
+        if words[ring + position] != _EMPTY:
+            return False
+
+        free_count = words[_H_FREE_COUNT]
+        if free_count:
+            row = words[layout.free_rows + free_count - 1]
+            words[_H_FREE_COUNT] = free_count - 1
+        else:
+            row = words[_H_HIGH_WATER]
+            words[_H_HIGH_WATER] = row + 1
+        words[layout.queue_ids + row] = words[_H_ID_COUNTER]
+        words[layout.restaurant_ids + row] = restaurant_id
+        words[layout.user_ids + row] = user_id
+        words[layout.ticket_numbers + row] = ticket_number
+        words[_H_ID_COUNTER] += 1
+
+        words[ring + position] = row
+        self._tree_add(self._tree(slot), position, 1)
+        words[slot + _R_HEAD] = head
+        words[slot + _R_TAIL] = tail
+        words[slot + _R_COUNT] += 1
+        words[slot + _R_QUEUE_VERSION] += 1
+        self._hash_insert(layout.user_keys, layout.user_rows, layout.user_hash_size, user_id, row)
+        return True
+
+    def delete_entry(self, restaurant_id: int, user_id: int) -> bool:
+        layout, words = self.layout, self.words
+        i = self._hash_find(layout.user_keys, layout.user_hash_size, user_id)
+        if i < 0:
+            return False
+        row = words[layout.user_rows + i]
+        if words[layout.restaurant_ids + row] != restaurant_id:
+            return False
+        self._hash_delete(layout.user_keys, layout.user_rows, layout.user_hash_size, i)
+
+        slot = self.restaurant_slot(restaurant_id)
+        position = words[layout.ticket_numbers + row] % layout.ticket_window
+        words[self._ring(slot) + position] = _EMPTY
+        self._tree_add(self._tree(slot), position, -1)
+        words[slot + _R_COUNT] -= 1
+        if words[slot + _R_COUNT] == 0:
+            words[slot + _R_HEAD] = words[slot + _R_TAIL]
+        words[slot + _R_QUEUE_VERSION] += 1
+
+        words[layout.user_ids + row] = _EMPTY
+        words[layout.free_rows + words[_H_FREE_COUNT]] = row
+        words[_H_FREE_COUNT] += 1
+        return True
+
+    def entry(self, row: int) -> QueueEntity:
+        layout, words = self.layout, self.words
+        return QueueEntity(
+            queue_id=words[layout.queue_ids + row],
+            restaurant_id=words[layout.restaurant_ids + row],
+            user_id=words[layout.user_ids + row],
+            ticket_number=words[layout.ticket_numbers + row]
+        )
+
+    def ring_row(self, slot: int, ticket_number: int) -> int:
+        """號碼對應的 row；號碼不在排隊中時回傳 _EMPTY"""
+        words = self.words
+        if not words[slot + _R_HEAD] <= ticket_number < words[slot + _R_TAIL]:
+            return _EMPTY
+        return words[self._ring(slot) + ticket_number % self.layout.ticket_window]
+
+    # --- 座位 (需持有 lock) ---
+    def table_slot(self, table_id: int) -> int:
+        layout = self.layout
+        i = self._hash_find(layout.table_keys, layout.table_hash_size, table_id)
+        return -1 if i < 0 else self.words[layout.table_slots + i]
+
+    def _insert_table(self, table_id: int, restaurant_id: int, x: int, y: int, status: int, label: str) -> None:
+        layout, words = self.layout, self.words
+        count = words[_H_TABLE_COUNT]
+        if count >= layout.table_capacity:
+            raise SharedMemoryFullError(f"shared memory holds at most {layout.table_capacity} tables")
+        encoded = label.encode("utf-8")
+        if len(encoded) > _LABEL_BYTES:
+            raise ValueError(f"table label {label!r} is longer than {_LABEL_BYTES} bytes")
+        table = layout.tables + count * _TABLE_WORDS
+        words[table + _T_ID] = table_id
+        words[table + _T_RESTAURANT] = restaurant_id
+        words[table + _T_X] = x
+        words[table + _T_Y] = y
+        words[table + _T_STATUS] = status
+        words[table + _T_NEXT] = _EMPTY
+        label_start = (table + _T_LABEL) * _WORD
+        self.segment.buf[label_start:label_start + len(encoded)] = encoded
+        words[_H_TABLE_COUNT] = count + 1
+        self._hash_insert(layout.table_keys, layout.table_slots, layout.table_hash_size, table_id, table)
+
+        # 接在同餐廳 linked list 的尾端，維持加入順序
+        restaurant = self.restaurant_slot(restaurant_id, create=True)
+        if words[restaurant + _R_FIRST_TABLE] == _EMPTY:
+            words[restaurant + _R_FIRST_TABLE] = table
+        else:
+            last = words[restaurant + _R_FIRST_TABLE]
+            while words[last + _T_NEXT] != _EMPTY:
+                last = words[last + _T_NEXT]
+            words[last + _T_NEXT] = table
+        if TABLE_STATUS_NAMES[status] == "empty":
+            words[restaurant + _R_EMPTY_TABLES] += 1
+
+    def table_entity(self, table: int) -> TableEntity:
+        words = self.words
+        label_start = (table + _T_LABEL) * _WORD
+        label = bytes(self.segment.buf[label_start:label_start + _LABEL_BYTES]).rstrip(b"\0").decode("utf-8")
+        return TableEntity(
+            table_id=words[table + _T_ID],
+            restaurant_id=words[table + _T_RESTAURANT],
+            label=label,
+            x=words[table + _T_X],
+            y=words[table + _T_Y],
+            status=TABLE_STATUS_NAMES[words[table + _T_STATUS]]
+        )
+
+    def tables_of(self, restaurant_slot: int) -> List[int]:
+        words, tables = self.words, []
+        table = words[restaurant_slot + _R_FIRST_TABLE]
+        while table != _EMPTY:
+            tables.append(table)
+            table = words[table + _T_NEXT]
+        return tables
+
+    def set_table_status(self, table: int, status: str) -> None:
+        words = self.words
+        old_code, new_code = words[table + _T_STATUS], TABLE_STATUS_CODES[status]
+        restaurant = self.restaurant_slot(words[table + _T_RESTAURANT])
+        if old_code != new_code:
+            if TABLE_STATUS_NAMES[old_code] == "empty":
+                words[restaurant + _R_EMPTY_TABLES] -= 1
+            elif status == "empty":
+                words[restaurant + _R_EMPTY_TABLES] += 1
+            words[table + _T_STATUS] = new_code
+        words[restaurant + _R_TABLE_VERSION] += 1
+
+    # --- 其他 worker 的異動偵測 ---
+    def versions(self) -> Dict[int, tuple]:
+        """每間餐廳的 (排隊版本, 座位版本)；每次異動都會遞增"""
+        words = self.words
+        return {
+            words[slot + _R_ID]: (words[slot + _R_QUEUE_VERSION], words[slot + _R_TABLE_VERSION])
+            for slot in self.restaurant_slots()
+        }
+
+
+class SharedMemoryQueueRepository(IQueueRepository):
+    def __init__(self, state: SharedQueueState):
+        self._state = state
+
+    def add_to_queue(self, restaurant_id: int, user_id: int, ticket_number: int) -> bool:
+        with self._state.lock:
+            added = self._state.insert_entry(restaurant_id, user_id, ticket_number)
+        if added:
+            record_undo(partial(self.remove_from_queue, restaurant_id, user_id))
+        return added
+
+    def remove_from_queue(self, restaurant_id: int, user_id: int) -> bool:
+        with self._state.lock:
+            row = self._state.find_user_row(user_id)
+            ticket_number = None if row == _EMPTY else self._state.words[self._state.layout.ticket_numbers + row]
+            removed = self._state.delete_entry(restaurant_id, user_id)
+        if removed:
+            record_undo(partial(self.add_to_queue, restaurant_id, user_id, ticket_number))
+        return removed
+
+    def get_user_current_queue(self, user_id: int) -> Optional[QueueEntity]:
+        with self._state.lock:
+            row = self._state.find_user_row(user_id)
+            return None if row == _EMPTY else self._state.entry(row)
+
+    def get_user_current_queue_by_restaurantId_and_ticketNumber(self, restaurant_id: int, ticket_number: int) -> Optional[QueueEntity]:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id)
+            if slot < 0:
+                return None
+            row = self._state.ring_row(slot, ticket_number)
+            return None if row == _EMPTY else self._state.entry(row)
+
+    def get_total_waiting(self, restaurant_id: int) -> int:
+        slot = self._state.restaurant_slot(restaurant_id)
+        return 0 if slot < 0 else self._state.words[slot + _R_COUNT]
+
+    def get_total_waiting_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return {restaurant_id: self.get_total_waiting(restaurant_id) for restaurant_id in restaurant_ids}
+
+    def get_next_queue_to_call(self, restaurant_id: int) -> Optional[int]:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id)
+            if slot < 0 or self._state.words[slot + _R_COUNT] == 0:
+                return None
+            return self._state.advance_head(slot)
+
+    def get_people_ahead(self, restaurant_id: int, user_id: int) -> int:
+        state = self._state
+        with state.lock:
+            row = state.find_user_row(user_id)
+            if row == _EMPTY or state.words[state.layout.restaurant_ids + row] != restaurant_id:
+                return 0
+            slot = state.restaurant_slot(restaurant_id)
+            return state.count_before(slot, state.words[state.layout.ticket_numbers + row])
+
+
+class SharedMemoryQueueRuntimeRepository(IQueueRuntimeRepository):
+    def __init__(self, state: SharedQueueState):
+        self._state = state
+
+    def _read(self, restaurant_id: int, field: int, default: int) -> int:
+        slot = self._state.restaurant_slot(restaurant_id)
+        return default if slot < 0 else self._state.words[slot + field]
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        return self._read(restaurant_id, _R_CURRENT, 0)
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            record_undo(partial(self.set_current_ticket_number, restaurant_id, self._state.words[slot + _R_CURRENT]))
+            self._state.words[slot + _R_CURRENT] = ticket_number
+            self._state.words[slot + _R_QUEUE_VERSION] += 1
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        return self._read(restaurant_id, _R_NEXT, 1)
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            self._state.words[slot + _R_NEXT] += 1
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            ticket_number = self._state.words[slot + _R_NEXT]
+            self._state.words[slot + _R_NEXT] = ticket_number + 1
+        return ticket_number
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            start = self._state.words[slot + _R_NEXT]
+            self._state.words[slot + _R_NEXT] = start + size
+        return start, start + size
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            if self._state.words[slot + _R_NEXT] != end:
+                return False
+            self._state.words[slot + _R_NEXT] = start
+            return True
+
+    def advance_next_ticket_number(self, restaurant_id: int, next_ticket_number: int) -> None:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id, create=True)
+            self._state.words[slot + _R_NEXT] = max(self._state.words[slot + _R_NEXT], next_ticket_number)
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        slot = self._state.restaurant_slot(restaurant_id)
+        if slot < 0:
+            return DEFAULT_METRICS
+        words = self._state.words
+        return RestaurantMetrics(average_wait_time=words[slot + _R_AVG_WAIT], table_number=words[slot + _R_TABLE_NUMBER])
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return {restaurant_id: self.get_metrics(restaurant_id) for restaurant_id in restaurant_ids}
+
+
+class SharedMemoryTableRepository(ITableRepository):
+    def __init__(self, state: SharedQueueState):
+        self._state = state
+
+    def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
+        with self._state.lock:
+            slot = self._state.restaurant_slot(restaurant_id)
+            if slot < 0:
+                return []
+            return [self._state.table_entity(table) for table in self._state.tables_of(slot)]
+
+    def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
+        with self._state.lock:
+            table = self._state.table_slot(table_id)
+            return None if table < 0 else self._state.table_entity(table)
+
+    def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
+        with self._state.lock:
+            table = self._state.table_slot(table_id)
+            if table < 0:
+                return False
+            record_undo(partial(self.update_status, table_id, self._state.table_entity(table).status, 0))
+            self._state.set_table_status(table, new_table_status)
+            return True
+
+    def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
+        slot = self._state.restaurant_slot(restaurant_id)
+        return 0 if slot < 0 else self._state.words[slot + _R_EMPTY_TABLES]
+
+    def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        return {restaurant_id: self.get_restaurant_remaining_table(restaurant_id) for restaurant_id in restaurant_ids}
+
+
+class SharedMemoryRestaurantVersionRepository(IRestaurantVersionRepository):
+    """
+    每間餐廳的 _R_QUEUE_VERSION / _R_TABLE_VERSION，與資料在同一個資料鎖內遞增，所有 worker 共用。
+    只讀取單一 word，不需要持有鎖。
+    """
+    def __init__(self, state: SharedQueueState):
+        self._state = state
+
+    def get_epoch(self) -> str:
+        return f"{self._state.words[_H_EPOCH]:08x}"
+
+    def get_versions(self, restaurant_id: int) -> Tuple[int, int]:
+        slot = self._state.restaurant_slot(restaurant_id)
+        if slot < 0:
+            return (0, 0)
+        words = self._state.words
+        return (words[slot + _R_QUEUE_VERSION], words[slot + _R_TABLE_VERSION])
+
+    def get_all_versions(self) -> Dict[int, Tuple[int, int]]:
+        return self._state.versions()
+
+
+class SharedMemoryChangeWatcher(RestaurantChangeWatcher):
+    """RestaurantChangeWatcher 比對 shared memory 中每間餐廳的版本號"""
+    def __init__(self, state: SharedQueueState, event_bus: RestaurantEventBus, interval: float = 0.05):
+        super().__init__(SharedMemoryRestaurantVersionRepository(state), event_bus, interval)
@@ -0,0 +1,218 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+    from app.repositories.journal import Journal
+
+# --- 記憶體資料的二進位 snapshot ---
+# 檔案結構 (所有區段都對齊 8 bytes)：
+#   header     magic "QSNP" | version (uint32) | journal_sequence (int64) | section 數 (uint32) | byteorder (4 bytes)
+#   目錄       每個 section：name (32 bytes) | kind (uint8) | offset (int64) | count (int64)
+#   資料       INT64   -> count 個 int64 (直接就是 array('q') 的內容)
+#              STRINGS -> 字串表：count + 1 個 int64 的邊界 (第 i 個字串為 [bounds[i], bounds[i+1]))，接著 UTF-8 bytes
+# 載入時以 mmap 開檔，每個 section 用 array.frombytes 整塊複製，不逐筆解析。
+
+SNAPSHOT_MAGIC = b"QSNP"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<4sIqI4s")
+_SECTION = struct.Struct("<32sB7xqq")
+_BYTEORDER = {"little": b"le\0\0", "big": b"be\0\0"}
+
+KIND_INT64 = 1
+KIND_STRINGS = 2
+
+SectionValue = Union[array, List[str]]
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def encode_snapshot(sections: Dict[str, SectionValue], journal_sequence: int = 0) -> Iterator[bytes]:
+    """依序產生 snapshot 的各個片段 (寫檔或送到 socket 時不需要先組成一整塊 bytes)"""
+    payloads: List[Tuple[str, int, int, List[bytes]]] = []
+    for name, value in sections.items():
+        if isinstance(value, array):
+            payloads.append((name, KIND_INT64, len(value), [value.tobytes()]))
+        else:
+            encoded = [text.encode("utf-8") for text in value]
+            bounds = array('q', [0])
+            for item in encoded:
+                bounds.append(bounds[-1] + len(item))
+            payloads.append((name, KIND_STRINGS, len(encoded), [bounds.tobytes(), b"".join(encoded)]))
+
+    offset = _HEADER.size + _SECTION.size * len(payloads)
+    directory, blocks = [], []
+    for name, kind, count, parts in payloads:
+        offset = _aligned(offset)
+        directory.append(_SECTION.pack(name.encode("ascii"), kind, offset, count))
+        blocks.append((offset, parts))
+        offset += sum(len(part) for part in parts)
+
+    yield _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, journal_sequence, len(payloads), _BYTEORDER[sys.byteorder])
+    yield b"".join(directory)
+    position = _HEADER.size + _SECTION.size * len(payloads)
+    for block_offset, parts in blocks:
+        yield b"\0" * (block_offset - position)
+        position = block_offset
+        for part in parts:
+            yield part
+            position += len(part)
+
+
+def write_snapshot(path: str, sections: Dict[str, SectionValue], journal_sequence: int = 0) -> None:
+    """
+    寫入 snapshot；先寫到暫存檔並 fsync，再以 os.replace 原子地取代舊檔，
+    寫到一半當機時舊的 snapshot 仍然完整。
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for part in encode_snapshot(sections, journal_sequence):
+            f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def decode_snapshot(buffer) -> Tuple[int, Dict[str, SectionValue]]:
+    """
+    從 buffer (mmap / bytes / bytearray) 解析 snapshot，回傳 (journal_sequence, sections)；
+    每個 section 以 array.frombytes 整塊複製。
+    """
+    magic, version, journal_sequence, section_count, byteorder = _HEADER.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"Not a queue snapshot (version {SNAPSHOT_VERSION})")
+    swap = byteorder != _BYTEORDER[sys.byteorder]
+    sections: Dict[str, SectionValue] = {}
+    with memoryview(buffer) as view:
+        for i in range(section_count):
+            raw_name, kind, offset, count = _SECTION.unpack_from(buffer, _HEADER.size + i * _SECTION.size)
+            name = raw_name.rstrip(b"\0").decode("ascii")
+            values = array('q')
+            length = count + 1 if kind == KIND_STRINGS else count
+            values.frombytes(view[offset:offset + length * values.itemsize])
+            if swap:
+                values.byteswap()
+            if kind == KIND_INT64:
+                sections[name] = values
+                continue
+            start = offset + len(values) * values.itemsize
+            text = bytes(view[start:start + values[-1]])
+            sections[name] = [text[begin:end].decode("utf-8") for begin, end in zip(values, values[1:])]
+    return journal_sequence, sections
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, SectionValue]]:
+    """以 mmap 讀取 snapshot 檔，回傳 (journal_sequence, sections)"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        try:
+            return decode_snapshot(mm)
+        except ValueError:
+            raise ValueError(f"{path} is not a queue snapshot (version {SNAPSHOT_VERSION})")
+
+
+def export_memory_sections(
+    queue_repo: "MemoryQueueRepository",
+    runtime_repo: "MemoryQueueRuntimeRepository",
+    table_repo: "MemoryTableRepository"
+) -> Dict[str, SectionValue]:
+    """三個記憶體 Repository 的 export_state()，以 queue. / runtime. / table. 為前綴合併"""
+    sections: Dict[str, SectionValue] = {}
+    for prefix, repo in (("queue", queue_repo), ("runtime", runtime_repo), ("table", table_repo)):
+        for name, value in repo.export_state().items():
+            sections[f"{prefix}.{name}"] = value
+    return sections
+
+
+def import_memory_sections(
+    sections: Dict[str, SectionValue],
+    queue_repo: "MemoryQueueRepository",
+    runtime_repo: "MemoryQueueRuntimeRepository",
+    table_repo: "MemoryTableRepository"
+) -> None:
+    for prefix, repo in (("queue", queue_repo), ("runtime", runtime_repo), ("table", table_repo)):
+        repo.import_state({
+            name[len(prefix) + 1:]: value for name, value in sections.items() if name.startswith(prefix + ".")
+        })
+
+
+def save_memory_snapshot(
+    path: str,
+    queue_repo: "MemoryQueueRepository",
+    runtime_repo: "MemoryQueueRuntimeRepository",
+    table_repo: "MemoryTableRepository",
+    journal: Optional["Journal"] = None
+) -> int:
+    """
+    把三個記憶體 Repository 寫成一份 snapshot，回傳它涵蓋到的 journal 序號。
+
+    journal 序號要在複製資料「之前」取得：每筆紀錄都是異動完成後才 append，
+    所以序號之前的紀錄一定已反映在複製的資料中；之後的紀錄可能也已反映，
+    重播 (replay_journal) 時重複套用結果相同。
+    """
+    journal_sequence = journal.sequence if journal is not None else 0
+    write_snapshot(path, export_memory_sections(queue_repo, runtime_repo, table_repo), journal_sequence)
+    return journal_sequence
+
+
+def load_memory_snapshot(
+    path: str,
+    queue_repo: "MemoryQueueRepository",
+    runtime_repo: "MemoryQueueRuntimeRepository",
+    table_repo: "MemoryTableRepository"
+) -> int:
+    """以 snapshot 取代三個記憶體 Repository 的資料，回傳接著要從哪一筆 journal 紀錄開始重播"""
+    journal_sequence, sections = read_snapshot(path)
+    import_memory_sections(sections, queue_repo, runtime_repo, table_repo)
+    return journal_sequence
+
+
+class PeriodicSnapshotter:
+    """背景 thread 每隔 interval 秒寫一次 snapshot；stop() 時再寫最後一次"""
+    def __init__(
+        self,
+        path: str,
+        queue_repo: "MemoryQueueRepository",
+        runtime_repo: "MemoryQueueRuntimeRepository",
+        table_repo: "MemoryTableRepository",
+        interval: float = 60.0,
+        journal: Optional["Journal"] = None
+    ):
+        self.path = path
+        self.queue_repo = queue_repo
+        self.runtime_repo = runtime_repo
+        self.table_repo = table_repo
+        self.interval = interval
+        self.journal = journal
+        self._stopped = threading.Event()
+        # 定時寫入與 stop() 的最後一次寫入不能同時進行 (共用同一個暫存檔)
+        self._save_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def save_now(self) -> int:
+        with self._save_lock:
+            return save_memory_snapshot(self.path, self.queue_repo, self.runtime_repo, self.table_repo, self.journal)
+
+    def start(self) -> None:
+        # 啟動時先寫一次，讓 snapshot 與目前的 journal 對齊 (例如 journal 檔案被換掉時)
+        self.save_now()
+        self._thread = threading.Thread(target=self._run, name="memory-snapshot", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.save_now()
+
+    def stop(self) -> None:
+        if self._stopped.is_set():
+            return
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.save_now()
@@ -0,0 +1,175 @@
+import atexit
+import os
+from app.domain.events import RestaurantEventBus
+from app.repositories.sqlite_db import SEED_QUEUE_RUNTIME, SQLiteDatabase, SQLiteUnitOfWork
+from app.repositories.map_repo import SQLiteMapRepository
+from app.repositories.queue_repo import SQLiteQueueRepository, SQLiteQueueRuntimeRepository
+from app.repositories.table_repo import SQLiteTableRepository
+from app.repositories.resp_client import RespClient
+from app.repositories.redis_queue_repo import RedisQueueRepository, RedisQueueRuntimeRepository
+from app.repositories.leased_ticket_repo import LeasedTicketRuntimeRepository
+from app.repositories.write_behind_repo import WriteBehindQueueRuntimeRepository
+from app.repositories.cached_map_repo import CachedMapRepository
+from app.repositories.version_repo import SQLiteRestaurantVersionRepository
+from app.services.status_projection import RestaurantStatusProjection
+from app.services.resource_versions import ResourceVersions
+from app.services.queue_notifier import QueueChangeNotifier
+from app.services.queue_response_cache import QueueResponseCache
+from app.services.group_commit import GroupCommitter
+from app.services.change_watcher import RestaurantChangeWatcher
+from app.repositories.replication import ReplicationNode
+
+# --- 組合包：USE_MOCK_DB=false 時使用的 SQLite Repository 與 Service 工廠函數 ---
+# sqlite3 是阻塞式 I/O，因此這裡提供同步 Service，Router 會把它們丟到 thread pool 執行
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "queue.db"))
+
+_db = SQLiteDatabase(SQLITE_DB_PATH)
+_db.init_schema()
+
+_sqlite_map_repo = SQLiteMapRepository(_db)
+# 餐廳基本資料幾乎不會改變：每個排隊 / 座位 Request 都會查一次，先經過 LRU 快取 (MAP_CACHE_SIZE=0 關閉)
+MAP_CACHE_SIZE = int(os.getenv("MAP_CACHE_SIZE", "1024"))
+MAP_CACHE_TTL_S = float(os.getenv("MAP_CACHE_TTL_S", "60"))
+_sqlite_map_cache = (
+    CachedMapRepository(_sqlite_map_repo, max_size=MAP_CACHE_SIZE, ttl=MAP_CACHE_TTL_S)
+    if MAP_CACHE_SIZE > 0 else None
+)
+if _sqlite_map_cache is not None:
+    _sqlite_map_repo = _sqlite_map_cache
+_sqlite_table_repo = SQLiteTableRepository(_db)
+# 多個 Repository 的寫入 (入座、加入排隊) 在同一個交易中 commit
+_sqlite_unit_of_work = SQLiteUnitOfWork(_db)
+# group commit：GROUP_COMMIT_MS > 0 時，同時加入排隊的寫入等待最多這麼久，集中成一個交易 commit
+GROUP_COMMIT_MS = float(os.getenv("GROUP_COMMIT_MS", "0"))
+GROUP_COMMIT_MAX_BATCH = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "64"))
+_sqlite_group_committer = (
+    GroupCommitter(_sqlite_unit_of_work, max_delay=GROUP_COMMIT_MS / 1000, max_batch_size=GROUP_COMMIT_MAX_BATCH)
+    if GROUP_COMMIT_MS > 0 else None
+)
+
+# 多節點部署：設定 REDIS_URL 時，排隊與叫號狀態改放在共用的 Redis (sorted set)，
+# 餐廳與座位資料仍在 SQLite
+REDIS_URL = os.getenv("REDIS_URL")
+if REDIS_URL:
+    _redis_client = RespClient.from_url(REDIS_URL)
+    _sqlite_queue_repo = RedisQueueRepository(_redis_client)
+    _sqlite_runtime_repo = RedisQueueRuntimeRepository(_redis_client)
+    _sqlite_runtime_repo.seed(SEED_QUEUE_RUNTIME)
+else:
+    _sqlite_queue_repo = SQLiteQueueRepository(_db)
+    _sqlite_runtime_repo = SQLiteQueueRuntimeRepository(_db)
+
+# 叫號計數器 write-behind：RUNTIME_WRITE_BEHIND_MS > 0 時，current / next_ticket_number 由記憶體回答，
+# 號碼牌一次在資料庫預先保留一段 (當機後計數器不會倒退)；入座時的叫號在同一個交易中直接寫入，
+# 交易外的叫號才每隔這麼久批次寫回。計數器快取在 process 內，只能單一 worker
+RUNTIME_WRITE_BEHIND_MS = float(os.getenv("RUNTIME_WRITE_BEHIND_MS", "0"))
+RUNTIME_WRITE_BEHIND_RESERVE = int(os.getenv("RUNTIME_WRITE_BEHIND_RESERVE", "64"))
+if RUNTIME_WRITE_BEHIND_MS > 0:
+    if REDIS_URL:
+        raise ValueError("RUNTIME_WRITE_BEHIND_MS cannot be combined with REDIS_URL")
+    _sqlite_runtime_repo = WriteBehindQueueRuntimeRepository(
+        _sqlite_runtime_repo,
+        flush_interval=RUNTIME_WRITE_BEHIND_MS / 1000,
+        ticket_reserve=RUNTIME_WRITE_BEHIND_RESERVE,
+        unit_of_work=_sqlite_unit_of_work
+    )
+    _sqlite_runtime_repo.start()
+    atexit.register(_sqlite_runtime_repo.close)
+
+# 號碼牌預借：多個 worker / 節點共用資料庫或 Redis 時，每次預借一段號碼在本地發號
+TICKET_LEASE_BLOCK = int(os.getenv("TICKET_LEASE_BLOCK", "0"))
+TICKET_LEASE_TTL_MS = int(os.getenv("TICKET_LEASE_TTL_MS", "1000"))
+if TICKET_LEASE_BLOCK > 0:
+    _sqlite_runtime_repo = LeasedTicketRuntimeRepository(
+        _sqlite_runtime_repo, block_size=TICKET_LEASE_BLOCK, lease_ttl=TICKET_LEASE_TTL_MS / 1000
+    )
+    atexit.register(_sqlite_runtime_repo.release_all)
+
+# 與記憶體版相同：排隊 / 座位變動時，透過 event bus 更新燈號、ETag 版本與推播
+_sqlite_event_bus = RestaurantEventBus()
+# 燈號投影、ETag 版本與排隊狀態回應快取都依賴 event bus 看到所有異動；REDIS_URL 時其他節點的異動不會經過這裡，
+# 沿用本地狀態會回傳舊燈號 / 304 / 舊回應，因此不使用 (MapService 每次重新計算燈號，Router 收到 None 時不做條件式 GET)
+_sqlite_status_projection = None if REDIS_URL else RestaurantStatusProjection(
+    queue_repo=_sqlite_queue_repo,
+    table_repo=_sqlite_table_repo,
+    queue_runtime_repo=_sqlite_runtime_repo
+)
+if _sqlite_status_projection is not None:
+    _sqlite_event_bus.subscribe(_sqlite_status_projection.handle)
+# 多個 worker 共用資料庫時彼此看不到對方的事件：排隊 / 座位的 ETag 與回應快取改用資料庫中的版本
+# (trigger 在同一個交易中遞增)，處理 Request 時讀取
+_sqlite_version_repo = SQLiteRestaurantVersionRepository(_db)
+_sqlite_resource_versions = None if REDIS_URL else ResourceVersions(
+    status_projection=_sqlite_status_projection, version_repo=_sqlite_version_repo
+)
+if _sqlite_resource_versions is not None:
+    _sqlite_event_bus.subscribe(_sqlite_resource_versions.handle)
+_sqlite_queue_response_cache = None if REDIS_URL else QueueResponseCache(version_repo=_sqlite_version_repo)
+if _sqlite_queue_response_cache is not None:
+    _sqlite_event_bus.subscribe(_sqlite_queue_response_cache.handle)
+# SSE / WebSocket 推播同樣只涵蓋經過本節點的異動 (REDIS_URL 時其他節點的異動不會推播)
+_sqlite_queue_notifier = QueueChangeNotifier()
+_sqlite_event_bus.subscribe(_sqlite_queue_notifier.handle)
+_sqlite_dashboard_notifier = QueueChangeNotifier(watch_tables=True)
+_sqlite_event_bus.subscribe(_sqlite_dashboard_notifier.handle)
+# 燈號投影與推播每隔 SQLITE_CHANGE_POLL_MS 比對資料庫中的版本，把其他 worker 的異動轉成本地事件 (0 關閉，只有單一 worker 時可關閉)
+SQLITE_CHANGE_POLL_MS = int(os.getenv("SQLITE_CHANGE_POLL_MS", "50"))
+_sqlite_change_watcher = None
+if not REDIS_URL and SQLITE_CHANGE_POLL_MS > 0:
+    _sqlite_change_watcher = RestaurantChangeWatcher(_sqlite_version_repo, _sqlite_event_bus, interval=SQLITE_CHANGE_POLL_MS / 1000)
+    _sqlite_change_watcher.start()
+    atexit.register(_sqlite_change_watcher.stop)
+
+# SQLite 模式的資料在資料庫中，不使用記憶體複寫
+_sqlite_replication_node = ReplicationNode()
+
+def get_sqlite_group_committer():
+    return _sqlite_group_committer
+
+def get_sqlite_map_cache():
+    return _sqlite_map_cache
+
+def get_sqlite_replication_node():
+    return _sqlite_replication_node
+
+def get_sqlite_resource_versions():
+    return _sqlite_resource_versions
+
+def get_sqlite_queue_notifier():
+    return _sqlite_queue_notifier
+
+def get_sqlite_dashboard_notifier():
+    return _sqlite_dashboard_notifier
+
+def get_sqlite_queue_service():
+    from app.services.queue_service import QueueService
+    return QueueService(
+        queue_repo=_sqlite_queue_repo,
+        queue_runtime_repo=_sqlite_runtime_repo,
+        map_repo=_sqlite_map_repo,
+        event_bus=_sqlite_event_bus,
+        unit_of_work=_sqlite_unit_of_work,
+        group_committer=_sqlite_group_committer,
+        response_cache=_sqlite_queue_response_cache
+    )
+
+def get_sqlite_map_service():
+    from app.services.map_service import MapService
+    return MapService(
+        map_repo=_sqlite_map_repo,
+        table_repo=_sqlite_table_repo,
+        queue_repo=_sqlite_queue_repo,
+        queue_runtime_repo=_sqlite_runtime_repo,
+        status_projection=_sqlite_status_projection
+    )
+
+def get_sqlite_table_service():
+    from app.services.table_service import TableService
+    return TableService(
+        table_repo=_sqlite_table_repo,
+        map_repo=_sqlite_map_repo,
+        queue_repo=_sqlite_queue_repo,
+        queue_runtime_repo=_sqlite_runtime_repo,
+        event_bus=_sqlite_event_bus,
+        unit_of_work=_sqlite_unit_of_work
+    )
@@ -0,0 +1,257 @@
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, List
+from app.interfaces.unit_of_work_interface import IUnitOfWork
+from app.services.unit_of_work import savepoint_scope, unit_of_work_scope
+
+# 每條連線快取的 prepared statement 數量 (sqlite3 依 SQL 字串重用已編譯的 statement)
+STATEMENT_CACHE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS restaurant (
+    restaurant_id   INTEGER PRIMARY KEY,
+    restaurant_name TEXT    NOT NULL,
+    lat             REAL    NOT NULL,
+    lng             REAL    NOT NULL,
+    image_url       TEXT    NOT NULL,
+    average_price   TEXT    NOT NULL,  -- JSON: [min, max]
+    specialties     TEXT    NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS seat (
+    table_id      INTEGER PRIMARY KEY,
+    restaurant_id INTEGER NOT NULL REFERENCES restaurant(restaurant_id),
+    label         TEXT    NOT NULL,
+    x             INTEGER NOT NULL,
+    y             INTEGER NOT NULL,
+    status        TEXT    NOT NULL CHECK (status IN ('empty', 'eating'))
+);
+-- 座位表與空桌數 (COUNT ... AND status = 'empty') 都只掃描該餐廳的索引範圍
+CREATE INDEX IF NOT EXISTS idx_seat_restaurant_status ON seat(restaurant_id, status);
+
+CREATE TABLE IF NOT EXISTS queue (
+    queue_id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    restaurant_id INTEGER NOT NULL,
+    user_id       INTEGER NOT NULL,
+    ticket_number INTEGER NOT NULL
+);
+-- 覆蓋索引：總人數、下一個叫號 (MIN)、前面人數 (COUNT ... ticket_number < ?) 都不需要回表
+CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_restaurant_ticket ON queue(restaurant_id, ticket_number);
+-- 覆蓋索引：依 user_id 找到所在餐廳與號碼
+CREATE INDEX IF NOT EXISTS idx_queue_user ON queue(user_id, restaurant_id, ticket_number);
+-- 一位使用者同時只能排一間 (多個 process 共用資料庫時的最後防線，Service 層已先檢查)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_queue_user_unique ON queue(user_id);
+
+CREATE TABLE IF NOT EXISTS queue_runtime (
+    restaurant_id         INTEGER PRIMARY KEY,
+    current_ticket_number INTEGER NOT NULL DEFAULT 0,
+    next_ticket_number    INTEGER NOT NULL DEFAULT 1,
+    metrics               TEXT    NOT NULL DEFAULT '[15, 4]'  -- JSON: [average_wait_time, table_number]
+);
+
+-- 每間餐廳的版本號，由 trigger 在同一個交易中遞增，多個 worker 共用 (ETag / 排隊狀態回應快取)
+CREATE TABLE IF NOT EXISTS restaurant_version (
+    restaurant_id INTEGER PRIMARY KEY,
+    queue_version INTEGER NOT NULL DEFAULT 0,
+    table_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TRIGGER IF NOT EXISTS trg_queue_insert_version AFTER INSERT ON queue BEGIN
+    INSERT INTO restaurant_version (restaurant_id, queue_version) VALUES (NEW.restaurant_id, 1)
+    ON CONFLICT (restaurant_id) DO UPDATE SET queue_version = queue_version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_queue_delete_version AFTER DELETE ON queue BEGIN
+    INSERT INTO restaurant_version (restaurant_id, queue_version) VALUES (OLD.restaurant_id, 1)
+    ON CONFLICT (restaurant_id) DO UPDATE SET queue_version = queue_version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_queue_runtime_current_version AFTER UPDATE OF current_ticket_number ON queue_runtime BEGIN
+    INSERT INTO restaurant_version (restaurant_id, queue_version) VALUES (NEW.restaurant_id, 1)
+    ON CONFLICT (restaurant_id) DO UPDATE SET queue_version = queue_version + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_seat_status_version AFTER UPDATE OF status ON seat BEGIN
+    INSERT INTO restaurant_version (restaurant_id, table_version) VALUES (NEW.restaurant_id, 1)
+    ON CONFLICT (restaurant_id) DO UPDATE SET table_version = table_version + 1;
+END;
+
+-- 資料庫建立時產生的 epoch：資料庫重建後版本從 0 開始，ETag 不會與舊的相同
+CREATE TABLE IF NOT EXISTS db_info (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# 與記憶體版 Repository 相同的初始資料
+SEED_RESTAURANTS = [
+    (1, "麥克小姐", 24.963068, 121.190522, "/imgs/麥克小姐.png", [150, 300], "義大利麵、漢堡"),
+    (2, "歐姆萊斯", 24.964267, 121.190726, "/imgs/歐姆萊斯.png", [85, 165], "咖哩、豬排飯"),
+    (3, "香城燒臘", 24.964879, 121.193531, "/imgs/香城燒臘.png", [80, 130], "蜜汁叉燒、燒肉、香腸"),
+]
+
+SEED_SEATS = [
+    (101, 1, "A1", 1, 1, "eating"),
+    (102, 1, "A2", 2, 1, "empty"),
+    (103, 1, "A3", 3, 1, "eating"),
+    (104, 1, "A4", 1, 2, "eating"),
+    (105, 1, "A5", 2, 2, "eating"),
+    (201, 2, "VIP1", 1, 1, "empty"),
+    (202, 2, "VIP2", 3, 1, "eating"),
+    (203, 2, "VIP3", 5, 1, "empty"),
+    (204, 2, "VIP4", 1, 3, "eating"),
+    (205, 2, "VIP5", 3, 3, "eating"),
+    (206, 2, "VIP6", 5, 3, "eating"),
+    (301, 3, "1桌", 1, 1, "empty"),
+    (302, 3, "2桌", 3, 1, "eating"),
+    (303, 3, "3桌", 5, 1, "empty"),
+    (304, 3, "4桌", 7, 1, "eating"),
+    (305, 3, "5桌", 1, 3, "empty"),
+    (306, 3, "6桌", 3, 3, "empty"),
+    (307, 3, "7桌", 5, 3, "empty"),
+    (308, 3, "8桌", 7, 3, "empty"),
+    (309, 3, "9桌", 1, 5, "empty"),
+    (310, 3, "10桌", 3, 5, "eating"),
+    (311, 3, "11桌", 5, 6, "empty"),
+    (312, 3, "12桌", 7, 6, "empty"),
+]
+
+SEED_QUEUE_RUNTIME = [
+    # restaurant_id, current_ticket_number, next_ticket_number, [average_wait_time, table_number]
+    (1, 0, 1, [10, 5]),
+    (2, 14, 17, [8, 6]),
+    (3, 5, 8, [100, 12]),
+]
+
+
+def id_list_param(ids: List[int]) -> str:
+    """
+    把 id 列表轉成單一參數，搭配 `IN (SELECT value FROM json_each(?))` 使用，
+    不論幾個 id 都是同一條 SQL，可以重用 prepared statement。
+    """
+    return json.dumps(list(ids))
+
+
+class SQLiteDatabase:
+    """
+    SQLite 連線管理：
+    - 每個 thread 一條連線 (FastAPI 的同步 Service 在 thread pool 中執行，thread 會被重複使用，
+      等同於一個以 thread 為單位的連線池)；sqlite3 連線不能安全地跨 thread 共用
+    - WAL 模式：讀取不會被寫入擋住，多個 thread 可以同時讀
+    - 連線為 autocommit (isolation_level=None)，需要多個語句一起成功時使用 transaction()
+    """
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            uri=self.path.startswith("file:")
+        )
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        # WAL 下 NORMAL 仍保證一致性，只是斷電時可能遺失最後幾筆 commit
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """目前 thread 的連線，第一次使用時建立"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        BEGIN IMMEDIATE ... COMMIT，一開始就取得寫入鎖，避免 read -> write 升級時 deadlock。
+        已經在交易中 (例如 SQLiteUnitOfWork 內) 時直接加入外層的交易，由外層 commit。
+        """
+        conn = self.connection
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @contextmanager
+    def savepoint(self) -> Iterator[sqlite3.Connection]:
+        """交易中的 SAVEPOINT：例外時只 ROLLBACK TO 這個 savepoint；不在交易中時等同 transaction()"""
+        conn = self.connection
+        if not conn.in_transaction:
+            with self.transaction():
+                yield conn
+            return
+        # 同名的 savepoint 可以巢狀，ROLLBACK TO / RELEASE 作用在最近的一個
+        conn.execute("SAVEPOINT unit_of_work")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO unit_of_work")
+            conn.execute("RELEASE unit_of_work")
+            raise
+        conn.execute("RELEASE unit_of_work")
+
+    def init_schema(self, seed: bool = True) -> None:
+        """建立資料表與索引；資料表是空的時候寫入初始資料"""
+        conn = self.connection
+        conn.executescript(SCHEMA)
+        # 多個 worker 同時啟動時只有第一個寫入成功，之後都讀到同一個值
+        conn.execute("INSERT OR IGNORE INTO db_info VALUES ('epoch', ?)", (uuid.uuid4().hex[:8],))
+        if not seed:
+            return
+        with self.transaction():
+            if conn.execute("SELECT 1 FROM restaurant LIMIT 1").fetchone() is None:
+                conn.executemany(
+                    "INSERT INTO restaurant VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(rid, name, lat, lng, image_url, json.dumps(price), specialties)
+                     for rid, name, lat, lng, image_url, price, specialties in SEED_RESTAURANTS]
+                )
+                conn.executemany("INSERT INTO seat VALUES (?, ?, ?, ?, ?, ?)", SEED_SEATS)
+                conn.executemany(
+                    "INSERT INTO queue_runtime VALUES (?, ?, ?, ?)",
+                    [(rid, current, nxt, json.dumps(metrics)) for rid, current, nxt, metrics in SEED_QUEUE_RUNTIME]
+                )
+
+    def close(self) -> None:
+        """關閉所有 thread 建立的連線"""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+class SQLiteUnitOfWork(IUnitOfWork):
+    """
+    同一個 thread 的連線上 BEGIN IMMEDIATE ... COMMIT，交易內 Repository 的語句都在同一個交易中，
+    多個 Repository 的寫入只 commit 一次 (一次 WAL fsync)。
+    同時開啟交易範圍，讓 Redis 等非 SQLite 的 Repository 也能登記復原動作。
+    """
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    @contextmanager
+    def begin(self) -> Iterator[None]:
+        with unit_of_work_scope(), self.db.transaction():
+            yield
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        with savepoint_scope(), self.db.savepoint():
+            yield
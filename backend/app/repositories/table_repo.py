@@ -0,0 +1,52 @@
+from typing import Dict, List, Optional
+from app.interfaces.table_interface import ITableRepository
+from app.domain.entities import TableEntity
+from app.repositories.sqlite_db import SQLiteDatabase, id_list_param
+
+
+class SQLiteTableRepository(ITableRepository):
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+
+    def get_tables_by_restaurant(self, restaurant_id: int) -> List[TableEntity]:
+        rows = self.db.connection.execute(
+            "SELECT table_id, restaurant_id, label, x, y, status FROM seat WHERE restaurant_id = ? ORDER BY table_id",
+            (restaurant_id,)
+        ).fetchall()
+        return [TableEntity(*row) for row in rows]
+
+    def get_table_by_id(self, table_id: int) -> Optional[TableEntity]:
+        row = self.db.connection.execute(
+            "SELECT table_id, restaurant_id, label, x, y, status FROM seat WHERE table_id = ?",
+            (table_id,)
+        ).fetchone()
+        return TableEntity(*row) if row is not None else None
+
+    def update_status(self, table_id: int, new_table_status: str, queue_ticket_number: int) -> bool:
+        cursor = self.db.connection.execute(
+            "UPDATE seat SET status = ? WHERE table_id = ?",
+            (new_table_status, table_id)
+        )
+        return cursor.rowcount > 0
+
+    def get_restaurant_remaining_table(self, restaurant_id: int) -> int:
+        # 只掃描 idx_seat_restaurant_status 中 (restaurant_id, 'empty') 的範圍
+        return self.db.connection.execute(
+            "SELECT COUNT(*) FROM seat WHERE restaurant_id = ? AND status = 'empty'",
+            (restaurant_id,)
+        ).fetchone()[0]
+
+    def get_restaurant_remaining_table_bulk(self, restaurant_ids: List[int]) -> Dict[int, int]:
+        rows = self.db.connection.execute(
+            """
+            SELECT restaurant_id, COUNT(*)
+            FROM seat
+            WHERE restaurant_id IN (SELECT value FROM json_each(?))
+              AND status = 'empty'
+            GROUP BY restaurant_id
+            """,
+            (id_list_param(restaurant_ids),)
+        ).fetchall()
+        remaining = dict.fromkeys(restaurant_ids, 0)
+        remaining.update(rows)
+        return remaining
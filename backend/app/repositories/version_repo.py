@@ -0,0 +1,27 @@
+from typing import Dict, Tuple
+from app.interfaces.version_interface import IRestaurantVersionRepository
+from app.repositories.sqlite_db import SQLiteDatabase
+
+
+class SQLiteRestaurantVersionRepository(IRestaurantVersionRepository):
+    """restaurant_version 由 sqlite_db.SCHEMA 的 trigger 維護，這裡只讀取"""
+    def __init__(self, db: SQLiteDatabase):
+        self.db = db
+        self._epoch = None
+
+    def get_epoch(self) -> str:
+        # init_schema 之後不會改變，讀一次即可
+        if self._epoch is None:
+            self._epoch = self.db.connection.execute("SELECT value FROM db_info WHERE key = 'epoch'").fetchone()[0]
+        return self._epoch
+
+    def get_versions(self, restaurant_id: int) -> Tuple[int, int]:
+        row = self.db.connection.execute(
+            "SELECT queue_version, table_version FROM restaurant_version WHERE restaurant_id = ?",
+            (restaurant_id,)
+        ).fetchone()
+        return (row[0], row[1]) if row is not None else (0, 0)
+
+    def get_all_versions(self) -> Dict[int, Tuple[int, int]]:
+        rows = self.db.connection.execute("SELECT restaurant_id, queue_version, table_version FROM restaurant_version").fetchall()
+        return {restaurant_id: (queue_version, table_version) for restaurant_id, queue_version, table_version in rows}
@@ -0,0 +1,212 @@
+import threading
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional, Set, Tuple
+from app.interfaces.queue_interface import IQueueRuntimeRepository
+from app.interfaces.unit_of_work_interface import IUnitOfWork
+from app.domain.value_objects import RestaurantMetrics
+from app.repositories.journal import Journal, OP_CURRENT_TICKET
+from app.services.unit_of_work import UnitOfWork, in_unit_of_work, record_undo
+
+
+@dataclass
+class RuntimeCounters:
+    """一間餐廳在記憶體中的叫號計數器"""
+    current: int
+    # 下一張要發出的號碼
+    next: int
+    # inner 的 next_ticket_number：已經寫入 inner 的號碼上限，發出的號碼一定 < reserved_end
+    reserved_end: int
+
+
+class WriteBehindQueueRuntimeRepository(IQueueRuntimeRepository):
+    """
+    叫號計數器的 write-behind 快取：current / next_ticket_number 的讀取直接由記憶體回答，
+    寫入先放在記憶體，由背景 thread 每隔 flush_interval 秒 (或累積 max_dirty 間餐廳時提早) 一次寫回 inner。
+
+    當機後計數器不會倒退：
+      - next_ticket_number：每次向 inner 預借 ticket_reserve 張號碼 (lease_ticket_block，立即寫入)，
+        在本地從預借的範圍發號，inner 的值永遠大於已經發出的號碼；當機只會留下沒用到的空號
+      - current_ticket_number：在 Unit of Work 中 (例如入座) 直接寫入 inner，跟著同一個交易 commit，
+        不多花一次 commit；交易外的更新延後寫回，有 journal 時立即 append 到 journal，重播時恢復
+
+    入座 (TableService) 的叫號都在 Unit of Work 中，所以實際上 current_ticket_number 一律 write-through，
+    省下的是讀取與號碼牌的寫入；背景寫回 (與 journal) 只涵蓋交易外的 set_current_ticket_number 呼叫。
+    journal 應為 inner 寫入的同一個 journal：寫回時 inner 會再記一次相同的值，重播結果不變。
+
+    計數器快取在這個 process 內，inner 只能由這一個 process 寫入 (不要搭配多個 worker / Redis 共用計數器)。
+    """
+    def __init__(
+        self,
+        inner: IQueueRuntimeRepository,
+        flush_interval: float = 0.05,
+        max_dirty: int = 256,
+        ticket_reserve: int = 64,
+        unit_of_work: Optional[IUnitOfWork] = None,
+        journal: Optional[Journal] = None
+    ):
+        self.inner = inner
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.ticket_reserve = ticket_reserve
+        # 寫回時使用的交易 (多間餐廳一次 commit)
+        self.unit_of_work = unit_of_work or UnitOfWork()
+        self.journal = journal
+        self._counters: Dict[int, RuntimeCounters] = {}
+        # current_ticket_number 尚未寫回 inner 的餐廳
+        self._dirty: Set[int] = set()
+        # _lock 只保護記憶體中的計數器，持有時不做任何 inner 的寫入
+        # (寫回的 thread 會在交易中等待 _lock，持有 _lock 等待資料庫寫入鎖會 deadlock)
+        self._lock = threading.Lock()
+        # 同一時間只有一個 thread 向 inner 預借號碼
+        self._reserve_lock = threading.Lock()
+        # 交易外的叫號 (含 journal) 與寫回 inner 互斥：inner 也寫同一個 journal 時，紀錄的順序與快取一致，
+        # 寫回不會把較舊的值排在較新的紀錄之後
+        self._deferred_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        # 統計：寫回次數與寫回的計數器數
+        self.flushes = 0
+        self.flushed_counters = 0
+
+    def start(self) -> None:
+        self._flusher = threading.Thread(target=self._run, name="runtime-write-behind", daemon=True)
+        self._flusher.start()
+
+    def close(self) -> None:
+        """停止背景 thread、寫回所有計數器並歸還沒用到的號碼"""
+        self._stopped.set()
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+        with self._lock:
+            unused = [(restaurant_id, counters.next, counters.reserved_end)
+                      for restaurant_id, counters in self._counters.items() if counters.next < counters.reserved_end]
+        for restaurant_id, start, end in unused:
+            if self.inner.release_ticket_block(restaurant_id, start, end):
+                with self._lock:
+                    self._counters[restaurant_id].reserved_end = start
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """把 current_ticket_number 有變動的餐廳寫回 inner，回傳寫回的數量"""
+        with self._lock:
+            if not self._dirty:
+                return 0
+        # 先開始交易再讀取快取：交易中寫入的 Request 會等這個交易結束 (或反之)，不會把較舊的值蓋回去
+        with self._deferred_lock, self.unit_of_work.begin():
+            with self._lock:
+                pending = [(restaurant_id, self._counters[restaurant_id].current) for restaurant_id in self._dirty]
+                self._dirty.clear()
+            for restaurant_id, current_ticket_number in pending:
+                self.inner.set_current_ticket_number(restaurant_id, current_ticket_number)
+        with self._lock:
+            self.flushes += 1
+            self.flushed_counters += len(pending)
+        return len(pending)
+
+    def _load(self, restaurant_id: int) -> RuntimeCounters:
+        """呼叫前須持有 _lock"""
+        counters = self._counters.get(restaurant_id)
+        if counters is None:
+            next_ticket_number = self.inner.get_next_ticket_number(restaurant_id)
+            counters = self._counters[restaurant_id] = RuntimeCounters(
+                current=self.inner.get_current_ticket_number(restaurant_id),
+                next=next_ticket_number,
+                reserved_end=next_ticket_number
+            )
+        return counters
+
+    def _take(self, restaurant_id: int, size: int) -> int:
+        """從預借的範圍取出 size 張號碼，不夠時先向 inner 預借，回傳第一張"""
+        while True:
+            with self._lock:
+                counters = self._load(restaurant_id)
+                if counters.next + size <= counters.reserved_end:
+                    ticket_number = counters.next
+                    counters.next += size
+                    return ticket_number
+                reserved_end = counters.reserved_end
+            with self._reserve_lock:
+                with self._lock:
+                    if counters.reserved_end != reserved_end:
+                        # 等待時其他 thread 已經預借過
+                        continue
+                start, end = self.inner.lease_ticket_block(restaurant_id, max(self.ticket_reserve, size))
+                with self._lock:
+                    if start != counters.reserved_end:
+                        # inner 被其他人推進過 (或之前的預借被 rollback)，從不小於 start 的號碼繼續發
+                        counters.next = max(counters.next, start)
+                    previous_end, counters.reserved_end = counters.reserved_end, end
+                # 在交易中預借時，rollback 會讓 inner 退回，快取的上限也要跟著退回，下次重新預借
+                record_undo(partial(self._unreserve, restaurant_id, previous_end, end))
+
+    def _unreserve(self, restaurant_id: int, previous_end: int, end: int) -> None:
+        """rollback 用：已經發出的號碼不收回 (next 不變)，只把上限退回"""
+        with self._lock:
+            counters = self._counters[restaurant_id]
+            if counters.reserved_end == end:
+                counters.reserved_end = previous_end
+
+    def _restore_current(self, restaurant_id: int, ticket_number: int) -> None:
+        """rollback 用：交易中已寫入 inner 的部分由 inner 自己復原，這裡只還原快取"""
+        with self._lock:
+            self._counters[restaurant_id].current = ticket_number
+
+    def get_current_ticket_number(self, restaurant_id: int) -> int:
+        with self._lock:
+            return self._load(restaurant_id).current
+
+    def set_current_ticket_number(self, restaurant_id: int, ticket_number: int) -> None:
+        if in_unit_of_work():
+            # 交易中 (入座)：跟著同一個交易寫入 inner
+            with self._lock:
+                counters = self._load(restaurant_id)
+                record_undo(partial(self._restore_current, restaurant_id, counters.current))
+                counters.current = ticket_number
+            self.inner.set_current_ticket_number(restaurant_id, ticket_number)
+            return
+        with self._deferred_lock:
+            # 先 append：journal 失敗時快取不變，不會留下沒有紀錄、之後還會寫回的值
+            if self.journal is not None:
+                self.journal.append(OP_CURRENT_TICKET, restaurant_id, ticket_number)
+            with self._lock:
+                self._load(restaurant_id).current = ticket_number
+                self._dirty.add(restaurant_id)
+                if len(self._dirty) >= self.max_dirty:
+                    self._wake.set()
+
+    def get_next_ticket_number(self, restaurant_id: int) -> int:
+        with self._lock:
+            return self._load(restaurant_id).next
+
+    def increment_next_ticket_number(self, restaurant_id: int) -> None:
+        self._take(restaurant_id, 1)
+
+    def allocate_ticket(self, restaurant_id: int) -> int:
+        return self._take(restaurant_id, 1)
+
+    def lease_ticket_block(self, restaurant_id: int, size: int) -> Tuple[int, int]:
+        start = self._take(restaurant_id, size)
+        return start, start + size
+
+    def release_ticket_block(self, restaurant_id: int, start: int, end: int) -> bool:
+        with self._lock:
+            counters = self._load(restaurant_id)
+            if counters.next != end:
+                return False
+            counters.next = start
+            return True
+
+    def get_metrics(self, restaurant_id: int) -> RestaurantMetrics:
+        return self.inner.get_metrics(restaurant_id)
+
+    def get_metrics_bulk(self, restaurant_ids: List[int]) -> Dict[int, RestaurantMetrics]:
+        return self.inner.get_metrics_bulk(restaurant_ids)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+from typing import Union
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+from app.interfaces.queue_interface import IAsyncQueueService, IQueueService
+from app.interfaces.table_interface import IAsyncTableService, ITableService
+from app.routers.service_call import call_service
+from app.routers.queues import get_queue_service
+from app.routers.table import get_table_service
+from app.routers.replication import get_replication_node
+from app.schemas.table_schema import TableCommand
+from app.domain.errors import DomainError, ReadOnlyReplicaError, RestaurantNotFoundError
+from app.repositories.replication import ReplicationNode
+from app.services.queue_notifier import QueueChangeNotifier
+
+dashboard_router = APIRouter(prefix="/api", tags=["Dashboard"])
+
+# Dependency Stub
+def get_dashboard_notifier() -> QueueChangeNotifier:
+    raise NotImplementedError("Dependency 'get_dashboard_notifier' not overridden")
+
+# 沒有變化時，每隔幾秒送一次 ping 避免連線被 proxy 關閉
+DASHBOARD_HEARTBEAT_SECONDS = 15.0
+
+# 餐廳不存在時的 WebSocket close code (4000-4999 為應用程式自訂)
+WS_CLOSE_RESTAURANT_NOT_FOUND = 4404
+
+def error_message(code: str, message: str, request_id=None) -> dict:
+    """輔助函式：產生與 HTTP 錯誤回應相同格式的 WebSocket 訊息"""
+    return {
+        "type": "error",
+        "request_id": request_id,
+        "error": {
+            "code": code,
+            "message": message
+        }
+    }
+
+async def build_dashboard_state(restaurant_id: int, queue_service: Union[IQueueService, IAsyncQueueService], table_service: Union[ITableService, IAsyncTableService]) -> dict:
+    """店家看板需要的資料：下一組叫號 + 座位表"""
+    queue_next = await call_service(queue_service.get_queue_next, restaurant_id)
+    seats = await call_service(table_service.get_restaurant_seats, restaurant_id)
+    return {
+        "queue": queue_next.model_dump(mode="json"),
+        "seats": seats.model_dump(mode="json")
+    }
+
+@dashboard_router.websocket("/restaurants/{restaurant_id}/dashboard")
+async def restaurant_dashboard(
+    websocket: WebSocket,
+    restaurant_id: int,
+    queue_service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service),
+    table_service: Union[ITableService, IAsyncTableService] = Depends(get_table_service),
+    notifier: QueueChangeNotifier = Depends(get_dashboard_notifier),
+    node: ReplicationNode = Depends(get_replication_node)
+):
+    """
+    店家看板 WebSocket
+        Server -> Client:
+            {"type": "snapshot", "version": n, "queue": QueueNextResponse, "seats": RestaurantSeatsResponse}
+                連線時與每次排隊 / 座位變動時推送
+            {"type": "result", "request_id": ..., "data": UpdateTableStatusResponse}
+            {"type": "error", "request_id": ..., "error": {"code": ..., "message": ...}}
+            {"type": "ping"}
+        Client -> Server:
+            TableCommand，例如 {"table_id": 102, "action": "eating", "queue_ticket_number": 15}
+            由 TableService.update_table_status 處理，與 POST /restaurant/{id}/tables/{table_id} 相同；
+            follower 仍推送看板資料，但指令一律回 READ_ONLY_REPLICA 錯誤 (ReadOnlyReplicaMiddleware 只擋 HTTP)
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def send(message: dict) -> None:
+        async with send_lock:
+            await websocket.send_json(message)
+
+    version = notifier.get_version(restaurant_id)
+    try:
+        state = await build_dashboard_state(restaurant_id, queue_service, table_service)
+    except RestaurantNotFoundError as e:
+        await send(error_message(e.code, e.message))
+        await websocket.close(code=WS_CLOSE_RESTAURANT_NOT_FOUND)
+        return
+    await send({"type": "snapshot", "version": version, **state})
+
+    async def push_changes() -> None:
+        nonlocal version
+        while True:
+            new_version = await notifier.wait_for_change(restaurant_id, version, DASHBOARD_HEARTBEAT_SECONDS)
+            if new_version == version:
+                await send({"type": "ping"})
+                continue
+            version = new_version
+            state = await build_dashboard_state(restaurant_id, queue_service, table_service)
+            await send({"type": "snapshot", "version": version, **state})
+
+    async def receive_commands() -> None:
+        while True:
+            payload = None
+            try:
+                payload = json.loads(await websocket.receive_text())
+                command = TableCommand.model_validate(payload)
+            except (ValueError, ValidationError):
+                request_id = payload.get("request_id") if isinstance(payload, dict) else None
+                await send(error_message("INVALID_COMMAND", "Command must contain table_id and action.", request_id))
+                continue
+            # 每個指令都重新檢查，promote 之後立即開始接受
+            if node.read_only:
+                error = ReadOnlyReplicaError()
+                await send(error_message(error.code, error.message, command.request_id))
+                continue
+            try:
+                result = await call_service(
+                    table_service.update_table_status,
+                    restaurant_id, command.table_id, command.action, command.queue_ticket_number
+                )
+            except DomainError as e:
+                await send(error_message(e.code, e.message, command.request_id))
+                continue
+            await send({"type": "result", "request_id": command.request_id, "data": result.model_dump(mode="json")})
+
+    pusher = asyncio.create_task(push_changes())
+    try:
+        await receive_commands()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pusher.cancel()
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import Request, Response, status
+from app.services.resource_versions import ResourceVersions
+
+# Dependency Stub
+# 預設回傳 None 代表不使用 ETag；main.py 會覆寫成實際的 ResourceVersions
+def get_resource_versions() -> Optional[ResourceVersions]:
+    return None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 使用 weak comparison：忽略 W/ 前綴，支援多個值與 *"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def check_not_modified(request: Request, response: Response, versions: Optional[ResourceVersions], resource: str, restaurant_id: int = 0) -> Optional[Response]:
+    """
+    在呼叫 Service 之前檢查 If-None-Match。
+    版本相同時回傳 304 Response；否則把 ETag 寫進之後的回應並回傳 None。
+    注意：版本要在 Service 讀資料之前取得，資料若在中途變動，ETag 只會比內容舊，不會誤判成 304。
+    """
+    if versions is None:
+        return None
+    etag = versions.get_etag(resource, restaurant_id)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
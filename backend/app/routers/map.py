@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
 from fastapi.responses import JSONResponse
-from typing import List
-from app.schemas.map_schema import RestaurantItem
-from app.services.map_service import MapService
-from app.interfaces.map_interface import IMapService
+from typing import List, Union
+from app.schemas.map_schema import RestaurantItem, RestaurantStatusChangesResponse
+from app.interfaces.map_interface import IAsyncMapService, IMapService
+from app.routers.service_call import call_service
+from app.routers.etag import check_not_modified, get_resource_versions
+from app.services.resource_versions import RESTAURANTS, ResourceVersions
 
 map_router = APIRouter(
     prefix="/api",
@@ -11,7 +13,7 @@ map_router = APIRouter(
 )
 
 # Dependency Stub
-def get_map_service() -> IMapService:
+def get_map_service() -> Union[IMapService, IAsyncMapService]:
     raise NotImplementedError("Dependency 'get_map_service' not overridden")
 
 def error_response(status_code: int, code: str, message: str):
@@ -28,8 +30,23 @@ def error_response(status_code: int, code: str, message: str):
 
 
 @map_router.get("/restaurants", response_model=List[RestaurantItem])
-def get_restaurants(
-    service: MapService = Depends(get_map_service)
+async def get_restaurants(
+    request: Request,
+    response: Response,
+    service: Union[IMapService, IAsyncMapService] = Depends(get_map_service),
+    versions: ResourceVersions = Depends(get_resource_versions)
 ):
+    # 燈號沒變時直接回 304，不呼叫 Service
+    not_modified = check_not_modified(request, response, versions, RESTAURANTS)
+    if not_modified is not None:
+        return not_modified
     # 取得所有餐廳列表，直接呼叫 Service
-    return service.get_restaurants()
\ No newline at end of file
+    return await call_service(service.get_restaurants)
+
+@map_router.get("/restaurants/status", response_model=RestaurantStatusChangesResponse)
+async def get_restaurant_status_changes(
+    since_version: int = Query(0, ge=0),
+    service: Union[IMapService, IAsyncMapService] = Depends(get_map_service)
+):
+    # 取得 since_version 之後燈號有改變的餐廳 (since_version=0 代表全部)
+    return await call_service(service.get_status_changes, since_version)
@@ -0,0 +1,28 @@
+from typing import Optional
+from fastapi import APIRouter, Depends
+from app.schemas.metrics_schema import GroupCommitMetricsResponse, MapCacheMetricsResponse
+from app.services.group_commit import GroupCommitter
+from app.repositories.cached_map_repo import CachedMapRepository
+
+metrics_router = APIRouter(prefix="/api", tags=["Metrics"])
+
+# Dependency Stub
+def get_group_committer() -> Optional[GroupCommitter]:
+    raise NotImplementedError("Dependency 'get_group_committer' not overridden")
+
+def get_map_cache() -> Optional[CachedMapRepository]:
+    raise NotImplementedError("Dependency 'get_map_cache' not overridden")
+
+@metrics_router.get("/metrics/group-commit", response_model=GroupCommitMetricsResponse)
+async def get_group_commit_metrics(committer: Optional[GroupCommitter] = Depends(get_group_committer)):
+    # 沒有啟用 group commit 時回傳 enabled = false
+    if committer is None:
+        return GroupCommitMetricsResponse(enabled=False)
+    return GroupCommitMetricsResponse(enabled=True, **committer.metrics())
+
+@metrics_router.get("/metrics/map-cache", response_model=MapCacheMetricsResponse)
+async def get_map_cache_metrics(cache: Optional[CachedMapRepository] = Depends(get_map_cache)):
+    # 沒有啟用餐廳資料快取時回傳 enabled = false
+    if cache is None:
+        return MapCacheMetricsResponse(enabled=False)
+    return MapCacheMetricsResponse(enabled=True, **cache.stats())
@@ -1,5 +1,7 @@
-from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
+import json
+from typing import AsyncIterator, Optional, Union
+from fastapi import APIRouter, Depends, Header, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.schemas.queue_schema import (
     JoinQueueRequest,
     JoinQueueResponse,
@@ -7,9 +9,14 @@ from app.schemas.queue_schema import (
     QueueStatusResponse,
     QueueNextResponse,
     UserQueueStatusRequest,
-    UserQueueStatusResponse
+    UserQueueStatusResponse,
+    UserQueuePositionEvent
 )
-from app.interfaces.queue_interface import IQueueService
+from app.interfaces.queue_interface import IAsyncQueueService, IQueueService
+from app.routers.service_call import call_service
+from app.routers.etag import check_not_modified, get_resource_versions
+from app.services.resource_versions import QUEUE, ResourceVersions
+from app.services.queue_notifier import QueueChangeNotifier
 from app.domain.errors import (
     QueueAlreadyJoinedError,
     RestaurantNotFoundError,
@@ -22,9 +29,15 @@ queue_router = APIRouter(
 )
 
 # Dependency Stub
-def get_queue_service() -> IQueueService:
+def get_queue_service() -> Union[IQueueService, IAsyncQueueService]:
     raise NotImplementedError("Dependency 'get_queue_service' not overridden")
 
+def get_queue_notifier() -> QueueChangeNotifier:
+    raise NotImplementedError("Dependency 'get_queue_notifier' not overridden")
+
+# SSE 沒有變化時，每隔幾秒送一次 heartbeat 避免連線被 proxy 關閉
+SSE_HEARTBEAT_SECONDS = 15.0
+
 def error_response(status_code: int, code: str, message: str):
     """輔助函式：產生符合格式的錯誤回應"""
     return JSONResponse(
@@ -38,59 +51,133 @@ def error_response(status_code: int, code: str, message: str):
     )
 
 @queue_router.post("/restaurants/{restaurant_id}/queue", response_model=JoinQueueResponse, status_code=status.HTTP_201_CREATED)
-def join_queue(
+async def join_queue(
     restaurant_id: int, 
     request: JoinQueueRequest, 
-    service: IQueueService = Depends(get_queue_service)
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service)
 ):
     try:
-        return service.join_restaurant_waiting_queue(restaurant_id, request.user_id)
+        return await call_service(service.join_restaurant_waiting_queue, restaurant_id, request.user_id)
     except QueueAlreadyJoinedError as e:
         return error_response(status.HTTP_409_CONFLICT, e.code, e.message)
     except RestaurantNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
 
 @queue_router.delete("/restaurants/{restaurant_id}/queue", status_code=status.HTTP_204_NO_CONTENT)
-def leave_queue(
+async def leave_queue(
     restaurant_id: int, 
     request: LeaveQueueRequest, 
-    service: IQueueService = Depends(get_queue_service)
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service)
 ):
     try:
-        service.leave_restaurant_waiting_queue(restaurant_id, request.user_id)
+        await call_service(service.leave_restaurant_waiting_queue, restaurant_id, request.user_id)
     except NotInQueueError as e:
         return error_response(status.HTTP_400_BAD_REQUEST, e.code, e.message)
     except RestaurantNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
 
 @queue_router.get("/restaurants/{restaurant_id}/queue/status", response_model=QueueStatusResponse)
-def get_queue_status(
+async def get_queue_status(
     restaurant_id: int, 
-    service: IQueueService = Depends(get_queue_service)
+    request: Request,
+    response: Response,
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service),
+    versions: ResourceVersions = Depends(get_resource_versions)
 ):
+    # 排隊狀態沒變時直接回 304，不呼叫 Service
+    not_modified = check_not_modified(request, response, versions, QUEUE, restaurant_id)
+    if not_modified is not None:
+        return not_modified
     try:
-        return service.get_queue_status(restaurant_id)
+        return await call_service(service.get_queue_status, restaurant_id)
     except RestaurantNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
 
 @queue_router.get("/restaurants/{restaurant_id}/queue/next", response_model=QueueNextResponse)
-def get_queue_next(
+async def get_queue_next(
     restaurant_id: int, 
-    service: IQueueService = Depends(get_queue_service)
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service)
 ):
     try:
-        return service.get_queue_next(restaurant_id)
+        return await call_service(service.get_queue_next, restaurant_id)
     except RestaurantNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
     
 @queue_router.get("/user/{user_id}/queue", response_model=UserQueueStatusResponse)
-def get_user_queue_status(
+async def get_user_queue_status(
+    user_id: int,
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service)
+):
+    try:
+        return await call_service(service.get_user_queue_status, user_id=user_id)
+    except NotInQueueError as e:
+        return error_response(status.HTTP_400_BAD_REQUEST, e.code, e.message)
+    except RestaurantNotFoundError as e:
+        return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
+
+def format_sse(event: str, data: str, event_id: Optional[str] = None) -> str:
+    """組成一則 Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+async def stream_user_queue_position(
+    service: Union[IQueueService, IAsyncQueueService],
+    notifier: QueueChangeNotifier,
+    user_id: int,
+    first_position: UserQueuePositionEvent,
+    last_event_id: Optional[str] = None,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS
+) -> AsyncIterator[str]:
+    """
+    推播使用者的排隊位置：
+    1. 連線時若 Last-Event-ID 與目前版本不同，先送一次目前狀態 (斷線重連時補上錯過的變化)
+    2. 之後只在該餐廳排隊有變化時才重新計算並推播
+    3. 使用者已經離開 / 入座時送出 end 事件並結束
+    """
+    restaurant_id = first_position.restaurant_id
+    version = notifier.get_version(restaurant_id)
+    yield "retry: 3000\n\n"
+    event_id = notifier.format_event_id(restaurant_id, version)
+    if event_id != last_event_id:
+        yield format_sse("queue", first_position.model_dump_json(), event_id)
+
+    while True:
+        new_version = await notifier.wait_for_change(restaurant_id, version, heartbeat_seconds)
+        if new_version == version:
+            yield ": heartbeat\n\n"
+            continue
+        version = new_version
+        try:
+            position = await call_service(service.get_user_queue_position, user_id)
+        except (NotInQueueError, RestaurantNotFoundError) as e:
+            yield format_sse("end", json.dumps({"code": e.code, "message": e.message}))
+            return
+        if position.restaurant_id != restaurant_id:
+            # 已經改排其他餐廳，請前端重新連線
+            yield format_sse("end", json.dumps({"code": "QUEUE_CHANGED", "message": "User joined another queue."}))
+            return
+        yield format_sse("queue", position.model_dump_json(), notifier.format_event_id(restaurant_id, version))
+
+@queue_router.get("/user/{user_id}/queue/stream")
+async def stream_user_queue_status(
     user_id: int,
-    service: IQueueService = Depends(get_queue_service)
+    service: Union[IQueueService, IAsyncQueueService] = Depends(get_queue_service),
+    notifier: QueueChangeNotifier = Depends(get_queue_notifier),
+    last_event_id: Optional[str] = Header(None)
 ):
+    # 先確認使用者在排隊中，錯誤時回傳一般的 JSON 錯誤
     try:
-        return service.get_user_queue_status(user_id=user_id)
+        first_position = await call_service(service.get_user_queue_position, user_id)
     except NotInQueueError as e:
         return error_response(status.HTTP_400_BAD_REQUEST, e.code, e.message)
     except RestaurantNotFoundError as e:
-        return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
\ No newline at end of file
+        return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
+    return StreamingResponse(
+        stream_user_queue_position(service, notifier, user_id, first_position, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
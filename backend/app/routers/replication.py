@@ -0,0 +1,68 @@
+from typing import Callable
+from fastapi import APIRouter, Depends, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.schemas.replication_schema import ReplicationStatusResponse
+from app.domain.errors import NotAFollowerError, ReadOnlyReplicaError
+from app.repositories.replication import ReplicationNode
+
+replication_router = APIRouter(prefix="/api", tags=["Replication"])
+
+# Dependency Stub
+def get_replication_node() -> ReplicationNode:
+    raise NotImplementedError("Dependency 'get_replication_node' not overridden")
+
+def error_response(status_code: int, code: str, message: str):
+    """輔助函式：產生符合格式的錯誤回應"""
+    return JSONResponse(
+        status_code=status_code,
+        content={
+            "error": {
+                "code": code,
+                "message": message
+            }
+        }
+    )
+
+@replication_router.get("/replication/status", response_model=ReplicationStatusResponse, response_model_exclude_none=True)
+async def get_replication_status(node: ReplicationNode = Depends(get_replication_node)):
+    # 角色、目前序號與複寫延遲 (follower: 落後 leader 幾筆；leader: 每個 follower 落後幾筆)
+    return node.status()
+
+@replication_router.post("/replication/promote", response_model=ReplicationStatusResponse, response_model_exclude_none=True)
+async def promote_replica(node: ReplicationNode = Depends(get_replication_node)):
+    try:
+        # 停止 follower thread 需要等待 join，不要卡住 event loop
+        await run_in_threadpool(node.promote)
+    except NotAFollowerError as e:
+        return error_response(status.HTTP_409_CONFLICT, e.code, e.message)
+    return node.status()
+
+
+# 不會修改資料的 HTTP method
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class ReadOnlyReplicaMiddleware:
+    """
+    follower 只提供讀取：/api 下的寫入請求直接回 503 (複寫管理 API 除外)，
+    讓 load balancer / 前端改送到 leader。
+    get_node 在每次請求時呼叫，promote 之後立即開始接受寫入。
+    """
+    def __init__(self, app: ASGIApp, get_node: Callable[[], ReplicationNode]):
+        self.app = app
+        self.get_node = get_node
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] == "http"
+            and scope["method"] not in SAFE_METHODS
+            and scope["path"].startswith("/api/")
+            and not scope["path"].startswith("/api/replication/")
+            and self.get_node().read_only
+        ):
+            error = ReadOnlyReplicaError()
+            response = error_response(status.HTTP_503_SERVICE_UNAVAILABLE, error.code, error.message)
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
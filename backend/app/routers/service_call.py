@@ -0,0 +1,14 @@
+import inspect
+from typing import Any, Callable
+from fastapi.concurrency import run_in_threadpool
+
+
+async def call_service(method: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Router 呼叫 Service 的共用入口 (Router 皆為 async def)：
+        async Service (IAsync*Service) -> 直接在 event loop 上 await
+        同步 Service (I*Service，例如測試中的 Mock) -> 丟到 thread pool，避免卡住 event loop
+    """
+    if inspect.iscoroutinefunction(method):
+        return await method(*args, **kwargs)
+    return await run_in_threadpool(method, *args, **kwargs)
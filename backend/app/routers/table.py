@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Depends, status
+from typing import Union
+from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.responses import JSONResponse
-from app.interfaces.table_interface import ITableService
+from app.interfaces.table_interface import IAsyncTableService, ITableService
 from app.schemas.table_schema import RestaurantSeatsResponse, UpdateTableStatusRequest, UpdateTableStatusResponse
 from app.domain.errors import RestaurantNotFoundError, NotInQueueError, TableInvalidActionError, TableNotFoundError
+from app.routers.etag import check_not_modified, get_resource_versions
+from app.services.resource_versions import TABLE, ResourceVersions
+from app.routers.service_call import call_service
 
 table_router = APIRouter(prefix="/api", tags=["Table"])
 
 # Dependency Stub
-def get_table_service() -> ITableService:
+def get_table_service() -> Union[ITableService, IAsyncTableService]:
     raise NotImplementedError("Dependency 'get_table_service' not overridden")
 
 def error_response(status_code: int, code: str, message: str):
@@ -24,25 +28,32 @@ def error_response(status_code: int, code: str, message: str):
 
 # 1. GET 取得座位表
 @table_router.get("/restaurants/{restaurant_id}/table", response_model=RestaurantSeatsResponse)
-def get_table_layout(
+async def get_table_layout(
     restaurant_id: int, 
-    service: ITableService = Depends(get_table_service)
+    request: Request,
+    response: Response,
+    service: Union[ITableService, IAsyncTableService] = Depends(get_table_service),
+    versions: ResourceVersions = Depends(get_resource_versions)
 ):
+    # 座位表沒變時直接回 304，不呼叫 Service
+    not_modified = check_not_modified(request, response, versions, TABLE, restaurant_id)
+    if not_modified is not None:
+        return not_modified
     try:
-        return service.get_restaurant_seats(restaurant_id)
+        return await call_service(service.get_restaurant_seats, restaurant_id)
     except RestaurantNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
 
 # 2. POST 更新狀態
 @table_router.post("/restaurant/{restaurant_id}/tables/{table_id}", response_model=UpdateTableStatusResponse)
-def update_table_status(
+async def update_table_status(
     restaurant_id: int,
     table_id: int,
     request: UpdateTableStatusRequest,
-    service: ITableService = Depends(get_table_service)
+    service: Union[ITableService, IAsyncTableService] = Depends(get_table_service)
 ):
     try:
-        return service.update_table_status(restaurant_id, table_id, request.action, request.queue_ticket_number)
+        return await call_service(service.update_table_status, restaurant_id, table_id, request.action, request.queue_ticket_number)
     except TableNotFoundError as e:
         return error_response(status.HTTP_404_NOT_FOUND, e.code, e.message)
     except TableInvalidActionError as e:
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Tuple
+from typing import List, Tuple
 
 
 class RestaurantItem(BaseModel):
@@ -11,4 +11,15 @@ class RestaurantItem(BaseModel):
     image_url: str
     average_price: Tuple[int, int]
     specialties: str
-    status: str  # "green", "red", "yellow"
\ No newline at end of file
+    status: str  # "green", "red", "yellow"
+
+class RestaurantStatusItem(BaseModel):
+    """單一餐廳的燈號"""
+    restaurant_id: int
+    status: str  # "green", "red", "yellow"
+
+
+class RestaurantStatusChangesResponse(BaseModel):
+    """GET /api/restaurants/status 回應"""
+    version: int                       # 目前的燈號版本，下次查詢帶入 since_version
+    changes: List[RestaurantStatusItem] # since_version 之後燈號有改變的餐廳
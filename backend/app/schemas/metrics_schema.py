@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+
+
+class GroupCommitMetricsResponse(BaseModel):
+    """GET /api/metrics/group-commit 回應"""
+    enabled: bool  # 記憶體模式不使用 group commit
+    commits: int = 0
+    failed_commits: int = 0
+    items: int = 0                    # 經由 group commit 寫入的筆數
+    average_batch_size: float = 0.0
+    max_batch_size: int = 0
+    average_wait_ms: float = 0.0      # 等待批次湊齊而增加的延遲
+    max_wait_ms: float = 0.0
+    average_commit_ms: float = 0.0    # 每一批交易執行到 commit 完成的時間
+
+
+class MapCacheMetricsResponse(BaseModel):
+    """GET /api/metrics/map-cache 回應"""
+    enabled: bool  # 記憶體模式不使用餐廳資料快取
+    size: int = 0
+    max_size: int = 0
+    hits: int = 0
+    negative_hits: int = 0  # 命中「餐廳不存在」的快取
+    misses: int = 0         # 實際查詢資料庫的次數
+    evictions: int = 0
+    hit_rate: float = 0.0
@@ -40,4 +40,12 @@ class UserQueueStatusResponse(BaseModel):
     restaurant_name: str
     ticket_number: int       # 你的號碼牌
     people_ahead: int        # 前面還有幾組人 (這就是 N)
-    estimated_wait_time: int # 根據公式算出來的時間 (分鐘)
\ No newline at end of file
+    estimated_wait_time: int # 根據公式算出來的時間 (分鐘)
+
+class UserQueuePositionEvent(BaseModel):
+    """GET /api/user/{user_id}/queue/stream 推播的資料 (SSE data)"""
+    restaurant_id: int
+    ticket_number: int       # 你的號碼牌
+    people_ahead: int        # 前面還有幾組人
+    current_number: int      # 目前叫到幾號
+    estimated_wait_time: int # 預估等待時間 (分鐘)
@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class ReplicationFollowerItem(BaseModel):
+    """leader 看到的單一 follower"""
+    address: str
+    acked_sequence: int  # follower 回報已套用到的序號
+    lag_records: int     # 尚未套用的紀錄數
+
+class ReplicationStatusResponse(BaseModel):
+    """GET /api/replication/status 回應 (依角色只回傳對應的欄位)"""
+    role: str  # "standalone", "leader", "follower"
+    # leader
+    sequence: Optional[int] = None
+    followers: Optional[List[ReplicationFollowerItem]] = None
+    # follower
+    leader: Optional[str] = None
+    connected: Optional[bool] = None
+    applied_sequence: Optional[int] = None
+    leader_sequence: Optional[int] = None
+    lag_records: Optional[int] = None
+    seconds_since_leader_contact: Optional[float] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Literal
+from typing import List, Literal, Optional
 from datetime import datetime
 
 # 店家座位服務 (/api/restaurants/{restaurant_id}/seats) 
@@ -30,4 +30,11 @@ class UpdateTableStatusResponse(BaseModel):
     """POST /api/tables/{table_id}/status 回應"""
     table_id: int 
     new_status: TableStatus
-    updated_at: datetime # Pydantic 可以自動將 ISO 8601 字串解析為 datetime 物件
\ No newline at end of file
+    updated_at: datetime # Pydantic 可以自動將 ISO 8601 字串解析為 datetime 物件
+
+class TableCommand(BaseModel):
+    """WS /api/restaurants/{restaurant_id}/dashboard 店家送出的入座 / 清桌指令"""
+    table_id: int
+    action: TableStatus              # "eating" 入座 或 "empty" 清桌
+    queue_ticket_number: int = 0     # 入座時要帶位的號碼
+    request_id: Optional[str] = None # 原樣放回結果訊息，讓前端對應是哪一個指令
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Dict, List, Optional
+from app.interfaces.map_interface import IAsyncMapRepository, IAsyncMapService
+from app.schemas.map_schema import RestaurantItem, RestaurantStatusChangesResponse, RestaurantStatusItem
+from app.interfaces.queue_interface import IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.interfaces.table_interface import IAsyncTableRepository
+from app.services.status_projection import RestaurantStatusProjection, compute_status_color
+
+class AsyncMapService(IAsyncMapService):
+    """MapService 的 async 版本；沒有燈號投影時，三個 bulk 查詢同時送出"""
+    def __init__(self, map_repo: IAsyncMapRepository, table_repo: IAsyncTableRepository, queue_repo: IAsyncQueueRepository, queue_runtime_repo: IAsyncQueueRuntimeRepository, status_projection: Optional[RestaurantStatusProjection] = None):
+        self.map_repo = map_repo
+        self.table_repo = table_repo
+        self.queue_repo = queue_repo
+        self.queue_runtime_repo = queue_runtime_repo
+        # 投影保存在記憶體中，讀取不需要 await
+        self.status_projection = status_projection
+
+    async def _get_status_map(self, restaurant_ids: List[int]) -> Dict[int, str]:
+        if self.status_projection is not None:
+            snapshots = self.status_projection.get_statuses(restaurant_ids)
+            return {restaurant_id: snapshot.status for restaurant_id, snapshot in snapshots.items()}
+
+        total_waiting_map, remaining_table_map, metrics_map = await asyncio.gather(
+            self.queue_repo.get_total_waiting_bulk(restaurant_ids),
+            self.table_repo.get_restaurant_remaining_table_bulk(restaurant_ids),
+            self.queue_runtime_repo.get_metrics_bulk(restaurant_ids)
+        )
+        return {
+            restaurant_id: compute_status_color(
+                remaining_table_number=remaining_table_map.get(restaurant_id, 0),
+                total_waiting=total_waiting_map.get(restaurant_id, 0),
+                table_number=metrics_map[restaurant_id].table_number
+            )
+            for restaurant_id in restaurant_ids
+        }
+
+    async def get_restaurants(self) -> List[RestaurantItem]:
+        restaurants = await self.map_repo.get_all_restaurants()
+        status_map = await self._get_status_map([item.restaurant_id for item in restaurants])
+        return [
+            RestaurantItem(
+                restaurant_id=item.restaurant_id,
+                restaurant_name=item.restaurant_name,
+                lat=item.lat,
+                lng=item.lng,
+                image_url=item.image_url,
+                average_price=item.average_price,
+                specialties=item.specialties,
+                status=status_map[item.restaurant_id]
+            )
+            for item in restaurants
+        ]
+
+    async def get_status_changes(self, since_version: int) -> RestaurantStatusChangesResponse:
+        restaurants = await self.map_repo.get_all_restaurants()
+        restaurant_ids = [item.restaurant_id for item in restaurants]
+
+        # 沒有投影時無法追蹤版本，直接回傳全部餐廳目前的燈號
+        if self.status_projection is None:
+            status_map = await self._get_status_map(restaurant_ids)
+            return RestaurantStatusChangesResponse(
+                version=0,
+                changes=[RestaurantStatusItem(restaurant_id=restaurant_id, status=status) for restaurant_id, status in status_map.items()]
+            )
+
+        self.status_projection.get_statuses(restaurant_ids)
+        version = self.status_projection.version
+        changes = self.status_projection.get_changes_since(since_version)
+        return RestaurantStatusChangesResponse(
+            version=version,
+            changes=[RestaurantStatusItem(restaurant_id=snapshot.restaurant_id, status=snapshot.status) for snapshot in changes]
+        )
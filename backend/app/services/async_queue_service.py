@@ -0,0 +1,179 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+from app.interfaces.queue_interface import IAsyncQueueService, IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.interfaces.map_interface import IAsyncMapRepository
+from app.domain.errors import NotInQueueError, QueueAlreadyJoinedError, RestaurantNotFoundError
+from app.domain.events import QUEUE_JOINED, QUEUE_LEFT, RestaurantChangedEvent, RestaurantEventBus
+from app.schemas.queue_schema import QueueStatusResponse,JoinQueueResponse,QueueNextResponse, UserQueueStatusResponse, UserQueuePositionEvent
+from app.interfaces.unit_of_work_interface import IAsyncUnitOfWork
+from app.services.locking import ASYNC_RESTAURANT_LOCKS, ASYNC_USER_LOCKS, AsyncStripedLock
+from app.services.queue_response_cache import QUEUE_NEXT, QUEUE_STATUS, QueueResponseCache
+from app.services.unit_of_work import AsyncUnitOfWork
+
+class AsyncQueueService(IAsyncQueueService):
+    """
+    QueueService 的 async 版本，商業邏輯與例外完全相同。
+    彼此獨立的 Repo 查詢以 asyncio.gather 同時送出，I/O 型 Repository 只需等待最慢的一個。
+    """
+    def __init__(self, queue_repo: IAsyncQueueRepository, queue_runtime_repo: IAsyncQueueRuntimeRepository, map_repo: IAsyncMapRepository, event_bus: Optional[RestaurantEventBus] = None,
+                 restaurant_locks: Optional[AsyncStripedLock] = None, user_locks: Optional[AsyncStripedLock] = None,
+                 unit_of_work: Optional[IAsyncUnitOfWork] = None, response_cache: Optional[QueueResponseCache] = None):
+        self.queue_repo=queue_repo
+        self.queue_runtime_repo=queue_runtime_repo
+        self.map_repo=map_repo
+        # 排隊變動後通知其他元件 (例如地圖燈號投影)
+        self.event_bus=event_bus
+        # 同一位使用者 / 同一間餐廳的「檢查 + 寫入」必須序列化，順序固定為 user -> restaurant
+        self.restaurant_locks=restaurant_locks or ASYNC_RESTAURANT_LOCKS
+        self.user_locks=user_locks or ASYNC_USER_LOCKS
+        # 取號與加入排隊在同一個交易中
+        self.unit_of_work=unit_of_work or AsyncUnitOfWork()
+        # 設定時，排隊狀態 / 下一號的回應在餐廳沒有異動前重複使用 (需訂閱同一個 event bus)
+        self.response_cache=response_cache
+
+    def _publish(self, restaurant_id: int, kind: str) -> None:
+        if self.event_bus is not None:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=kind))
+
+    async def join_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> JoinQueueResponse:
+        async with self.user_locks.for_key(user_id), self.restaurant_locks.for_key(restaurant_id), self.unit_of_work.begin():
+            # user 是否已在任何餐廳排隊 / 餐廳是否存在
+            queue_ticket, restaurant = await asyncio.gather(
+                self.queue_repo.get_user_current_queue(user_id=user_id),
+                self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
+            )
+            if queue_ticket is not None:
+                raise QueueAlreadyJoinedError()
+            if restaurant is None:
+                raise RestaurantNotFoundError()
+            # 排隊計數 + 取得票號 (原子操作，同時讓 next_ticket_number + 1)
+            people_ahead, obtain_ticket_number = await asyncio.gather(
+                self.queue_repo.get_total_waiting(restaurant_id=restaurant_id),
+                self.queue_runtime_repo.allocate_ticket(restaurant_id=restaurant_id)
+            )
+            # 加入排隊；Repository 拒絕 (其他 process 已先替這位使用者寫入) 時視為已在排隊，號碼作廢
+            joined = await self.queue_repo.add_to_queue(
+                restaurant_id=restaurant_id,
+                user_id=user_id,
+                ticket_number=obtain_ticket_number
+            )
+            if not joined:
+                raise QueueAlreadyJoinedError()
+        self._publish(restaurant_id, QUEUE_JOINED)
+        # 計算預估時間
+        metrics = await self.queue_runtime_repo.get_metrics(restaurant_id=restaurant_id)
+        estimated_wait_time = int(people_ahead * (metrics.average_wait_time / metrics.table_number))
+
+        return JoinQueueResponse(
+            ticket_number=obtain_ticket_number,
+            people_ahead=people_ahead,
+            estimated_wait_time=estimated_wait_time
+        )
+
+    async def leave_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> None:
+        async with self.user_locks.for_key(user_id), self.restaurant_locks.for_key(restaurant_id):
+            queue_ticket, restaurant = await asyncio.gather(
+                self.queue_repo.get_user_current_queue(user_id=user_id),
+                self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
+            )
+            if queue_ticket is None:
+                raise NotInQueueError()
+            if restaurant is None:
+                raise RestaurantNotFoundError()
+            if queue_ticket.restaurant_id != restaurant_id:
+                raise NotInQueueError("User is not in this restaurant's queue.")
+            # 離開排隊
+            await self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=user_id)
+        self._publish(restaurant_id, QUEUE_LEFT)
+
+    async def _cached(self, kind: str, restaurant_id: int, build: Callable[[int], Awaitable[Any]]) -> Any:
+        """同 QueueService._cached"""
+        if self.response_cache is None:
+            return await build(restaurant_id)
+        version, response = self.response_cache.lookup(kind, restaurant_id)
+        if response is None:
+            response = await build(restaurant_id)
+            self.response_cache.store(kind, restaurant_id, version, response)
+        return response
+
+    async def get_queue_status(self, restaurant_id: int) -> QueueStatusResponse:
+        return await self._cached(QUEUE_STATUS, restaurant_id, self._build_queue_status)
+
+    async def _build_queue_status(self, restaurant_id: int) -> QueueStatusResponse:
+        restaurant, current_number, total_waiting, metrics = await asyncio.gather(
+            self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id),
+            self.queue_runtime_repo.get_current_ticket_number(restaurant_id=restaurant_id),
+            self.queue_repo.get_total_waiting(restaurant_id=restaurant_id),
+            self.queue_runtime_repo.get_metrics(restaurant_id=restaurant_id)
+        )
+        if restaurant is None:
+            raise RestaurantNotFoundError()
+        # 避免除以零的錯誤 (防呆)
+        avg_wait_time = 0
+        if metrics.table_number > 0:
+            avg_wait_time = int(total_waiting * (metrics.average_wait_time / metrics.table_number))
+        return QueueStatusResponse(
+            restaurant_id=restaurant_id,
+            restaurant_name=restaurant.restaurant_name,
+            current_number=current_number,
+            total_waiting=total_waiting,
+            avg_wait_time=avg_wait_time
+        )
+
+    async def get_queue_next(self, restaurant_id: int) -> QueueNextResponse:
+        return await self._cached(QUEUE_NEXT, restaurant_id, self._build_queue_next)
+
+    async def _build_queue_next(self, restaurant_id: int) -> QueueNextResponse:
+        restaurant, current_number, next_queue_to_call, total_waiting = await asyncio.gather(
+            self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id),
+            self.queue_runtime_repo.get_current_ticket_number(restaurant_id=restaurant_id),
+            self.queue_repo.get_next_queue_to_call(restaurant_id=restaurant_id),
+            self.queue_repo.get_total_waiting(restaurant_id=restaurant_id)
+        )
+        if restaurant is None:
+            raise RestaurantNotFoundError()
+        if next_queue_to_call is None:
+            next_queue_to_call = current_number
+        return QueueNextResponse(
+            current_number=current_number,
+            next_queue_to_call=next_queue_to_call,
+            total_waiting=total_waiting
+        )
+
+    async def get_user_queue_status(self, user_id: int) -> UserQueueStatusResponse:
+        # user 是否已在任何餐廳排隊
+        queue_ticket = await self.queue_repo.get_user_current_queue(user_id=user_id)
+        if queue_ticket is None:
+            raise NotInQueueError()
+        restaurant_id = queue_ticket.restaurant_id
+
+        restaurant, people_ahead, metrics = await asyncio.gather(
+            self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id),
+            self.queue_repo.get_people_ahead(restaurant_id=restaurant_id, user_id=queue_ticket.user_id),
+            self.queue_runtime_repo.get_metrics(restaurant_id=restaurant_id)
+        )
+        if restaurant is None:
+            raise RestaurantNotFoundError()
+        # 避免除以零的錯誤 (防呆)
+        estimated_wait_time = 0
+        if metrics.table_number > 0:
+            estimated_wait_time = int(people_ahead * (metrics.average_wait_time / metrics.table_number))
+
+        return UserQueueStatusResponse(
+            restaurant_id=restaurant_id,
+            restaurant_name=restaurant.restaurant_name,
+            ticket_number=queue_ticket.ticket_number,
+            people_ahead=people_ahead,
+            estimated_wait_time=estimated_wait_time
+        )
+
+    async def get_user_queue_position(self, user_id: int) -> UserQueuePositionEvent:
+        user_status = await self.get_user_queue_status(user_id=user_id)
+        current_number = await self.queue_runtime_repo.get_current_ticket_number(restaurant_id=user_status.restaurant_id)
+        return UserQueuePositionEvent(
+            restaurant_id=user_status.restaurant_id,
+            ticket_number=user_status.ticket_number,
+            people_ahead=user_status.people_ahead,
+            current_number=current_number,
+            estimated_wait_time=user_status.estimated_wait_time
+        )
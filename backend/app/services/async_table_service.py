@@ -0,0 +1,95 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+from app.schemas.table_schema import UpdateTableStatusResponse, RestaurantSeatsResponse, TableDetail
+from app.interfaces.table_interface import IAsyncTableService, IAsyncTableRepository
+from app.interfaces.map_interface import IAsyncMapRepository
+from app.interfaces.queue_interface import IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.domain.errors import RestaurantNotFoundError, TableNotFoundError, TableInvalidActionError, NotInQueueError
+from app.domain.events import TABLE_CLEARED, TABLE_SEATED, RestaurantChangedEvent, RestaurantEventBus
+from app.interfaces.unit_of_work_interface import IAsyncUnitOfWork
+from app.services.locking import ASYNC_RESTAURANT_LOCKS, AsyncStripedLock
+from app.services.unit_of_work import AsyncUnitOfWork
+
+class AsyncTableService(IAsyncTableService):
+    """TableService 的 async 版本，商業邏輯與例外完全相同"""
+    def __init__(self, table_repo: IAsyncTableRepository, map_repo: IAsyncMapRepository, queue_repo: IAsyncQueueRepository, queue_runtime_repo: IAsyncQueueRuntimeRepository, event_bus: Optional[RestaurantEventBus] = None,
+                 restaurant_locks: Optional[AsyncStripedLock] = None, unit_of_work: Optional[IAsyncUnitOfWork] = None):
+        self.table_repo = table_repo
+        self.map_repo = map_repo
+        self.queue_repo = queue_repo
+        self.queue_runtime_repo = queue_runtime_repo
+        # 座位變動後通知其他元件 (例如地圖燈號投影)
+        self.event_bus = event_bus
+        self.restaurant_locks = restaurant_locks or ASYNC_RESTAURANT_LOCKS
+        # 入座時的三個寫入 (移除排隊、更新叫號、更新桌子) 一起 commit / rollback
+        self.unit_of_work = unit_of_work or AsyncUnitOfWork()
+
+    def _publish(self, restaurant_id: int, kind: Optional[str]) -> None:
+        if self.event_bus is not None and kind is not None:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=kind))
+
+    async def get_restaurant_seats(self, restaurant_id: int) -> RestaurantSeatsResponse:
+        restaurant, layouts = await asyncio.gather(
+            self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id),
+            self.table_repo.get_tables_by_restaurant(restaurant_id=restaurant_id)
+        )
+        if restaurant is None:
+            raise RestaurantNotFoundError()
+        tables = [
+            TableDetail(
+                table_id=layout.table_id,
+                label=layout.label,
+                x=layout.x,
+                y=layout.y,
+                status=layout.status # type: ignore
+            )
+            for layout in layouts
+        ]
+        return RestaurantSeatsResponse(
+            restaurant_id=restaurant_id,
+            restaurant_name=restaurant.restaurant_name,
+            seats=tables
+        )
+
+    async def update_table_status(self, restaurant_id: int, table_id: int, new_table_status: str, queue_ticket_number: int) -> UpdateTableStatusResponse:
+        # 與加入 / 離開排隊共用同一組餐廳鎖
+        async with self.restaurant_locks.for_key(restaurant_id), self.unit_of_work.begin():
+            event_kind = await self._apply_table_status(restaurant_id, table_id, new_table_status, queue_ticket_number)
+        self._publish(restaurant_id, event_kind)
+
+        return UpdateTableStatusResponse(
+            table_id=table_id,
+            new_status=new_table_status, # type: ignore
+            updated_at=datetime.now(timezone.utc)
+        )
+
+    async def _apply_table_status(self, restaurant_id: int, table_id: int, new_table_status: str, queue_ticket_number: int) -> Optional[str]:
+        """呼叫前須持有該餐廳的鎖，回傳要發布的事件種類"""
+        table = await self.table_repo.get_table_by_id(table_id=table_id)
+        # 桌子不存在，或不屬於該餐廳
+        if table is None or table.restaurant_id != restaurant_id:
+            raise TableNotFoundError()
+        if table.status == new_table_status:
+            raise TableInvalidActionError(current_status=table.status)
+
+        # 情境 A: 顧客入座 (empty -> eating)
+        if new_table_status == "eating":
+            queue_ticket = await self.queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(
+                restaurant_id=restaurant_id,
+                ticket_number=queue_ticket_number
+            )
+            if queue_ticket is None:
+                raise NotInQueueError()
+            # 移除排隊是唯一的原子步驟：其他 worker 已先替這個號碼入座時停止，交由 Unit of Work 復原
+            if not await self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=queue_ticket.user_id):
+                raise NotInQueueError()
+            await self.queue_runtime_repo.set_current_ticket_number(restaurant_id=restaurant_id, ticket_number=queue_ticket.ticket_number)
+            await self.table_repo.update_status(table_id=table_id, new_table_status=new_table_status, queue_ticket_number=queue_ticket_number)
+            return TABLE_SEATED
+
+        # 情境 B: 顧客離座/清桌 (eating -> empty)
+        elif new_table_status == "empty":
+            await self.table_repo.update_status(table_id=table_id, new_table_status=new_table_status, queue_ticket_number=0)
+            return TABLE_CLEARED
+        return None
@@ -0,0 +1,50 @@
+import threading
+from typing import Optional
+from app.domain.events import QUEUE_JOINED, TABLE_CLEARED, TABLE_SEATED, RestaurantChangedEvent, RestaurantEventBus
+from app.interfaces.version_interface import IRestaurantVersionRepository
+
+
+class RestaurantChangeWatcher:
+    """
+    燈號投影、ETag 版本與推播通知器都是各 worker 自己的記憶體，
+    只會收到本 worker 的 Service 發出的事件。這個 thread 定期比對共用的每間餐廳版本號，
+    把其他 worker 造成的異動轉成本地的 event bus 事件。
+    (本 worker 的異動也會被偵測到而多發一次事件，對訂閱者只是多一次更新。)
+    """
+    def __init__(self, version_repo: IRestaurantVersionRepository, event_bus: RestaurantEventBus, interval: float = 0.05):
+        self.version_repo = version_repo
+        self.event_bus = event_bus
+        self.interval = interval
+        self._seen = version_repo.get_all_versions()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll(self) -> int:
+        """發布自上次檢查以來有異動的餐廳，回傳事件數"""
+        published = 0
+        for restaurant_id, (queue_version, table_version) in self.version_repo.get_all_versions().items():
+            seen_queue, seen_table = self._seen.get(restaurant_id, (0, 0))
+            if (queue_version, table_version) == (seen_queue, seen_table):
+                continue
+            self._seen[restaurant_id] = (queue_version, table_version)
+            if table_version != seen_table:
+                kind = TABLE_SEATED if queue_version != seen_queue else TABLE_CLEARED
+            else:
+                # 只用來決定要更新哪些資料，加入與離開的效果相同
+                kind = QUEUE_JOINED
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=kind))
+            published += 1
+        return published
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="restaurant-change-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self.poll()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from app.interfaces.unit_of_work_interface import IUnitOfWork
+
+
+class _PendingWork:
+    """等待 group commit 的一筆工作"""
+    __slots__ = ("work", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, work: Callable[[], Any]):
+        self.work = work
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class GroupCommitter:
+    """
+    Group commit：把同時送來的寫入集中成一批，在同一個交易中執行、只 commit 一次。
+
+    第一個送出工作的 thread 成為這一批的 leader，等待 max_delay 秒 (或累積到 max_batch_size 筆時提早)，
+    接著在自己的 thread 上開啟交易，依送出順序逐筆執行，每筆各自一個 savepoint：
+    某一筆拋出例外只復原該筆的寫入並把例外交給送出的人，其他筆照常 commit。
+    其他 thread 只是等待自己那筆的結果，因此每個呼叫者仍然拿到自己的回傳值 / 例外。
+    commit 本身失敗時，這一批的所有工作都拋出該例外。
+
+    工作會在 leader 的 thread 上執行，不能依賴呼叫者 thread 上的狀態 (例如已持有的鎖)。
+    """
+    def __init__(self, unit_of_work: IUnitOfWork, max_delay: float = 0.002, max_batch_size: int = 64):
+        self.unit_of_work = unit_of_work
+        self.max_delay = max_delay
+        self.max_batch_size = max_batch_size
+        self._lock = threading.Lock()
+        self._pending: List[_PendingWork] = []
+        self._leader_active = False
+        # 累積到 max_batch_size 筆時叫醒 leader
+        self._batch_full = threading.Event()
+        # 統計
+        self._commits = 0
+        self._failed_commits = 0
+        self._items = 0
+        self._max_batch = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._total_commit_time = 0.0
+
+    def submit(self, work: Callable[[], Any]) -> Any:
+        """送出一筆工作，等到所在的批次 commit 後回傳 work() 的結果 (或拋出它的例外)"""
+        item = _PendingWork(work)
+        with self._lock:
+            self._pending.append(item)
+            leader = not self._leader_active
+            if leader:
+                self._leader_active = True
+            elif len(self._pending) >= self.max_batch_size:
+                self._batch_full.set()
+        if leader:
+            self._batch_full.wait(self.max_delay)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._leader_active = False
+                self._batch_full.clear()
+            self._commit(batch)
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _commit(self, batch: List[_PendingWork]) -> None:
+        started_at = time.monotonic()
+        committed = False
+        try:
+            with self.unit_of_work.begin():
+                for item in batch:
+                    try:
+                        with self.unit_of_work.savepoint():
+                            item.result = item.work()
+                    except Exception as error:
+                        item.error = error
+            committed = True
+        except BaseException as error:
+            for item in batch:
+                if item.error is None:
+                    item.result, item.error = None, error
+        finally:
+            self._record(batch, started_at, committed)
+            for item in batch:
+                item.done.set()
+
+    def _record(self, batch: List[_PendingWork], started_at: float, committed: bool) -> None:
+        waits = [started_at - item.enqueued_at for item in batch]
+        with self._lock:
+            if committed:
+                self._commits += 1
+            else:
+                self._failed_commits += 1
+            self._items += len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._total_wait += sum(waits)
+            self._max_wait = max(self._max_wait, max(waits))
+            self._total_commit_time += time.monotonic() - started_at
+
+    def metrics(self) -> Dict[str, Any]:
+        """commit 次數、批次大小與因為等待批次而增加的延遲 (毫秒)"""
+        with self._lock:
+            batches = self._commits + self._failed_commits
+            return {
+                "commits": self._commits,
+                "failed_commits": self._failed_commits,
+                "items": self._items,
+                "average_batch_size": self._items / batches if batches else 0.0,
+                "max_batch_size": self._max_batch,
+                "average_wait_ms": self._total_wait * 1000 / self._items if self._items else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+                "average_commit_ms": self._total_commit_time * 1000 / batches if batches else 0.0,
+            }
@@ -0,0 +1,38 @@
+import bisect
+import hashlib
+from typing import Hashable, Iterable, List, Tuple
+
+
+def _hash(value: str) -> int:
+    # 需要跨 process / 重啟都相同的雜湊，不能用內建 hash()
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """
+    一致性雜湊環：每個節點在環上放 replicas 個虛擬節點，
+    key 順時針遇到的第一個虛擬節點就是負責它的節點。
+    增減節點時只有相鄰區段的 key 會換到別的節點，其餘不動。
+    """
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 64):
+        self.replicas = replicas
+        self._points: List[Tuple[int, str]] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted({node for _, node in self._points})
+
+    def add_node(self, node: str) -> None:
+        for i in range(self.replicas):
+            bisect.insort(self._points, (_hash(f"{node}#{i}"), node))
+
+    def remove_node(self, node: str) -> None:
+        self._points = [point for point in self._points if point[1] != node]
+
+    def node_for(self, key: Hashable) -> str:
+        if not self._points:
+            raise LookupError("hash ring has no nodes")
+        i = bisect.bisect(self._points, (_hash(str(key)), ""))
+        return self._points[i % len(self._points)][1]
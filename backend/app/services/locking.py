@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import weakref
+from typing import Hashable, List
+
+
+class StripedLock:
+    """
+    固定數量的鎖 (lock striping)：同一個 key 永遠對應到同一把鎖，
+    不同 key 大多落在不同的鎖上，因此不同餐廳的寫入可以同時進行，
+    又不需要為每間餐廳 / 每位使用者各自建立一把鎖。
+    """
+    def __init__(self, stripes: int = 64):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def for_key(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class AsyncStripedLock:
+    """
+    StripedLock 的 asyncio 版本，給 async Service 使用：等待鎖時讓出 event loop，
+    而不是卡住整個 thread。
+
+    asyncio.Lock 只能在建立它的 event loop 上使用，所以每個 loop 各有一組鎖
+    (正式環境只有一個 loop；測試時 TestClient 可能會換 loop)。
+    注意：與 StripedLock 互不排斥，同一份資料的寫入應只經由 sync 或 async 其中一條路徑。
+    """
+    def __init__(self, stripes: int = 64):
+        self._stripes = stripes
+        self._locks_by_loop: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List[asyncio.Lock]]" = weakref.WeakKeyDictionary()
+
+    def for_key(self, key: Hashable) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        locks = self._locks_by_loop.get(loop)
+        if locks is None:
+            locks = self._locks_by_loop[loop] = [asyncio.Lock() for _ in range(self._stripes)]
+        return locks[hash(key) % self._stripes]
+
+
+class _PollingLock:
+    """async with 用：以不等待的 try_acquire 反覆嘗試，拿不到就 await asyncio.sleep 退讓，不佔用任何 thread"""
+    _MIN_DELAY = 0.0005
+    _MAX_DELAY = 0.01
+
+    def __init__(self, lock):
+        self._lock = lock
+
+    async def __aenter__(self) -> "_PollingLock":
+        delay = self._MIN_DELAY
+        while not self._lock.try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self._MAX_DELAY)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._lock.__exit__(*exc_info)
+
+
+class AsyncStripedLockAdapter:
+    """
+    把 blocking 的 striped lock (例如跨 process 的 InterProcessStripedLock) 包成 AsyncStripedLock 的介面，
+    讓 async Service 也能與其他 worker 互斥。被包住的鎖要提供 try_acquire() -> bool 與 __exit__ (釋放)。
+
+    不在 thread pool 中等待鎖：持有 user 鎖的 coroutine 會再等 restaurant 鎖，
+    若等待佔用 thread，所有 thread 都卡在某個 coroutine 已持有的鎖上時會 deadlock。
+    """
+    def __init__(self, locks):
+        self._locks = locks
+
+    def for_key(self, key: Hashable) -> _PollingLock:
+        return _PollingLock(self._locks.for_key(key))
+
+
+# 全域共用：Service 每個 Request 都會重新建立，鎖必須跨 Service 實例共用
+# 取得順序固定為 USER_LOCKS -> RESTAURANT_LOCKS，避免 deadlock
+RESTAURANT_LOCKS = StripedLock()
+USER_LOCKS = StripedLock()
+ASYNC_RESTAURANT_LOCKS = AsyncStripedLock()
+ASYNC_USER_LOCKS = AsyncStripedLock()
@@ -1,36 +1,48 @@
-from typing import List
+from typing import Dict, List, Optional
 from app.interfaces.map_interface import IMapRepository, IMapService
-from app.schemas.map_schema import RestaurantItem
+from app.schemas.map_schema import RestaurantItem, RestaurantStatusChangesResponse, RestaurantStatusItem
 from app.interfaces.queue_interface import IQueueRepository,IQueueRuntimeRepository
 from app.interfaces.table_interface import ITableRepository
+from app.services.status_projection import RestaurantStatusProjection, compute_status_color
 
 class MapService(IMapService):
-    def __init__(self, map_repo: IMapRepository, table_repo: ITableRepository, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository):
+    def __init__(self, map_repo: IMapRepository, table_repo: ITableRepository, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository, status_projection: Optional[RestaurantStatusProjection] = None):
         # 依賴注入：這裡只認得 IMapRepository 定義過的 function
         self.map_repo = map_repo
         self.table_repo=table_repo
         self.queue_repo = queue_repo
         self.queue_runtime_repo = queue_runtime_repo
+        # 有注入燈號投影時直接讀取保存的燈號，否則每次重新計算
+        self.status_projection = status_projection
+
+    def _get_status_map(self, restaurant_ids: List[int]) -> Dict[int, str]:
+        if self.status_projection is not None:
+            snapshots = self.status_projection.get_statuses(restaurant_ids)
+            return {restaurant_id: snapshot.status for restaurant_id, snapshot in snapshots.items()}
+
+        # 一次撈出所有餐廳的排隊 / 空桌 / 座位數 (固定次數的 Repo 呼叫，避免 N+1)
+        total_waiting_map = self.queue_repo.get_total_waiting_bulk(restaurant_ids)
+        remaining_table_map = self.table_repo.get_restaurant_remaining_table_bulk(restaurant_ids)
+        metrics_map = self.queue_runtime_repo.get_metrics_bulk(restaurant_ids)
+        return {
+            restaurant_id: compute_status_color(
+                remaining_table_number=remaining_table_map.get(restaurant_id, 0),
+                total_waiting=total_waiting_map.get(restaurant_id, 0),
+                table_number=metrics_map[restaurant_id].table_number
+            )
+            for restaurant_id in restaurant_ids
+        }
 
     def get_restaurants(self) -> List[RestaurantItem]:
         # 1. 從 Repo 撈取原始資料 (List[MapEntity])
         restaurants = self.map_repo.get_all_restaurants()
+
+        # 2. 取得每間餐廳的燈號
+        status_map = self._get_status_map([item.restaurant_id for item in restaurants])
         
         # 3. 資料轉換 (List[MapEntity] -> List[RestaurantItem])
         result = []
         for item in restaurants:
-            status = "green"
-            total_waiting = self.queue_repo.get_total_waiting(item.restaurant_id)
-            remaining_table_number = self.table_repo.get_restaurant_remaining_table(item.restaurant_id)
-            table_number = self.queue_runtime_repo.get_metrics(restaurant_id=item.restaurant_id).table_number
-            if (remaining_table_number-total_waiting) <= table_number*0.2:
-                status="red"
-            elif (remaining_table_number-total_waiting) <= table_number*0.5:
-                status="yellow"
-            else:
-                status="green"
-                
-
             restaurant = RestaurantItem(        
                 restaurant_id=item.restaurant_id,
                 restaurant_name=item.restaurant_name,
@@ -39,8 +51,29 @@ class MapService(IMapService):
                 image_url=item.image_url,
                 average_price=item.average_price,
                 specialties=item.specialties,
-                status=status
+                status=status_map[item.restaurant_id]
             )
             result.append(restaurant)
             
-        return result
\ No newline at end of file
+        return result
+
+    def get_status_changes(self, since_version: int) -> RestaurantStatusChangesResponse:
+        restaurants = self.map_repo.get_all_restaurants()
+        restaurant_ids = [item.restaurant_id for item in restaurants]
+
+        # 沒有投影時無法追蹤版本，直接回傳全部餐廳目前的燈號
+        if self.status_projection is None:
+            status_map = self._get_status_map(restaurant_ids)
+            return RestaurantStatusChangesResponse(
+                version=0,
+                changes=[RestaurantStatusItem(restaurant_id=restaurant_id, status=status) for restaurant_id, status in status_map.items()]
+            )
+
+        # 確保所有餐廳都已經在投影中
+        self.status_projection.get_statuses(restaurant_ids)
+        version = self.status_projection.version
+        changes = self.status_projection.get_changes_since(since_version)
+        return RestaurantStatusChangesResponse(
+            version=version,
+            changes=[RestaurantStatusItem(restaurant_id=snapshot.restaurant_id, status=snapshot.status) for snapshot in changes]
+        )
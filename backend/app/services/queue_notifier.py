@@ -0,0 +1,66 @@
+import asyncio
+import threading
+import uuid
+from typing import Dict, Optional
+from app.domain.events import RestaurantChangedEvent
+
+
+class QueueChangeNotifier:
+    """
+    把 RestaurantChangedEvent 轉成 asyncio 上可等待的「排隊有變化」通知。
+
+    - 每間餐廳一個版本號，排隊有變化 (加入、離開、入座) 時 + 1；
+      watch_tables=True 時清桌等只影響座位的變化也會 + 1 (店家看板使用)
+    - 等待中的連線只持有同一個 asyncio.Event，不需要額外的 thread / task，
+      所以一個 worker 可以同時掛著大量閒置的 SSE / WebSocket 連線
+    - handle() 可能在 thread pool 中被呼叫 (sync 路由)，
+      因此透過 loop.call_soon_threadsafe 回到 event loop 喚醒等待者
+    """
+    def __init__(self, watch_tables: bool = False):
+        self.watch_tables = watch_tables
+        # 每次啟動不同，讓 Last-Event-ID 在重啟後不會誤判為最新
+        self.epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[int, int] = {}
+        self._waiters: Dict[int, asyncio.Event] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def handle(self, event: RestaurantChangedEvent) -> None:
+        """給 RestaurantEventBus.subscribe 使用"""
+        if not (event.affects_queue or (self.watch_tables and event.affects_tables)):
+            return
+        with self._lock:
+            self._versions[event.restaurant_id] = self._versions.get(event.restaurant_id, 0) + 1
+            loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._wake, event.restaurant_id)
+
+    def _wake(self, restaurant_id: int) -> None:
+        waiter = self._waiters.pop(restaurant_id, None)
+        if waiter is not None:
+            waiter.set()
+
+    def get_version(self, restaurant_id: int) -> int:
+        return self._versions.get(restaurant_id, 0)
+
+    def format_event_id(self, restaurant_id: int, version: int) -> str:
+        return f"{self.epoch}-{restaurant_id}-{version}"
+
+    async def wait_for_change(self, restaurant_id: int, known_version: int, timeout: float) -> int:
+        """
+        等到該餐廳的版本與 known_version 不同，或超過 timeout 秒。
+        回傳目前版本 (超時時與 known_version 相同)。
+        """
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+        current = self.get_version(restaurant_id)
+        if current != known_version:
+            return current
+        waiter = self._waiters.get(restaurant_id)
+        if waiter is None:
+            waiter = self._waiters[restaurant_id] = asyncio.Event()
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.get_version(restaurant_id)
@@ -0,0 +1,62 @@
+import threading
+from typing import Any, Dict, Optional, Tuple
+from app.domain.events import RestaurantChangedEvent
+from app.interfaces.version_interface import IRestaurantVersionRepository
+
+# 可以快取的回應
+QUEUE_STATUS = "queue_status"  # QueueService.get_queue_status -> QueueStatusResponse
+QUEUE_NEXT = "queue_next"      # QueueService.get_queue_next -> QueueNextResponse
+
+
+class QueueResponseCache:
+    """
+    排隊狀態回應的快取：每間餐廳一個版本號，任何排隊 / 座位的 RestaurantChangedEvent 都 + 1，
+    算好的回應以 (restaurant_id, 版本) 保存，版本沒變就直接回傳同一個物件，不再查詢 Repository。
+
+    使用方式：先 lookup 取得目前版本 (與快取的回應)，沒有快取時計算後以該版本 store。
+    版本在計算之前讀取，計算期間有異動時存下的版本已經過時，下一次 lookup 會重新計算，不會回傳舊資料。
+    Service 在 commit 之後才 publish 事件，版本前進時新資料已經讀得到。
+
+    多個 worker 共用資料時注入 version_repo：改用共用的排隊版本 (與資料在同一個交易中遞增)，
+    每次 lookup 時讀取，其他 worker 的異動不需要等事件傳過來。
+    """
+    def __init__(self, version_repo: Optional[IRestaurantVersionRepository] = None):
+        self.version_repo = version_repo
+        self._versions: Dict[int, int] = {}
+        # (種類, restaurant_id) -> (版本, 回應)；每間餐廳每種只保留最新的一份
+        self._entries: Dict[Tuple[str, int], Tuple[int, Any]] = {}
+        self._lock = threading.Lock()
+        # 統計
+        self.hits = 0
+        self.misses = 0
+
+    def handle(self, event: RestaurantChangedEvent) -> None:
+        """給 RestaurantEventBus.subscribe 使用"""
+        with self._lock:
+            self._versions[event.restaurant_id] = self._versions.get(event.restaurant_id, 0) + 1
+
+    def get_version(self, restaurant_id: int) -> int:
+        if self.version_repo is not None:
+            return self.version_repo.get_versions(restaurant_id)[0]
+        with self._lock:
+            return self._versions.get(restaurant_id, 0)
+
+    def lookup(self, kind: str, restaurant_id: int) -> Tuple[int, Optional[Any]]:
+        """回傳 (目前版本, 該版本的回應)；沒有快取時回應為 None"""
+        # 共用版本在持有 _lock 之前讀取，查詢資料庫時不擋住其他 Request
+        shared_version = self.version_repo.get_versions(restaurant_id)[0] if self.version_repo is not None else None
+        with self._lock:
+            version = self._versions.get(restaurant_id, 0) if shared_version is None else shared_version
+            entry = self._entries.get((kind, restaurant_id))
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return version, entry[1]
+            self.misses += 1
+            return version, None
+
+    def store(self, kind: str, restaurant_id: int, version: int, response: Any) -> None:
+        with self._lock:
+            entry = self._entries.get((kind, restaurant_id))
+            # 較慢的 Request 不會用舊版本蓋掉較新的回應
+            if entry is None or entry[0] <= version:
+                self._entries[(kind, restaurant_id)] = (version, response)
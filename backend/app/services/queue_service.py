@@ -1,36 +1,55 @@
-from typing import Optional
+from functools import partial
+from typing import Any, Callable, Optional, Tuple
 from app.interfaces.queue_interface import IQueueService,IQueueRepository,IQueueRuntimeRepository
 from app.interfaces.map_interface import IMapRepository
 from app.domain.errors import NotInQueueError, QueueAlreadyJoinedError, RestaurantNotFoundError
-from app.schemas.queue_schema import QueueStatusResponse,JoinQueueResponse,QueueNextResponse, UserQueueStatusResponse
+from app.domain.events import QUEUE_JOINED, QUEUE_LEFT, RestaurantChangedEvent, RestaurantEventBus
+from app.schemas.queue_schema import QueueStatusResponse,JoinQueueResponse,QueueNextResponse, UserQueueStatusResponse, UserQueuePositionEvent
+from app.interfaces.unit_of_work_interface import IUnitOfWork
+from app.services.group_commit import GroupCommitter
+from app.services.locking import RESTAURANT_LOCKS, USER_LOCKS, StripedLock
+from app.services.queue_response_cache import QUEUE_NEXT, QUEUE_STATUS, QueueResponseCache
+from app.services.unit_of_work import UnitOfWork
 
 class QueueService(IQueueService):
 
-    def __init__(self, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository, map_repo: IMapRepository):
+    def __init__(self, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository, map_repo: IMapRepository, event_bus: Optional[RestaurantEventBus] = None,
+                 restaurant_locks: Optional[StripedLock] = None, user_locks: Optional[StripedLock] = None,
+                 unit_of_work: Optional[IUnitOfWork] = None, group_committer: Optional[GroupCommitter] = None,
+                 response_cache: Optional[QueueResponseCache] = None):
         self.queue_repo=queue_repo
         self.queue_runtime_repo=queue_runtime_repo
         self.map_repo=map_repo
+        # 排隊變動後通知其他元件 (例如地圖燈號投影)
+        self.event_bus=event_bus
+        # 同一位使用者 / 同一間餐廳的「檢查 + 寫入」必須序列化，順序固定為 user -> restaurant
+        self.restaurant_locks=restaurant_locks or RESTAURANT_LOCKS
+        self.user_locks=user_locks or USER_LOCKS
+        # 取號與加入排隊在同一個交易中 (SQL 只 commit 一次)
+        self.unit_of_work=unit_of_work or UnitOfWork()
+        # 設定時，同時加入排隊的寫入集中成一批 commit (持久化的 Repository 使用)
+        self.group_committer=group_committer
+        # 設定時，排隊狀態 / 下一號的回應在餐廳沒有異動前重複使用 (需訂閱同一個 event bus)
+        self.response_cache=response_cache
+
+    def _publish(self, restaurant_id: int, kind: str) -> None:
+        if self.event_bus is not None:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=kind))
 
     def join_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> JoinQueueResponse:
-        # user 是否已在任何餐廳排隊
-        queue_ticket = self.queue_repo.get_user_current_queue(user_id=user_id)
-        if  queue_ticket is not None:
-            raise QueueAlreadyJoinedError()
-        # 餐廳是否存在
-        restaurant = self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
-        if restaurant is None:
-            raise RestaurantNotFoundError()
-        # 排隊計數
-        people_ahead = self.queue_repo.get_total_waiting(restaurant_id=restaurant_id)
-        # 取得票號
-        obtain_ticket_number = self.queue_runtime_repo.get_next_ticket_number(restaurant_id=restaurant_id)
-        # 加入排隊
-        self.queue_repo.add_to_queue(
-            restaurant_id=restaurant_id, 
-            user_id=user_id, 
-            ticket_number=obtain_ticket_number
-        )
-        self.queue_runtime_repo.increment_next_ticket_number(restaurant_id=restaurant_id)
+        if self.group_committer is not None:
+            # 只持有 user 鎖：同一批的寫入在 leader 的交易中依序執行，由資料庫的寫入鎖序列化；
+            # 在這裡持有餐廳鎖的話，同一間餐廳同時加入排隊的 Request 就無法併成一批
+            with self.user_locks.for_key(user_id):
+                self._check_can_join(restaurant_id, user_id)
+                people_ahead, obtain_ticket_number = self.group_committer.submit(
+                    partial(self._append_to_queue, restaurant_id, user_id)
+                )
+        else:
+            with self.user_locks.for_key(user_id), self.restaurant_locks.for_key(restaurant_id), self.unit_of_work.begin():
+                self._check_can_join(restaurant_id, user_id)
+                people_ahead, obtain_ticket_number = self._append_to_queue(restaurant_id, user_id)
+        self._publish(restaurant_id, QUEUE_JOINED)
         # 計算預估時間
         metrics= self.queue_runtime_repo.get_metrics(restaurant_id=restaurant_id)
         avg_dining_time= metrics.average_wait_time
@@ -43,22 +62,64 @@ class QueueService(IQueueService):
             people_ahead=people_ahead,
             estimated_wait_time=estimated_wait_time
         )
-    
-    def leave_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> None:
+
+    def _check_can_join(self, restaurant_id: int, user_id: int) -> None:
+        """呼叫前須持有該使用者的鎖"""
         # user 是否已在任何餐廳排隊
         queue_ticket = self.queue_repo.get_user_current_queue(user_id=user_id)
-        if queue_ticket is None:
-            raise NotInQueueError()
+        if  queue_ticket is not None:
+            raise QueueAlreadyJoinedError()
         # 餐廳是否存在
         restaurant = self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
         if restaurant is None:
             raise RestaurantNotFoundError()
-        if queue_ticket.restaurant_id != restaurant_id:
-            raise NotInQueueError("User is not in this restaurant's queue.")
-        # 離開排隊
-        self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=user_id)
+
+    def _append_to_queue(self, restaurant_id: int, user_id: int) -> Tuple[int, int]:
+        """取號並加入排隊，回傳 (前面人數, 號碼)"""
+        # 排隊計數
+        people_ahead = self.queue_repo.get_total_waiting(restaurant_id=restaurant_id)
+        # 取得票號 (原子操作，同時讓 next_ticket_number + 1)
+        obtain_ticket_number = self.queue_runtime_repo.allocate_ticket(restaurant_id=restaurant_id)
+        # 加入排隊；Repository 拒絕 (其他 process 已先替這位使用者寫入) 時視為已在排隊，號碼作廢
+        joined = self.queue_repo.add_to_queue(
+            restaurant_id=restaurant_id, 
+            user_id=user_id, 
+            ticket_number=obtain_ticket_number
+        )
+        if not joined:
+            raise QueueAlreadyJoinedError()
+        return people_ahead, obtain_ticket_number
+    
+    def leave_restaurant_waiting_queue(self, restaurant_id: int, user_id: int) -> None:
+        with self.user_locks.for_key(user_id), self.restaurant_locks.for_key(restaurant_id):
+            # user 是否已在任何餐廳排隊
+            queue_ticket = self.queue_repo.get_user_current_queue(user_id=user_id)
+            if queue_ticket is None:
+                raise NotInQueueError()
+            # 餐廳是否存在
+            restaurant = self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
+            if restaurant is None:
+                raise RestaurantNotFoundError()
+            if queue_ticket.restaurant_id != restaurant_id:
+                raise NotInQueueError("User is not in this restaurant's queue.")
+            # 離開排隊
+            self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=user_id)
+        self._publish(restaurant_id, QUEUE_LEFT)
+
+    def _cached(self, kind: str, restaurant_id: int, build: Callable[[int], Any]) -> Any:
+        """有 response_cache 時，同一個版本的回應只計算一次"""
+        if self.response_cache is None:
+            return build(restaurant_id)
+        version, response = self.response_cache.lookup(kind, restaurant_id)
+        if response is None:
+            response = build(restaurant_id)
+            self.response_cache.store(kind, restaurant_id, version, response)
+        return response
 
     def get_queue_status(self, restaurant_id: int) -> QueueStatusResponse:
+        return self._cached(QUEUE_STATUS, restaurant_id, self._build_queue_status)
+
+    def _build_queue_status(self, restaurant_id: int) -> QueueStatusResponse:
         # 1. 檢查餐廳是否存在
         restaurant = self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
         if restaurant is None:
@@ -87,6 +148,9 @@ class QueueService(IQueueService):
         )
     
     def get_queue_next(self, restaurant_id: int) -> QueueNextResponse:
+        return self._cached(QUEUE_NEXT, restaurant_id, self._build_queue_next)
+
+    def _build_queue_next(self, restaurant_id: int) -> QueueNextResponse:
         # 1. 檢查餐廳是否存在
         restaurant = self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
         if restaurant is None :
@@ -129,3 +193,14 @@ class QueueService(IQueueService):
             people_ahead=people_ahead,
             estimated_wait_time=estimated_wait_time
         )
+
+    def get_user_queue_position(self, user_id: int) -> UserQueuePositionEvent:
+        user_status = self.get_user_queue_status(user_id=user_id)
+        current_number = self.queue_runtime_repo.get_current_ticket_number(restaurant_id=user_status.restaurant_id)
+        return UserQueuePositionEvent(
+            restaurant_id=user_status.restaurant_id,
+            ticket_number=user_status.ticket_number,
+            people_ahead=user_status.people_ahead,
+            current_number=current_number,
+            estimated_wait_time=user_status.estimated_wait_time
+        )
@@ -0,0 +1,64 @@
+import threading
+import uuid
+from typing import Dict, Optional, Tuple
+from app.domain.events import RestaurantChangedEvent
+from app.interfaces.version_interface import IRestaurantVersionRepository
+from app.services.status_projection import RestaurantStatusProjection
+
+# 可以用 ETag 做條件式 GET 的資源
+RESTAURANTS = "restaurants"  # GET /api/restaurants
+TABLE = "table"              # GET /api/restaurants/{restaurant_id}/table
+QUEUE = "queue"              # GET /api/restaurants/{restaurant_id}/queue/status
+
+
+class ResourceVersions:
+    """
+    每個資源各自的版本號，由 RestaurantChangedEvent 推進，用來產生 strong ETag。
+
+    - QUEUE:       加入 / 離開排隊、入座時 + 1
+    - TABLE:       入座、清桌時 + 1
+    - RESTAURANTS: 有注入燈號投影時直接使用投影的版本 (只有燈號改變才前進)，
+                   否則任何事件都 + 1
+    ETag 中包含每次啟動隨機產生的 epoch，避免重啟後版本從 0 開始而誤判為未修改。
+
+    多個 worker 共用資料時注入 version_repo：QUEUE / TABLE 改用共用的版本與 epoch，
+    在處理 Request 時讀取，其他 worker 的異動立即生效，不同 worker 發出的 ETag 也相同。
+    RESTAURANTS 跟著本 worker 的燈號投影，仍使用本地的 epoch。
+    """
+    def __init__(self, status_projection: Optional[RestaurantStatusProjection] = None,
+                 version_repo: Optional[IRestaurantVersionRepository] = None):
+        self.status_projection = status_projection
+        self.version_repo = version_repo
+        self._epoch = uuid.uuid4().hex[:8]
+        self._versions: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+
+    def _bump(self, key: Tuple[str, int]) -> None:
+        """呼叫前須持有 _lock"""
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def handle(self, event: RestaurantChangedEvent) -> None:
+        """給 RestaurantEventBus.subscribe 使用"""
+        with self._lock:
+            if event.affects_queue:
+                self._bump((QUEUE, event.restaurant_id))
+            if event.affects_tables:
+                self._bump((TABLE, event.restaurant_id))
+            if self.status_projection is None:
+                self._bump((RESTAURANTS, 0))
+
+    def _is_shared(self, resource: str) -> bool:
+        return self.version_repo is not None and resource in (QUEUE, TABLE)
+
+    def get_version(self, resource: str, restaurant_id: int = 0) -> int:
+        if resource == RESTAURANTS and self.status_projection is not None:
+            return self.status_projection.version
+        if self._is_shared(resource):
+            queue_version, table_version = self.version_repo.get_versions(restaurant_id)
+            return queue_version if resource == QUEUE else table_version
+        return self._versions.get((resource, restaurant_id), 0)
+
+    def get_etag(self, resource: str, restaurant_id: int = 0) -> str:
+        version = self.get_version(resource, restaurant_id)
+        epoch = self.version_repo.get_epoch() if self._is_shared(resource) else self._epoch
+        return f'"{epoch}-{resource}-{restaurant_id}-{version}"'
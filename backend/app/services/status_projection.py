@@ -0,0 +1,107 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List
+from app.domain.events import RestaurantChangedEvent
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.interfaces.table_interface import ITableRepository
+
+
+def compute_status_color(remaining_table_number: int, total_waiting: int, table_number: int) -> str:
+    """
+    地圖上的餐廳燈號
+        red:    (空桌 - 排隊組數) <= 座位數 * 0.2
+        yellow: (空桌 - 排隊組數) <= 座位數 * 0.5
+        green:  其他
+    """
+    if (remaining_table_number - total_waiting) <= table_number * 0.2:
+        return "red"
+    elif (remaining_table_number - total_waiting) <= table_number * 0.5:
+        return "yellow"
+    return "green"
+
+
+@dataclass
+class RestaurantStatusSnapshot:
+    """投影中保存的單一餐廳燈號與計算它的輸入值"""
+    restaurant_id: int
+    status: str
+    total_waiting: int
+    remaining_table_number: int
+    table_number: int
+    # 燈號最後一次改變時的版本
+    version: int
+
+
+class RestaurantStatusProjection:
+    """
+    餐廳燈號的增量投影 (projection)。
+
+    只有在排隊 / 座位發生變化 (RestaurantChangedEvent) 時才重新計算該餐廳的燈號，
+    GET /api/restaurants 直接讀取保存好的結果。
+    每次有餐廳燈號改變，全域 version 就 + 1，可用 get_changes_since 查詢之後變色的餐廳。
+    """
+    def __init__(self, queue_repo: IQueueRepository, table_repo: ITableRepository, queue_runtime_repo: IQueueRuntimeRepository):
+        self.queue_repo = queue_repo
+        self.table_repo = table_repo
+        self.queue_runtime_repo = queue_runtime_repo
+        self._snapshots: Dict[int, RestaurantStatusSnapshot] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def handle(self, event: RestaurantChangedEvent) -> None:
+        """給 RestaurantEventBus.subscribe 使用"""
+        self.refresh(event.restaurant_id)
+
+    def _store(self, restaurant_id: int, total_waiting: int, remaining_table_number: int, table_number: int) -> None:
+        """呼叫前須持有 _lock"""
+        status = compute_status_color(remaining_table_number, total_waiting, table_number)
+        previous = self._snapshots.get(restaurant_id)
+        if previous is None or previous.status != status:
+            self._version += 1
+            version = self._version
+        else:
+            version = previous.version
+        self._snapshots[restaurant_id] = RestaurantStatusSnapshot(
+            restaurant_id=restaurant_id,
+            status=status,
+            total_waiting=total_waiting,
+            remaining_table_number=remaining_table_number,
+            table_number=table_number,
+            version=version
+        )
+
+    def refresh(self, restaurant_id: int) -> None:
+        """重新讀取單一餐廳的輸入值 (皆為 O(1) 的 Repo 查詢) 並更新燈號"""
+        with self._lock:
+            self._store(
+                restaurant_id,
+                total_waiting=self.queue_repo.get_total_waiting(restaurant_id),
+                remaining_table_number=self.table_repo.get_restaurant_remaining_table(restaurant_id),
+                table_number=self.queue_runtime_repo.get_metrics(restaurant_id=restaurant_id).table_number
+            )
+
+    def get_statuses(self, restaurant_ids: List[int]) -> Dict[int, RestaurantStatusSnapshot]:
+        """讀取保存的燈號；第一次出現的餐廳以 bulk 查詢初始化"""
+        with self._lock:
+            missing = [restaurant_id for restaurant_id in restaurant_ids if restaurant_id not in self._snapshots]
+            if missing:
+                total_waiting_map = self.queue_repo.get_total_waiting_bulk(missing)
+                remaining_table_map = self.table_repo.get_restaurant_remaining_table_bulk(missing)
+                metrics_map = self.queue_runtime_repo.get_metrics_bulk(missing)
+                for restaurant_id in missing:
+                    self._store(
+                        restaurant_id,
+                        total_waiting=total_waiting_map.get(restaurant_id, 0),
+                        remaining_table_number=remaining_table_map.get(restaurant_id, 0),
+                        table_number=metrics_map[restaurant_id].table_number
+                    )
+            return {restaurant_id: self._snapshots[restaurant_id] for restaurant_id in restaurant_ids}
+
+    def get_changes_since(self, version: int) -> List[RestaurantStatusSnapshot]:
+        """燈號在指定版本之後改變過的餐廳"""
+        with self._lock:
+            return [snapshot for snapshot in self._snapshots.values() if snapshot.version > version]
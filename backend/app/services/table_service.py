@@ -1,16 +1,30 @@
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 from app.schemas.table_schema import UpdateTableStatusResponse, RestaurantSeatsResponse, TableDetail, TableStatus
 from app.interfaces.table_interface import ITableService, ITableRepository
 from app.interfaces.map_interface import IMapRepository
 from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
 from app.domain.errors import RestaurantNotFoundError, TableNotFoundError, TableInvalidActionError, NotInQueueError
+from app.domain.events import TABLE_CLEARED, TABLE_SEATED, RestaurantChangedEvent, RestaurantEventBus
+from app.interfaces.unit_of_work_interface import IUnitOfWork
+from app.services.locking import RESTAURANT_LOCKS, StripedLock
+from app.services.unit_of_work import UnitOfWork
 class TableService(ITableService):
-    def __init__(self, table_repo: ITableRepository, map_repo: IMapRepository, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository):
+    def __init__(self, table_repo: ITableRepository, map_repo: IMapRepository, queue_repo: IQueueRepository, queue_runtime_repo: IQueueRuntimeRepository, event_bus: Optional[RestaurantEventBus] = None,
+                 restaurant_locks: Optional[StripedLock] = None, unit_of_work: Optional[IUnitOfWork] = None):
         self.table_repo = table_repo
         self.map_repo = map_repo
         self.queue_repo = queue_repo
         self.queue_runtime_repo = queue_runtime_repo
+        # 座位變動後通知其他元件 (例如地圖燈號投影)
+        self.event_bus = event_bus
+        self.restaurant_locks = restaurant_locks or RESTAURANT_LOCKS
+        # 入座時的三個寫入 (移除排隊、更新叫號、更新桌子) 一起 commit / rollback
+        self.unit_of_work = unit_of_work or UnitOfWork()
+
+    def _publish(self, restaurant_id: int, kind: Optional[str]) -> None:
+        if self.event_bus is not None and kind is not None:
+            self.event_bus.publish(RestaurantChangedEvent(restaurant_id=restaurant_id, kind=kind))
 
     def get_restaurant_seats(self, restaurant_id: int) -> RestaurantSeatsResponse:
         restaurant=self.map_repo.get_restaurant_basic_info(restaurant_id=restaurant_id)
@@ -36,6 +50,19 @@ class TableService(ITableService):
         )
     
     def update_table_status(self, restaurant_id: int, table_id: int, new_table_status: str, queue_ticket_number: int) -> UpdateTableStatusResponse:
+        # 與加入 / 離開排隊共用同一組餐廳鎖，入座時移除的排隊資料不會同時被其他 Request 修改
+        with self.restaurant_locks.for_key(restaurant_id), self.unit_of_work.begin():
+            event_kind = self._apply_table_status(restaurant_id, table_id, new_table_status, queue_ticket_number)
+        self._publish(restaurant_id, event_kind)
+
+        return UpdateTableStatusResponse(
+            table_id=table_id,
+            new_status=new_table_status, # type: ignore
+            updated_at=datetime.now(timezone.utc)
+        )
+
+    def _apply_table_status(self, restaurant_id: int, table_id: int, new_table_status: str, queue_ticket_number: int) -> Optional[str]:
+        """呼叫前須持有該餐廳的鎖，回傳要發布的事件種類"""
         # 1. 獲取桌子資訊
         table = self.table_repo.get_table_by_id(table_id=table_id)
         if table is None:
@@ -62,11 +89,14 @@ class TableService(ITableService):
                 raise NotInQueueError()
 
             # 執行入座相關的排隊操作
-            self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=queue_ticket.user_id)
+            # 移除排隊是唯一的原子步驟：其他 worker 已先替這個號碼入座時停止，交由 Unit of Work 復原
+            if not self.queue_repo.remove_from_queue(restaurant_id=restaurant_id, user_id=queue_ticket.user_id):
+                raise NotInQueueError()
             self.queue_runtime_repo.set_current_ticket_number(restaurant_id=restaurant_id, ticket_number=queue_ticket.ticket_number)
 
             # 更新桌子狀態 (這裡需要帶入 ticket_number 嗎？視你的實作而定)
             self.table_repo.update_status(table_id=table_id, new_table_status=new_table_status, queue_ticket_number=queue_ticket_number)
+            return TABLE_SEATED
 
         # 情境 B: 顧客離座/清桌 (eating -> empty)
         # 不需要檢查排隊號碼，也不需要操作 Queue Repo
@@ -74,9 +104,6 @@ class TableService(ITableService):
             # 只單純更新桌子狀態
             # 這裡傳入 None 或 0 給 ticket_number，視你的 Repository 實作而定
             self.table_repo.update_status(table_id=table_id, new_table_status=new_table_status, queue_ticket_number=0)
+            return TABLE_CLEARED
+        return None
         
-        return UpdateTableStatusResponse(
-            table_id=table_id,
-            new_status=new_table_status, # type: ignore
-            updated_at=datetime.now(timezone.utc)
-        )
\ No newline at end of file
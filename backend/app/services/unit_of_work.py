@@ -0,0 +1,160 @@
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterator, List, Optional
+from app.interfaces.unit_of_work_interface import IAsyncUnitOfWork, IUnitOfWork
+
+# --- Unit of Work 的共用機制 ---
+# 交易範圍記錄在 ContextVar 中 (每個 thread / asyncio task 各自一份)，Repository 不需要多一個參數就能加入交易：
+#   - 記憶體類 Repository 在寫入後以 record_undo 登記「怎麼復原」，rollback 時倒序執行 (undo log)
+#   - journal 等必須成功才算寫入的副作用以 before_commit 在 commit 前執行，失敗時依 undo log 復原並拋出例外
+#   - 其他對外的副作用以 after_commit 延後到 commit 之後，rollback 時直接丟掉
+# 沒有交易時 record_undo 不做事、before_commit / after_commit 立即執行，行為與原本相同。
+
+
+class UnitOfWorkScope:
+    """一個交易內登記的復原動作、commit 前與 commit 後的動作"""
+    def __init__(self):
+        self._undo_log: List[Callable[[], object]] = []
+        self._before_commit: List[Callable[[], object]] = []
+        self._after_commit: List[Callable[[], object]] = []
+
+    def add_undo(self, action: Callable[[], object]) -> None:
+        self._undo_log.append(action)
+
+    def add_before_commit(self, action: Callable[[], object]) -> None:
+        self._before_commit.append(action)
+
+    def add_after_commit(self, action: Callable[[], object]) -> None:
+        self._after_commit.append(action)
+
+    def merge(self, child: "UnitOfWorkScope") -> None:
+        """savepoint 成功：子範圍的動作併入外層"""
+        self._undo_log.extend(child._undo_log)
+        self._before_commit.extend(child._before_commit)
+        self._after_commit.extend(child._after_commit)
+
+    def rollback(self) -> None:
+        undo_log, self._undo_log, self._before_commit, self._after_commit = self._undo_log, [], [], []
+        for action in reversed(undo_log):
+            action()
+
+    def prepare(self) -> None:
+        """依序執行 commit 前的動作；任一個失敗時由呼叫端 rollback"""
+        before_commit, self._before_commit = self._before_commit, []
+        for action in before_commit:
+            action()
+
+    def commit(self) -> None:
+        after_commit, self._undo_log, self._after_commit = self._after_commit, [], []
+        for action in after_commit:
+            action()
+
+
+_ACTIVE_SCOPE: ContextVar[Optional[UnitOfWorkScope]] = ContextVar("active_unit_of_work_scope", default=None)
+
+
+def in_unit_of_work() -> bool:
+    """目前是否在交易中 (Repository 需要額外查詢才能登記復原動作時，先以此判斷)"""
+    return _ACTIVE_SCOPE.get() is not None
+
+
+def record_undo(action: Callable[[], object]) -> None:
+    """在交易中時登記復原動作 (Repository 寫入後呼叫)"""
+    scope = _ACTIVE_SCOPE.get()
+    if scope is not None:
+        scope.add_undo(action)
+
+
+def before_commit(action: Callable[[], object]) -> None:
+    """在交易中時延後到 commit 前執行 (失敗則整個交易復原)，否則立即執行"""
+    scope = _ACTIVE_SCOPE.get()
+    if scope is None:
+        action()
+    else:
+        scope.add_before_commit(action)
+
+
+def after_commit(action: Callable[[], object]) -> None:
+    """在交易中時延後到 commit 之後執行，否則立即執行"""
+    scope = _ACTIVE_SCOPE.get()
+    if scope is None:
+        action()
+    else:
+        scope.add_after_commit(action)
+
+
+@contextmanager
+def unit_of_work_scope() -> Iterator[UnitOfWorkScope]:
+    """開始交易範圍；已經在交易中時加入外層"""
+    scope = _ACTIVE_SCOPE.get()
+    if scope is not None:
+        yield scope
+        return
+    scope = UnitOfWorkScope()
+    token = _ACTIVE_SCOPE.set(scope)
+    try:
+        yield scope
+    except BaseException:
+        # 先離開交易範圍，復原動作本身不再登記 undo
+        _ACTIVE_SCOPE.reset(token)
+        scope.rollback()
+        raise
+    _ACTIVE_SCOPE.reset(token)
+    try:
+        scope.prepare()
+    except BaseException:
+        # commit 前的動作 (journal) 失敗：記憶體的異動也不算數
+        scope.rollback()
+        raise
+    scope.commit()
+
+
+@contextmanager
+def savepoint_scope() -> Iterator[UnitOfWorkScope]:
+    """在交易中建立子範圍，失敗時只復原子範圍內的寫入；不在交易中時等同 unit_of_work_scope"""
+    parent = _ACTIVE_SCOPE.get()
+    if parent is None:
+        with unit_of_work_scope() as scope:
+            yield scope
+        return
+    scope = UnitOfWorkScope()
+    token = _ACTIVE_SCOPE.set(scope)
+    try:
+        yield scope
+    except BaseException:
+        # 復原動作不登記到任何範圍
+        detached = _ACTIVE_SCOPE.set(None)
+        try:
+            scope.rollback()
+        finally:
+            _ACTIVE_SCOPE.reset(detached)
+            _ACTIVE_SCOPE.reset(token)
+        raise
+    _ACTIVE_SCOPE.reset(token)
+    parent.merge(scope)
+
+
+class UnitOfWork(IUnitOfWork):
+    """記憶體模式的 Unit of Work：rollback 依 undo log 倒序復原，journal 在 commit 前寫入，失敗時一併復原"""
+    @contextmanager
+    def begin(self) -> Iterator[None]:
+        with unit_of_work_scope():
+            yield
+
+    @contextmanager
+    def savepoint(self) -> Iterator[None]:
+        with savepoint_scope():
+            yield
+
+
+class AsyncUnitOfWork(IAsyncUnitOfWork):
+    """UnitOfWork 的 async 版本 (記憶體 Repository 不會在交易中讓出 event loop)"""
+    @asynccontextmanager
+    async def begin(self) -> AsyncIterator[None]:
+        with unit_of_work_scope():
+            yield
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[None]:
+        with savepoint_scope():
+            yield
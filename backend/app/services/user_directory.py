@@ -0,0 +1,31 @@
+import threading
+from typing import Dict, Optional
+
+
+class UserDirectory:
+    """
+    cluster gateway 用的小目錄：user_id -> 正在排隊的 restaurant_id。
+
+    排隊資料依餐廳分散在各節點，「同一位使用者只能排一間」無法在單一節點檢查，
+    由 gateway 在轉送加入排隊前查這份目錄。目錄只是提示：使用者入座 / 被叫號後
+    節點不會通知 gateway，所以查到的紀錄要再向負責該餐廳的節點確認 (見 gateway)。
+    """
+    def __init__(self):
+        self._restaurants: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._restaurants)
+
+    def get(self, user_id: int) -> Optional[int]:
+        return self._restaurants.get(user_id)
+
+    def set(self, user_id: int, restaurant_id: int) -> None:
+        with self._lock:
+            self._restaurants[user_id] = restaurant_id
+
+    def discard(self, user_id: int, restaurant_id: Optional[int] = None) -> None:
+        """移除紀錄；指定 restaurant_id 時只在紀錄仍是該餐廳時移除"""
+        with self._lock:
+            if restaurant_id is None or self._restaurants.get(user_id) == restaurant_id:
+                self._restaurants.pop(user_id, None)
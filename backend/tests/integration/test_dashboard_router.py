@@ -0,0 +1,157 @@
+import pytest
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+from unittest.mock import MagicMock
+
+from app.routers.dashboard import dashboard_router, get_dashboard_notifier
+from app.routers.queues import get_queue_service
+from app.routers.table import get_table_service
+from app.routers.replication import get_replication_node
+from app.repositories.replication import ReplicationNode
+from app.services.queue_service import QueueService
+from app.services.table_service import TableService
+from app.services.queue_notifier import QueueChangeNotifier
+from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
+from app.interfaces.map_interface import IMapRepository
+from app.interfaces.table_interface import ITableRepository
+from app.domain.entities import MapEntity, QueueEntity, TableEntity
+from app.domain.events import TABLE_CLEARED, RestaurantChangedEvent
+# 建立測試用的 FastAPI App
+app = FastAPI()
+app.include_router(dashboard_router)
+
+client = TestClient(app)
+
+# --- Fixtures ---
+@pytest.fixture
+def mock_repos():
+    table_repo = MagicMock(spec=ITableRepository)
+    map_repo = MagicMock(spec=IMapRepository)
+    queue_repo = MagicMock(spec=IQueueRepository)
+    queue_runtime_repo = MagicMock(spec=IQueueRuntimeRepository)
+    return table_repo, map_repo, queue_repo, queue_runtime_repo
+
+@pytest.fixture
+def notifier():
+    return QueueChangeNotifier(watch_tables=True)
+
+@pytest.fixture
+def node():
+    replication_node = MagicMock(spec=ReplicationNode)
+    replication_node.read_only = False
+    return replication_node
+
+@pytest.fixture
+def app_with_override(mock_repos, notifier, node):
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    app.dependency_overrides[get_queue_service] = lambda: QueueService(queue_repo, queue_runtime_repo, map_repo)
+    app.dependency_overrides[get_table_service] = lambda: TableService(table_repo, map_repo, queue_repo, queue_runtime_repo)
+    app.dependency_overrides[get_dashboard_notifier] = lambda: notifier
+    app.dependency_overrides[get_replication_node] = lambda: node
+    yield app
+    app.dependency_overrides = {}
+
+def arrange_restaurant(mock_repos):
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    map_repo.get_restaurant_basic_info.return_value = MapEntity(
+                                                                restaurant_id = 2,
+                                                                restaurant_name = "麥克小姐",
+                                                                lat = 24.968,
+                                                                lng = 121.192,
+                                                                image_url = "https://example.com/burger.jpg",
+                                                                average_price = (150,300),
+                                                                specialties = "義大利麵、漢堡",
+                                                            )
+    queue_runtime_repo.get_current_ticket_number.return_value = 20
+    queue_repo.get_next_queue_to_call.return_value = 22
+    queue_repo.get_total_waiting.return_value = 5
+    table_repo.get_tables_by_restaurant.return_value = [
+        TableEntity(table_id=10, restaurant_id=2, label="1桌", x=1, y=1, status="empty")
+    ]
+
+
+def test_dashboard_SnapshotAndSeatCommand(app_with_override, mock_repos):
+    """連線後先收到看板資料，送出入座指令後收到結果"""
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    arrange_restaurant(mock_repos)
+    table_repo.get_table_by_id.return_value = TableEntity(table_id=10, restaurant_id=2, label="1桌", x=1, y=1, status="empty")
+    queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber.return_value = QueueEntity(
+        queue_id=1, restaurant_id=2, user_id=100, ticket_number=22
+    )
+
+    with client.websocket_connect("/api/restaurants/2/dashboard") as websocket:
+        snapshot = websocket.receive_json()
+        websocket.send_json({"table_id": 10, "action": "eating", "queue_ticket_number": 22, "request_id": "r1"})
+        result = websocket.receive_json()
+
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["queue"]["next_queue_to_call"] == 22
+    assert snapshot["seats"]["seats"][0]["label"] == "1桌"
+    assert result["type"] == "result"
+    assert result["request_id"] == "r1"
+    assert result["data"]["new_status"] == "eating"
+    queue_repo.remove_from_queue.assert_called_once_with(restaurant_id=2, user_id=100)
+
+
+def test_dashboard_CommandError(app_with_override, mock_repos):
+    """指令失敗時，回傳與 HTTP 相同格式的錯誤"""
+    table_repo, _, _, _ = mock_repos
+    arrange_restaurant(mock_repos)
+    table_repo.get_table_by_id.return_value = None # 桌子不存在
+
+    with client.websocket_connect("/api/restaurants/2/dashboard") as websocket:
+        websocket.receive_json()
+        websocket.send_json({"table_id": 999, "action": "empty", "request_id": "r2"})
+        message = websocket.receive_json()
+
+    assert message["type"] == "error"
+    assert message["request_id"] == "r2"
+    assert message["error"]["code"] == "TABLE_NOT_FOUND"
+
+
+def test_dashboard_FollowerRejectsSeatCommand(app_with_override, mock_repos, node):
+    """follower 仍可看板，但入座指令回 READ_ONLY_REPLICA，不修改座位"""
+    table_repo, _, queue_repo, _ = mock_repos
+    arrange_restaurant(mock_repos)
+    node.read_only = True
+
+    with client.websocket_connect("/api/restaurants/2/dashboard") as websocket:
+        snapshot = websocket.receive_json()
+        websocket.send_json({"table_id": 10, "action": "eating", "queue_ticket_number": 22, "request_id": "r3"})
+        message = websocket.receive_json()
+
+    assert snapshot["type"] == "snapshot"
+    assert message["type"] == "error"
+    assert message["request_id"] == "r3"
+    assert message["error"]["code"] == "READ_ONLY_REPLICA"
+    table_repo.update_status.assert_not_called()
+    queue_repo.remove_from_queue.assert_not_called()
+
+
+def test_dashboard_PushOnChange(app_with_override, mock_repos, notifier):
+    """有排隊 / 座位變化時主動推送新的看板資料"""
+    table_repo, _, _, _ = mock_repos
+    arrange_restaurant(mock_repos)
+
+    with client.websocket_connect("/api/restaurants/2/dashboard") as websocket:
+        first = websocket.receive_json()
+        table_repo.get_tables_by_restaurant.return_value = [
+            TableEntity(table_id=10, restaurant_id=2, label="1桌", x=1, y=1, status="eating")
+        ]
+        notifier.handle(RestaurantChangedEvent(restaurant_id=2, kind=TABLE_CLEARED))
+        pushed = websocket.receive_json()
+
+    assert first["version"] == 0
+    assert pushed["type"] == "snapshot"
+    assert pushed["version"] == 1
+    assert pushed["seats"]["seats"][0]["status"] == "eating"
+
+
+def test_dashboard_RestaurantNotFoundError(app_with_override, mock_repos):
+    _, map_repo, _, _ = mock_repos
+    map_repo.get_restaurant_basic_info.return_value = None # 餐廳不存在
+
+    with client.websocket_connect("/api/restaurants/999/dashboard") as websocket:
+        message = websocket.receive_json()
+
+    assert message["error"]["code"] == "RESTAURANT_NOT_FOUND"
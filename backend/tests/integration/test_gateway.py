@@ -0,0 +1,152 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.gateway import create_gateway
+from app.routers.queues import queue_router, get_queue_service
+from app.routers.map import map_router, get_map_service
+from app.routers.table import table_router, get_table_service
+from app.routers.etag import get_resource_versions
+from app.repositories.fake_all_repo import MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+from app.services.queue_service import QueueService
+from app.services.map_service import MapService
+from app.services.table_service import TableService
+from app.services.status_projection import RestaurantStatusProjection
+from app.services.resource_versions import ResourceVersions
+from app.services.locking import StripedLock
+from app.domain.events import RestaurantEventBus
+
+# 以這組節點名稱，餐廳 1、3 由 node2 負責，餐廳 2 由 node3 負責
+NODES = ["http://node1", "http://node2", "http://node3"]
+
+
+class _Node:
+    """一個 backend 節點：自己的記憶體資料 + queue / map / table Router"""
+    def __init__(self):
+        self.queue_repo = MemoryQueueRepository()
+        self.runtime_repo = MemoryQueueRuntimeRepository()
+        self.table_repo = MemoryTableRepository()
+        self.map_repo = MemoryMapRepository()
+        event_bus = RestaurantEventBus()
+        projection = RestaurantStatusProjection(queue_repo=self.queue_repo, table_repo=self.table_repo, queue_runtime_repo=self.runtime_repo)
+        event_bus.subscribe(projection.handle)
+        versions = ResourceVersions(status_projection=projection)
+        event_bus.subscribe(versions.handle)
+        restaurant_locks, user_locks = StripedLock(), StripedLock()
+
+        self.app = FastAPI()
+        self.app.include_router(queue_router)
+        self.app.include_router(map_router)
+        self.app.include_router(table_router)
+        self.app.dependency_overrides[get_queue_service] = lambda: QueueService(
+            self.queue_repo, self.runtime_repo, self.map_repo, event_bus=event_bus,
+            restaurant_locks=restaurant_locks, user_locks=user_locks
+        )
+        self.app.dependency_overrides[get_map_service] = lambda: MapService(
+            self.map_repo, self.table_repo, self.queue_repo, self.runtime_repo, status_projection=projection
+        )
+        self.app.dependency_overrides[get_table_service] = lambda: TableService(
+            self.table_repo, self.map_repo, self.queue_repo, self.runtime_repo, event_bus=event_bus,
+            restaurant_locks=restaurant_locks
+        )
+        self.app.dependency_overrides[get_resource_versions] = lambda: versions
+
+
+@pytest.fixture
+def nodes():
+    return {name: _Node() for name in NODES}
+
+
+@pytest.fixture
+def gateway(nodes):
+    client = httpx.AsyncClient(mounts={name: httpx.ASGITransport(app=node.app) for name, node in nodes.items()})
+    return TestClient(create_gateway(NODES, client=client))
+
+
+# 測試排隊 Request 只送到負責該餐廳的節點
+def test_join_RoutedToOwningNode(gateway, nodes):
+    # Act
+    response = gateway.post("/api/restaurants/2/queue", json={"user_id": 7})
+    status = gateway.get("/api/restaurants/2/queue/status")
+
+    # Assert
+    assert response.status_code == 201
+    assert nodes["http://node3"].queue_repo.get_total_waiting(restaurant_id=2) == 1
+    assert nodes["http://node2"].queue_repo.get_total_waiting(restaurant_id=2) == 0
+    assert status.json()["total_waiting"] == 1
+    assert gateway.get("/api/user/7/queue").json()["restaurant_id"] == 2
+
+
+# 測試不同節點上的餐廳仍然遵守「一人只能排一間」，入座後可以再排
+def test_join_UserUniqueAcrossNodes(gateway, nodes):
+    # Arrange
+    gateway.post("/api/restaurants/1/queue", json={"user_id": 8})
+
+    # Act
+    conflict = gateway.post("/api/restaurants/2/queue", json={"user_id": 8})
+    # 使用者在 node2 入座 (節點不會通知 gateway，目錄的紀錄變成過期)
+    nodes["http://node2"].queue_repo.remove_from_queue(restaurant_id=1, user_id=8)
+    rejoined = gateway.post("/api/restaurants/2/queue", json={"user_id": 8})
+
+    # Assert
+    assert conflict.status_code == 409
+    assert conflict.json()["error"]["code"] == "QUEUE_ALREADY_JOINED"
+    assert rejoined.status_code == 201
+    assert nodes["http://node3"].queue_repo.get_user_current_queue(user_id=8).restaurant_id == 2
+
+
+# 測試離開排隊後目錄也會清掉
+def test_leave_ClearsDirectory(gateway):
+    # Arrange
+    gateway.post("/api/restaurants/3/queue", json={"user_id": 9})
+
+    # Act
+    left = gateway.request("DELETE", "/api/restaurants/3/queue", json={"user_id": 9})
+    status = gateway.get("/api/user/9/queue")
+
+    # Assert
+    assert left.status_code == 204
+    assert status.status_code == 400
+    assert status.json()["error"]["code"] == "NOT_IN_QUEUE"
+
+
+# 測試餐廳列表合併各節點負責的燈號，並支援條件式 GET
+def test_restaurants_MergesOwnersStatus(gateway):
+    # Arrange：餐廳 2 (node3) 排到沒有空位
+    first = gateway.get("/api/restaurants")
+    for user_id in range(100, 106):
+        gateway.post("/api/restaurants/2/queue", json={"user_id": user_id})
+
+    # Act
+    stale = gateway.get("/api/restaurants", headers={"If-None-Match": first.headers["etag"]})
+    changed = gateway.get("/api/restaurants")
+    changes = gateway.get("/api/restaurants/status", params={"since_version": 0}).json()
+    later = gateway.get("/api/restaurants/status", params={"since_version": changes["version"]}).json()
+
+    # Assert
+    assert [item["restaurant_id"] for item in first.json()] == [1, 2, 3]
+    assert stale.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert {item["restaurant_id"]: item["status"] for item in changed.json()}[2] == "red"
+    assert {change["restaurant_id"]: change["status"] for change in changes["changes"]}[2] == "red"
+    assert gateway.get("/api/restaurants", headers={"If-None-Match": changed.headers["etag"]}).status_code == 304
+    assert later == {"version": changes["version"], "changes": []}
+
+
+# 測試負責的節點無法連線時回傳 502
+def test_forward_NodeDown_Returns502(nodes):
+    # Arrange：node3 沒有掛載，連線失敗
+    def refuse(request):
+        raise httpx.ConnectError("connection refused", request=request)
+    mounts = {name: httpx.ASGITransport(app=node.app) for name, node in nodes.items() if name != "http://node3"}
+    mounts["http://node3"] = httpx.MockTransport(refuse)
+    gateway = TestClient(create_gateway(NODES, client=httpx.AsyncClient(mounts=mounts)))
+
+    # Act
+    response = gateway.get("/api/restaurants/2/queue/status")
+
+    # Assert
+    assert response.status_code == 502
+    assert response.json()["error"]["code"] == "NODE_UNAVAILABLE"
+    assert gateway.get("/api/restaurants/1/queue/status").status_code == 200
@@ -88,9 +88,12 @@ def test_get_restaurants_success(app_with_map_override, mock_repos):
     
     # 設定 Mock Repo 的行為：當被呼叫 get_all_restaurants 時，回傳上面的假資料
     mock_map_repo.get_all_restaurants.return_value = fake_db_data
-    mock_queue_repo.get_total_waiting.return_value = 3
-    mock_table_repo.get_restaurant_remaining_table.return_value = 8
-    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=15, table_number=10)
+    mock_queue_repo.get_total_waiting_bulk.return_value = {2: 3, 3: 3}
+    mock_table_repo.get_restaurant_remaining_table_bulk.return_value = {2: 8, 3: 8}
+    mock_queue_runtime_repo.get_metrics_bulk.return_value = {
+        2: RestaurantMetrics(average_wait_time=15, table_number=10),
+        3: RestaurantMetrics(average_wait_time=15, table_number=10),
+    }
     # 2. Act (執行請求)
     # 這裡的網址必須對應 router 設定的 prefix + path
     response = client.get("/api/restaurants")
@@ -107,4 +110,32 @@ def test_get_restaurants_success(app_with_map_override, mock_repos):
     assert data[1]["status"] == "yellow"
 
     # 驗證 Service 是否真的有去呼叫 Repository
-    mock_map_repo.get_all_restaurants.assert_called_once()
\ No newline at end of file
+    mock_map_repo.get_all_restaurants.assert_called_once()
+
+
+def test_get_restaurant_status_changes_success(app_with_map_override, mock_repos):
+    """
+    測試 GET /api/restaurants/status 在沒有投影時回傳所有餐廳目前的燈號
+    """
+    mock_map_repo, mock_table_repo, mock_queue_repo, mock_queue_runtime_repo = mock_repos
+    mock_map_repo.get_all_restaurants.return_value = [
+        MapEntity(
+            restaurant_id = 2,
+            restaurant_name = "麥克小姐",
+            lat = 24.968,
+            lng = 121.192,
+            image_url = "https://example.com/burger.jpg",
+            average_price = (150,300),
+            specialties = "義大利麵、漢堡",
+        )
+    ]
+    mock_queue_repo.get_total_waiting_bulk.return_value = {2: 0}
+    mock_table_repo.get_restaurant_remaining_table_bulk.return_value = {2: 1}
+    mock_queue_runtime_repo.get_metrics_bulk.return_value = {2: RestaurantMetrics(average_wait_time=15, table_number=10)}
+
+    response = client.get("/api/restaurants/status?since_version=0")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["version"] == 0
+    assert data["changes"] == [{"restaurant_id": 2, "status": "red"}]
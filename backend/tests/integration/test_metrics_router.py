@@ -0,0 +1,87 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from app.routers.metrics import metrics_router, get_group_committer, get_map_cache
+from app.services.group_commit import GroupCommitter
+from app.repositories.cached_map_repo import CachedMapRepository
+from app.repositories.fake_all_repo import MemoryMapRepository
+
+# 建立測試用的 FastAPI App
+app = FastAPI()
+app.include_router(metrics_router)
+
+client = TestClient(app)
+
+
+# 測試回傳 group commit 的統計
+def test_get_group_commit_metrics_Enabled():
+    # Arrange
+    committer = GroupCommitter(MagicMock())
+    committer.submit(lambda: None)
+    app.dependency_overrides[get_group_committer] = lambda: committer
+
+    # Act
+    response = client.get("/api/metrics/group-commit")
+
+    # Assert
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is True
+    assert body["commits"] == 1
+    assert body["items"] == 1
+    assert body["average_batch_size"] == 1.0
+    app.dependency_overrides.clear()
+
+
+# 測試沒有啟用 group commit 時回傳 enabled = false
+def test_get_group_commit_metrics_Disabled():
+    # Arrange
+    app.dependency_overrides[get_group_committer] = lambda: None
+
+    # Act
+    response = client.get("/api/metrics/group-commit")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json() == {
+        "enabled": False, "commits": 0, "failed_commits": 0, "items": 0, "average_batch_size": 0.0,
+        "max_batch_size": 0, "average_wait_ms": 0.0, "max_wait_ms": 0.0, "average_commit_ms": 0.0
+    }
+    app.dependency_overrides.clear()
+
+
+# 測試回傳餐廳資料快取的命中統計
+def test_get_map_cache_metrics_Enabled():
+    # Arrange
+    cache = CachedMapRepository(MemoryMapRepository())
+    cache.get_restaurant_basic_info(restaurant_id=1)
+    cache.get_restaurant_basic_info(restaurant_id=1)
+    app.dependency_overrides[get_map_cache] = lambda: cache
+
+    # Act
+    response = client.get("/api/metrics/map-cache")
+
+    # Assert
+    assert response.status_code == 200
+    body = response.json()
+    assert body["enabled"] is True
+    assert body["hits"] == 1
+    assert body["misses"] == 1
+    assert body["hit_rate"] == 0.5
+    app.dependency_overrides.clear()
+
+
+# 測試沒有啟用快取時回傳 enabled = false
+def test_get_map_cache_metrics_Disabled():
+    # Arrange
+    app.dependency_overrides[get_map_cache] = lambda: None
+
+    # Act
+    response = client.get("/api/metrics/map-cache")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["enabled"] is False
+    assert response.json()["hits"] == 0
+    app.dependency_overrides.clear()
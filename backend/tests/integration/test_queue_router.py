@@ -4,12 +4,21 @@ from fastapi import FastAPI
 from unittest.mock import MagicMock
 
 # Import 你的模組
-from app.routers.queues import queue_router, get_queue_service
+from app.routers.queues import queue_router, get_queue_service, get_queue_notifier
 from app.services.queue_service import QueueService
 from app.interfaces.queue_interface import IQueueRepository, IQueueRuntimeRepository
 from app.interfaces.map_interface import IMapRepository
 from app.domain.value_objects import RestaurantMetrics
 from app.domain.entities import QueueEntity, MapEntity
+from app.domain.events import QUEUE_JOINED, RestaurantChangedEvent
+from app.routers.etag import get_resource_versions
+from app.services.resource_versions import ResourceVersions
+from app.services.queue_notifier import QueueChangeNotifier
+from app.services.async_queue_service import AsyncQueueService
+from app.repositories.fake_all_repo import (
+    AsyncMemoryMapRepository, AsyncMemoryQueueRepository, AsyncMemoryQueueRuntimeRepository,
+    MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository
+)
 # 建立測試用的 FastAPI App
 app = FastAPI()
 app.include_router(queue_router)
@@ -47,7 +56,7 @@ def test_join_restaurant_waiting_queue_Success(app_with_override, mock_repos):
     mock_queue_repo.get_user_current_queue.return_value = None # 使用者沒排隊
     mock_map_repo.get_restaurant_basic_info.return_value = True # 餐廳存在
     mock_queue_repo.get_total_waiting.return_value = waiting_count
-    mock_queue_runtime_repo.get_next_ticket_number.return_value = obtain_ticket_number
+    mock_queue_runtime_repo.allocate_ticket.return_value = obtain_ticket_number
     mock_queue_runtime_repo.get_metrics.return_value = metrics
     mock_queue_repo.add_to_queue.return_value = True 
 
@@ -291,4 +300,80 @@ def test_get_user_queue_status_RestaurantNotFoundError(app_with_override, mock_r
     assert response.status_code == 404
     data = response.json()
     assert data["error"]["code"] == "RESTAURANT_NOT_FOUND"
-    
\ No newline at end of file
+    
+
+
+# --- 6. 條件式 GET (ETag) 測試 ---
+def test_get_queue_status_NotModified(app_with_override, mock_repos):
+    """帶著相同的 ETag 再次查詢時回傳 304，且不會呼叫任何 Repo"""
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    versions = ResourceVersions()
+    app.dependency_overrides[get_resource_versions] = lambda: versions
+
+    mock_map_repo.get_restaurant_basic_info.return_value = MapEntity(
+                                                                restaurant_id = 1,
+                                                                restaurant_name = "麥克小姐",
+                                                                lat = 24.968,
+                                                                lng = 121.192,
+                                                                image_url = "https://example.com/burger.jpg",
+                                                                average_price = (150,300),
+                                                                specialties = "義大利麵、漢堡",
+                                                            )
+    mock_queue_runtime_repo.get_current_ticket_number.return_value = 105
+    mock_queue_repo.get_total_waiting.return_value = 5
+    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=10,table_number=2)
+
+    first = client.get("/api/restaurants/1/queue/status")
+    etag = first.headers["ETag"]
+    mock_map_repo.reset_mock()
+
+    second = client.get("/api/restaurants/1/queue/status", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    mock_map_repo.get_restaurant_basic_info.assert_not_called()
+
+    # 排隊有變動後，舊的 ETag 就失效
+    versions.handle(RestaurantChangedEvent(restaurant_id=1, kind=QUEUE_JOINED))
+    third = client.get("/api/restaurants/1/queue/status", headers={"If-None-Match": etag})
+    assert third.status_code == 200
+    assert third.headers["ETag"] != etag
+
+
+# --- 7. SSE 排隊位置推播 測試 ---
+def test_stream_user_queue_status_NotInQueueError(app_with_override, mock_repos):
+    """使用者沒有在排隊時，不建立串流，直接回傳 400"""
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    app.dependency_overrides[get_queue_notifier] = lambda: QueueChangeNotifier()
+
+    mock_queue_repo.get_user_current_queue.return_value = None   # 使用者沒排隊
+
+    response = client.get("/api/user/123/queue/stream")
+
+    assert response.status_code == 400
+    assert response.json()["error"]["code"] == "NOT_IN_QUEUE"
+
+
+# --- 8. async Service 測試 ---
+def test_join_queue_AsyncService_Success():
+    """Router 直接 await async Service (不經過 thread pool)"""
+    queue_repo = AsyncMemoryQueueRepository(MemoryQueueRepository())
+    service = AsyncQueueService(
+        queue_repo=queue_repo,
+        queue_runtime_repo=AsyncMemoryQueueRuntimeRepository(MemoryQueueRuntimeRepository()),
+        map_repo=AsyncMemoryMapRepository(MemoryMapRepository())
+    )
+    app.dependency_overrides[get_queue_service] = lambda: service
+    try:
+        first = client.post("/api/restaurants/2/queue", json={"user_id": 41})
+        second = client.post("/api/restaurants/2/queue", json={"user_id": 42})
+        duplicate = client.post("/api/restaurants/3/queue", json={"user_id": 41})
+        user_status = client.get("/api/user/42/queue")
+    finally:
+        app.dependency_overrides = {}
+
+    assert first.status_code == 201
+    assert second.json()["ticket_number"] == first.json()["ticket_number"] + 1
+    assert duplicate.status_code == 409
+    assert user_status.json()["people_ahead"] == 1
@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+from fastapi import FastAPI
+from unittest.mock import MagicMock
+
+from app.routers.replication import replication_router, get_replication_node, ReadOnlyReplicaMiddleware
+from app.routers.queues import queue_router, get_queue_service
+from app.repositories.replication import ReplicationNode
+from app.interfaces.queue_interface import IQueueService
+from app.schemas.queue_schema import JoinQueueResponse, QueueStatusResponse
+from app.domain.errors import NotAFollowerError
+
+
+@pytest.fixture
+def node():
+    return MagicMock(spec=ReplicationNode)
+
+
+@pytest.fixture
+def queue_service():
+    return MagicMock(spec=IQueueService)
+
+
+@pytest.fixture
+def client(node, queue_service):
+    app = FastAPI()
+    app.include_router(replication_router)
+    app.include_router(queue_router)
+    app.dependency_overrides[get_replication_node] = lambda: node
+    app.dependency_overrides[get_queue_service] = lambda: queue_service
+    app.add_middleware(ReadOnlyReplicaMiddleware, get_node=lambda: node)
+    return TestClient(app)
+
+
+# 測試 follower 拒絕寫入，但可以讀取
+def test_follower_RejectsWritesAllowsReads(client, node, queue_service):
+    # Arrange
+    node.read_only = True
+    queue_service.get_queue_status.return_value = QueueStatusResponse(
+        restaurant_id=1, restaurant_name="麥克小姐", current_number=0, total_waiting=0, avg_wait_time=0
+    )
+
+    # Act
+    write = client.post("/api/restaurants/1/queue", json={"user_id": 1})
+    read = client.get("/api/restaurants/1/queue/status")
+
+    # Assert
+    assert write.status_code == 503
+    assert write.json()["error"]["code"] == "READ_ONLY_REPLICA"
+    queue_service.join_restaurant_waiting_queue.assert_not_called()
+    assert read.status_code == 200
+
+
+# 測試 leader 正常接受寫入
+def test_leader_AcceptsWrites(client, node, queue_service):
+    # Arrange
+    node.read_only = False
+    queue_service.join_restaurant_waiting_queue.return_value = JoinQueueResponse(ticket_number=1, people_ahead=0, estimated_wait_time=0)
+
+    # Act
+    response = client.post("/api/restaurants/1/queue", json={"user_id": 1})
+
+    # Assert
+    assert response.status_code == 201
+    queue_service.join_restaurant_waiting_queue.assert_called_once()
+
+
+# 測試複寫狀態只回傳該角色的欄位
+def test_get_replication_status(client, node):
+    # Arrange
+    node.read_only = True
+    node.status.return_value = {
+        "role": "follower", "leader": "127.0.0.1:7001", "connected": True,
+        "applied_sequence": 40, "leader_sequence": 42, "lag_records": 2, "seconds_since_leader_contact": 0.1
+    }
+
+    # Act
+    response = client.get("/api/replication/status")
+
+    # Assert
+    assert response.status_code == 200
+    assert response.json()["lag_records"] == 2
+    assert "followers" not in response.json()
+
+
+# 測試 promote：follower 成功，其他角色回 409
+def test_promote_replica(client, node):
+    # Arrange
+    node.read_only = True
+    node.status.return_value = {"role": "leader", "sequence": 42, "followers": []}
+
+    # Act
+    promoted = client.post("/api/replication/promote")
+    node.promote.side_effect = NotAFollowerError()
+    conflict = client.post("/api/replication/promote")
+
+    # Assert
+    assert promoted.status_code == 200
+    assert promoted.json() == {"role": "leader", "sequence": 42, "followers": []}
+    assert conflict.status_code == 409
+    assert conflict.json()["error"]["code"] == "NOT_A_FOLLOWER"
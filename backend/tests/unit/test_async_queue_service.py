@@ -0,0 +1,164 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from app.services.async_queue_service import AsyncQueueService
+from app.services.locking import AsyncStripedLock
+from app.interfaces.queue_interface import IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.interfaces.map_interface import IAsyncMapRepository
+from app.domain.errors import QueueAlreadyJoinedError, NotInQueueError, RestaurantNotFoundError
+from app.domain.value_objects import RestaurantMetrics
+from app.domain.entities import QueueEntity, MapEntity
+from app.domain.events import QUEUE_JOINED, QUEUE_LEFT, RestaurantChangedEvent, RestaurantEventBus
+from app.services.queue_response_cache import QueueResponseCache
+from app.repositories.fake_all_repo import (
+    AsyncMemoryMapRepository, AsyncMemoryQueueRepository, AsyncMemoryQueueRuntimeRepository,
+    MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository
+)
+
+@pytest.fixture
+def mock_repos():
+    """
+    MagicMock(spec=async 介面) 的方法會自動變成 AsyncMock。
+    回傳 Tuple: (mock_queue_repo, mock_runtime_repo, mock_map_repo)
+    """
+    queue_repo = MagicMock(spec=IAsyncQueueRepository)
+    queue_runtime_repo = MagicMock(spec=IAsyncQueueRuntimeRepository)
+    map_repo = MagicMock(spec=IAsyncMapRepository)
+    return queue_repo, queue_runtime_repo, map_repo
+
+@pytest.fixture
+def queue_service(mock_repos):
+    queue_repo, queue_runtime_repo, map_repo = mock_repos
+    return AsyncQueueService(
+        queue_repo=queue_repo,
+        queue_runtime_repo=queue_runtime_repo,
+        map_repo=map_repo
+    )
+
+def make_restaurant(restaurant_id: int) -> MapEntity:
+    return MapEntity(
+        restaurant_id=restaurant_id,
+        restaurant_name="歐姆萊斯",
+        lat=24.968,
+        lng=121.192,
+        image_url="https://example.com/rice.jpg",
+        average_price=(80, 150),
+        specialties="咖哩、焗烤飯",
+    )
+
+# 測試加入排隊成功案例
+def test_join_restaurant_waiting_queue_Success(queue_service, mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    event_bus = RestaurantEventBus()
+    events = []
+    event_bus.subscribe(events.append)
+    queue_service.event_bus = event_bus
+
+    mock_queue_repo.get_user_current_queue.return_value = None
+    mock_map_repo.get_restaurant_basic_info.return_value = make_restaurant(5)
+    mock_queue_repo.get_total_waiting.return_value = 3
+    mock_queue_runtime_repo.allocate_ticket.return_value = 12
+    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=8, table_number=10)
+
+    # Act
+    join_response = asyncio.run(queue_service.join_restaurant_waiting_queue(restaurant_id=5, user_id=25))
+
+    # Assert
+    assert join_response.ticket_number == 12
+    assert join_response.people_ahead == 3
+    assert join_response.estimated_wait_time == int(3 * (8 / 10))
+    mock_queue_repo.add_to_queue.assert_awaited_once_with(restaurant_id=5, user_id=25, ticket_number=12)
+    assert events == [RestaurantChangedEvent(restaurant_id=5, kind=QUEUE_JOINED)]
+
+# 測試加入排隊失敗時不會取號
+@pytest.mark.parametrize("current_queue, restaurant, error", [
+    (QueueEntity(queue_id=1, restaurant_id=5, user_id=25, ticket_number=30), make_restaurant(5), QueueAlreadyJoinedError),
+    (None, None, RestaurantNotFoundError),
+])
+def test_join_restaurant_waiting_queue_Errors(queue_service, mock_repos, current_queue, restaurant, error):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    mock_queue_repo.get_user_current_queue.return_value = current_queue
+    mock_map_repo.get_restaurant_basic_info.return_value = restaurant
+
+    # Act & Assert
+    with pytest.raises(error):
+        asyncio.run(queue_service.join_restaurant_waiting_queue(restaurant_id=5, user_id=25))
+    mock_queue_runtime_repo.allocate_ticket.assert_not_awaited()
+    mock_queue_repo.add_to_queue.assert_not_awaited()
+
+# 測試離開其他餐廳的排隊
+def test_leave_restaurant_waiting_queue_WrongRestaurant(queue_service, mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    mock_queue_repo.get_user_current_queue.return_value = QueueEntity(queue_id=1, restaurant_id=3, user_id=25, ticket_number=30)
+    mock_map_repo.get_restaurant_basic_info.return_value = make_restaurant(5)
+
+    # Act & Assert
+    with pytest.raises(NotInQueueError):
+        asyncio.run(queue_service.leave_restaurant_waiting_queue(restaurant_id=5, user_id=25))
+    mock_queue_repo.remove_from_queue.assert_not_awaited()
+
+# 測試取得使用者排隊狀況
+def test_get_user_queue_status_Success(queue_service, mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    mock_queue_repo.get_user_current_queue.return_value = QueueEntity(queue_id=1, restaurant_id=2, user_id=25, ticket_number=30)
+    mock_map_repo.get_restaurant_basic_info.return_value = make_restaurant(2)
+    mock_queue_repo.get_people_ahead.return_value = 4
+    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=10, table_number=5)
+
+    # Act
+    response = asyncio.run(queue_service.get_user_queue_status(user_id=25))
+
+    # Assert
+    assert response.ticket_number == 30
+    assert response.people_ahead == 4
+    assert response.estimated_wait_time == 8
+    mock_queue_repo.get_people_ahead.assert_awaited_once_with(restaurant_id=2, user_id=25)
+
+# 測試同一間餐廳同時加入排隊 (記憶體版 async Repository)，號碼牌不重複
+def test_join_restaurant_waiting_queue_ConcurrentJoins_UniqueTickets():
+    # Arrange
+    service = AsyncQueueService(
+        queue_repo=AsyncMemoryQueueRepository(MemoryQueueRepository()),
+        queue_runtime_repo=AsyncMemoryQueueRuntimeRepository(MemoryQueueRuntimeRepository()),
+        map_repo=AsyncMemoryMapRepository(MemoryMapRepository()),
+        restaurant_locks=AsyncStripedLock(),
+        user_locks=AsyncStripedLock()
+    )
+
+    async def scenario():
+        return await asyncio.gather(*(service.join_restaurant_waiting_queue(1, user_id) for user_id in range(100, 132)))
+
+    # Act
+    results = asyncio.run(scenario())
+
+    # Assert
+    assert sorted(result.ticket_number for result in results) == list(range(1, 33))
+    assert sorted(result.people_ahead for result in results) == list(range(32))
+
+# 測試有回應快取時，同一個版本只查詢 Repository 一次
+def test_get_queue_next_ResponseCache_QueriesOncePerVersion(mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    mock_map_repo.get_restaurant_basic_info.return_value = make_restaurant(2)
+    mock_queue_runtime_repo.get_current_ticket_number.return_value = 7
+    mock_queue_repo.get_next_queue_to_call.return_value = 9
+    mock_queue_repo.get_total_waiting.return_value = 3
+    response_cache = QueueResponseCache()
+    service = AsyncQueueService(*mock_repos, response_cache=response_cache)
+
+    # Act
+    first = asyncio.run(service.get_queue_next(restaurant_id=2))
+    second = asyncio.run(service.get_queue_next(restaurant_id=2))
+    response_cache.handle(RestaurantChangedEvent(restaurant_id=2, kind=QUEUE_LEFT))
+    mock_queue_repo.get_total_waiting.return_value = 2
+    after_change = asyncio.run(service.get_queue_next(restaurant_id=2))
+
+    # Assert
+    assert second is first
+    assert first.total_waiting == 3
+    assert after_change.total_waiting == 2
+    assert mock_queue_repo.get_next_queue_to_call.await_count == 2
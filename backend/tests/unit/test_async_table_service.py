@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from app.services.async_table_service import AsyncTableService
+from app.domain.errors import TableNotFoundError, NotInQueueError
+from app.interfaces.map_interface import IAsyncMapRepository
+from app.interfaces.queue_interface import IAsyncQueueRepository, IAsyncQueueRuntimeRepository
+from app.interfaces.table_interface import IAsyncTableRepository
+from app.domain.entities import TableEntity, QueueEntity
+
+@pytest.fixture
+def mock_repos():
+    table_repo = MagicMock(spec=IAsyncTableRepository)
+    map_repo = MagicMock(spec=IAsyncMapRepository)
+    queue_repo = MagicMock(spec=IAsyncQueueRepository)
+    queue_runtime_repo = MagicMock(spec=IAsyncQueueRuntimeRepository)
+    return table_repo, map_repo, queue_repo, queue_runtime_repo
+
+@pytest.fixture
+def table_service(mock_repos):
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    return AsyncTableService(
+        table_repo=table_repo,
+        map_repo=map_repo,
+        queue_repo=queue_repo,
+        queue_runtime_repo=queue_runtime_repo,
+    )
+
+# 測試入座：移除排隊、更新叫號與桌子狀態
+def test_update_table_status_Seated_Success(table_service, mock_repos):
+    # Arrange
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    table_repo.get_table_by_id.return_value = TableEntity(table_id=5, restaurant_id=2, label="1桌", x=1, y=1, status="empty")
+    queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber.return_value = QueueEntity(queue_id=1, restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    response = asyncio.run(table_service.update_table_status(restaurant_id=2, table_id=5, new_table_status="eating", queue_ticket_number=15))
+
+    # Assert
+    assert response.table_id == 5
+    assert response.new_status == "eating"
+    queue_repo.remove_from_queue.assert_awaited_once_with(restaurant_id=2, user_id=25)
+    queue_runtime_repo.set_current_ticket_number.assert_awaited_once_with(restaurant_id=2, ticket_number=15)
+    table_repo.update_status.assert_awaited_once_with(table_id=5, new_table_status="eating", queue_ticket_number=15)
+
+# 測試桌子屬於其他餐廳
+def test_update_table_status_OtherRestaurant_TableNotFound(table_service, mock_repos):
+    # Arrange
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    table_repo.get_table_by_id.return_value = TableEntity(table_id=5, restaurant_id=3, label="1桌", x=1, y=1, status="empty")
+
+    # Act & Assert
+    with pytest.raises(TableNotFoundError):
+        asyncio.run(table_service.update_table_status(restaurant_id=2, table_id=5, new_table_status="eating", queue_ticket_number=15))
+    table_repo.update_status.assert_not_awaited()
+
+# 測試入座時號碼牌不在排隊中
+def test_update_table_status_NotInQueue(table_service, mock_repos):
+    # Arrange
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    table_repo.get_table_by_id.return_value = TableEntity(table_id=5, restaurant_id=2, label="1桌", x=1, y=1, status="empty")
+    queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber.return_value = None
+
+    # Act & Assert
+    with pytest.raises(NotInQueueError):
+        asyncio.run(table_service.update_table_status(restaurant_id=2, table_id=5, new_table_status="eating", queue_ticket_number=99))
+    table_repo.update_status.assert_not_awaited()
+
+# 測試排隊資料已被其他 worker 先移除時停止入座
+def test_update_table_status_AlreadyRemoved_NotInQueue(table_service, mock_repos):
+    # Arrange
+    table_repo, map_repo, queue_repo, queue_runtime_repo = mock_repos
+    table_repo.get_table_by_id.return_value = TableEntity(table_id=5, restaurant_id=2, label="1桌", x=1, y=1, status="empty")
+    queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber.return_value = QueueEntity(queue_id=1, restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.remove_from_queue.return_value = False
+
+    # Act & Assert
+    with pytest.raises(NotInQueueError):
+        asyncio.run(table_service.update_table_status(restaurant_id=2, table_id=5, new_table_status="eating", queue_ticket_number=15))
+    queue_runtime_repo.set_current_ticket_number.assert_not_awaited()
+    table_repo.update_status.assert_not_awaited()
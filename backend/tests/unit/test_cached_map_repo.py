@@ -0,0 +1,123 @@
+from app.repositories.fake_all_repo import MemoryMapRepository
+from app.repositories.cached_map_repo import CachedMapRepository
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingMapRepository(MemoryMapRepository):
+    """記錄 get_restaurant_basic_info 被呼叫的次數，代表實際查詢資料庫"""
+    def __init__(self):
+        super().__init__()
+        self.lookups = 0
+
+    def get_restaurant_basic_info(self, restaurant_id):
+        self.lookups += 1
+        return super().get_restaurant_basic_info(restaurant_id)
+
+
+# 測試重複讀取同一間餐廳只查詢 inner 一次
+def test_get_restaurant_basic_info_SecondReadIsHit():
+    # Arrange
+    inner = _CountingMapRepository()
+    repo = CachedMapRepository(inner)
+
+    # Act
+    first = repo.get_restaurant_basic_info(restaurant_id=1)
+    second = repo.get_restaurant_basic_info(restaurant_id=1)
+
+    # Assert
+    assert first == second == inner.get_restaurant_basic_info(restaurant_id=1)
+    assert inner.lookups == 2
+    assert repo.stats()["hits"] == 1
+    assert repo.stats()["misses"] == 1
+
+
+# 測試不存在的餐廳也會被快取
+def test_get_restaurant_basic_info_MissingId_NegativeCached():
+    # Arrange
+    inner = _CountingMapRepository()
+    repo = CachedMapRepository(inner)
+
+    # Act
+    results = [repo.get_restaurant_basic_info(restaurant_id=999) for _ in range(5)]
+
+    # Assert
+    assert results == [None] * 5
+    assert inner.lookups == 1
+    assert repo.stats()["negative_hits"] == 4
+
+
+# 測試快取過期後重新查詢 inner，不存在的餐廳可以有較短的過期時間
+def test_get_restaurant_basic_info_Expired_Reloads():
+    # Arrange
+    clock = _Clock()
+    inner = _CountingMapRepository()
+    repo = CachedMapRepository(inner, ttl=10, negative_ttl=1, clock=clock)
+    repo.get_restaurant_basic_info(restaurant_id=1)
+    repo.get_restaurant_basic_info(restaurant_id=999)
+
+    # Act
+    clock.now = 5
+    repo.get_restaurant_basic_info(restaurant_id=1)
+    repo.get_restaurant_basic_info(restaurant_id=999)
+    lookups_before_expiry = inner.lookups
+    clock.now = 11
+    repo.get_restaurant_basic_info(restaurant_id=1)
+
+    # Assert
+    assert lookups_before_expiry == 3
+    assert inner.lookups == 4
+
+
+# 測試超過 max_size 時淘汰最久沒讀取的餐廳
+def test_get_restaurant_basic_info_Full_EvictsLeastRecentlyUsed():
+    # Arrange
+    inner = _CountingMapRepository()
+    repo = CachedMapRepository(inner, max_size=2)
+    repo.get_restaurant_basic_info(restaurant_id=1)
+    repo.get_restaurant_basic_info(restaurant_id=2)
+    repo.get_restaurant_basic_info(restaurant_id=1)
+
+    # Act
+    repo.get_restaurant_basic_info(restaurant_id=3)
+    lookups = inner.lookups
+    repo.get_restaurant_basic_info(restaurant_id=1)
+    repo.get_restaurant_basic_info(restaurant_id=2)
+
+    # Assert
+    assert lookups == 3
+    assert inner.lookups == 4
+    assert repo.stats()["evictions"] == 2
+    assert repo.stats()["size"] == 2
+
+
+# 測試 invalidate 後重新查詢，查詢期間被清除的結果不放進快取
+def test_invalidate_ReloadsAndDropsStaleResult():
+    # Arrange
+    inner = _CountingMapRepository()
+    repo = CachedMapRepository(inner)
+    repo.get_restaurant_basic_info(restaurant_id=1)
+
+    class _InvalidatingMapRepository(MemoryMapRepository):
+        def get_restaurant_basic_info(self, restaurant_id):
+            result = super().get_restaurant_basic_info(restaurant_id)
+            racing.invalidate(restaurant_id)
+            return result
+    racing = CachedMapRepository(_InvalidatingMapRepository())
+
+    # Act
+    repo.invalidate(restaurant_id=1)
+    repo.get_restaurant_basic_info(restaurant_id=1)
+    racing.get_restaurant_basic_info(restaurant_id=2)
+
+    # Assert
+    assert inner.lookups == 2
+    assert racing.stats()["size"] == 0
+    repo.invalidate_all()
+    assert repo.stats()["size"] == 0
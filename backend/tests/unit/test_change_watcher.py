@@ -0,0 +1,31 @@
+from app.domain.events import QUEUE_JOINED, TABLE_CLEARED, RestaurantEventBus
+from app.repositories.sqlite_db import SQLiteDatabase
+from app.repositories.queue_repo import SQLiteQueueRepository
+from app.repositories.table_repo import SQLiteTableRepository
+from app.repositories.version_repo import SQLiteRestaurantVersionRepository
+from app.services.change_watcher import RestaurantChangeWatcher
+
+
+# 測試其他 worker (另一條資料庫連線) 的異動會轉成本地 event bus 事件，沒有異動時不發布
+def test_poll_PublishesOtherWorkersChanges(tmp_path):
+    # Arrange
+    local, other = SQLiteDatabase(str(tmp_path / "queue.db")), SQLiteDatabase(str(tmp_path / "queue.db"))
+    local.init_schema()
+    event_bus = RestaurantEventBus()
+    events = []
+    event_bus.subscribe(events.append)
+    watcher = RestaurantChangeWatcher(SQLiteRestaurantVersionRepository(local), event_bus)
+
+    # Act
+    idle = watcher.poll()
+    SQLiteQueueRepository(other).add_to_queue(restaurant_id=1, user_id=5, ticket_number=1)
+    SQLiteTableRepository(other).update_status(table_id=201, new_table_status="eating", queue_ticket_number=17)
+    published = watcher.poll()
+
+    # Assert
+    assert idle == 0
+    assert published == 2
+    assert sorted((event.restaurant_id, event.kind) for event in events) == [(1, QUEUE_JOINED), (2, TABLE_CLEARED)]
+    assert watcher.poll() == 0
+    local.close()
+    other.close()
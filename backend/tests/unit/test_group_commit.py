@@ -0,0 +1,82 @@
+import threading
+import pytest
+from app.services.group_commit import GroupCommitter
+from app.services.queue_service import QueueService
+from app.repositories.sqlite_db import SQLiteDatabase, SQLiteUnitOfWork
+from app.repositories.map_repo import SQLiteMapRepository
+from app.repositories.queue_repo import SQLiteQueueRepository, SQLiteQueueRuntimeRepository
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "queue.db"))
+    database.init_schema()
+    yield database
+    database.close()
+
+
+def _run_together(count, target):
+    """count 個 thread 同時開始執行 target(i)"""
+    barrier = threading.Barrier(count)
+    results, errors = [None] * count, [None] * count
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = target(i)
+        except Exception as error:
+            errors[i] = error
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+# 測試同時加入排隊的 Request 併成少數幾次 commit，每個人仍拿到自己的號碼
+def test_join_ConcurrentJoins_BatchedIntoFewCommits(db):
+    # Arrange
+    committer = GroupCommitter(SQLiteUnitOfWork(db), max_delay=0.05)
+    queue_repo = SQLiteQueueRepository(db)
+    service = QueueService(
+        queue_repo, SQLiteQueueRuntimeRepository(db), SQLiteMapRepository(db),
+        unit_of_work=SQLiteUnitOfWork(db), group_committer=committer
+    )
+
+    # Act
+    responses, errors = _run_together(20, lambda i: service.join_restaurant_waiting_queue(restaurant_id=2, user_id=1000 + i))
+
+    # Assert
+    assert errors == [None] * 20
+    assert sorted(response.ticket_number for response in responses) == list(range(17, 37))
+    assert sorted(response.people_ahead for response in responses) == list(range(20))
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 20
+    metrics = committer.metrics()
+    assert metrics["items"] == 20
+    assert metrics["commits"] < 20
+    assert metrics["max_batch_size"] > 1
+
+
+# 測試同一批中某一筆失敗只復原該筆，例外交給送出的人，其他筆照常 commit
+def test_submit_FailingItem_OnlyThatItemRolledBack(db):
+    # Arrange
+    committer = GroupCommitter(SQLiteUnitOfWork(db), max_delay=0.05)
+    queue_repo = SQLiteQueueRepository(db)
+
+    def work(i):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=2000 + i, ticket_number=100 + i)
+        if i == 1:
+            raise ValueError("bad item")
+        return i
+
+    # Act
+    results, errors = _run_together(3, lambda i: committer.submit(lambda: work(i)))
+
+    # Assert
+    assert results == [0, None, 2]
+    assert isinstance(errors[1], ValueError)
+    assert queue_repo.get_user_current_queue(user_id=2001) is None
+    assert queue_repo.get_user_current_queue(user_id=2000) is not None
+    assert queue_repo.get_user_current_queue(user_id=2002) is not None
@@ -0,0 +1,59 @@
+import pytest
+from app.services.hash_ring import ConsistentHashRing
+from app.services.user_directory import UserDirectory
+
+
+# 測試每個節點都分到差不多的份量，且結果不隨建立順序改變
+def test_node_for_SpreadsKeysDeterministically():
+    # Arrange
+    nodes = ["http://node1", "http://node2", "http://node3"]
+    ring = ConsistentHashRing(nodes)
+
+    # Act
+    owners = [ring.node_for(restaurant_id) for restaurant_id in range(3000)]
+
+    # Assert
+    assert owners == [ConsistentHashRing(reversed(nodes)).node_for(restaurant_id) for restaurant_id in range(3000)]
+    for node in nodes:
+        assert 600 < owners.count(node) < 1400
+
+
+# 測試新增節點時，只有被新節點接手的 key 會搬動
+def test_add_node_MovesOnlyKeysOfNewNode():
+    # Arrange
+    ring = ConsistentHashRing(["http://node1", "http://node2", "http://node3"])
+    before = {restaurant_id: ring.node_for(restaurant_id) for restaurant_id in range(3000)}
+
+    # Act
+    ring.add_node("http://node4")
+    after = {restaurant_id: ring.node_for(restaurant_id) for restaurant_id in range(3000)}
+
+    # Assert
+    moved = [restaurant_id for restaurant_id in before if before[restaurant_id] != after[restaurant_id]]
+    assert all(after[restaurant_id] == "http://node4" for restaurant_id in moved)
+    assert 400 < len(moved) < 1200
+    ring.remove_node("http://node4")
+    assert {restaurant_id: ring.node_for(restaurant_id) for restaurant_id in range(3000)} == before
+
+
+# 測試空的 ring 無法分配
+def test_node_for_EmptyRing_Raises():
+    with pytest.raises(LookupError):
+        ConsistentHashRing().node_for(1)
+
+
+# 測試目錄只在紀錄仍是同一間餐廳時移除
+def test_user_directory_DiscardOnlyMatchingRestaurant():
+    # Arrange
+    directory = UserDirectory()
+    directory.set(user_id=1, restaurant_id=10)
+
+    # Act
+    directory.discard(user_id=1, restaurant_id=20)
+    kept = directory.get(1)
+    directory.discard(user_id=1, restaurant_id=10)
+
+    # Assert
+    assert kept == 10
+    assert directory.get(1) is None
+    assert len(directory) == 0
@@ -0,0 +1,209 @@
+import os
+import pytest
+from app.repositories.journal import (
+    Journal, read_journal, encode_record, RECORD_SIZE,
+    OP_QUEUE_ADD, OP_QUEUE_REMOVE
+)
+from app.repositories.journaled_repo import (
+    JournaledQueueRepository, JournaledQueueRuntimeRepository, JournaledTableRepository, replay_journal
+)
+from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+
+
+def _fresh_repos():
+    return MemoryQueueRepository(), MemoryQueueRuntimeRepository(), MemoryTableRepository()
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "memory.journal")
+
+
+# 測試異動寫入 journal 後，重播到全新的記憶體資料可以得到相同狀態
+def test_replay_journal_ReproducesState(journal_path):
+    # Arrange
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    journal = Journal(journal_path)
+    journaled_queue = JournaledQueueRepository(queue_repo, journal)
+    journaled_runtime = JournaledQueueRuntimeRepository(runtime_repo, journal)
+    journaled_table = JournaledTableRepository(table_repo, journal)
+
+    # Act
+    for user_id in (1, 2, 3):
+        ticket_number = journaled_runtime.allocate_ticket(restaurant_id=1)
+        journaled_queue.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=ticket_number)
+    journaled_queue.remove_from_queue(restaurant_id=1, user_id=1)
+    journaled_queue.remove_from_queue(restaurant_id=2, user_id=2)  # 不在這間餐廳，不寫 journal
+    journaled_runtime.set_current_ticket_number(restaurant_id=1, ticket_number=1)
+    journaled_table.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+    journaled_table.update_status(table_id=999, new_table_status="eating", queue_ticket_number=1)  # 不存在
+    journal.close()
+
+    records, _ = read_journal(journal_path)
+    replayed_queue, replayed_runtime, replayed_table = _fresh_repos()
+    count = replay_journal(records, replayed_queue, replayed_runtime, replayed_table)
+
+    # Assert
+    assert count == 3 + 3 + 1 + 1 + 1
+    assert replayed_queue.get_total_waiting(restaurant_id=1) == 2
+    assert replayed_queue.get_user_current_queue(user_id=1) is None
+    assert replayed_queue.get_user_current_queue(user_id=3).ticket_number == 3
+    assert replayed_queue.get_people_ahead(restaurant_id=1, user_id=3) == 1
+    assert replayed_runtime.get_current_ticket_number(restaurant_id=1) == 1
+    assert replayed_runtime.get_next_ticket_number(restaurant_id=1) == 4
+    assert replayed_table.get_table_by_id(102).status == "eating"
+    assert replayed_table.get_restaurant_remaining_table(restaurant_id=1) == 0
+
+
+# 測試重播後號碼牌不會倒退 (不會發出重複號碼)
+def test_replay_journal_TicketNumberOnlyMovesForward(journal_path):
+    # Arrange
+    journal = Journal(journal_path)
+    runtime = JournaledQueueRuntimeRepository(MemoryQueueRuntimeRepository(), journal)
+    issued = [runtime.allocate_ticket(restaurant_id=2) for _ in range(3)]
+    runtime.increment_next_ticket_number(restaurant_id=2)
+    journal.close()
+
+    # Act
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    replay_journal(read_journal(journal_path)[0], queue_repo, runtime_repo, table_repo)
+
+    # Assert
+    assert issued == [17, 18, 19]
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 21
+    assert runtime_repo.allocate_ticket(restaurant_id=2) == 21
+
+
+# 測試最後一筆只寫了一半 (當機) 時會被忽略，重新開啟時截掉並接續寫入
+def test_journal_TornTailIsTruncated(journal_path):
+    # Arrange
+    journal = Journal(journal_path)
+    journal.append(OP_QUEUE_ADD, 1, 10, 1)
+    journal.append(OP_QUEUE_ADD, 1, 11, 2)
+    journal.close()
+    with open(journal_path, "ab") as f:
+        f.write(encode_record(OP_QUEUE_ADD, 1, 12, 3)[:RECORD_SIZE // 2])
+
+    # Act
+    records, valid_length = read_journal(journal_path)
+    journal = Journal(journal_path)
+    size_after_open = os.path.getsize(journal_path)
+    journal.append(OP_QUEUE_REMOVE, 1, 10)
+    journal.close()
+
+    # Assert
+    assert records == [(OP_QUEUE_ADD, 1, 10, 1), (OP_QUEUE_ADD, 1, 11, 2)]
+    assert size_after_open == valid_length
+    assert read_journal(journal_path)[0] == records + [(OP_QUEUE_REMOVE, 1, 10, 0)]
+
+
+# 測試 CRC 不符的紀錄與其後的紀錄都不會被重播
+def test_read_journal_StopsAtChecksumMismatch(journal_path):
+    # Arrange
+    journal = Journal(journal_path)
+    for user_id in (10, 11, 12):
+        journal.append(OP_QUEUE_ADD, 1, user_id, user_id)
+    journal.close()
+    with open(journal_path, "r+b") as f:
+        # 破壞第二筆紀錄的內容
+        f.seek(8 + RECORD_SIZE + 3)
+        f.write(b"\xff")
+
+    # Act
+    records, _ = read_journal(journal_path)
+
+    # Assert
+    assert records == [(OP_QUEUE_ADD, 1, 10, 10)]
+
+
+# 測試 wait_durable / flush 不需要等到下一次定時 fsync
+def test_journal_WaitDurableFlushesImmediately(journal_path):
+    # Arrange：定時 fsync 間隔設得很長
+    journal = Journal(journal_path, fsync_interval=60)
+
+    # Act
+    sequence = journal.append(OP_QUEUE_ADD, 1, 10, 1)
+    durable = journal.wait_durable(sequence, timeout=5)
+    journal.append(OP_QUEUE_ADD, 1, 11, 2)
+    journal.flush()
+
+    # Assert
+    assert durable is True
+    assert journal.durable_sequence == 2
+    assert list(journal.records()) == [(OP_QUEUE_ADD, 1, 10, 1), (OP_QUEUE_ADD, 1, 11, 2)]
+    journal.close()
+    with pytest.raises(RuntimeError):
+        journal.append(OP_QUEUE_ADD, 1, 12, 3)
+
+
+class _FullDiskFile:
+    """write 時拋出磁碟已滿，模擬背景寫入失敗"""
+    def __init__(self, wrapped):
+        self.wrapped = wrapped
+
+    def write(self, data):
+        raise OSError(28, "No space left on device")
+
+    def close(self):
+        self.wrapped.close()
+
+
+# 測試背景寫入失敗後，append 立即拋出例外，不再當作寫入成功
+def test_journal_WriterFailed_AppendRaises(journal_path):
+    # Arrange
+    journal = Journal(journal_path, fsync_interval=60)
+    journal._file = _FullDiskFile(journal._file)
+    sequence = journal.append(OP_QUEUE_ADD, 1, 10, 1)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        journal.wait_durable(sequence, timeout=5)
+
+    # Assert
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        journal.append(OP_QUEUE_ADD, 1, 11, 2)
+    assert journal.sequence == 1
+    journal.close()
+
+
+# 測試 journal 已無法寫入時，交易外的寫入拋出例外且記憶體資料不變
+def test_journaled_repo_WriterFailed_WriteNotApplied(journal_path):
+    # Arrange
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    journal = Journal(journal_path, fsync_interval=60)
+    journal._file = _FullDiskFile(journal._file)
+    journaled_queue = JournaledQueueRepository(queue_repo, journal)
+    journaled_runtime = JournaledQueueRuntimeRepository(runtime_repo, journal)
+    journaled_table = JournaledTableRepository(table_repo, journal)
+    journaled_queue.add_to_queue(restaurant_id=1, user_id=10, ticket_number=1)
+    with pytest.raises(RuntimeError):
+        journal.flush()
+
+    # Act
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        journaled_queue.add_to_queue(restaurant_id=1, user_id=11, ticket_number=2)
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        journaled_queue.remove_from_queue(restaurant_id=1, user_id=10)
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        journaled_runtime.set_current_ticket_number(restaurant_id=1, ticket_number=1)
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        journaled_table.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+
+    # Assert
+    assert queue_repo.get_user_current_queue(user_id=11) is None
+    assert queue_repo.get_user_current_queue(user_id=10).ticket_number == 1
+    assert runtime_repo.get_current_ticket_number(restaurant_id=1) == 0
+    assert table_repo.get_table_by_id(102).status == "empty"
+    journal.close()
+
+
+# 測試不是 journal 的檔案不會被誤讀
+def test_read_journal_RejectsForeignFile(journal_path):
+    # Arrange
+    with open(journal_path, "wb") as f:
+        f.write(b"SQLite format 3\x00")
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        read_journal(journal_path)
+    assert read_journal(journal_path + ".missing") == ([], 0)
@@ -0,0 +1,113 @@
+import threading
+from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository
+from app.repositories.leased_ticket_repo import LeasedTicketRuntimeRepository
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# 測試同一段預借內在本地發號，用完才再向共用計數器預借
+def test_allocate_ticket_UsesLocalBlock():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    start = inner.get_next_ticket_number(restaurant_id=1)
+    repo = LeasedTicketRuntimeRepository(inner, block_size=4)
+
+    # Act
+    first = [repo.allocate_ticket(restaurant_id=1) for _ in range(3)]
+    counter_after_first = inner.get_next_ticket_number(restaurant_id=1)
+    second = [repo.allocate_ticket(restaurant_id=1) for _ in range(3)]
+
+    # Assert
+    assert first == [start, start + 1, start + 2]
+    assert counter_after_first == start + 4
+    assert second == [start + 3, start + 4, start + 5]
+    assert inner.get_next_ticket_number(restaurant_id=1) == start + 8
+
+
+# 測試多個 worker 共用同一個計數器時號碼不重複
+def test_allocate_ticket_ManyWorkers_UniqueTickets():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    start = inner.get_next_ticket_number(restaurant_id=2)
+    workers = [LeasedTicketRuntimeRepository(inner, block_size=5) for _ in range(4)]
+    tickets = []
+    tickets_lock = threading.Lock()
+
+    def run(repo):
+        allocated = [repo.allocate_ticket(restaurant_id=2) for _ in range(23)]
+        with tickets_lock:
+            tickets.extend(allocated)
+
+    # Act
+    threads = [threading.Thread(target=run, args=(repo,)) for repo in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for repo in workers:
+        repo.release_all()
+
+    # Assert
+    assert len(set(tickets)) == 92
+    assert min(tickets) == start
+    assert inner.get_next_ticket_number(restaurant_id=2) >= max(tickets) + 1
+
+
+# 測試預借中已經被叫過的號碼不會再發出
+def test_allocate_ticket_SkipsCalledNumbers():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    start = inner.get_next_ticket_number(restaurant_id=3)
+    repo = LeasedTicketRuntimeRepository(inner, block_size=10)
+    repo.allocate_ticket(restaurant_id=3)
+
+    # Act：其他 worker 的號碼已經叫到 start + 5
+    inner.set_current_ticket_number(restaurant_id=3, ticket_number=start + 5)
+    ticket = repo.allocate_ticket(restaurant_id=3)
+
+    # Assert
+    assert ticket == start + 6
+
+
+# 測試預借到期後，仍在計數器尾端的剩餘號碼會歸還
+def test_allocate_ticket_ExpiredLease_ReleasesTail():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    start = inner.get_next_ticket_number(restaurant_id=1)
+    clock = _Clock()
+    repo = LeasedTicketRuntimeRepository(inner, block_size=10, lease_ttl=1.0, clock=clock)
+    repo.allocate_ticket(restaurant_id=1)
+
+    # Act
+    clock.now = 2.0
+    ticket = repo.allocate_ticket(restaurant_id=1)
+
+    # Assert：start + 1 ~ start + 9 歸還後重新預借
+    assert ticket == start + 1
+    assert repo.outstanding() == {1: (start + 2, start + 11)}
+
+
+# 測試其他 worker 已經在後面預借時，剩餘號碼收不回來 (成為空號)，排隊與叫號不受影響
+def test_release_all_NotAtTail_LeavesGap():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    queue_repo = MemoryQueueRepository()
+    start = inner.get_next_ticket_number(restaurant_id=1)
+    first, second = LeasedTicketRuntimeRepository(inner, block_size=3), LeasedTicketRuntimeRepository(inner, block_size=3)
+    queue_repo.add_to_queue(restaurant_id=1, user_id=901, ticket_number=first.allocate_ticket(restaurant_id=1))
+    queue_repo.add_to_queue(restaurant_id=1, user_id=902, ticket_number=second.allocate_ticket(restaurant_id=1))
+
+    # Act
+    first.release_all()
+    second.release_all()
+
+    # Assert：second 的剩餘號碼在尾端可以歸還，first 的不行
+    assert inner.get_next_ticket_number(restaurant_id=1) == start + 4
+    assert first.outstanding() == {} and second.outstanding() == {}
+    assert queue_repo.get_next_queue_to_call(restaurant_id=1) == start
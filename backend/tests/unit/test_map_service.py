@@ -7,6 +7,7 @@ from app.interfaces.table_interface import ITableRepository
 from app.domain.entities import MapEntity
 from typing import Tuple
 from app.domain.value_objects import RestaurantMetrics
+from app.services.status_projection import RestaurantStatusProjection, RestaurantStatusSnapshot
 
 
 @pytest.fixture
@@ -64,9 +65,12 @@ def test_get_restaurants(map_service, mock_repos):
 
     # 設定 Mock 行為
     mock_map_repo.get_all_restaurants.return_value = fake_db_data
-    mock_queue_repo.get_total_waiting.return_value = 3
-    mock_table_repo.get_restaurant_remaining_table.return_value = 8
-    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=15, table_number=10)
+    mock_queue_repo.get_total_waiting_bulk.return_value = {2: 3, 3: 3}
+    mock_table_repo.get_restaurant_remaining_table_bulk.return_value = {2: 8, 3: 8}
+    mock_queue_runtime_repo.get_metrics_bulk.return_value = {
+        2: RestaurantMetrics(average_wait_time=15, table_number=10),
+        3: RestaurantMetrics(average_wait_time=15, table_number=10),
+    }
 
     # --- 2. Act (執行測試) ---
     result = map_service.get_restaurants()
@@ -77,4 +81,49 @@ def test_get_restaurants(map_service, mock_repos):
     assert result[1].status == "yellow"
 
     # 驗證 Service 是否呼叫了正確的 Repo 方法
-    mock_map_repo.get_all_restaurants.assert_called_once()
\ No newline at end of file
+    mock_map_repo.get_all_restaurants.assert_called_once()
+    # 驗證每種資料只查詢一次 (不會逐間餐廳查詢)
+    mock_queue_repo.get_total_waiting_bulk.assert_called_once_with([2, 3])
+    mock_table_repo.get_restaurant_remaining_table_bulk.assert_called_once_with([2, 3])
+    mock_queue_runtime_repo.get_metrics_bulk.assert_called_once_with([2, 3])
+    mock_queue_repo.get_total_waiting.assert_not_called()
+    mock_table_repo.get_restaurant_remaining_table.assert_not_called()
+    mock_queue_runtime_repo.get_metrics.assert_not_called()
+
+
+
+# 測試注入燈號投影後，直接讀取保存的燈號，不再查詢 Repo
+def test_get_restaurants_WithStatusProjection(mock_repos):
+    # Arrange
+    mock_map_repo, mock_table_repo, mock_queue_repo, mock_queue_runtime_repo = mock_repos
+    projection = MagicMock(spec=RestaurantStatusProjection)
+    projection.get_statuses.return_value = {
+        2: RestaurantStatusSnapshot(restaurant_id=2, status="red", total_waiting=9, remaining_table_number=1, table_number=10, version=3),
+    }
+    mock_map_repo.get_all_restaurants.return_value = [
+        MapEntity(
+            restaurant_id = 2,
+            restaurant_name = "麥克小姐",
+            lat = 24.968,
+            lng = 121.192,
+            image_url = "https://example.com/burger.jpg",
+            average_price = (150,300),
+            specialties = "義大利麵、漢堡",
+        )
+    ]
+    map_service = MapService(
+        map_repo=mock_map_repo,
+        table_repo=mock_table_repo,
+        queue_repo=mock_queue_repo,
+        queue_runtime_repo=mock_queue_runtime_repo,
+        status_projection=projection
+    )
+
+    # Act
+    result = map_service.get_restaurants()
+
+    # Assert
+    assert result[0].status == "red"
+    projection.get_statuses.assert_called_once_with([2])
+    mock_queue_repo.get_total_waiting_bulk.assert_not_called()
+    mock_table_repo.get_restaurant_remaining_table_bulk.assert_not_called()
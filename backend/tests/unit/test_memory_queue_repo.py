@@ -0,0 +1,187 @@
+import random
+import pytest
+from app.repositories.fake_all_repo import MemoryQueueRepository
+
+
+@pytest.fixture
+def queue_repo():
+    """
+    每個測試都拿到一個全新的記憶體版 Queue Repository。
+    """
+    return MemoryQueueRepository()
+
+
+# 測試加入排隊後，可以用 user_id 與 (restaurant_id, ticket_number) 找到同一筆資料
+def test_add_to_queue_IndexedLookup_Success(queue_repo):
+    # Act
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=28, ticket_number=16)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=30, ticket_number=6)
+
+    # Assert
+    by_user = queue_repo.get_user_current_queue(user_id=28)
+    by_ticket = queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=2, ticket_number=16)
+    assert by_user is not None
+    assert by_user == by_ticket
+    assert by_user.restaurant_id == 2
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 2
+    assert queue_repo.get_total_waiting(restaurant_id=3) == 1
+    assert queue_repo.get_total_waiting(restaurant_id=999) == 0
+
+
+# 測試已在排隊的使用者不會再寫入第二筆，原本那筆仍可移除
+def test_add_to_queue_UserAlreadyQueued_Rejected(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    same_restaurant = queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=16)
+    other_restaurant = queue_repo.add_to_queue(restaurant_id=3, user_id=25, ticket_number=6)
+    removed = queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Assert
+    assert same_restaurant is False
+    assert other_restaurant is False
+    assert removed is True
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 0
+    assert queue_repo.get_total_waiting(restaurant_id=3) == 0
+    assert queue_repo.get_next_queue_to_call(restaurant_id=2) is None
+
+
+# 測試離開排隊後，所有索引與計數都同步更新
+def test_remove_from_queue_Success(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    removed = queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Assert
+    assert removed is True
+    assert queue_repo.get_user_current_queue(user_id=25) is None
+    assert queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=2, ticket_number=15) is None
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 0
+
+
+# 測試從錯誤的餐廳移除時，不會動到使用者在其他餐廳的排隊資料
+def test_remove_from_queue_WrongRestaurant(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    removed = queue_repo.remove_from_queue(restaurant_id=3, user_id=25)
+
+    # Assert
+    assert removed is False
+    assert queue_repo.get_user_current_queue(user_id=25) is not None
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 1
+
+
+# 測試下一個叫號與前面人數
+def test_get_next_queue_to_call_and_people_ahead(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=28, ticket_number=16)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=29, ticket_number=17)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=30, ticket_number=6)
+
+    # Act
+    queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Assert
+    assert queue_repo.get_next_queue_to_call(restaurant_id=2) == 16
+    assert queue_repo.get_next_queue_to_call(restaurant_id=999) is None
+    assert queue_repo.get_people_ahead(restaurant_id=2, user_id=28) == 0
+    assert queue_repo.get_people_ahead(restaurant_id=2, user_id=29) == 1
+    assert queue_repo.get_people_ahead(restaurant_id=3, user_id=29) == 0
+
+
+# 測試 Fenwick Tree 的前面人數與逐筆掃描結果一致 (包含亂序號碼與跨越擴充邊界)
+def test_get_people_ahead_MatchesFullScan(queue_repo):
+    # Arrange
+    rng = random.Random(7)
+    tickets = list(range(100, 400))
+    rng.shuffle(tickets)
+    waiting = {}
+    for user_id, ticket in enumerate(tickets):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=ticket)
+        waiting[user_id] = ticket
+    for user_id in rng.sample(sorted(waiting), 120):
+        queue_repo.remove_from_queue(restaurant_id=1, user_id=user_id)
+        del waiting[user_id]
+
+    # Assert
+    for user_id, ticket in waiting.items():
+        expected = sum(1 for other in waiting.values() if other < ticket)
+        assert queue_repo.get_people_ahead(restaurant_id=1, user_id=user_id) == expected
+
+
+# 測試依序叫號 (入座 / 離開) 經過多次壓縮後，下一個叫號與前面人數仍正確
+def test_get_next_queue_to_call_AfterCompaction(queue_repo):
+    # Arrange
+    rng = random.Random(11)
+    waiting = {}
+    next_ticket = 1
+    for _ in range(2000):
+        if rng.random() < 0.55 or not waiting:
+            queue_repo.add_to_queue(restaurant_id=3, user_id=next_ticket, ticket_number=next_ticket)
+            waiting[next_ticket] = next_ticket
+            next_ticket += 1
+        elif rng.random() < 0.8:
+            # 叫號入座：移除號碼最小的人
+            user_id = min(waiting, key=waiting.get)
+            queue_repo.remove_from_queue(restaurant_id=3, user_id=user_id)
+            del waiting[user_id]
+        else:
+            # 任意一人離開
+            user_id = rng.choice(sorted(waiting))
+            queue_repo.remove_from_queue(restaurant_id=3, user_id=user_id)
+            del waiting[user_id]
+
+        # Assert
+        expected_next = min(waiting.values()) if waiting else None
+        assert queue_repo.get_next_queue_to_call(restaurant_id=3) == expected_next
+        assert queue_repo.get_total_waiting(restaurant_id=3) == len(waiting)
+
+    for user_id, ticket in waiting.items():
+        expected = sum(1 for other in waiting.values() if other < ticket)
+        assert queue_repo.get_people_ahead(restaurant_id=3, user_id=user_id) == expected
+        assert queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=3, ticket_number=ticket).user_id == user_id
+
+
+# 測試壓縮後再插入比目前最小號碼還小的號碼
+def test_add_to_queue_TicketBelowHead(queue_repo):
+    # Arrange
+    for ticket in range(1, 201):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=ticket, ticket_number=ticket)
+    for ticket in range(1, 151):
+        queue_repo.remove_from_queue(restaurant_id=1, user_id=ticket)
+    assert queue_repo.get_next_queue_to_call(restaurant_id=1) == 151
+
+    # Act
+    queue_repo.add_to_queue(restaurant_id=1, user_id=999, ticket_number=5)
+
+    # Assert
+    assert queue_repo.get_next_queue_to_call(restaurant_id=1) == 5
+    assert queue_repo.get_people_ahead(restaurant_id=1, user_id=999) == 0
+    assert queue_repo.get_people_ahead(restaurant_id=1, user_id=151) == 1
+    assert queue_repo.get_total_waiting(restaurant_id=1) == 51
+
+
+# 測試離開後釋放的 row 會被重複使用，且回傳的 QueueEntity 是新的 view
+def test_add_to_queue_ReusesFreedRow(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=28, ticket_number=16)
+    queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Act
+    queue_repo.add_to_queue(restaurant_id=3, user_id=30, ticket_number=6)
+
+    # Assert
+    entry = queue_repo.get_user_current_queue(user_id=30)
+    assert entry.queue_id == 3
+    assert (entry.restaurant_id, entry.user_id, entry.ticket_number) == (3, 30, 6)
+    assert queue_repo.get_user_current_queue(user_id=25) is None
+    assert queue_repo.get_user_current_queue(user_id=28).ticket_number == 16
+    assert len(queue_repo._queue_ids) == 2
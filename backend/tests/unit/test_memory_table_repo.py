@@ -0,0 +1,84 @@
+import threading
+import pytest
+from app.repositories.fake_all_repo import MemoryTableRepository
+
+
+@pytest.fixture
+def table_repo():
+    """
+    每個測試都拿到一個全新的記憶體版 Table Repository (含預設座位資料)。
+    """
+    return MemoryTableRepository()
+
+
+# 測試座位表只回傳該餐廳的桌子
+def test_get_tables_by_restaurant_Success(table_repo):
+    # Act
+    tables = table_repo.get_tables_by_restaurant(restaurant_id=2)
+
+    # Assert
+    assert len(tables) == 6
+    assert all(t.restaurant_id == 2 for t in tables)
+    assert table_repo.get_tables_by_restaurant(restaurant_id=999) == []
+
+
+# 測試入座 / 離座會同步更新空桌數
+def test_update_status_MaintainsRemainingTable(table_repo):
+    # Arrange
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=1) == 1
+
+    # Act & Assert
+    table_repo.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=1) == 0
+
+    table_repo.update_status(table_id=101, new_table_status="empty", queue_ticket_number=0)
+    table_repo.update_status(table_id=103, new_table_status="empty", queue_ticket_number=0)
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=1) == 2
+
+    # 狀態沒有改變時，空桌數不變
+    table_repo.update_status(table_id=103, new_table_status="empty", queue_ticket_number=0)
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=1) == 2
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=999) == 0
+
+
+# 測試更新不存在的桌子
+def test_update_status_TableNotFound(table_repo):
+    # Act
+    updated = table_repo.update_status(table_id=999, new_table_status="eating", queue_ticket_number=1)
+
+    # Assert
+    assert updated is False
+
+
+# 測試一次查詢多間餐廳的空桌數
+def test_get_restaurant_remaining_table_bulk_Success(table_repo):
+    # Act
+    remaining = table_repo.get_restaurant_remaining_table_bulk([1, 2, 3, 999])
+
+    # Assert
+    assert remaining == {1: 1, 2: 2, 3: 9, 999: 0}
+
+
+# 測試 import_state 先在本地建好新資料，持有鎖時才一次換上：讀取端不會看到新的分區配上舊的空桌數
+def test_import_state_SwapsUnderLock(table_repo):
+    # Arrange
+    loaded = MemoryTableRepository()
+    loaded.update_status(table_id=201, new_table_status="eating", queue_ticket_number=1)
+    state = loaded.export_state()
+    before_tables, before_remaining = table_repo.get_tables_by_restaurant(restaurant_id=2), table_repo.get_restaurant_remaining_table(restaurant_id=2)
+    importer = threading.Thread(target=table_repo.import_state, args=(state,))
+
+    # Act：讀取端持有鎖期間 import_state 只能等待
+    with table_repo._lock:
+        importer.start()
+        importer.join(timeout=0.2)
+        waiting = importer.is_alive()
+        tables_during = list(table_repo._tables_by_restaurant[2].values())
+        remaining_during = table_repo._empty_count[2]
+    importer.join()
+
+    # Assert
+    assert waiting is True
+    assert (tables_during, remaining_during) == (before_tables, before_remaining)
+    assert table_repo.get_tables_by_restaurant(restaurant_id=2) == loaded.get_tables_by_restaurant(restaurant_id=2)
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=2) == before_remaining - 1
@@ -0,0 +1,61 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services.queue_service import QueueService
+from app.services.locking import StripedLock
+from app.repositories.fake_all_repo import MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository
+from app.domain.errors import QueueAlreadyJoinedError
+
+
+@pytest.fixture
+def queue_service():
+    """
+    使用記憶體版 Repository 與獨立的鎖，模擬多個 Request 同時呼叫 Service。
+    """
+    return QueueService(
+        queue_repo=MemoryQueueRepository(),
+        queue_runtime_repo=MemoryQueueRuntimeRepository(),
+        map_repo=MemoryMapRepository(),
+        restaurant_locks=StripedLock(),
+        user_locks=StripedLock()
+    )
+
+
+def run_concurrently(fn, args_list):
+    """所有 thread 在同一時間點開始呼叫，回傳 (結果, 例外) 列表"""
+    barrier = threading.Barrier(len(args_list))
+
+    def call(args):
+        barrier.wait()
+        try:
+            return fn(*args), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(max_workers=len(args_list)) as pool:
+        return list(pool.map(call, args_list))
+
+
+# 測試同一間餐廳同時加入排隊，號碼牌不重複且連續
+def test_join_restaurant_waiting_queue_ConcurrentJoins_UniqueTickets(queue_service):
+    # Act
+    results = run_concurrently(queue_service.join_restaurant_waiting_queue, [(1, user_id) for user_id in range(100, 164)])
+
+    # Assert
+    tickets = sorted(result.ticket_number for result, error in results)
+    assert all(error is None for _, error in results)
+    assert tickets == list(range(1, 65))
+    assert sorted(result.people_ahead for result, _ in results) == list(range(64))
+    assert queue_service.queue_repo.get_total_waiting(restaurant_id=1) == 64
+
+
+# 測試同一位使用者同時加入多間餐廳，只有一次成功
+def test_join_restaurant_waiting_queue_SameUserConcurrent_OnlyOneSucceeds(queue_service):
+    # Act
+    results = run_concurrently(queue_service.join_restaurant_waiting_queue, [(restaurant_id, 7) for restaurant_id in (1, 2, 3) * 8])
+
+    # Assert
+    succeeded = [result for result, error in results if error is None]
+    assert len(succeeded) == 1
+    assert all(isinstance(error, QueueAlreadyJoinedError) for result, error in results if result is None)
+    assert queue_service.queue_repo.get_user_current_queue(user_id=7) is not None
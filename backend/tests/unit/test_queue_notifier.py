@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock
+from app.domain.errors import NotInQueueError
+from app.domain.events import QUEUE_JOINED, QUEUE_LEFT, TABLE_CLEARED, RestaurantChangedEvent
+from app.interfaces.queue_interface import IQueueService
+from app.routers.queues import stream_user_queue_position
+from app.schemas.queue_schema import UserQueuePositionEvent
+from app.services.queue_notifier import QueueChangeNotifier
+
+
+def make_position(people_ahead: int) -> UserQueuePositionEvent:
+    return UserQueuePositionEvent(restaurant_id=2, ticket_number=30, people_ahead=people_ahead, current_number=20, estimated_wait_time=people_ahead * 5)
+
+
+# 測試其他 thread 發出的事件可以喚醒 event loop 上的等待者
+def test_wait_for_change_WokenFromThread():
+    notifier = QueueChangeNotifier()
+
+    async def scenario():
+        waiting = asyncio.create_task(notifier.wait_for_change(2, 0, timeout=5))
+        await asyncio.sleep(0)
+        thread = threading.Thread(target=notifier.handle, args=(RestaurantChangedEvent(restaurant_id=2, kind=QUEUE_JOINED),))
+        thread.start()
+        thread.join()
+        return await waiting
+
+    assert asyncio.run(scenario()) == 1
+
+
+# 測試只影響座位的事件不會推進排隊版本，等待超時回傳原本版本
+def test_wait_for_change_TimeoutAndTableEvent():
+    notifier = QueueChangeNotifier()
+    notifier.handle(RestaurantChangedEvent(restaurant_id=2, kind=TABLE_CLEARED))
+
+    assert asyncio.run(notifier.wait_for_change(2, 0, timeout=0.01)) == 0
+
+
+# 測試 SSE 串流：先送目前狀態、沒變化送 heartbeat、有變化推播、離開後結束
+def test_stream_user_queue_position():
+    notifier = QueueChangeNotifier()
+    service = MagicMock(spec=IQueueService)
+    service.get_user_queue_position.side_effect = [make_position(1), NotInQueueError()]
+
+    async def scenario():
+        stream = stream_user_queue_position(service, notifier, user_id=123, first_position=make_position(3), heartbeat_seconds=0.01)
+        messages = [await stream.__anext__(), await stream.__anext__(), await stream.__anext__()]
+        notifier.handle(RestaurantChangedEvent(restaurant_id=2, kind=QUEUE_LEFT))
+        messages.append(await stream.__anext__())
+        notifier.handle(RestaurantChangedEvent(restaurant_id=2, kind=QUEUE_LEFT))
+        messages.extend([message async for message in stream])
+        return messages
+
+    messages = asyncio.run(scenario())
+
+    assert messages[0].startswith("retry:")
+    assert f"id: {notifier.epoch}-2-0" in messages[1]
+    assert '"people_ahead":3' in messages[1]
+    assert messages[2] == ": heartbeat\n\n"
+    assert f"id: {notifier.epoch}-2-1" in messages[3]
+    assert '"people_ahead":1' in messages[3]
+    assert "event: end" in messages[4]
+    assert len(messages) == 5
+
+
+# 測試重連時 Last-Event-ID 已是最新版本，不會重送目前狀態
+def test_stream_user_queue_position_ResumeFromLastEventId():
+    notifier = QueueChangeNotifier()
+    service = MagicMock(spec=IQueueService)
+
+    async def scenario():
+        stream = stream_user_queue_position(service, notifier, user_id=123, first_position=make_position(3),
+                                            last_event_id=notifier.format_event_id(2, 0), heartbeat_seconds=0.01)
+        return [await stream.__anext__(), await stream.__anext__()]
+
+    messages = asyncio.run(scenario())
+
+    assert messages[0].startswith("retry:")
+    assert messages[1] == ": heartbeat\n\n"
@@ -6,6 +6,12 @@ from app.interfaces.map_interface import IMapRepository
 from app.domain.errors import QueueAlreadyJoinedError,NotInQueueError, RestaurantNotFoundError
 from app.domain.value_objects import RestaurantMetrics
 from app.domain.entities import QueueEntity, MapEntity
+from app.domain.events import QUEUE_JOINED, TABLE_CLEARED, RestaurantChangedEvent, RestaurantEventBus
+from app.services.queue_response_cache import QueueResponseCache
+from app.repositories.fake_all_repo import MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository
+from app.repositories.sqlite_db import SQLiteDatabase
+from app.repositories.queue_repo import SQLiteQueueRepository, SQLiteQueueRuntimeRepository
+from app.repositories.version_repo import SQLiteRestaurantVersionRepository
 @pytest.fixture
 def mock_repos():
     """
@@ -42,7 +48,7 @@ def test_join_restaurant_waiting_queue_Success(queue_service, mock_repos):
     mock_queue_repo.get_user_current_queue.return_value = None # 使用者沒排隊
     mock_map_repo.get_restaurant_basic_info.return_value = True # 餐廳存在
     mock_queue_repo.get_total_waiting.return_value = waiting_count
-    mock_queue_runtime_repo.get_next_ticket_number.return_value = obtain_ticket_number
+    mock_queue_runtime_repo.allocate_ticket.return_value = obtain_ticket_number
     mock_queue_runtime_repo.get_metrics.return_value = metrics
     mock_queue_repo.add_to_queue.return_value = True
 
@@ -52,7 +58,7 @@ def test_join_restaurant_waiting_queue_Success(queue_service, mock_repos):
     assert join_response.ticket_number == obtain_ticket_number
     assert join_response.people_ahead == waiting_count
     assert join_response.estimated_wait_time == int(waiting_count* (metrics.average_wait_time/metrics.table_number))
-    mock_queue_runtime_repo.increment_next_ticket_number.assert_called_once_with(restaurant_id=5)
+    mock_queue_runtime_repo.allocate_ticket.assert_called_once_with(restaurant_id=5)
     
 # 測試加入排隊因 餐廳找不到 而失敗
 def test_join_restaurant_waiting_queue_RestaurantNotFoundError(queue_service, mock_repos):
@@ -65,7 +71,7 @@ def test_join_restaurant_waiting_queue_RestaurantNotFoundError(queue_service, mo
     # Act & Assert
     with pytest.raises(RestaurantNotFoundError):
         queue_service.join_restaurant_waiting_queue(restaurant_id=999, user_id=25)
-    mock_queue_runtime_repo.increment_next_ticket_number.assert_not_called()
+    mock_queue_runtime_repo.allocate_ticket.assert_not_called()
 
 # 測試加入排隊因 已經在排隊隊伍中 而失敗
 def test_join_restaurant_waiting_queue_AlreadyJoinQueueError(queue_service, mock_repos):
@@ -77,7 +83,7 @@ def test_join_restaurant_waiting_queue_AlreadyJoinQueueError(queue_service, mock
     # Act & Assert
     with pytest.raises(QueueAlreadyJoinedError):
         queue_service.join_restaurant_waiting_queue(restaurant_id=5, user_id=25)
-    mock_queue_runtime_repo.increment_next_ticket_number.assert_not_called()
+    mock_queue_runtime_repo.allocate_ticket.assert_not_called()
         
 
 
@@ -282,4 +288,110 @@ def test_get_user_queue_status_RestaurantNotFoundError(queue_service, mock_repos
     mock_map_repo.get_restaurant_basic_info.return_value = None #餐廳找不到
     # Act & Assert
     with pytest.raises(RestaurantNotFoundError):
-        queue_service.get_user_queue_status(user_id=123)
\ No newline at end of file
+        queue_service.get_user_queue_status(user_id=123)
+
+
+# 測試加入排隊成功後會發出 QUEUE_JOINED 事件
+def test_join_restaurant_waiting_queue_PublishesEvent(mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+    event_bus = MagicMock(spec=RestaurantEventBus)
+    queue_service = QueueService(
+        queue_repo=mock_queue_repo,
+        queue_runtime_repo=mock_queue_runtime_repo,
+        map_repo=mock_map_repo,
+        event_bus=event_bus
+    )
+    mock_queue_repo.get_user_current_queue.return_value = None
+    mock_map_repo.get_restaurant_basic_info.return_value = True
+    mock_queue_repo.get_total_waiting.return_value = 0
+    mock_queue_runtime_repo.allocate_ticket.return_value = 1
+    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=8,table_number=10)
+
+    # Act
+    queue_service.join_restaurant_waiting_queue(restaurant_id=5, user_id=25)
+
+    # Assert
+    event_bus.publish.assert_called_once_with(RestaurantChangedEvent(restaurant_id=5, kind=QUEUE_JOINED))
+
+
+
+# 測試取得使用者排隊位置 (含目前叫號)
+def test_get_user_queue_position_Success(queue_service, mock_repos):
+    # Arrange
+    mock_queue_repo, mock_queue_runtime_repo, mock_map_repo = mock_repos
+
+    mock_queue_repo.get_user_current_queue.return_value = QueueEntity(queue_id=1, restaurant_id=1, user_id=123, ticket_number=30)
+    mock_map_repo.get_restaurant_basic_info.return_value = MapEntity(
+                                                                restaurant_id = 1,
+                                                                restaurant_name = "麥克小姐",
+                                                                lat = 24.968,
+                                                                lng = 121.192,
+                                                                image_url = "https://example.com/burger.jpg",
+                                                                average_price = (150,300),
+                                                                specialties = "義大利麵、漢堡",
+                                                            )
+    mock_queue_repo.get_people_ahead.return_value = 6
+    mock_queue_runtime_repo.get_current_ticket_number.return_value = 24
+    mock_queue_runtime_repo.get_metrics.return_value = RestaurantMetrics(average_wait_time=10, table_number=2)
+    # Act
+    response = queue_service.get_user_queue_position(user_id=123)
+    # Assert
+    assert response.restaurant_id == 1
+    assert response.people_ahead == 6
+    assert response.current_number == 24
+    assert response.estimated_wait_time == 30
+
+
+# 測試排隊狀態 / 下一號的回應在餐廳沒有異動前重複使用，排隊或座位異動後重新計算
+def test_get_queue_status_ResponseCache_ReusedUntilChanged():
+    # Arrange
+    event_bus = RestaurantEventBus()
+    response_cache = QueueResponseCache()
+    event_bus.subscribe(response_cache.handle)
+    service = QueueService(
+        MemoryQueueRepository(), MemoryQueueRuntimeRepository(), MemoryMapRepository(),
+        event_bus=event_bus, response_cache=response_cache
+    )
+    first_status, first_next = service.get_queue_status(restaurant_id=1), service.get_queue_next(restaurant_id=1)
+
+    # Act
+    repeated_status, repeated_next = service.get_queue_status(restaurant_id=1), service.get_queue_next(restaurant_id=1)
+    service.join_restaurant_waiting_queue(restaurant_id=1, user_id=77)
+    joined_status = service.get_queue_status(restaurant_id=1)
+    event_bus.publish(RestaurantChangedEvent(restaurant_id=1, kind=TABLE_CLEARED))
+    cleared_status = service.get_queue_status(restaurant_id=1)
+
+    # Assert
+    assert repeated_status is first_status
+    assert repeated_next is first_next
+    assert joined_status.total_waiting == first_status.total_waiting + 1
+    assert cleared_status is not joined_status
+    assert cleared_status == joined_status
+    assert (response_cache.hits, response_cache.misses) == (2, 4)
+
+
+# 測試多個 worker 共用資料庫：回應快取以資料庫中的版本為準，其他 worker 加入排隊後立即重新計算
+def test_get_queue_status_SharedVersions_SeesOtherWorkersChanges(tmp_path):
+    # Arrange：兩個 worker 各自的連線與快取，彼此沒有共用 event bus
+    def worker():
+        db = SQLiteDatabase(str(tmp_path / "queue.db"))
+        db.init_schema()
+        service = QueueService(
+            SQLiteQueueRepository(db), SQLiteQueueRuntimeRepository(db), MemoryMapRepository(),
+            response_cache=QueueResponseCache(version_repo=SQLiteRestaurantVersionRepository(db))
+        )
+        return db, service
+    (db_a, worker_a), (db_b, worker_b) = worker(), worker()
+    first = worker_a.get_queue_status(restaurant_id=1)
+
+    # Act
+    repeated = worker_a.get_queue_status(restaurant_id=1)
+    worker_b.join_restaurant_waiting_queue(restaurant_id=1, user_id=77)
+    after_join = worker_a.get_queue_status(restaurant_id=1)
+
+    # Assert
+    assert repeated is first
+    assert after_join.total_waiting == first.total_waiting + 1
+    db_a.close()
+    db_b.close()
@@ -0,0 +1,220 @@
+import random
+import threading
+import pytest
+from app.repositories.fake_redis_server import FakeRedisServer
+from app.repositories.resp_client import RespClient, RespError
+from app.repositories.redis_queue_repo import RedisQueueRepository, RedisQueueRuntimeRepository
+from app.repositories.sqlite_db import SEED_QUEUE_RUNTIME
+from app.domain.value_objects import RestaurantMetrics
+from app.services.unit_of_work import UnitOfWork
+
+
+@pytest.fixture(scope="module")
+def server():
+    """整個檔案共用一個本機 RESP server，不需要真的 Redis"""
+    fake = FakeRedisServer()
+    fake.start()
+    yield fake
+    fake.stop()
+
+
+@pytest.fixture
+def client(server):
+    resp_client = RespClient.from_url(server.url)
+    resp_client.execute("FLUSHALL")
+    yield resp_client
+    resp_client.close_thread_connection()
+
+
+@pytest.fixture
+def queue_repo(client):
+    return RedisQueueRepository(client)
+
+
+@pytest.fixture
+def runtime_repo(client):
+    repo = RedisQueueRuntimeRepository(client)
+    repo.seed(SEED_QUEUE_RUNTIME)
+    return repo
+
+
+# 測試 pipeline 一次往返送出多個指令，錯誤的指令會拋出 RespError
+def test_pipeline_SingleRoundTrip(client):
+    # Act
+    before = client.round_trips
+    replies = client.pipeline([("SET", "a", 1), ("INCR", "a"), ("GET", "a"), ("ZCARD", "missing")])
+
+    # Assert
+    assert replies == ["OK", 2, b"2", 0]
+    assert client.round_trips == before + 1
+    client.execute("HSET", "h", "f", "v")
+    with pytest.raises(RespError):
+        client.execute("INCR", "h")
+
+
+# 測試加入排隊後，可以用 user_id 與 (restaurant_id, ticket_number) 找到同一筆資料
+def test_add_to_queue_Lookups(queue_repo):
+    # Act
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=28, ticket_number=16)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=30, ticket_number=6)
+
+    # Assert
+    by_user = queue_repo.get_user_current_queue(user_id=28)
+    by_ticket = queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=2, ticket_number=16)
+    assert by_user == by_ticket
+    assert (by_user.restaurant_id, by_user.ticket_number) == (2, 16)
+    assert queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=2, ticket_number=99) is None
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 2
+    assert queue_repo.get_total_waiting_bulk([2, 3, 999]) == {2: 2, 3: 1, 999: 0}
+    assert queue_repo.get_next_queue_to_call(restaurant_id=2) == 15
+    assert queue_repo.get_next_queue_to_call(restaurant_id=999) is None
+
+
+# 測試從錯誤的餐廳移除不會動到資料，正確移除後索引同步更新
+def test_remove_from_queue(queue_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    removed_wrong_restaurant = queue_repo.remove_from_queue(restaurant_id=3, user_id=25)
+    removed = queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Assert
+    assert removed_wrong_restaurant is False
+    assert removed is True
+    assert queue_repo.get_user_current_queue(user_id=25) is None
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 0
+    assert queue_repo.remove_from_queue(restaurant_id=2, user_id=25) is False
+
+
+# 測試 ZRANK 的前面人數與逐筆計算一致
+def test_get_people_ahead_MatchesFullScan(queue_repo):
+    # Arrange
+    rng = random.Random(5)
+    tickets = list(range(1, 151))
+    rng.shuffle(tickets)
+    waiting = {}
+    for user_id, ticket in enumerate(tickets, start=1000):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=ticket)
+        waiting[user_id] = ticket
+    for user_id in rng.sample(sorted(waiting), 60):
+        queue_repo.remove_from_queue(restaurant_id=1, user_id=user_id)
+        del waiting[user_id]
+
+    # Assert
+    for user_id, ticket in waiting.items():
+        expected = sum(1 for other in waiting.values() if other < ticket)
+        assert queue_repo.get_people_ahead(restaurant_id=1, user_id=user_id) == expected
+    assert queue_repo.get_people_ahead(restaurant_id=2, user_id=next(iter(waiting))) == 0
+    assert queue_repo.get_next_queue_to_call(restaurant_id=1) == min(waiting.values())
+
+
+# 測試初始資料、預設值與 bulk 查詢
+def test_runtime_repo_SeedAndDefaults(runtime_repo):
+    # Act
+    runtime_repo.seed([(2, 99, 99, [1, 1])])  # 已存在的值不覆蓋
+
+    # Assert
+    assert runtime_repo.get_current_ticket_number(restaurant_id=2) == 14
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 17
+    assert runtime_repo.get_metrics(restaurant_id=3) == RestaurantMetrics(average_wait_time=100, table_number=12)
+    assert runtime_repo.get_metrics_bulk([1, 50]) == {
+        1: RestaurantMetrics(average_wait_time=10, table_number=5),
+        50: RestaurantMetrics(average_wait_time=15, table_number=4),
+    }
+    assert runtime_repo.get_current_ticket_number(restaurant_id=50) == 0
+    runtime_repo.set_current_ticket_number(restaurant_id=50, ticket_number=3)
+    assert runtime_repo.get_current_ticket_number(restaurant_id=50) == 3
+
+
+# 測試多個 client 同時以 INCR 取號，號碼不重複
+def test_allocate_ticket_ConcurrentClients_UniqueTickets(server, runtime_repo):
+    # Arrange
+    tickets = []
+    tickets_lock = threading.Lock()
+
+    def worker():
+        repo = RedisQueueRuntimeRepository(RespClient.from_url(server.url))
+        allocated = [repo.allocate_ticket(restaurant_id=2) for _ in range(25)]
+        repo.client.close_thread_connection()
+        with tickets_lock:
+            tickets.extend(allocated)
+
+    # Act
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert sorted(tickets) == list(range(17, 167))
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 167
+    assert runtime_repo.allocate_ticket(restaurant_id=77) == 1
+
+
+# 測試兩個節點 (各自的 client) 同時替同一位使用者加入不同餐廳：只有一個成功，另一個不寫入
+def test_add_to_queue_SameUserFromTwoClients_OnlyOneSucceeds(server, queue_repo):
+    # Arrange
+    results = {}
+    barrier = threading.Barrier(2)
+
+    def worker(restaurant_id):
+        repo = RedisQueueRepository(RespClient.from_url(server.url))
+        outcomes = []
+        for user_id in range(300, 320):
+            barrier.wait()
+            outcomes.append(repo.add_to_queue(restaurant_id=restaurant_id, user_id=user_id, ticket_number=user_id))
+        repo.client.close_thread_connection()
+        results[restaurant_id] = outcomes
+
+    # Act
+    threads = [threading.Thread(target=worker, args=(restaurant_id,)) for restaurant_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert all(first != second for first, second in zip(results[1], results[2]))
+    assert queue_repo.get_total_waiting(restaurant_id=1) + queue_repo.get_total_waiting(restaurant_id=2) == 20
+    for user_id in range(300, 320):
+        entry = queue_repo.get_user_current_queue(user_id)
+        assert results[entry.restaurant_id][user_id - 300] is True
+    assert queue_repo.add_to_queue(restaurant_id=3, user_id=300, ticket_number=1) is False
+
+
+# 測試以 INCRBY 預借一段號碼，只有仍在計數器尾端時才能歸還
+def test_lease_ticket_block_ReleaseOnlyAtTail(runtime_repo):
+    # Act
+    block = runtime_repo.lease_ticket_block(restaurant_id=2, size=5)
+    later = runtime_repo.lease_ticket_block(restaurant_id=2, size=5)
+    not_at_tail = runtime_repo.release_ticket_block(restaurant_id=2, start=19, end=block[1])
+    at_tail = runtime_repo.release_ticket_block(restaurant_id=2, start=24, end=later[1])
+
+    # Assert
+    assert block == (17, 22)
+    assert later == (22, 27)
+    assert not_at_tail is False
+    assert at_tail is True
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 24
+    assert runtime_repo.allocate_ticket(restaurant_id=2) == 24
+
+
+# 測試 Redis 的寫入在交易 rollback 時以反向操作補償
+def test_unit_of_work_Rollback_Compensates(queue_repo, runtime_repo):
+    # Arrange
+    queue_repo.add_to_queue(restaurant_id=2, user_id=42, ticket_number=17)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with UnitOfWork().begin():
+            queue_repo.remove_from_queue(restaurant_id=2, user_id=42)
+            runtime_repo.set_current_ticket_number(restaurant_id=2, ticket_number=17)
+            raise RuntimeError("abort")
+
+    # Assert
+    assert queue_repo.get_user_current_queue(user_id=42).ticket_number == 17
+    assert queue_repo.get_next_queue_to_call(restaurant_id=2) == 17
+    assert runtime_repo.get_current_ticket_number(restaurant_id=2) == 14
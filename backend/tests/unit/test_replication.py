@@ -0,0 +1,150 @@
+import time
+import pytest
+from app.repositories.replication import ReplicationLeader, ReplicationFollower, ReplicationNode
+from app.repositories.journaled_repo import JournaledQueueRepository, JournaledQueueRuntimeRepository, JournaledTableRepository
+from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+from app.domain.errors import NotAFollowerError
+from app.domain.events import RestaurantEventBus, QUEUE_JOINED, QUEUE_LEFT, TABLE_SEATED
+
+
+def _wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+class _Node:
+    """一組記憶體 Repository 與包上複寫的 Journaled* 裝飾器"""
+    def __init__(self):
+        self.queue_repo = MemoryQueueRepository()
+        self.runtime_repo = MemoryQueueRuntimeRepository()
+        self.table_repo = MemoryTableRepository()
+        self.leader = ReplicationLeader(self.queue_repo, self.runtime_repo, self.table_repo, heartbeat_interval=0.05)
+        self.writes = (
+            JournaledQueueRepository(self.queue_repo, self.leader),
+            JournaledQueueRuntimeRepository(self.runtime_repo, self.leader),
+            JournaledTableRepository(self.table_repo, self.leader),
+        )
+
+    def join(self, restaurant_id: int, user_id: int) -> int:
+        queue_repo, runtime_repo, _ = self.writes
+        ticket_number = runtime_repo.allocate_ticket(restaurant_id)
+        queue_repo.add_to_queue(restaurant_id, user_id, ticket_number)
+        return ticket_number
+
+    def follower_of(self, leader_node: "_Node", event_bus=None) -> ReplicationFollower:
+        return ReplicationFollower(
+            leader_node.leader.address, self.queue_repo, self.runtime_repo, self.table_repo,
+            event_bus=event_bus, reconnect_interval=0.05
+        )
+
+
+@pytest.fixture
+def primary():
+    node = _Node()
+    node.leader.start()
+    yield node
+    node.leader.stop()
+
+
+# 測試 follower 先以 snapshot 取得既有資料，再接收之後的異動並發布事件
+def test_follower_BootstrapsAndStreams(primary):
+    # Arrange：follower 連上前已經有資料
+    primary.join(restaurant_id=1, user_id=10)
+    primary.join(restaurant_id=1, user_id=11)
+    replica = _Node()
+    events = []
+    event_bus = RestaurantEventBus()
+    event_bus.subscribe(events.append)
+    follower = replica.follower_of(primary, event_bus)
+
+    # Act
+    follower.start()
+    assert follower.bootstrapped.wait(5)
+    primary.join(restaurant_id=2, user_id=12)
+    primary.writes[0].remove_from_queue(restaurant_id=1, user_id=10)
+    primary.writes[2].update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+    caught_up = _wait_until(lambda: follower.applied_sequence == primary.leader.sequence)
+
+    # Assert
+    assert caught_up
+    assert replica.queue_repo.get_user_current_queue(user_id=10) is None
+    assert replica.queue_repo.get_people_ahead(restaurant_id=1, user_id=11) == 0
+    assert replica.queue_repo.get_user_current_queue(user_id=12).ticket_number == 17
+    assert replica.runtime_repo.get_next_ticket_number(restaurant_id=2) == 18
+    assert replica.table_repo.get_table_by_id(102).status == "eating"
+    # snapshot 後所有餐廳都更新一次，之後每筆排隊 / 座位異動各一個事件
+    assert {event.restaurant_id for event in events[:3]} == {1, 2, 3}
+    assert [(event.restaurant_id, event.kind) for event in events[3:]] == [
+        (2, QUEUE_JOINED), (1, QUEUE_LEFT), (1, TABLE_SEATED)
+    ]
+    follower.stop()
+
+
+# 測試雙方都能回報複寫延遲
+def test_status_ReportsLag(primary):
+    # Arrange
+    replica = _Node()
+    follower = replica.follower_of(primary)
+    follower.start()
+    follower.bootstrapped.wait(5)
+
+    # Act
+    primary.join(restaurant_id=3, user_id=30)
+    _wait_until(lambda: primary.leader.status()["followers"] and primary.leader.status()["followers"][0]["acked_sequence"] == primary.leader.sequence)
+    leader_status = primary.leader.status()
+    follower_status = follower.status()
+
+    # Assert
+    assert leader_status["sequence"] == 2
+    assert leader_status["followers"][0]["lag_records"] == 0
+    assert follower_status["connected"] is True
+    assert follower_status["applied_sequence"] == follower_status["leader_sequence"] == 2
+    assert follower_status["lag_records"] == 0
+    assert follower_status["seconds_since_leader_contact"] < 5
+    follower.stop()
+
+
+# 測試 leader 停止後 promote follower：序號接續，並開始接受其他 follower
+def test_promote_FollowerBecomesLeader(primary):
+    # Arrange
+    replica = _Node()
+    node = ReplicationNode(leader=replica.leader, follower=replica.follower_of(primary))
+    node.start()
+    node.follower.bootstrapped.wait(5)
+    primary.join(restaurant_id=1, user_id=10)
+    _wait_until(lambda: node.follower.applied_sequence == 2)
+    primary.leader.stop()
+
+    # Act
+    assert node.read_only is True
+    node.promote()
+    replica.join(restaurant_id=1, user_id=11)
+    third = _Node()
+    follower = third.follower_of(replica)
+    follower.start()
+    follower.bootstrapped.wait(5)
+
+    # Assert
+    assert node.role == "leader" and node.read_only is False
+    assert replica.leader.sequence == 4
+    assert third.queue_repo.get_people_ahead(restaurant_id=1, user_id=11) == 1
+    with pytest.raises(NotAFollowerError):
+        node.promote()
+    follower.stop()
+    node.stop()
+
+
+# 測試沒有設定複寫時為 standalone，不能 promote
+def test_standalone_NotReadOnly():
+    # Arrange
+    node = ReplicationNode()
+
+    # Act & Assert
+    assert node.status() == {"role": "standalone"}
+    assert node.read_only is False
+    with pytest.raises(NotAFollowerError):
+        node.promote()
@@ -0,0 +1,72 @@
+from app.domain.events import QUEUE_JOINED, TABLE_CLEARED, TABLE_SEATED, RestaurantChangedEvent
+from app.routers.etag import etag_matches
+from app.interfaces.version_interface import IRestaurantVersionRepository
+from app.services.resource_versions import QUEUE, RESTAURANTS, TABLE, ResourceVersions
+
+
+class _DictVersionRepository(IRestaurantVersionRepository):
+    """代替資料庫中的共用版本"""
+    def __init__(self):
+        self.versions = {}
+
+    def get_epoch(self):
+        return "shared"
+
+    def get_versions(self, restaurant_id):
+        return self.versions.get(restaurant_id, (0, 0))
+
+    def get_all_versions(self):
+        return dict(self.versions)
+
+
+# 測試不同事件只推進受影響資源的版本
+def test_handle_BumpsAffectedResources():
+    # Arrange
+    versions = ResourceVersions()
+    queue_etag = versions.get_etag(QUEUE, 2)
+    table_etag = versions.get_etag(TABLE, 2)
+
+    # Act & Assert
+    versions.handle(RestaurantChangedEvent(restaurant_id=2, kind=QUEUE_JOINED))
+    assert versions.get_version(QUEUE, 2) == 1
+    assert versions.get_version(TABLE, 2) == 0
+    assert versions.get_version(QUEUE, 3) == 0
+    assert versions.get_etag(QUEUE, 2) != queue_etag
+
+    versions.handle(RestaurantChangedEvent(restaurant_id=2, kind=TABLE_SEATED))
+    assert versions.get_version(QUEUE, 2) == 2
+    assert versions.get_version(TABLE, 2) == 1
+
+    versions.handle(RestaurantChangedEvent(restaurant_id=2, kind=TABLE_CLEARED))
+    assert versions.get_version(QUEUE, 2) == 2
+    assert versions.get_etag(TABLE, 2) != table_etag
+    assert versions.get_version(RESTAURANTS) == 3
+
+
+# 測試不同次啟動 (不同 epoch) 的 ETag 不會相同
+def test_get_etag_DiffersAcrossInstances():
+    assert ResourceVersions().get_etag(QUEUE, 2) != ResourceVersions().get_etag(QUEUE, 2)
+
+
+# 測試注入共用版本時，不同 worker 的 QUEUE / TABLE ETag 相同，且不需要事件就反映其他 worker 的異動
+def test_get_etag_SharedVersions_SameAcrossWorkers():
+    # Arrange
+    version_repo = _DictVersionRepository()
+    worker_a, worker_b = ResourceVersions(version_repo=version_repo), ResourceVersions(version_repo=version_repo)
+    before = worker_a.get_etag(QUEUE, 2)
+
+    # Act
+    version_repo.versions[2] = (1, 0)
+
+    # Assert
+    assert worker_a.get_etag(QUEUE, 2) == worker_b.get_etag(QUEUE, 2) != before
+    assert worker_a.get_etag(TABLE, 2) == worker_b.get_etag(TABLE, 2)
+    assert worker_a.get_etag(RESTAURANTS) != worker_b.get_etag(RESTAURANTS)
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
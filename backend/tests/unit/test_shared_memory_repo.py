@@ -0,0 +1,313 @@
+import asyncio
+import multiprocessing
+import random
+import time
+import uuid
+import pytest
+from app.repositories.shared_memory_repo import (
+    SharedQueueState, SharedMemoryQueueRepository, SharedMemoryQueueRuntimeRepository, SharedMemoryTableRepository,
+    SharedMemoryChangeWatcher, SharedMemoryFullError, SharedMemoryRestaurantVersionRepository
+)
+from app.repositories.fake_all_repo import (
+    AsyncMemoryMapRepository, AsyncMemoryQueueRepository, AsyncMemoryQueueRuntimeRepository, AsyncMemoryTableRepository,
+    MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+)
+from app.services.queue_service import QueueService
+from app.services.async_queue_service import AsyncQueueService
+from app.services.async_table_service import AsyncTableService
+from app.services.locking import AsyncStripedLockAdapter
+from app.services.queue_response_cache import QueueResponseCache
+from app.services.resource_versions import QUEUE, ResourceVersions
+from app.domain.errors import QueueAlreadyJoinedError, TableInvalidActionError
+from app.domain.events import RestaurantEventBus, TABLE_CLEARED
+
+
+def _seed():
+    return {**MemoryQueueRuntimeRepository().export_state(), **MemoryTableRepository().export_state()}
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """建立一個測試專用的 segment，結束時刪除"""
+    options = {
+        "name": f"qtest_{uuid.uuid4().hex[:12]}",
+        "lock_path": str(tmp_path / "shm.lock"),
+        "queue_capacity": 2000,
+        "restaurant_capacity": 16,
+        "ticket_window": 64,
+        "table_capacity": 64,
+    }
+    state = SharedQueueState.open(seed=_seed(), **options)
+    yield state, options
+    state.destroy()
+
+
+def _join_worker(options, restaurant_id, user_ids, results):
+    """在另一個 process 連上同一個 segment，以跨 process 的鎖經由 Service 加入排隊"""
+    state = SharedQueueState.open(**options)
+    service = QueueService(
+        queue_repo=SharedMemoryQueueRepository(state),
+        queue_runtime_repo=SharedMemoryQueueRuntimeRepository(state),
+        map_repo=MemoryMapRepository(),
+        restaurant_locks=state.restaurant_locks,
+        user_locks=state.user_locks
+    )
+    for user_id in user_ids:
+        try:
+            results.put((user_id, service.join_restaurant_waiting_queue(restaurant_id=restaurant_id, user_id=user_id).ticket_number))
+        except QueueAlreadyJoinedError:
+            results.put((user_id, None))
+    state.close()
+
+
+class _SlowTableRepository(SharedMemoryTableRepository):
+    """讀取桌子後停頓，讓兩個 worker 的「檢查 + 寫入」一定重疊"""
+    def get_table_by_id(self, table_id):
+        table = super().get_table_by_id(table_id)
+        time.sleep(0.2)
+        return table
+
+
+def _seat_worker(options, table_id, ticket_number, barrier, results):
+    """在另一個 process 以 async Service (main.py 使用的) 與跨 process 的鎖入座"""
+    state = SharedQueueState.open(**options)
+    service = AsyncTableService(
+        table_repo=AsyncMemoryTableRepository(_SlowTableRepository(state)),
+        map_repo=AsyncMemoryMapRepository(MemoryMapRepository()),
+        queue_repo=AsyncMemoryQueueRepository(SharedMemoryQueueRepository(state)),
+        queue_runtime_repo=AsyncMemoryQueueRuntimeRepository(SharedMemoryQueueRuntimeRepository(state)),
+        restaurant_locks=AsyncStripedLockAdapter(state.restaurant_locks)
+    )
+    barrier.wait()
+    try:
+        asyncio.run(service.update_table_status(restaurant_id=1, table_id=table_id, new_table_status="eating", queue_ticket_number=ticket_number))
+        results.put((ticket_number, "seated"))
+    except TableInvalidActionError:
+        results.put((ticket_number, "rejected"))
+    state.close()
+
+
+# 測試排隊操作的結果與記憶體版 Repository 完全相同 (包含號碼環繞回)
+def test_queue_repo_MatchesMemoryRepository(shared):
+    # Arrange
+    state, _ = shared
+    expected = MemoryQueueRepository()
+    actual = SharedMemoryQueueRepository(state)
+    runtime = SharedMemoryQueueRuntimeRepository(state)
+    rng = random.Random(7)
+    waiting = {1: [], 2: []}
+
+    # Act：隨機加入 / 離開 / 叫號，讓號碼超過 ticket_window 好幾輪
+    for step in range(1500):
+        restaurant_id = rng.choice((1, 2))
+        if waiting[restaurant_id] and rng.random() < 0.5:
+            # 大多從隊首離開 (入座)，偶爾從中間離開
+            user_id = waiting[restaurant_id].pop(0 if rng.random() < 0.7 else rng.randrange(len(waiting[restaurant_id])))
+            assert actual.remove_from_queue(restaurant_id, user_id) == expected.remove_from_queue(restaurant_id, user_id)
+        elif len(waiting[restaurant_id]) < 40:
+            user_id = 10_000 + step
+            ticket_number = runtime.allocate_ticket(restaurant_id)
+            assert actual.add_to_queue(restaurant_id, user_id, ticket_number)
+            expected.add_to_queue(restaurant_id, user_id, ticket_number)
+            waiting[restaurant_id].append(user_id)
+
+        # Assert
+        assert actual.get_total_waiting(restaurant_id) == expected.get_total_waiting(restaurant_id)
+        assert actual.get_next_queue_to_call(restaurant_id) == expected.get_next_queue_to_call(restaurant_id)
+        if waiting[restaurant_id]:
+            user_id = rng.choice(waiting[restaurant_id])
+            entry = actual.get_user_current_queue(user_id)
+            assert entry.ticket_number == expected.get_user_current_queue(user_id).ticket_number
+            assert actual.get_people_ahead(restaurant_id, user_id) == expected.get_people_ahead(restaurant_id, user_id)
+            assert actual.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id, entry.ticket_number).user_id == user_id
+    assert actual.remove_from_queue(restaurant_id=1, user_id=-5) is False
+
+
+# 測試建立時寫入預設的叫號狀態與座位，空桌數隨 update_status 維護
+def test_open_SeedsRuntimeAndTables(shared):
+    # Arrange
+    state, _ = shared
+    expected_tables = MemoryTableRepository()
+    tables = SharedMemoryTableRepository(state)
+    runtime = SharedMemoryQueueRuntimeRepository(state)
+
+    # Act
+    updated = tables.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+    expected_tables.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+
+    # Assert
+    assert updated is True
+    assert tables.update_status(table_id=999, new_table_status="empty", queue_ticket_number=0) is False
+    for restaurant_id in (1, 2, 3):
+        assert tables.get_tables_by_restaurant(restaurant_id) == expected_tables.get_tables_by_restaurant(restaurant_id)
+        assert tables.get_restaurant_remaining_table(restaurant_id) == expected_tables.get_restaurant_remaining_table(restaurant_id)
+        assert runtime.get_metrics(restaurant_id) == MemoryQueueRuntimeRepository().get_metrics(restaurant_id)
+    assert tables.get_table_by_id(301).label == "1桌"
+    assert runtime.get_next_ticket_number(restaurant_id=2) == 17
+    # 沒有資料的餐廳回傳預設值，且不會佔用餐廳槽位
+    assert runtime.get_next_ticket_number(restaurant_id=99) == 1
+    assert tables.get_restaurant_remaining_table(restaurant_id=99) == 0
+    assert len(state.restaurant_slots()) == 3
+
+
+# 測試多個 process 同時經由 Service 加入排隊：號碼不重複、同一人只排一次
+def test_join_FromSeveralProcesses_SharesOneQueue(shared):
+    # Arrange
+    state, options = shared
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    # 每個 process 都嘗試加入每位使用者 (順序錯開)
+    user_ids = list(range(500, 540))
+    workers = [
+        context.Process(target=_join_worker, args=(options, 1, user_ids[i % 2::2] + user_ids[(i + 1) % 2::2], results))
+        for i in range(4)
+    ]
+
+    # Act
+    for worker in workers:
+        worker.start()
+    outcomes = [results.get(timeout=60) for _ in range(len(user_ids) * len(workers))]
+    for worker in workers:
+        worker.join(timeout=60)
+
+    # Assert
+    tickets = [ticket for _, ticket in outcomes if ticket is not None]
+    assert sorted(user_id for user_id, ticket in outcomes if ticket is not None) == user_ids
+    assert len(set(tickets)) == len(user_ids)
+    queue_repo = SharedMemoryQueueRepository(state)
+    assert queue_repo.get_total_waiting(restaurant_id=1) == len(user_ids)
+    last = max(user_ids, key=lambda user_id: queue_repo.get_user_current_queue(user_id).ticket_number)
+    assert queue_repo.get_people_ahead(restaurant_id=1, user_id=last) == len(user_ids) - 1
+
+
+# 測試另一個連線 (代表其他 worker) 的異動會轉成本地 event bus 事件
+def test_change_watcher_PublishesOtherWorkersChanges(shared):
+    # Arrange
+    state, options = shared
+    events = []
+    event_bus = RestaurantEventBus()
+    event_bus.subscribe(events.append)
+    watcher = SharedMemoryChangeWatcher(state, event_bus)
+    other = SharedQueueState.open(**options)
+
+    # Act
+    SharedMemoryQueueRepository(other).add_to_queue(restaurant_id=2, user_id=1, ticket_number=17)
+    SharedMemoryTableRepository(other).update_status(table_id=101, new_table_status="empty", queue_ticket_number=0)
+    published = watcher.poll()
+
+    # Assert
+    assert published == 2
+    assert {(event.restaurant_id, event.kind) for event in events} == {(2, "queue_joined"), (1, TABLE_CLEARED)}
+    assert watcher.poll() == 0
+    other.close()
+
+
+# 測試容量用完時拒絕寫入，而不是覆寫其他資料
+def test_add_to_queue_WindowFull_Raises(shared):
+    # Arrange
+    state, _ = shared
+    queue_repo = SharedMemoryQueueRepository(state)
+    queue_repo.add_to_queue(restaurant_id=1, user_id=1, ticket_number=1)
+
+    # Act & Assert：ticket_window = 64，與目前隊首相差太遠的號碼放不進號碼環
+    with pytest.raises(SharedMemoryFullError):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=2, ticket_number=65)
+    assert queue_repo.add_to_queue(restaurant_id=1, user_id=2, ticket_number=64) is True
+    # 同一位使用者不能重複加入
+    assert queue_repo.add_to_queue(restaurant_id=2, user_id=2, ticket_number=17) is False
+    assert queue_repo.get_total_waiting(restaurant_id=1) == 2
+
+
+# 測試兩個 process 以 async Service 同時把不同號碼安排到同一張桌子，只有一個成功
+def test_seat_SameTableFromTwoProcesses_OnlyOneSucceeds(shared):
+    # Arrange
+    state, options = shared
+    queue_repo = SharedMemoryQueueRepository(state)
+    runtime = SharedMemoryQueueRuntimeRepository(state)
+    tickets = []
+    for user_id in (801, 802):
+        ticket_number = runtime.allocate_ticket(restaurant_id=1)
+        queue_repo.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=ticket_number)
+        tickets.append(ticket_number)
+    context = multiprocessing.get_context("spawn")
+    results, barrier = context.Queue(), context.Barrier(2)
+    workers = [context.Process(target=_seat_worker, args=(options, 102, ticket_number, barrier, results)) for ticket_number in tickets]
+
+    # Act
+    for worker in workers:
+        worker.start()
+    outcomes = dict(results.get(timeout=60) for _ in workers)
+    for worker in workers:
+        worker.join(timeout=60)
+
+    # Assert
+    assert sorted(outcomes.values()) == ["rejected", "seated"]
+    seated = next(ticket_number for ticket_number, outcome in outcomes.items() if outcome == "seated")
+    assert queue_repo.get_total_waiting(restaurant_id=1) == 1
+    assert queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=1, ticket_number=seated) is None
+    assert SharedMemoryTableRepository(state).get_table_by_id(102).status == "eating"
+    assert runtime.get_current_ticket_number(restaurant_id=1) == seated
+
+
+# 測試 async Service 經由跨 process 鎖同時處理大量加入排隊：全部完成，不會卡住 (每位使用者同時送兩次)
+def test_async_join_Burst_FinishesWithoutDeadlock(shared):
+    # Arrange
+    state, _ = shared
+    service = AsyncQueueService(
+        queue_repo=AsyncMemoryQueueRepository(SharedMemoryQueueRepository(state)),
+        queue_runtime_repo=AsyncMemoryQueueRuntimeRepository(SharedMemoryQueueRuntimeRepository(state)),
+        map_repo=AsyncMemoryMapRepository(MemoryMapRepository()),
+        restaurant_locks=AsyncStripedLockAdapter(state.restaurant_locks),
+        user_locks=AsyncStripedLockAdapter(state.user_locks)
+    )
+    joins = [(1 + user_id % 3, user_id) for user_id in range(2000, 2180)] * 2
+
+    async def join(restaurant_id, user_id):
+        try:
+            return (await service.join_restaurant_waiting_queue(restaurant_id=restaurant_id, user_id=user_id)).ticket_number
+        except QueueAlreadyJoinedError:
+            return None
+
+    async def burst():
+        return await asyncio.wait_for(asyncio.gather(*(join(restaurant_id, user_id) for restaurant_id, user_id in joins)), timeout=30)
+
+    # Act
+    tickets = asyncio.run(burst())
+
+    # Assert
+    assert sum(ticket is not None for ticket in tickets) == 180
+    queue_repo = SharedMemoryQueueRepository(state)
+    assert [queue_repo.get_total_waiting(restaurant_id) for restaurant_id in (1, 2, 3)] == [60, 60, 60]
+
+
+# 測試回應快取與 ETag 以共用的排隊版本為準：另一個 worker 加入排隊後立即重新計算，不必等 change watcher
+def test_response_cache_SharedVersion_SeesOtherWorkersJoin(shared):
+    # Arrange：另一條連線代表其他 worker，兩邊沒有共用 event bus
+    state, options = shared
+    other_state = SharedQueueState.open(**options)
+
+    def worker(worker_state):
+        version_repo = SharedMemoryRestaurantVersionRepository(worker_state)
+        service = QueueService(
+            queue_repo=SharedMemoryQueueRepository(worker_state),
+            queue_runtime_repo=SharedMemoryQueueRuntimeRepository(worker_state),
+            map_repo=MemoryMapRepository(),
+            restaurant_locks=worker_state.restaurant_locks,
+            user_locks=worker_state.user_locks,
+            response_cache=QueueResponseCache(version_repo=version_repo)
+        )
+        return service, ResourceVersions(version_repo=version_repo)
+    (service_a, versions_a), (service_b, versions_b) = worker(state), worker(other_state)
+    first = service_a.get_queue_status(restaurant_id=1)
+    etag = versions_a.get_etag(QUEUE, 1)
+
+    # Act
+    repeated = service_a.get_queue_status(restaurant_id=1)
+    service_b.join_restaurant_waiting_queue(restaurant_id=1, user_id=42)
+    after_join = service_a.get_queue_status(restaurant_id=1)
+
+    # Assert
+    assert repeated is first
+    assert after_join.total_waiting == first.total_waiting + 1
+    assert versions_a.get_etag(QUEUE, 1) == versions_b.get_etag(QUEUE, 1) != etag
+    other_state.close()
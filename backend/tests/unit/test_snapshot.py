@@ -0,0 +1,165 @@
+import os
+from array import array
+import pytest
+from app.repositories.snapshot import (
+    write_snapshot, read_snapshot, save_memory_snapshot, load_memory_snapshot, PeriodicSnapshotter
+)
+from app.repositories.journal import Journal, read_journal
+from app.repositories.journaled_repo import JournaledQueueRepository, JournaledQueueRuntimeRepository, replay_journal
+from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+
+
+def _fresh_repos():
+    return MemoryQueueRepository(), MemoryQueueRuntimeRepository(), MemoryTableRepository()
+
+
+# 測試 int64 欄位與字串表可以原樣讀回
+def test_write_snapshot_RoundTripsSections(tmp_path):
+    # Arrange
+    path = str(tmp_path / "memory.snapshot")
+    sections = {
+        "numbers": array('q', [1, -1, 2 ** 40]),
+        "empty": array('q'),
+        "labels": ["A1", "VIP1", "12桌", ""],
+        "no_labels": [],
+    }
+
+    # Act
+    write_snapshot(path, sections, journal_sequence=42)
+    journal_sequence, loaded = read_snapshot(path)
+
+    # Assert
+    assert journal_sequence == 42
+    assert loaded == sections
+    assert not os.path.exists(path + ".tmp")
+
+
+# 測試記憶體 Repository 寫成 snapshot 後載入，查詢結果完全相同
+def test_load_memory_snapshot_ReproducesState(tmp_path):
+    # Arrange
+    path = str(tmp_path / "memory.snapshot")
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    for i in range(300):
+        ticket_number = runtime_repo.allocate_ticket(restaurant_id=i % 3 + 1)
+        queue_repo.add_to_queue(restaurant_id=i % 3 + 1, user_id=1000 + i, ticket_number=ticket_number)
+    for i in range(0, 300, 4):
+        queue_repo.remove_from_queue(restaurant_id=i % 3 + 1, user_id=1000 + i)
+    queue_repo.get_next_queue_to_call(restaurant_id=1)
+    runtime_repo.set_current_ticket_number(restaurant_id=2, ticket_number=20)
+    table_repo.update_status(table_id=102, new_table_status="eating", queue_ticket_number=1)
+
+    # Act
+    save_memory_snapshot(path, queue_repo, runtime_repo, table_repo)
+    loaded_queue, loaded_runtime, loaded_table = _fresh_repos()
+    journal_sequence = load_memory_snapshot(path, loaded_queue, loaded_runtime, loaded_table)
+
+    # Assert
+    assert journal_sequence == 0
+    for restaurant_id in (1, 2, 3):
+        assert loaded_queue.get_total_waiting(restaurant_id) == queue_repo.get_total_waiting(restaurant_id)
+        assert loaded_queue.get_next_queue_to_call(restaurant_id) == queue_repo.get_next_queue_to_call(restaurant_id)
+        assert loaded_runtime.get_next_ticket_number(restaurant_id) == runtime_repo.get_next_ticket_number(restaurant_id)
+        assert loaded_runtime.get_metrics(restaurant_id) == runtime_repo.get_metrics(restaurant_id)
+        assert loaded_table.get_tables_by_restaurant(restaurant_id) == table_repo.get_tables_by_restaurant(restaurant_id)
+        assert loaded_table.get_restaurant_remaining_table(restaurant_id) == table_repo.get_restaurant_remaining_table(restaurant_id)
+    for user_id in range(1000, 1300):
+        entry = queue_repo.get_user_current_queue(user_id)
+        assert loaded_queue.get_user_current_queue(user_id) == entry
+        if entry is not None:
+            assert loaded_queue.get_people_ahead(entry.restaurant_id, user_id) == queue_repo.get_people_ahead(entry.restaurant_id, user_id)
+    assert loaded_runtime.get_current_ticket_number(restaurant_id=2) == 20
+
+    # 載入後可以繼續寫入，空閒 row 與 queue_id 都接續使用
+    loaded_queue.add_to_queue(restaurant_id=1, user_id=5000, ticket_number=loaded_runtime.allocate_ticket(restaurant_id=1))
+    queue_repo.add_to_queue(restaurant_id=1, user_id=5000, ticket_number=runtime_repo.allocate_ticket(restaurant_id=1))
+    assert loaded_queue.get_user_current_queue(5000) == queue_repo.get_user_current_queue(5000)
+
+
+# 測試 snapshot 記錄 journal 位置，恢復時只重播之後的紀錄
+def test_snapshot_WithJournal_ReplaysOnlySuffix(tmp_path):
+    # Arrange
+    snapshot_path = str(tmp_path / "memory.snapshot")
+    journal_path = str(tmp_path / "memory.journal")
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    journal = Journal(journal_path)
+    journaled_queue = JournaledQueueRepository(queue_repo, journal)
+    journaled_runtime = JournaledQueueRuntimeRepository(runtime_repo, journal)
+
+    for user_id in (1, 2, 3):
+        journaled_queue.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=journaled_runtime.allocate_ticket(restaurant_id=1))
+    snapshot_sequence = save_memory_snapshot(snapshot_path, queue_repo, runtime_repo, table_repo, journal)
+    journaled_queue.remove_from_queue(restaurant_id=1, user_id=1)
+    journaled_queue.add_to_queue(restaurant_id=1, user_id=4, ticket_number=journaled_runtime.allocate_ticket(restaurant_id=1))
+    journal.close()
+
+    # Act
+    loaded_queue, loaded_runtime, loaded_table = _fresh_repos()
+    start = load_memory_snapshot(snapshot_path, loaded_queue, loaded_runtime, loaded_table)
+    suffix, _ = read_journal(journal_path, start=start)
+    replay_journal(suffix, loaded_queue, loaded_runtime, loaded_table)
+
+    # Assert
+    assert snapshot_sequence == start == 6
+    assert len(suffix) == 3
+    assert loaded_queue.get_user_current_queue(user_id=1) is None
+    assert loaded_queue.get_people_ahead(restaurant_id=1, user_id=4) == 2
+    assert loaded_runtime.get_next_ticket_number(restaurant_id=1) == 5
+
+    # journal 重新開啟後序號接續計算
+    reopened = Journal(journal_path, start_sequence=start)
+    assert reopened.sequence == 9
+    reopened.close()
+
+
+# 測試 snapshot 之後的紀錄其實已反映在 snapshot 中時，重播結果仍相同
+def test_replay_journal_OverlappingSnapshotIsIdempotent(tmp_path):
+    # Arrange
+    journal_path = str(tmp_path / "memory.journal")
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    journal = Journal(journal_path)
+    journaled_queue = JournaledQueueRepository(queue_repo, journal)
+    journaled_queue.add_to_queue(restaurant_id=1, user_id=1, ticket_number=1)
+    journaled_queue.add_to_queue(restaurant_id=1, user_id=2, ticket_number=2)
+    journaled_queue.remove_from_queue(restaurant_id=1, user_id=1)
+    journaled_queue.add_to_queue(restaurant_id=2, user_id=1, ticket_number=17)
+    journal.close()
+
+    # Act：把全部紀錄再套用一次到已經是最終狀態的資料
+    replay_journal(read_journal(journal_path)[0], queue_repo, runtime_repo, table_repo)
+
+    # Assert
+    assert queue_repo.get_total_waiting(restaurant_id=1) == 1
+    assert queue_repo.get_total_waiting(restaurant_id=2) == 1
+    assert queue_repo.get_user_current_queue(user_id=1).ticket_number == 17
+
+
+# 測試定期寫入：start() 先寫一次，stop() 再寫最後一次
+def test_periodic_snapshotter_WritesOnStartAndStop(tmp_path):
+    # Arrange
+    path = str(tmp_path / "memory.snapshot")
+    queue_repo, runtime_repo, table_repo = _fresh_repos()
+    snapshotter = PeriodicSnapshotter(path, queue_repo, runtime_repo, table_repo, interval=60)
+
+    # Act
+    snapshotter.start()
+    written_on_start = os.path.exists(path)
+    queue_repo.add_to_queue(restaurant_id=1, user_id=7, ticket_number=1)
+    snapshotter.stop()
+    loaded_queue, loaded_runtime, loaded_table = _fresh_repos()
+    load_memory_snapshot(path, loaded_queue, loaded_runtime, loaded_table)
+
+    # Assert
+    assert written_on_start
+    assert loaded_queue.get_user_current_queue(user_id=7).ticket_number == 1
+
+
+# 測試不是 snapshot 的檔案不會被誤讀
+def test_read_snapshot_RejectsForeignFile(tmp_path):
+    # Arrange
+    path = str(tmp_path / "memory.snapshot")
+    with open(path, "wb") as f:
+        f.write(b"QJNL" + b"\0" * 60)
+
+    # Act & Assert
+    with pytest.raises(ValueError):
+        read_snapshot(path)
@@ -0,0 +1,236 @@
+import random
+import sqlite3
+import threading
+import pytest
+from app.repositories.sqlite_db import SQLiteDatabase, SQLiteUnitOfWork
+from app.repositories.map_repo import SQLiteMapRepository
+from app.repositories.queue_repo import SQLiteQueueRepository, SQLiteQueueRuntimeRepository
+from app.repositories.table_repo import SQLiteTableRepository
+from app.repositories.version_repo import SQLiteRestaurantVersionRepository
+from app.repositories.fake_all_repo import MemoryMapRepository, MemoryTableRepository
+from app.domain.value_objects import RestaurantMetrics
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    每個測試使用一個全新的 SQLite 檔案 (WAL 模式需要實體檔案)。
+    """
+    database = SQLiteDatabase(str(tmp_path / "queue.db"))
+    database.init_schema()
+    yield database
+    database.close()
+
+
+# 測試連線設定與初始資料與記憶體版一致
+def test_init_schema_WalModeAndSeedData(db):
+    # Assert
+    assert db.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert SQLiteMapRepository(db).get_all_restaurants() == MemoryMapRepository().get_all_restaurants()
+    assert SQLiteMapRepository(db).get_restaurant_basic_info(restaurant_id=999) is None
+    memory_tables = MemoryTableRepository()
+    assert SQLiteTableRepository(db).get_tables_by_restaurant(restaurant_id=3) == memory_tables.get_tables_by_restaurant(restaurant_id=3)
+
+    # 再次初始化不會重複寫入
+    db.init_schema()
+    assert len(SQLiteMapRepository(db).get_all_restaurants()) == 3
+
+
+# 測試加入 / 離開排隊與各種查詢
+def test_queue_repo_AddRemoveAndLookups(db):
+    # Arrange
+    queue_repo = SQLiteQueueRepository(db)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=28, ticket_number=16)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=30, ticket_number=6)
+
+    # Act
+    removed_wrong_restaurant = queue_repo.remove_from_queue(restaurant_id=3, user_id=25)
+    removed = queue_repo.remove_from_queue(restaurant_id=2, user_id=25)
+
+    # Assert
+    assert removed_wrong_restaurant is False
+    assert removed is True
+    assert queue_repo.get_user_current_queue(user_id=25) is None
+    entry = queue_repo.get_user_current_queue(user_id=28)
+    assert (entry.restaurant_id, entry.user_id, entry.ticket_number) == (2, 28, 16)
+    assert queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber(restaurant_id=2, ticket_number=16) == entry
+    assert queue_repo.get_next_queue_to_call(restaurant_id=2) == 16
+    assert queue_repo.get_next_queue_to_call(restaurant_id=999) is None
+    assert queue_repo.get_total_waiting_bulk([2, 3, 999]) == {2: 1, 3: 1, 999: 0}
+
+
+# 測試已在排隊的使用者再寫入時被唯一索引拒絕 (多個 process 共用資料庫)
+def test_add_to_queue_UserAlreadyQueued_Rejected(db):
+    # Arrange
+    queue_repo = SQLiteQueueRepository(db)
+    other_process = SQLiteQueueRepository(db)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act
+    added = other_process.add_to_queue(restaurant_id=3, user_id=25, ticket_number=6)
+
+    # Assert
+    assert added is False
+    assert queue_repo.get_user_current_queue(user_id=25).restaurant_id == 2
+    assert queue_repo.get_total_waiting(restaurant_id=3) == 0
+
+
+# 測試同一間餐廳重複的號碼 (發號錯誤) 不會被當成使用者已在排隊，而是拋出例外
+def test_add_to_queue_DuplicateTicket_Raises(db):
+    # Arrange
+    queue_repo = SQLiteQueueRepository(db)
+    queue_repo.add_to_queue(restaurant_id=2, user_id=25, ticket_number=15)
+
+    # Act & Assert
+    with pytest.raises(sqlite3.IntegrityError):
+        queue_repo.add_to_queue(restaurant_id=2, user_id=26, ticket_number=15)
+    assert queue_repo.get_user_current_queue(user_id=26) is None
+
+
+# 測試以索引計數取得的前面人數與逐筆計算一致
+def test_get_people_ahead_MatchesFullScan(db):
+    # Arrange
+    queue_repo = SQLiteQueueRepository(db)
+    rng = random.Random(3)
+    tickets = list(range(1, 201))
+    rng.shuffle(tickets)
+    waiting = {}
+    for user_id, ticket in enumerate(tickets, start=1000):
+        queue_repo.add_to_queue(restaurant_id=1, user_id=user_id, ticket_number=ticket)
+        waiting[user_id] = ticket
+    for user_id in rng.sample(sorted(waiting), 80):
+        queue_repo.remove_from_queue(restaurant_id=1, user_id=user_id)
+        del waiting[user_id]
+
+    # Assert
+    for user_id, ticket in waiting.items():
+        expected = sum(1 for other in waiting.values() if other < ticket)
+        assert queue_repo.get_people_ahead(restaurant_id=1, user_id=user_id) == expected
+    assert queue_repo.get_people_ahead(restaurant_id=2, user_id=next(iter(waiting))) == 0
+
+
+# 測試查詢都使用覆蓋索引，不需要掃描整張表
+@pytest.mark.parametrize("sql, params, index", [
+    ("SELECT COUNT(*) FROM queue WHERE restaurant_id = ? AND ticket_number < (SELECT ticket_number FROM queue INDEXED BY idx_queue_user WHERE user_id = ? AND restaurant_id = ?)", (1, 2, 1), "idx_queue_restaurant_ticket"),
+    ("SELECT queue_id, restaurant_id, user_id, ticket_number FROM queue INDEXED BY idx_queue_user WHERE user_id = ?", (1,), "idx_queue_user"),
+    ("SELECT MIN(ticket_number) FROM queue WHERE restaurant_id = ?", (1,), "idx_queue_restaurant_ticket"),
+    ("SELECT COUNT(*) FROM seat WHERE restaurant_id = ? AND status = 'empty'", (1,), "idx_seat_restaurant_status"),
+])
+def test_query_plan_UsesCoveringIndex(db, sql, params, index):
+    # Act
+    plan = " ".join(row[3] for row in db.connection.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall())
+
+    # Assert
+    assert f"COVERING INDEX {index}" in plan
+    assert "SCAN queue" not in plan and "SCAN seat" not in plan
+
+
+# 測試多個 thread 同時取號，號碼不重複
+def test_allocate_ticket_ConcurrentThreads_UniqueTickets(db):
+    # Arrange
+    runtime_repo = SQLiteQueueRuntimeRepository(db)
+    tickets = []
+    tickets_lock = threading.Lock()
+
+    def worker():
+        for _ in range(25):
+            ticket = runtime_repo.allocate_ticket(restaurant_id=2)
+            with tickets_lock:
+                tickets.append(ticket)
+
+    # Act
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    assert sorted(tickets) == list(range(17, 217))
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 217
+
+
+# 測試沒有 queue_runtime 資料列的餐廳使用預設值
+def test_queue_runtime_repo_UnknownRestaurant_Defaults(db):
+    # Arrange
+    runtime_repo = SQLiteQueueRuntimeRepository(db)
+
+    # Assert
+    assert runtime_repo.get_current_ticket_number(restaurant_id=50) == 0
+    assert runtime_repo.get_metrics(restaurant_id=50) == RestaurantMetrics(average_wait_time=15, table_number=4)
+    assert runtime_repo.allocate_ticket(restaurant_id=50) == 1
+    runtime_repo.set_current_ticket_number(restaurant_id=50, ticket_number=1)
+    assert runtime_repo.get_current_ticket_number(restaurant_id=50) == 1
+    assert runtime_repo.get_metrics_bulk([2, 50])[2] == RestaurantMetrics(average_wait_time=8, table_number=6)
+
+
+# 測試更新座位狀態後空桌數同步改變
+def test_table_repo_UpdateStatus_RemainingTables(db):
+    # Arrange
+    table_repo = SQLiteTableRepository(db)
+    before = table_repo.get_restaurant_remaining_table(restaurant_id=2)
+
+    # Act
+    updated = table_repo.update_status(table_id=201, new_table_status="eating", queue_ticket_number=17)
+    missing = table_repo.update_status(table_id=999, new_table_status="eating", queue_ticket_number=0)
+
+    # Assert
+    assert updated is True
+    assert missing is False
+    assert table_repo.get_table_by_id(table_id=201).status == "eating"
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=2) == before - 1
+    assert table_repo.get_restaurant_remaining_table_bulk([1, 2, 999]) == {1: 1, 2: before - 1, 999: 0}
+
+
+# 測試預借一段號碼，只有仍在計數器尾端時才能歸還
+def test_lease_ticket_block_ReleaseOnlyAtTail(db):
+    # Arrange
+    runtime_repo = SQLiteQueueRuntimeRepository(db)
+
+    # Act
+    block = runtime_repo.lease_ticket_block(restaurant_id=2, size=5)
+    later = runtime_repo.lease_ticket_block(restaurant_id=2, size=5)
+    not_at_tail = runtime_repo.release_ticket_block(restaurant_id=2, start=19, end=block[1])
+    at_tail = runtime_repo.release_ticket_block(restaurant_id=2, start=24, end=later[1])
+
+    # Assert
+    assert block == (17, 22)
+    assert later == (22, 27)
+    assert not_at_tail is False
+    assert at_tail is True
+    assert runtime_repo.get_next_ticket_number(restaurant_id=2) == 24
+    assert runtime_repo.lease_ticket_block(restaurant_id=77, size=3) == (1, 4)
+
+
+# 測試排隊 / 叫號 / 座位的寫入由 trigger 遞增版本，rollback 時版本一起復原；epoch 由所有連線共用
+def test_version_repo_TriggersBumpWithData(db, tmp_path):
+    # Arrange
+    versions = SQLiteRestaurantVersionRepository(db)
+    queue_repo, runtime_repo, table_repo = SQLiteQueueRepository(db), SQLiteQueueRuntimeRepository(db), SQLiteTableRepository(db)
+    unit_of_work = SQLiteUnitOfWork(db)
+
+    # Act
+    queue_repo.add_to_queue(restaurant_id=2, user_id=40, ticket_number=17)
+    runtime_repo.allocate_ticket(restaurant_id=2)
+    joined = versions.get_versions(restaurant_id=2)
+    with unit_of_work.begin():
+        queue_repo.remove_from_queue(restaurant_id=2, user_id=40)
+        runtime_repo.set_current_ticket_number(restaurant_id=2, ticket_number=17)
+        table_repo.update_status(table_id=201, new_table_status="eating", queue_ticket_number=17)
+    seated = versions.get_versions(restaurant_id=2)
+    with pytest.raises(RuntimeError):
+        with unit_of_work.begin():
+            queue_repo.add_to_queue(restaurant_id=2, user_id=41, ticket_number=18)
+            raise RuntimeError("disk full")
+    other_worker = SQLiteDatabase(db.path)
+    other_worker.init_schema()
+
+    # Assert
+    assert joined == (1, 0)
+    assert seated == (3, 1)
+    assert versions.get_versions(restaurant_id=2) == (3, 1)
+    assert versions.get_versions(restaurant_id=999) == (0, 0)
+    assert versions.get_all_versions() == {2: (3, 1)}
+    assert SQLiteRestaurantVersionRepository(other_worker).get_epoch() == versions.get_epoch()
+    other_worker.close()
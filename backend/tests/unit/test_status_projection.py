@@ -0,0 +1,66 @@
+import pytest
+from app.domain.events import QUEUE_JOINED, TABLE_CLEARED, RestaurantChangedEvent, RestaurantEventBus
+from app.repositories.fake_all_repo import MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+from app.services.status_projection import RestaurantStatusProjection, compute_status_color
+
+
+@pytest.fixture
+def repos():
+    return MemoryQueueRepository(), MemoryTableRepository(), MemoryQueueRuntimeRepository()
+
+@pytest.fixture
+def projection(repos):
+    queue_repo, table_repo, queue_runtime_repo = repos
+    return RestaurantStatusProjection(
+        queue_repo=queue_repo,
+        table_repo=table_repo,
+        queue_runtime_repo=queue_runtime_repo
+    )
+
+
+def test_compute_status_color():
+    assert compute_status_color(remaining_table_number=8, total_waiting=3, table_number=10) == "yellow"
+    assert compute_status_color(remaining_table_number=8, total_waiting=0, table_number=10) == "green"
+    assert compute_status_color(remaining_table_number=2, total_waiting=1, table_number=10) == "red"
+
+
+# 測試燈號只在收到事件時才更新，且版本只在燈號改變時前進
+def test_projection_UpdatesOnlyOnEvents(projection, repos):
+    # Arrange
+    queue_repo, table_repo, _ = repos
+    bus = RestaurantEventBus()
+    bus.subscribe(projection.handle)
+    # 餐廳 3：12 桌中 9 桌空 -> green
+    assert projection.get_statuses([3])[3].status == "green"
+    version = projection.version
+
+    # Act: 沒有發事件前，Repo 的變化不會反映在投影上
+    for user_id in range(1, 5):
+        queue_repo.add_to_queue(restaurant_id=3, user_id=user_id, ticket_number=user_id)
+    assert projection.get_statuses([3])[3].status == "green"
+
+    bus.publish(RestaurantChangedEvent(restaurant_id=3, kind=QUEUE_JOINED))
+
+    # Assert: 9 - 4 = 5 <= 12 * 0.5 -> yellow
+    snapshot = projection.get_statuses([3])[3]
+    assert snapshot.status == "yellow"
+    assert snapshot.total_waiting == 4
+    assert projection.version == version + 1
+    assert [s.restaurant_id for s in projection.get_changes_since(version)] == [3]
+
+
+# 測試輸入值改變但燈號不變時，不會被視為變色
+def test_projection_SameColorKeepsVersion(projection, repos):
+    # Arrange
+    _, table_repo, _ = repos
+    projection.get_statuses([1, 2, 3])
+    version = projection.version
+
+    # Act: 餐廳 3 多一張空桌，仍是 green
+    table_repo.update_status(table_id=302, new_table_status="empty", queue_ticket_number=0)
+    projection.handle(RestaurantChangedEvent(restaurant_id=3, kind=TABLE_CLEARED))
+
+    # Assert
+    assert projection.get_statuses([3])[3].remaining_table_number == 10
+    assert projection.version == version
+    assert projection.get_changes_since(version) == []
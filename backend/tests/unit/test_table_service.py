@@ -184,6 +184,25 @@ def test_update_table_status_CheckIn_NotInQueueError(table_service, mock_repos):
         )
 
 
+# 7-1. 情境 A 失敗: 排隊資料已被其他 worker 先移除 (同一個號碼同時入座兩張桌子)
+def test_update_table_status_CheckIn_AlreadyRemoved_NotInQueueError(table_service, mock_repos):
+    # Arrange
+    table_repo, _, queue_repo, queue_runtime_repo = mock_repos
+    table_repo.get_table_by_id.return_value = TableEntity(
+        table_id=10, restaurant_id=2, label="A1", x=0, y=0, status="empty"
+    )
+    queue_repo.get_user_current_queue_by_restaurantId_and_ticketNumber.return_value = QueueEntity(
+        queue_id=1, restaurant_id=2, user_id=100, ticket_number=50
+    )
+    queue_repo.remove_from_queue.return_value = False
+
+    # Act & Assert
+    with pytest.raises(NotInQueueError):
+        table_service.update_table_status(restaurant_id=2, table_id=10, new_table_status="eating", queue_ticket_number=50)
+    queue_runtime_repo.set_current_ticket_number.assert_not_called()
+    table_repo.update_status.assert_not_called()
+
+
 # 8. 情境 B: 顧客離座/清桌成功 (eating -> empty)
 def test_update_table_status_CheckOut_Success(table_service, mock_repos):
     # Arrange
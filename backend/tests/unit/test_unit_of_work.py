@@ -0,0 +1,158 @@
+import pytest
+from app.services.table_service import TableService
+from app.services.unit_of_work import UnitOfWork
+from app.repositories.fake_all_repo import MemoryMapRepository, MemoryQueueRepository, MemoryQueueRuntimeRepository, MemoryTableRepository
+from app.repositories.journaled_repo import JournaledQueueRepository, JournaledQueueRuntimeRepository, JournaledTableRepository
+from app.repositories.journal import OP_QUEUE_ADD, OP_QUEUE_REMOVE, OP_CURRENT_TICKET, OP_NEXT_TICKET, OP_TABLE_STATUS
+from app.repositories.sqlite_db import SQLiteDatabase, SQLiteUnitOfWork
+from app.repositories.map_repo import SQLiteMapRepository
+from app.repositories.queue_repo import SQLiteQueueRepository, SQLiteQueueRuntimeRepository
+from app.repositories.table_repo import SQLiteTableRepository
+
+
+class _ListJournal:
+    """收集 append 的紀錄，代替寫檔的 Journal"""
+    def __init__(self):
+        self.records = []
+
+    def append(self, op, a, b=0, c=0):
+        self.records.append((op, a, b, c))
+
+
+class _FailingJournal(_ListJournal):
+    """append 時失敗，模擬 journal 背景寫入已經失敗"""
+    def append(self, op, a, b=0, c=0):
+        raise RuntimeError("Journal writer failed")
+
+
+class _FailingTableRepository(MemoryTableRepository):
+    """更新桌子時失敗，模擬入座流程寫到一半出錯"""
+    def update_status(self, table_id, new_table_status, queue_ticket_number):
+        raise RuntimeError("disk full")
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "queue.db"))
+    database.init_schema()
+    yield database
+    database.close()
+
+
+# 測試記憶體模式入座寫到一半失敗時，已完成的寫入依 undo log 復原
+def test_seat_MemoryFailure_RollsBack():
+    # Arrange
+    queue_repo, runtime_repo, table_repo = MemoryQueueRepository(), MemoryQueueRuntimeRepository(), _FailingTableRepository()
+    queue_repo.add_to_queue(restaurant_id=3, user_id=42, ticket_number=6)
+    before = queue_repo.get_user_current_queue(user_id=42)
+    service = TableService(table_repo, MemoryMapRepository(), queue_repo, runtime_repo, unit_of_work=UnitOfWork())
+
+    # Act
+    with pytest.raises(RuntimeError):
+        service.update_table_status(restaurant_id=3, table_id=301, new_table_status="eating", queue_ticket_number=6)
+
+    # Assert
+    assert queue_repo.get_user_current_queue(user_id=42) == before
+    assert queue_repo.get_next_queue_to_call(restaurant_id=3) == 6
+    assert runtime_repo.get_current_ticket_number(restaurant_id=3) == 5
+
+
+# 測試 journal 只在 commit 時寫入，rollback 的異動不寫入 (號碼牌除外)
+def test_unit_of_work_Journal_WrittenOnlyOnCommit():
+    # Arrange
+    journal = _ListJournal()
+    queue_repo = JournaledQueueRepository(MemoryQueueRepository(), journal)
+    runtime_repo = JournaledQueueRuntimeRepository(MemoryQueueRuntimeRepository(), journal)
+    table_repo = JournaledTableRepository(MemoryTableRepository(), journal)
+    unit_of_work = UnitOfWork()
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with unit_of_work.begin():
+            ticket_number = runtime_repo.allocate_ticket(restaurant_id=1)
+            queue_repo.add_to_queue(restaurant_id=1, user_id=7, ticket_number=ticket_number)
+            assert journal.records == [(OP_NEXT_TICKET, 1, ticket_number + 1, 0)]
+            raise RuntimeError("abort")
+    rolled_back = list(journal.records)
+    with unit_of_work.begin():
+        queue_repo.add_to_queue(restaurant_id=1, user_id=7, ticket_number=ticket_number)
+        queue_repo.remove_from_queue(restaurant_id=1, user_id=7)
+        runtime_repo.set_current_ticket_number(restaurant_id=1, ticket_number=ticket_number)
+        table_repo.update_status(table_id=102, new_table_status="eating", queue_ticket_number=ticket_number)
+        assert journal.records == rolled_back
+
+    # Assert
+    assert queue_repo.get_user_current_queue(user_id=7) is None
+    assert journal.records[len(rolled_back):] == [
+        (OP_QUEUE_ADD, 1, 7, ticket_number),
+        (OP_QUEUE_REMOVE, 1, 7, 0),
+        (OP_CURRENT_TICKET, 1, ticket_number, 0),
+        (OP_TABLE_STATUS, 102, 1, ticket_number),
+    ]
+
+
+# 測試入座時 journal 寫入失敗，記憶體中已完成的寫入全部復原
+def test_seat_JournalFailure_RollsBackMemory():
+    # Arrange
+    journal = _FailingJournal()
+    inner_queue, inner_runtime, inner_table = MemoryQueueRepository(), MemoryQueueRuntimeRepository(), MemoryTableRepository()
+    inner_queue.add_to_queue(restaurant_id=3, user_id=42, ticket_number=6)
+    before = inner_queue.get_user_current_queue(user_id=42)
+    service = TableService(
+        JournaledTableRepository(inner_table, journal), MemoryMapRepository(),
+        JournaledQueueRepository(inner_queue, journal), JournaledQueueRuntimeRepository(inner_runtime, journal),
+        unit_of_work=UnitOfWork()
+    )
+
+    # Act
+    with pytest.raises(RuntimeError, match="Journal writer failed"):
+        service.update_table_status(restaurant_id=3, table_id=301, new_table_status="eating", queue_ticket_number=6)
+
+    # Assert
+    assert inner_queue.get_user_current_queue(user_id=42) == before
+    assert inner_runtime.get_current_ticket_number(restaurant_id=3) == 5
+    assert inner_table.get_table_by_id(301).status == "empty"
+
+
+# 測試巢狀的 begin 加入外層交易，由外層一起 rollback
+def test_unit_of_work_Nested_JoinsOuter():
+    # Arrange
+    table_repo = MemoryTableRepository()
+    unit_of_work = UnitOfWork()
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with unit_of_work.begin():
+            with unit_of_work.begin():
+                table_repo.update_status(table_id=102, new_table_status="eating", queue_ticket_number=0)
+            assert table_repo.get_table_by_id(102).status == "eating"
+            raise RuntimeError("abort")
+
+    # Assert
+    assert table_repo.get_table_by_id(102).status == "empty"
+    assert table_repo.get_restaurant_remaining_table(restaurant_id=1) == 1
+
+
+# 測試 SQLite 入座的三個寫入只 commit 一次，失敗時整個交易 rollback
+def test_seat_SQLite_SingleCommitAndRollback(db):
+    # Arrange
+    statements = []
+    db.connection.set_trace_callback(statements.append)
+    queue_repo, runtime_repo = SQLiteQueueRepository(db), SQLiteQueueRuntimeRepository(db)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=42, ticket_number=6)
+    queue_repo.add_to_queue(restaurant_id=3, user_id=43, ticket_number=7)
+    service = TableService(SQLiteTableRepository(db), SQLiteMapRepository(db), queue_repo, runtime_repo, unit_of_work=SQLiteUnitOfWork(db))
+    failing = TableService(_FailingTableRepository(), SQLiteMapRepository(db), queue_repo, runtime_repo, unit_of_work=SQLiteUnitOfWork(db))
+
+    # Act
+    statements.clear()
+    service.update_table_status(restaurant_id=3, table_id=301, new_table_status="eating", queue_ticket_number=6)
+    commits = [sql for sql in statements if sql in ("BEGIN IMMEDIATE", "COMMIT")]
+    with pytest.raises(RuntimeError):
+        failing.update_table_status(restaurant_id=3, table_id=301, new_table_status="eating", queue_ticket_number=7)
+
+    # Assert
+    assert commits == ["BEGIN IMMEDIATE", "COMMIT"]
+    assert queue_repo.get_user_current_queue(user_id=42) is None
+    assert queue_repo.get_user_current_queue(user_id=43) is not None
+    assert runtime_repo.get_current_ticket_number(restaurant_id=3) == 6
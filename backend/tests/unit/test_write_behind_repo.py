@@ -0,0 +1,222 @@
+import threading
+import time
+import pytest
+from app.repositories.fake_all_repo import MemoryQueueRuntimeRepository
+from app.repositories.journal import OP_CURRENT_TICKET
+from app.repositories.queue_repo import SQLiteQueueRuntimeRepository
+from app.repositories.sqlite_db import SQLiteDatabase, SQLiteUnitOfWork
+from app.repositories.write_behind_repo import WriteBehindQueueRuntimeRepository
+from app.services.unit_of_work import UnitOfWork
+
+
+class _ListJournal:
+    """收集 append 的紀錄，代替寫檔的 Journal"""
+    def __init__(self):
+        self.records = []
+
+    def append(self, op, a, b=0, c=0):
+        self.records.append((op, a, b, c))
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SQLiteDatabase(str(tmp_path / "queue.db"))
+    database.init_schema()
+    yield database
+    database.close()
+
+
+def _wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+# 測試交易外的叫號由記憶體回答，flush 前不寫入 inner
+def test_set_current_OutsideTransaction_DeferredUntilFlush():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    before = inner.get_current_ticket_number(restaurant_id=1)
+    repo = WriteBehindQueueRuntimeRepository(inner)
+
+    # Act
+    repo.set_current_ticket_number(restaurant_id=1, ticket_number=before + 3)
+    cached, stored = repo.get_current_ticket_number(restaurant_id=1), inner.get_current_ticket_number(restaurant_id=1)
+    flushed = repo.flush()
+
+    # Assert
+    assert cached == before + 3
+    assert stored == before
+    assert flushed == 1
+    assert inner.get_current_ticket_number(restaurant_id=1) == before + 3
+    assert repo.flush() == 0
+
+
+# 測試背景 thread 依時間間隔寫回，累積到 max_dirty 間餐廳時提早寫回
+def test_flusher_TimerAndSizeThreshold():
+    # Arrange
+    timed_inner, sized_inner = MemoryQueueRuntimeRepository(), MemoryQueueRuntimeRepository()
+    timed = WriteBehindQueueRuntimeRepository(timed_inner, flush_interval=0.01)
+    sized = WriteBehindQueueRuntimeRepository(sized_inner, flush_interval=60, max_dirty=2)
+    timed.start()
+    sized.start()
+
+    # Act
+    timed.set_current_ticket_number(restaurant_id=1, ticket_number=40)
+    sized.set_current_ticket_number(restaurant_id=1, ticket_number=41)
+    sized.set_current_ticket_number(restaurant_id=2, ticket_number=42)
+
+    # Assert
+    try:
+        assert _wait_until(lambda: timed_inner.get_current_ticket_number(restaurant_id=1) == 40)
+        assert _wait_until(lambda: sized_inner.get_current_ticket_number(restaurant_id=2) == 42)
+        assert sized_inner.get_current_ticket_number(restaurant_id=1) == 41
+    finally:
+        timed.close()
+        sized.close()
+
+
+# 測試號碼在 inner 預先保留：沒寫回就當機，重新啟動後發出的號碼仍然比之前的大
+def test_allocate_ticket_CrashWithoutFlush_NeverReusesTickets(db):
+    # Arrange
+    inner = SQLiteQueueRuntimeRepository(db)
+    repo = WriteBehindQueueRuntimeRepository(inner, ticket_reserve=4)
+
+    # Act
+    issued = [repo.allocate_ticket(restaurant_id=1) for _ in range(6)]
+    stored_next = inner.get_next_ticket_number(restaurant_id=1)
+    # 模擬當機：不呼叫 close，直接換一個新的快取
+    restarted = WriteBehindQueueRuntimeRepository(SQLiteQueueRuntimeRepository(db), ticket_reserve=4)
+    after_restart = restarted.allocate_ticket(restaurant_id=1)
+
+    # Assert
+    assert issued == list(range(issued[0], issued[0] + 6))
+    assert stored_next == issued[0] + 8
+    assert after_restart > issued[-1]
+
+
+# 測試交易中的叫號直接寫入 inner，跟著同一個交易 commit
+def test_set_current_InsideTransaction_WritesThrough(db):
+    # Arrange
+    inner = SQLiteQueueRuntimeRepository(db)
+    unit_of_work = SQLiteUnitOfWork(db)
+    repo = WriteBehindQueueRuntimeRepository(inner, unit_of_work=unit_of_work)
+
+    # Act
+    with unit_of_work.begin():
+        repo.set_current_ticket_number(restaurant_id=2, ticket_number=30)
+
+    # Assert
+    assert SQLiteQueueRuntimeRepository(db).get_current_ticket_number(restaurant_id=2) == 30
+    assert repo.flush() == 0
+
+
+# 測試 rollback 時還原快取，預借的號碼隨交易退回後不會發出重複的號碼
+def test_unit_of_work_Rollback_RestoresCache(db):
+    # Arrange
+    inner = SQLiteQueueRuntimeRepository(db)
+    unit_of_work = SQLiteUnitOfWork(db)
+    repo = WriteBehindQueueRuntimeRepository(inner, ticket_reserve=4, unit_of_work=unit_of_work)
+    before = repo.get_current_ticket_number(restaurant_id=3)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with unit_of_work.begin():
+            rolled_back_ticket = repo.allocate_ticket(restaurant_id=3)
+            repo.set_current_ticket_number(restaurant_id=3, ticket_number=before + 1)
+            raise RuntimeError("disk full")
+    next_ticket = repo.allocate_ticket(restaurant_id=3)
+
+    # Assert
+    assert repo.get_current_ticket_number(restaurant_id=3) == before
+    assert inner.get_current_ticket_number(restaurant_id=3) == before
+    assert next_ticket > rolled_back_ticket
+    assert inner.get_next_ticket_number(restaurant_id=3) > next_ticket
+
+
+# 測試記憶體 inner 的 rollback 也還原快取
+def test_unit_of_work_MemoryRollback_RestoresCache():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    repo = WriteBehindQueueRuntimeRepository(inner)
+    before = repo.get_current_ticket_number(restaurant_id=1)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with UnitOfWork().begin():
+            repo.set_current_ticket_number(restaurant_id=1, ticket_number=before + 5)
+            raise RuntimeError("disk full")
+
+    # Assert
+    assert repo.get_current_ticket_number(restaurant_id=1) == before
+    assert inner.get_current_ticket_number(restaurant_id=1) == before
+
+
+# 測試搭配 journal 時，延後寫回的叫號立即寫入 journal
+def test_set_current_WithJournal_AppendsImmediately():
+    # Arrange
+    journal = _ListJournal()
+    repo = WriteBehindQueueRuntimeRepository(MemoryQueueRuntimeRepository(), journal=journal)
+
+    # Act
+    repo.set_current_ticket_number(restaurant_id=1, ticket_number=12)
+    with UnitOfWork().begin():
+        repo.set_current_ticket_number(restaurant_id=1, ticket_number=13)
+
+    # Assert
+    assert journal.records == [(OP_CURRENT_TICKET, 1, 12, 0)]
+
+
+class _JournaledInner(MemoryQueueRuntimeRepository):
+    """寫入後才寫 journal 的 inner；寫入期間讓另一個 thread 叫下一號"""
+    def __init__(self, journal):
+        super().__init__()
+        self.journal = journal
+        self.during_write = None
+
+    def set_current_ticket_number(self, restaurant_id, ticket_number):
+        super().set_current_ticket_number(restaurant_id, ticket_number)
+        if self.during_write is not None:
+            self.during_write()
+            time.sleep(0.05)
+        self.journal.append(OP_CURRENT_TICKET, restaurant_id, ticket_number)
+
+
+# 測試 inner 也寫同一個 journal 時，寫回不會把較舊的叫號排在較新的紀錄之後
+def test_flush_SharedJournal_KeepsLatestLast():
+    # Arrange
+    journal = _ListJournal()
+    inner = _JournaledInner(journal)
+    repo = WriteBehindQueueRuntimeRepository(inner, journal=journal)
+    repo.set_current_ticket_number(restaurant_id=1, ticket_number=12)
+    caller = threading.Thread(target=repo.set_current_ticket_number, args=(1, 13))
+    inner.during_write = caller.start
+
+    # Act
+    repo.flush()
+    caller.join()
+    inner.during_write = None
+
+    # Assert
+    assert journal.records[-1] == (OP_CURRENT_TICKET, 1, 13, 0)
+    assert repo.get_current_ticket_number(restaurant_id=1) == 13
+
+
+# 測試 close 寫回計數器並歸還沒用到的號碼
+def test_close_FlushesAndReleasesReservation():
+    # Arrange
+    inner = MemoryQueueRuntimeRepository()
+    start = inner.get_next_ticket_number(restaurant_id=2)
+    repo = WriteBehindQueueRuntimeRepository(inner, ticket_reserve=10)
+    repo.start()
+    repo.allocate_ticket(restaurant_id=2)
+    repo.allocate_ticket(restaurant_id=2)
+    repo.set_current_ticket_number(restaurant_id=2, ticket_number=start)
+
+    # Act
+    repo.close()
+
+    # Assert
+    assert inner.get_next_ticket_number(restaurant_id=2) == start + 2
+    assert inner.get_current_ticket_number(restaurant_id=2) == start